@@ -65,11 +65,11 @@ DEFAULT_THINKING_MODE_THINKDEEP = os.getenv("DEFAULT_THINKING_MODE_THINKDEEP", "
 
 # Consensus Tool Defaults
 # Consensus timeout and rate limiting settings
-DEFAULT_CONSENSUS_TIMEOUT = 120.0  # 2 minutes per model
+DEFAULT_CONSENSUS_TIMEOUT = 120.0  # 2 minutes per model (parallel mode, overridable via model_timeout)
 DEFAULT_CONSENSUS_MAX_INSTANCES_PER_COMBINATION = 2
 
-# NOTE: Consensus tool now uses sequential processing for MCP compatibility
-# Concurrent processing was removed to avoid async pattern violations
+# NOTE: Consensus consults one model per step by default. With parallel=true, step 1
+# consults all models concurrently (asyncio.gather) and returns every verdict at once.
 
 # MCP Protocol Transport Limits
 #
@@ -1,16 +1,18 @@
 """Model provider abstractions for supporting multiple AI providers."""
 
-from .base import ModelCapabilities, ModelProvider, ModelResponse
+from .base import ModelCapabilities, ModelProvider, ModelResponse, StreamChunk
 from .gemini import GeminiModelProvider
 from .openai_compatible import OpenAICompatibleProvider
 from .openai_provider import OpenAIModelProvider
 from .openrouter import OpenRouterProvider
-from .registry import ModelProviderRegistry
+from .registry import ModelCatalog, ModelProviderRegistry
 
 __all__ = [
     "ModelProvider",
     "ModelResponse",
+    "StreamChunk",
     "ModelCapabilities",
+    "ModelCatalog",
     "ModelProviderRegistry",
     "GeminiModelProvider",
     "OpenAIModelProvider",
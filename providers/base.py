@@ -1,10 +1,15 @@
 """Base model provider interface and data classes."""
 
+import asyncio
 import base64
 import binascii
+import functools
+import inspect
 import logging
 import os
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import TYPE_CHECKING, Any, Optional
@@ -12,10 +17,15 @@ from typing import TYPE_CHECKING, Any, Optional
 if TYPE_CHECKING:
     from tools.models import ToolModelCategory
 
+from providers.retry import DEFAULT_RETRY_POLICY, RetryPolicy, aretry_call, get_retry_budget, retry_call
 from utils.file_types import IMAGES, get_image_mime_type
+from utils.response_cache import get_response_cache, is_deterministic_request, response_cache_key
 
 logger = logging.getLogger(__name__)
 
+# Set while a cached generate call runs, so nested super() calls go straight to the API
+_response_cache_active: ContextVar[bool] = ContextVar("response_cache_active", default=False)
+
 
 class ProviderType(Enum):
     """Supported model provider types."""
@@ -185,6 +195,15 @@ class ModelResponse:
         return self.usage.get("total_tokens", 0)
 
 
+@dataclass
+class StreamChunk:
+    """Incremental piece of a streamed model response."""
+
+    text: str = ""  # Newly generated text
+    usage: Optional[dict[str, int]] = None  # Token usage so far, when the provider reports it
+    response: Optional[ModelResponse] = None  # Complete response, set on the final chunk only
+
+
 class ModelProvider(ABC):
     """Abstract base class for model providers."""
 
@@ -194,11 +213,24 @@ class ModelProvider(ABC):
     # Default maximum image size in MB
     DEFAULT_MAX_IMAGE_SIZE_MB = 20.0
 
+    # Backoff policy for API calls (see providers/retry.py)
+    RETRY_POLICY: RetryPolicy = DEFAULT_RETRY_POLICY
+
     def __init__(self, api_key: str, **kwargs):
         """Initialize the provider with API key and optional configuration."""
         self.api_key = api_key
         self.config = kwargs
 
+    def __init_subclass__(cls, **kwargs):
+        """Serve deterministic requests from the response cache (see utils/response_cache.py)."""
+        super().__init_subclass__(**kwargs)
+        generate = cls.__dict__.get("generate_content")
+        if inspect.isfunction(generate) and not inspect.iscoroutinefunction(generate):
+            cls.generate_content = _with_response_cache(generate)
+        agenerate = cls.__dict__.get("agenerate_content")
+        if inspect.iscoroutinefunction(agenerate):
+            cls.agenerate_content = _with_async_response_cache(agenerate)
+
     @abstractmethod
     def get_capabilities(self, model_name: str) -> ModelCapabilities:
         """Get capabilities for a specific model."""
@@ -229,6 +261,155 @@ class ModelProvider(ABC):
         """
         pass
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content without blocking the event loop.
+
+        Providers with a native async SDK override this. The default runs
+        generate_content() in a worker thread so that providers which only
+        implement the synchronous API still keep the server responsive.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature (0-2)
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Provider-specific parameters
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        return await asyncio.to_thread(
+            self.generate_content,
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Generate content, yielding the output as it is produced.
+
+        Providers with a streaming API override this. The default awaits
+        agenerate_content() and yields the whole response as a single chunk.
+        Either way the last chunk carries the complete ModelResponse. Closing
+        the iterator early (e.g. when the request is cancelled) abandons the
+        generation.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature (0-2)
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Provider-specific parameters
+
+        Yields:
+            StreamChunk objects; the final one has response set
+        """
+        response = await self.agenerate_content(
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+        yield StreamChunk(text=response.content or "", usage=response.usage, response=response)
+
+    def _uses_response_cache(self, temperature: Optional[float], params: dict[str, Any]) -> bool:
+        """Whether a request is served from/stored in the response cache, so it should not be streamed."""
+        return get_response_cache() is not None and is_deterministic_request(temperature, params)
+
+    def _is_error_retryable(self, error: Exception) -> bool:
+        """Determine if an error should be retried.
+
+        Default implementation never retries. Providers override this to
+        classify errors raised by their SDK.
+
+        Args:
+            error: Exception raised by the API call
+
+        Returns:
+            True if the call should be retried
+        """
+        return False
+
+    def _call_with_retries(self, fn, description: str):
+        """Run a blocking API call under the provider's retry policy and budget.
+
+        Raises:
+            RetryError: When retries are exhausted or the error is not retryable
+        """
+        return retry_call(
+            fn,
+            is_retryable=self._is_error_retryable,
+            policy=self.RETRY_POLICY,
+            budget=get_retry_budget(self.get_provider_type().value),
+            description=description,
+        )
+
+    async def _acall_with_retries(self, fn, description: str):
+        """Await an API call under the provider's retry policy and budget.
+
+        Raises:
+            RetryError: When retries are exhausted or the error is not retryable
+        """
+        return await aretry_call(
+            fn,
+            is_retryable=self._is_error_retryable,
+            policy=self.RETRY_POLICY,
+            budget=get_retry_budget(self.get_provider_type().value),
+            description=description,
+        )
+
+    def _response_cache_key(self, arguments: dict[str, Any]) -> Optional[str]:
+        """Key of a deterministic request in the response cache, or None if it must not be cached.
+
+        Args:
+            arguments: generate_content() arguments by name, provider-specific keyword arguments included
+        """
+        params = dict(arguments)
+        prompt = params.pop("prompt")
+        model_name = params.pop("model_name")
+        system_prompt = params.pop("system_prompt", None)
+        temperature = params.pop("temperature", None)
+        max_output_tokens = params.pop("max_output_tokens", None)
+        if not is_deterministic_request(temperature, params):
+            return None
+        try:
+            return response_cache_key(
+                provider=self.get_provider_type().value,
+                endpoint=getattr(self, "base_url", None),
+                model_name=self._resolve_model_name(model_name),
+                system_prompt=system_prompt,
+                prompt=prompt,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                params=params,
+            )
+        except Exception as e:
+            logger.debug(f"Response cache skipped for {model_name}: {e}")
+            return None
+
     @abstractmethod
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text using the specified model's tokenizer."""
@@ -532,3 +713,103 @@ class ModelProvider(ABC):
         """
         # Default implementation - most providers don't have a registry
         return None
+
+
+def _cache_entry(response: ModelResponse) -> Optional[dict[str, Any]]:
+    """Serializable form of a response worth caching (None for empty or blocked responses)"""
+    if not response.content or response.metadata.get("is_blocked_by_safety"):
+        return None
+    return {
+        "content": response.content,
+        "usage": response.usage,
+        "model_name": response.model_name,
+        "friendly_name": response.friendly_name,
+        "provider": response.provider.value,
+        "metadata": response.metadata,
+    }
+
+
+def _cached_response(entry: dict[str, Any], tier: str) -> ModelResponse:
+    return ModelResponse(
+        content=entry["content"],
+        usage=entry["usage"],
+        model_name=entry["model_name"],
+        friendly_name=entry["friendly_name"],
+        provider=ProviderType(entry["provider"]),
+        metadata={**entry["metadata"], "cache_hit": True, "cache_tier": tier},
+    )
+
+
+def _request_arguments(signature: inspect.Signature, args: tuple, kwargs: dict) -> dict[str, Any]:
+    """Bind a generate call to the provider's signature: named arguments with defaults, **kwargs flattened"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = {}
+    for name, value in list(bound.arguments.items())[1:]:
+        if signature.parameters[name].kind is inspect.Parameter.VAR_KEYWORD:
+            arguments.update(value)
+        elif signature.parameters[name].kind is not inspect.Parameter.VAR_POSITIONAL:
+            arguments[name] = value
+    return arguments
+
+
+def _with_response_cache(generate):
+    """Wrap a provider's generate_content with the response cache."""
+    signature = inspect.signature(generate)
+
+    @functools.wraps(generate)
+    def generate_content(self, *args, **kwargs) -> ModelResponse:
+        cache = None if _response_cache_active.get() else get_response_cache()
+        key = None
+        if cache is not None:
+            key = self._response_cache_key(_request_arguments(signature, (self, *args), kwargs))
+        if key is None:
+            return generate(self, *args, **kwargs)
+
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug(f"Serving response from the {cached[1]} response cache")
+            return _cached_response(*cached)
+
+        token = _response_cache_active.set(True)
+        try:
+            response = generate(self, *args, **kwargs)
+        finally:
+            _response_cache_active.reset(token)
+        entry = _cache_entry(response)
+        if entry is not None:
+            cache.put(key, entry)
+        return response
+
+    return generate_content
+
+
+def _with_async_response_cache(agenerate):
+    """Wrap a provider's agenerate_content with the response cache."""
+    signature = inspect.signature(agenerate)
+
+    @functools.wraps(agenerate)
+    async def agenerate_content(self, *args, **kwargs) -> ModelResponse:
+        cache = None if _response_cache_active.get() else get_response_cache()
+        key = None
+        if cache is not None:
+            key = self._response_cache_key(_request_arguments(signature, (self, *args), kwargs))
+        if key is None:
+            return await agenerate(self, *args, **kwargs)
+
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            logger.debug(f"Serving response from the {cached[1]} response cache")
+            return _cached_response(*cached)
+
+        token = _response_cache_active.set(True)
+        try:
+            response = await agenerate(self, *args, **kwargs)
+        finally:
+            _response_cache_active.reset(token)
+        entry = _cache_entry(response)
+        if entry is not None:
+            await asyncio.to_thread(cache.put, key, entry)
+        return response
+
+    return agenerate_content
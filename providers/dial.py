@@ -3,20 +3,40 @@
 import logging
 import os
 import threading
-import time
 from typing import Optional
 
+from utils.prompt_cache import MIN_CACHEABLE_PREFIX_CHARS, cacheable_prefix_chars, is_prompt_cache_enabled
+
 from .base import (
     ModelCapabilities,
     ModelResponse,
     ProviderType,
     create_temperature_constraint,
 )
+from .http_pool import get_http_pool
 from .openai_compatible import OpenAICompatibleProvider
+from .retry import RetryError
 
 logger = logging.getLogger(__name__)
 
 
+def _remove_auth_header(request):
+    """Remove Authorization header that OpenAI client adds."""
+    # httpx headers are case-insensitive, so we need to check all variations
+    headers_to_remove = []
+    for header_name in request.headers:
+        if header_name.lower() == "authorization":
+            headers_to_remove.append(header_name)
+
+    for header_name in headers_to_remove:
+        del request.headers[header_name]
+
+
+async def _aremove_auth_header(request):
+    """Async event hook variant of _remove_auth_header for httpx.AsyncClient."""
+    _remove_auth_header(request)
+
+
 class DIALModelProvider(OpenAICompatibleProvider):
     """DIAL provider using OpenAI-compatible API.
 
@@ -26,10 +46,6 @@ class DIALModelProvider(OpenAICompatibleProvider):
 
     FRIENDLY_NAME = "DIAL"
 
-    # Retry configuration for API calls
-    MAX_RETRIES = 4
-    RETRY_DELAYS = [1, 3, 5, 8]  # seconds
-
     # Model configurations using ModelCapabilities objects
     SUPPORTED_MODELS = {
         "o3-2025-04-16": ModelCapabilities(
@@ -231,35 +247,21 @@ class DIALModelProvider(OpenAICompatibleProvider):
 
         # Cache for deployment-specific clients to avoid recreating them on each request
         self._deployment_clients = {}
+        # Async counterparts, created lazily on first use from the event loop
+        self._async_deployment_clients = {}
+        self._async_http_client = None
         # Lock to ensure thread-safe client creation
         self._client_lock = threading.Lock()
 
         # Create a SINGLE shared httpx client for the provider instance
         import httpx
 
-        # Create custom event hooks to remove Authorization header
-        def remove_auth_header(request):
-            """Remove Authorization header that OpenAI client adds."""
-            # httpx headers are case-insensitive, so we need to check all variations
-            headers_to_remove = []
-            for header_name in request.headers:
-                if header_name.lower() == "authorization":
-                    headers_to_remove.append(header_name)
-
-            for header_name in headers_to_remove:
-                del request.headers[header_name]
-
         self._http_client = httpx.Client(
             timeout=self.timeout_config,
-            verify=True,
             follow_redirects=True,
             headers=self.DEFAULT_HEADERS.copy(),  # Include DIAL headers including Api-Key
-            limits=httpx.Limits(
-                max_keepalive_connections=5,
-                max_connections=10,
-                keepalive_expiry=30.0,
-            ),
-            event_hooks={"request": [remove_auth_header]},
+            transport=get_http_pool().transport,  # Connections are pooled across deployments and providers
+            event_hooks={"request": [_remove_auth_header]},
         )
 
         logger.info(f"Initialized DIAL provider with host: {dial_host} and api-version: {self.api_version}")
@@ -326,6 +328,18 @@ class DIALModelProvider(OpenAICompatibleProvider):
 
         return True
 
+    def _get_deployment_url(self, deployment: str) -> str:
+        """Build the Azure-style deployment endpoint URL for a model."""
+        base_url = str(self.client.base_url)
+        if base_url.endswith("/"):
+            base_url = base_url[:-1]
+
+        # Remove /openai suffix if present to reconstruct properly
+        if base_url.endswith("/openai"):
+            base_url = base_url[:-7]
+
+        return f"{base_url}/openai/deployments/{deployment}"
+
     def _get_deployment_client(self, deployment: str):
         """Get or create a cached client for a specific deployment.
 
@@ -348,16 +362,7 @@ class DIALModelProvider(OpenAICompatibleProvider):
             if deployment not in self._deployment_clients:
                 from openai import OpenAI
 
-                # Build deployment-specific URL
-                base_url = str(self.client.base_url)
-                if base_url.endswith("/"):
-                    base_url = base_url[:-1]
-
-                # Remove /openai suffix if present to reconstruct properly
-                if base_url.endswith("/openai"):
-                    base_url = base_url[:-7]
-
-                deployment_url = f"{base_url}/openai/deployments/{deployment}"
+                deployment_url = self._get_deployment_url(deployment)
 
                 # Create and cache the client, REUSING the shared http_client
                 # Use placeholder API key - Authorization header will be removed by http_client event hook
@@ -366,11 +371,47 @@ class DIALModelProvider(OpenAICompatibleProvider):
                     base_url=deployment_url,
                     http_client=self._http_client,  # Pass the shared client with Api-Key header
                     default_query={"api-version": self.api_version},  # Add api-version as query param
+                    max_retries=0,  # Retries are handled by providers/retry.py
                 )
 
         return self._deployment_clients[deployment]
 
-    def generate_content(
+    def _get_async_deployment_client(self, deployment: str):
+        """Get or create a cached AsyncOpenAI client for a specific deployment.
+
+        All async deployment clients share one httpx.AsyncClient, mirroring the
+        synchronous client cache. Only called from the event loop, so no lock is needed.
+
+        Args:
+            deployment: The deployment/model name
+
+        Returns:
+            AsyncOpenAI client configured for the specific deployment
+        """
+        if deployment not in self._async_deployment_clients:
+            import httpx
+            from openai import AsyncOpenAI
+
+            if self._async_http_client is None:
+                self._async_http_client = httpx.AsyncClient(
+                    timeout=self.timeout_config,
+                    follow_redirects=True,
+                    headers=self.DEFAULT_HEADERS.copy(),
+                    transport=get_http_pool().async_transport,
+                    event_hooks={"request": [_aremove_auth_header]},
+                )
+
+            self._async_deployment_clients[deployment] = AsyncOpenAI(
+                api_key="placeholder-not-used",
+                base_url=self._get_deployment_url(deployment),
+                http_client=self._async_http_client,
+                default_query={"api-version": self.api_version},
+                max_retries=0,
+            )
+
+        return self._async_deployment_clients[deployment]
+
+    def _prepare_completion_request(
         self,
         prompt: str,
         model_name: str,
@@ -379,22 +420,11 @@ class DIALModelProvider(OpenAICompatibleProvider):
         max_output_tokens: Optional[int] = None,
         images: Optional[list[str]] = None,
         **kwargs,
-    ) -> ModelResponse:
-        """Generate content using DIAL's deployment-specific endpoint.
-
-        DIAL uses Azure OpenAI-style deployment endpoints:
-        /openai/deployments/{deployment}/chat/completions
-
-        Args:
-            prompt: User prompt
-            model_name: Model name or alias
-            system_prompt: Optional system prompt
-            temperature: Sampling temperature
-            max_output_tokens: Maximum tokens to generate
-            **kwargs: Additional provider-specific parameters
+    ) -> tuple[dict, list, str]:
+        """Validate inputs and build the DIAL chat completion request.
 
         Returns:
-            ModelResponse with generated content and metadata
+            Tuple of (completion_params, messages, resolved_model)
         """
         # Validate model name against allow-list
         if not self.validate_model_name(model_name):
@@ -458,57 +488,125 @@ class DIALModelProvider(OpenAICompatibleProvider):
                     continue
                 completion_params[key] = value
 
+        if is_prompt_cache_enabled():
+            self._apply_prompt_cache(
+                completion_params, resolved_model, system_prompt, prompt, kwargs.get("cacheable_prefix_length")
+            )
+
+        return completion_params, messages, resolved_model
+
+    def _apply_prompt_cache(
+        self,
+        completion_params: dict,
+        model_name: str,
+        system_prompt: Optional[str],
+        prompt: str,
+        prefix_length: Optional[int],
+    ) -> None:
+        """Mark the system message as a cache breakpoint for Claude deployments.
+
+        DIAL places cache breakpoints on whole messages (custom_fields.cache_breakpoint),
+        so only the system prompt can be cached; the stable prefix of the user prompt
+        shares its message with the per-call request. Other deployments (OpenAI,
+        Gemini) cache prompt prefixes automatically.
+        """
+        if not model_name.startswith("anthropic."):
+            return
+        if cacheable_prefix_chars(system_prompt, "") < MIN_CACHEABLE_PREFIX_CHARS:
+            return
+        for message in completion_params["messages"]:
+            if message["role"] == "system":
+                message["custom_fields"] = {"cache_breakpoint": {}}
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using DIAL's deployment-specific endpoint.
+
+        DIAL uses Azure OpenAI-style deployment endpoints:
+        /openai/deployments/{deployment}/chat/completions
+
+        Args:
+            prompt: User prompt
+            model_name: Model name or alias
+            system_prompt: Optional system prompt
+            temperature: Sampling temperature
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        completion_params, _, resolved_model = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
+
         # DIAL-specific: Get cached client for deployment endpoint
         deployment_client = self._get_deployment_client(resolved_model)
 
-        # Retry logic with progressive delays
-        last_exception = None
+        try:
+            response = self._call_with_retries(
+                lambda: deployment_client.chat.completions.create(**completion_params),
+                f"DIAL request for model {model_name}",
+            )
+        except RetryError as e:
+            self._raise_dial_error(model_name, e)
+
+        return self._build_chat_model_response(response, model_name)
 
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                # Generate completion using deployment-specific client
-                response = deployment_client.chat.completions.create(**completion_params)
-
-                # Extract content and usage
-                content = response.choices[0].message.content
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=content,
-                    usage=usage,
-                    model_name=model_name,
-                    friendly_name=self.FRIENDLY_NAME,
-                    provider=self.get_provider_type(),
-                    metadata={
-                        "finish_reason": response.choices[0].finish_reason,
-                        "model": response.model,
-                        "id": response.id,
-                        "created": response.created,
-                    },
-                )
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content via DIAL's deployment endpoint without blocking the event loop.
 
-            except Exception as e:
-                last_exception = e
-
-                # Check if this is a retryable error
-                is_retryable = self._is_error_retryable(e)
-
-                if not is_retryable:
-                    # Non-retryable error, raise immediately
-                    raise ValueError(f"DIAL API error for model {model_name}: {str(e)}")
-
-                # If this isn't the last attempt and error is retryable, wait and retry
-                if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAYS[attempt]
-                    logger.info(
-                        f"DIAL API error (attempt {attempt + 1}/{self.MAX_RETRIES}), " f"retrying in {delay}s: {str(e)}"
-                    )
-                    time.sleep(delay)
-                    continue
+        Accepts the same arguments as generate_content().
+        """
+        completion_params, _, resolved_model = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
+
+        deployment_client = self._get_async_deployment_client(resolved_model)
+
+        async def _call():
+            return await deployment_client.chat.completions.create(**completion_params)
+
+        try:
+            response = await self._acall_with_retries(_call, f"DIAL request for model {model_name}")
+        except RetryError as e:
+            self._raise_dial_error(model_name, e)
+
+        return self._build_chat_model_response(response, model_name)
+
+    def _get_async_streaming_client(self, resolved_model: str):
+        """Stream through the model's deployment endpoint, like agenerate_content()."""
+        return self._get_async_deployment_client(resolved_model)
+
+    def _raise_generation_error(self, model_name: str, error: RetryError):
+        """Report failed streaming requests the same way as generate_content()."""
+        self._raise_dial_error(model_name, error)
+
+    def _raise_dial_error(self, model_name: str, error: RetryError):
+        """Raise the DIAL error for a call that will not be retried any further."""
+        if not error.retryable:
+            # Non-retryable errors surface immediately without an attempt count
+            raise ValueError(f"DIAL API error for model {model_name}: {str(error.last_exception)}")
 
-        # All retries exhausted
         raise ValueError(
-            f"DIAL API error for model {model_name} after {self.MAX_RETRIES} attempts: {str(last_exception)}"
+            f"DIAL API error for model {model_name} after {error.attempts} attempts: {str(error.last_exception)}"
         )
 
     def _supports_vision(self, model_name: str) -> bool:
@@ -537,7 +635,12 @@ class DIALModelProvider(OpenAICompatibleProvider):
         # use the shared httpx.Client which we close separately
         self._deployment_clients.clear()
 
-        # Close the shared HTTP client
+        # Async clients can only be closed from a running event loop; drop them so
+        # they are recreated (and garbage collected) rather than reused after close
+        self._async_deployment_clients.clear()
+        self._async_http_client = None
+
+        # Close the provider's HTTP client (the pooled connections it used stay open for other providers)
         if hasattr(self, "_http_client"):
             try:
                 self._http_client.close()
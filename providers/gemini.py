@@ -2,8 +2,11 @@
 
 import base64
 import logging
+import os
+import threading
 import time
-from typing import TYPE_CHECKING, Optional
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING, NamedTuple, Optional
 
 if TYPE_CHECKING:
     from tools.models import ToolModelCategory
@@ -11,11 +14,31 @@ if TYPE_CHECKING:
 from google import genai
 from google.genai import types
 
-from .base import ModelCapabilities, ModelProvider, ModelResponse, ProviderType, create_temperature_constraint
+from utils.prompt_cache import is_prompt_cache_enabled, prompt_cache_key, split_cacheable_prefix
+from utils.token_utils import estimate_tokens
+from utils.tokenizer import count_tokens
+
+from .base import (
+    ModelCapabilities,
+    ModelProvider,
+    ModelResponse,
+    ProviderType,
+    StreamChunk,
+    create_temperature_constraint,
+)
+from .retry import RetryError
 
 logger = logging.getLogger(__name__)
 
 
+class _ExplicitCacheCandidate(NamedTuple):
+    key: str
+    model_name: str
+    system_prompt: Optional[str]
+    prefix: str
+    remainder: str
+
+
 class GeminiModelProvider(ModelProvider):
     """Google Gemini model provider implementation."""
 
@@ -116,12 +139,38 @@ class GeminiModelProvider(ModelProvider):
         "gemini-2.5-pro": 32768,  # Pro 2.5 thinking budget limit
     }
 
+    # Explicit context caches are only worth their storage cost for large prefixes
+    # (Gemini rejects caches below its per-model minimum of 1-4K tokens)
+    DEFAULT_EXPLICIT_CACHE_MIN_TOKENS = 4096
+    DEFAULT_EXPLICIT_CACHE_TTL_SECONDS = 600
+    # Caches this close to expiry are not reused for new requests
+    EXPLICIT_CACHE_EXPIRY_MARGIN_SECONDS = 30
+
     def __init__(self, api_key: str, **kwargs):
         """Initialize Gemini provider with API key."""
         super().__init__(api_key, **kwargs)
         self._client = None
         self._token_counters = {}  # Cache for token counting
 
+        # Optional explicit context caching of stable prompt prefixes (see utils.prompt_cache).
+        # Implicit caching applies automatically; explicit caches guarantee the discount
+        # but are billed for storage, so they are opt-in.
+        self._explicit_cache_enabled = os.getenv("GEMINI_EXPLICIT_CACHE", "false").lower() in ("true", "1", "yes")
+        try:
+            self._explicit_cache_min_tokens = int(
+                os.getenv("GEMINI_EXPLICIT_CACHE_MIN_TOKENS", str(self.DEFAULT_EXPLICIT_CACHE_MIN_TOKENS))
+            )
+            self._explicit_cache_ttl = max(
+                60, int(os.getenv("GEMINI_EXPLICIT_CACHE_TTL", str(self.DEFAULT_EXPLICIT_CACHE_TTL_SECONDS)))
+            )
+        except ValueError:
+            logger.warning("Invalid GEMINI_EXPLICIT_CACHE_* value, using defaults")
+            self._explicit_cache_min_tokens = self.DEFAULT_EXPLICIT_CACHE_MIN_TOKENS
+            self._explicit_cache_ttl = self.DEFAULT_EXPLICIT_CACHE_TTL_SECONDS
+        # prefix key -> (cache name or None after a failed creation, monotonic expiry)
+        self._explicit_caches: dict[str, tuple[Optional[str], float]] = {}
+        self._explicit_cache_lock = threading.Lock()
+
     @property
     def client(self):
         """Lazy initialization of Gemini client."""
@@ -149,18 +198,25 @@ class GeminiModelProvider(ModelProvider):
         # Return the ModelCapabilities object directly from SUPPORTED_MODELS
         return self.SUPPORTED_MODELS[resolved_name]
 
-    def generate_content(
+    def _prepare_generation_request(
         self,
         prompt: str,
         model_name: str,
-        system_prompt: Optional[str] = None,
-        temperature: float = 0.3,
-        max_output_tokens: Optional[int] = None,
-        thinking_mode: str = "medium",
-        images: Optional[list[str]] = None,
-        **kwargs,
-    ) -> ModelResponse:
-        """Generate content using Gemini model."""
+        system_prompt: Optional[str],
+        temperature: float,
+        max_output_tokens: Optional[int],
+        thinking_mode: str,
+        images: Optional[list[str]],
+        cached_content: Optional[str] = None,
+    ):
+        """Build the contents and generation config shared by the sync and async paths.
+
+        With cached_content, the system prompt and the stable prompt prefix live in
+        the explicit cache and prompt is only the per-call remainder.
+
+        Returns:
+            Tuple of (resolved_name, contents, generation_config, capabilities)
+        """
         # Validate parameters
         resolved_name = self._resolve_model_name(model_name)
         self.validate_parameters(model_name, temperature)
@@ -199,6 +255,9 @@ class GeminiModelProvider(ModelProvider):
             candidate_count=1,
         )
 
+        if cached_content:
+            generation_config.cached_content = cached_content
+
         # Add max output tokens if specified
         if max_output_tokens:
             generation_config.max_output_tokens = max_output_tokens
@@ -213,145 +272,353 @@ class GeminiModelProvider(ModelProvider):
                 actual_thinking_budget = int(max_thinking_tokens * self.THINKING_BUDGETS[thinking_mode])
                 generation_config.thinking_config = types.ThinkingConfig(thinking_budget=actual_thinking_budget)
 
-        # Retry logic with progressive delays
-        max_retries = 4  # Total of 4 attempts
-        retry_delays = [1, 3, 5, 8]  # Progressive delays: 1s, 3s, 5s, 8s
+        return resolved_name, contents, generation_config, capabilities
 
-        last_exception = None
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using Gemini model."""
+        cached_content = None
+        candidate = self._explicit_cache_candidate(model_name, system_prompt, prompt, kwargs)
+        if candidate:
+            cached_content = self._get_explicit_cache(candidate)
+            if cached_content:
+                system_prompt, prompt = None, candidate.remainder
+
+        resolved_name, contents, generation_config, capabilities = self._prepare_generation_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images, cached_content
+        )
 
-        for attempt in range(max_retries):
-            try:
-                # Generate content
-                response = self.client.models.generate_content(
+        try:
+            response = self._call_with_retries(
+                lambda: self.client.models.generate_content(
                     model=resolved_name,
                     contents=contents,
                     config=generation_config,
-                )
+                ),
+                f"Gemini request for model {resolved_name}",
+            )
+        except RetryError as e:
+            self._raise_generation_error(resolved_name, e)
 
-                # Extract usage information if available
-                usage = self._extract_usage(response)
+        return self._build_model_response(response, resolved_name, thinking_mode, capabilities)
 
-                # Intelligently determine finish reason and safety blocks
-                finish_reason_str = "UNKNOWN"
-                is_blocked_by_safety = False
-                safety_feedback_details = None
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the Gemini async client (client.aio)."""
+        resolved_name, contents, generation_config, capabilities = await self._aprepare_generation_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images, kwargs
+        )
 
-                if response.candidates:
-                    candidate = response.candidates[0]
+        async def _call():
+            return await self.client.aio.models.generate_content(
+                model=resolved_name,
+                contents=contents,
+                config=generation_config,
+            )
 
-                    # Safely get finish reason
+        try:
+            response = await self._acall_with_retries(_call, f"Gemini request for model {resolved_name}")
+        except RetryError as e:
+            self._raise_generation_error(resolved_name, e)
+
+        return self._build_model_response(response, resolved_name, thinking_mode, capabilities)
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream content from the Gemini async client, yielding text as it is generated.
+
+        Accepts the same arguments as generate_content(). Requests answered by the
+        response cache are not streamed.
+        """
+        if self._uses_response_cache(temperature, kwargs):
+            async for chunk in super().astream_content(
+                prompt,
+                model_name,
+                system_prompt,
+                temperature,
+                max_output_tokens,
+                thinking_mode=thinking_mode,
+                images=images,
+                **kwargs,
+            ):
+                yield chunk
+            return
+
+        resolved_name, contents, generation_config, capabilities = await self._aprepare_generation_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images, kwargs
+        )
+
+        async def _call():
+            return await self.client.aio.models.generate_content_stream(
+                model=resolved_name,
+                contents=contents,
+                config=generation_config,
+            )
+
+        # Only opening the stream is retried; a failure mid-stream surfaces to the caller
+        try:
+            stream = await self._acall_with_retries(_call, f"Gemini streaming request for model {resolved_name}")
+        except RetryError as e:
+            self._raise_generation_error(resolved_name, e)
+
+        parts = []
+        last_chunk = None
+        try:
+            async for chunk in stream:
+                last_chunk = chunk
+                text = chunk.text or ""
+                usage = self._extract_usage(chunk)
+                if text:
+                    parts.append(text)
+                if text or usage:
+                    yield StreamChunk(text=text, usage=usage or None)
+        finally:
+            # Closing the stream stops the generation when the consumer gives up early
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        if last_chunk is None:
+            raise RuntimeError(f"Gemini returned an empty stream for model {resolved_name}")
+        # Finish reason, safety feedback and final usage are reported on the last chunk
+        response = self._build_model_response(last_chunk, resolved_name, thinking_mode, capabilities)
+        response.content = "".join(parts)
+        response.metadata["streamed"] = True
+        yield StreamChunk(usage=response.usage or None, response=response)
+
+    async def _aprepare_generation_request(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_output_tokens: Optional[int],
+        thinking_mode: str,
+        images: Optional[list[str]],
+        kwargs: dict,
+    ):
+        """Resolve the explicit prompt cache (if any) and build the request for the async paths."""
+        cached_content = None
+        candidate = self._explicit_cache_candidate(model_name, system_prompt, prompt, kwargs)
+        if candidate:
+            cached_content = await self._aget_explicit_cache(candidate)
+            if cached_content:
+                system_prompt, prompt = None, candidate.remainder
+
+        return self._prepare_generation_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images, cached_content
+        )
+
+    def _explicit_cache_candidate(
+        self, model_name: str, system_prompt: Optional[str], prompt: str, kwargs: dict
+    ) -> Optional["_ExplicitCacheCandidate"]:
+        """Return what to cache explicitly for this request, or None to rely on implicit caching"""
+        if not self._explicit_cache_enabled or not is_prompt_cache_enabled():
+            return None
+        prefix, remainder = split_cacheable_prefix(prompt, kwargs.get("cacheable_prefix_length"))
+        if not remainder.strip():
+            return None
+        if estimate_tokens(f"{system_prompt or ''}{prefix}") < self._explicit_cache_min_tokens:
+            return None
+        resolved_name = self._resolve_model_name(model_name)
+        key = prompt_cache_key(resolved_name, system_prompt, prefix)
+        return _ExplicitCacheCandidate(key, resolved_name, system_prompt, prefix, remainder)
+
+    def _lookup_explicit_cache(self, key: str) -> tuple[bool, Optional[str]]:
+        """Return (known, cache name); a known key with no name failed to cache recently"""
+        with self._explicit_cache_lock:
+            entry = self._explicit_caches.get(key)
+            if entry is None:
+                return False, None
+            name, expires_at = entry
+            if expires_at - self.EXPLICIT_CACHE_EXPIRY_MARGIN_SECONDS <= time.monotonic():
+                del self._explicit_caches[key]
+                return False, None
+            return True, name
+
+    def _explicit_cache_config(self, candidate: "_ExplicitCacheCandidate") -> types.CreateCachedContentConfig:
+        contents = [candidate.prefix] if candidate.prefix else None
+        return types.CreateCachedContentConfig(
+            contents=contents,
+            system_instruction=candidate.system_prompt or None,
+            ttl=f"{self._explicit_cache_ttl}s",
+            display_name=candidate.key,
+        )
+
+    def _remember_explicit_cache(self, key: str, name: Optional[str]) -> None:
+        # Failures are remembered for a TTL too, so an unsupported model is not retried every call
+        with self._explicit_cache_lock:
+            self._explicit_caches[key] = (name, time.monotonic() + self._explicit_cache_ttl)
+
+    def _get_explicit_cache(self, candidate: "_ExplicitCacheCandidate") -> Optional[str]:
+        """Return the cached content name for the candidate's prefix, creating the cache if needed"""
+        known, name = self._lookup_explicit_cache(candidate.key)
+        if known:
+            return name
+        try:
+            cache = self.client.caches.create(model=candidate.model_name, config=self._explicit_cache_config(candidate))
+            name = cache.name
+            logger.debug(f"Created Gemini context cache {name} for model {candidate.model_name}")
+        except Exception as e:
+            logger.debug(f"Gemini context caching unavailable for {candidate.model_name}: {e}")
+            name = None
+        self._remember_explicit_cache(candidate.key, name)
+        return name
+
+    async def _aget_explicit_cache(self, candidate: "_ExplicitCacheCandidate") -> Optional[str]:
+        """Async variant of _get_explicit_cache()"""
+        known, name = self._lookup_explicit_cache(candidate.key)
+        if known:
+            return name
+        try:
+            cache = await self.client.aio.caches.create(
+                model=candidate.model_name, config=self._explicit_cache_config(candidate)
+            )
+            name = cache.name
+            logger.debug(f"Created Gemini context cache {name} for model {candidate.model_name}")
+        except Exception as e:
+            logger.debug(f"Gemini context caching unavailable for {candidate.model_name}: {e}")
+            name = None
+        self._remember_explicit_cache(candidate.key, name)
+        return name
+
+    def _raise_generation_error(self, resolved_name: str, error: RetryError):
+        """Raise the user-facing error once retries are exhausted."""
+        attempts = error.attempts
+        error_msg = f"Gemini API error for model {resolved_name} after {attempts} attempt{'s' if attempts > 1 else ''}: {str(error.last_exception)}"
+        raise RuntimeError(error_msg) from error.last_exception
+
+    def _build_model_response(
+        self, response, resolved_name: str, thinking_mode: str, capabilities: ModelCapabilities
+    ) -> ModelResponse:
+        """Convert a Gemini response into a ModelResponse, detecting finish reason and safety blocks."""
+        # Extract usage information if available
+        usage = self._extract_usage(response)
+
+        # Intelligently determine finish reason and safety blocks
+        finish_reason_str = "UNKNOWN"
+        is_blocked_by_safety = False
+        safety_feedback_details = None
+
+        if response.candidates:
+            candidate = response.candidates[0]
+
+            # Safely get finish reason
+            try:
+                finish_reason_enum = candidate.finish_reason
+                if finish_reason_enum:
+                    # Handle both enum objects and string values
                     try:
-                        finish_reason_enum = candidate.finish_reason
-                        if finish_reason_enum:
-                            # Handle both enum objects and string values
-                            try:
-                                finish_reason_str = finish_reason_enum.name
-                            except AttributeError:
-                                finish_reason_str = str(finish_reason_enum)
-                        else:
-                            finish_reason_str = "STOP"
+                        finish_reason_str = finish_reason_enum.name
                     except AttributeError:
-                        finish_reason_str = "STOP"
-
-                    # If content is empty, check safety ratings for the definitive cause
-                    if not response.text:
-                        try:
-                            safety_ratings = candidate.safety_ratings
-                            if safety_ratings:  # Check it's not None or empty
-                                for rating in safety_ratings:
+                        finish_reason_str = str(finish_reason_enum)
+                else:
+                    finish_reason_str = "STOP"
+            except AttributeError:
+                finish_reason_str = "STOP"
+
+            # If content is empty, check safety ratings for the definitive cause
+            if not response.text:
+                try:
+                    safety_ratings = candidate.safety_ratings
+                    if safety_ratings:  # Check it's not None or empty
+                        for rating in safety_ratings:
+                            try:
+                                if rating.blocked:
+                                    is_blocked_by_safety = True
+                                    # Provide details for logging/debugging
+                                    category_name = "UNKNOWN"
+                                    probability_name = "UNKNOWN"
+
                                     try:
-                                        if rating.blocked:
-                                            is_blocked_by_safety = True
-                                            # Provide details for logging/debugging
-                                            category_name = "UNKNOWN"
-                                            probability_name = "UNKNOWN"
-
-                                            try:
-                                                category_name = rating.category.name
-                                            except (AttributeError, TypeError):
-                                                pass
-
-                                            try:
-                                                probability_name = rating.probability.name
-                                            except (AttributeError, TypeError):
-                                                pass
-
-                                            safety_feedback_details = (
-                                                f"Category: {category_name}, Probability: {probability_name}"
-                                            )
-                                            break
+                                        category_name = rating.category.name
                                     except (AttributeError, TypeError):
-                                        # Individual rating doesn't have expected attributes
-                                        continue
-                        except (AttributeError, TypeError):
-                            # candidate doesn't have safety_ratings or it's not iterable
-                            pass
-
-                # Also check for prompt-level blocking (request rejected entirely)
-                elif response.candidates is not None and len(response.candidates) == 0:
-                    # No candidates is the primary indicator of a prompt-level block
-                    is_blocked_by_safety = True
-                    finish_reason_str = "SAFETY"
-                    safety_feedback_details = "Prompt blocked, reason unavailable"  # Default message
+                                        pass
+
+                                    try:
+                                        probability_name = rating.probability.name
+                                    except (AttributeError, TypeError):
+                                        pass
+
+                                    safety_feedback_details = (
+                                        f"Category: {category_name}, Probability: {probability_name}"
+                                    )
+                                    break
+                            except (AttributeError, TypeError):
+                                # Individual rating doesn't have expected attributes
+                                continue
+                except (AttributeError, TypeError):
+                    # candidate doesn't have safety_ratings or it's not iterable
+                    pass
 
+        # Also check for prompt-level blocking (request rejected entirely)
+        elif response.candidates is not None and len(response.candidates) == 0:
+            # No candidates is the primary indicator of a prompt-level block
+            is_blocked_by_safety = True
+            finish_reason_str = "SAFETY"
+            safety_feedback_details = "Prompt blocked, reason unavailable"  # Default message
+
+            try:
+                prompt_feedback = response.prompt_feedback
+                if prompt_feedback and prompt_feedback.block_reason:
                     try:
-                        prompt_feedback = response.prompt_feedback
-                        if prompt_feedback and prompt_feedback.block_reason:
-                            try:
-                                block_reason_name = prompt_feedback.block_reason.name
-                            except AttributeError:
-                                block_reason_name = str(prompt_feedback.block_reason)
-                            safety_feedback_details = f"Prompt blocked, reason: {block_reason_name}"
-                    except (AttributeError, TypeError):
-                        # prompt_feedback doesn't exist or has unexpected attributes; stick with the default message
-                        pass
+                        block_reason_name = prompt_feedback.block_reason.name
+                    except AttributeError:
+                        block_reason_name = str(prompt_feedback.block_reason)
+                    safety_feedback_details = f"Prompt blocked, reason: {block_reason_name}"
+            except (AttributeError, TypeError):
+                # prompt_feedback doesn't exist or has unexpected attributes; stick with the default message
+                pass
 
-                return ModelResponse(
-                    content=response.text,
-                    usage=usage,
-                    model_name=resolved_name,
-                    friendly_name="Gemini",
-                    provider=ProviderType.GOOGLE,
-                    metadata={
-                        "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
-                        "finish_reason": finish_reason_str,
-                        "is_blocked_by_safety": is_blocked_by_safety,
-                        "safety_feedback": safety_feedback_details,
-                    },
-                )
-
-            except Exception as e:
-                last_exception = e
-
-                # Check if this is a retryable error using structured error codes
-                is_retryable = self._is_error_retryable(e)
-
-                # If this is the last attempt or not retryable, give up
-                if attempt == max_retries - 1 or not is_retryable:
-                    break
-
-                # Get progressive delay
-                delay = retry_delays[attempt]
-
-                # Log retry attempt
-                logger.warning(
-                    f"Gemini API error for model {resolved_name}, attempt {attempt + 1}/{max_retries}: {str(e)}. Retrying in {delay}s..."
-                )
-                time.sleep(delay)
-
-        # If we get here, all retries failed
-        actual_attempts = attempt + 1  # Convert from 0-based index to human-readable count
-        error_msg = f"Gemini API error for model {resolved_name} after {actual_attempts} attempt{'s' if actual_attempts > 1 else ''}: {str(last_exception)}"
-        raise RuntimeError(error_msg) from last_exception
+        return ModelResponse(
+            content=response.text,
+            usage=usage,
+            model_name=resolved_name,
+            friendly_name="Gemini",
+            provider=ProviderType.GOOGLE,
+            metadata={
+                "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
+                "finish_reason": finish_reason_str,
+                "is_blocked_by_safety": is_blocked_by_safety,
+                "safety_feedback": safety_feedback_details,
+            },
+        )
 
     def count_tokens(self, text: str, model_name: str) -> int:
-        """Count tokens for the given text using Gemini's tokenizer."""
-        self._resolve_model_name(model_name)
+        """Count tokens for the given text.
 
-        # For now, use a simple estimation
-        # TODO: Use actual Gemini tokenizer when available in SDK
-        # Rough estimation: ~4 characters per token for English text
-        return len(text) // 4
+        Gemini's tokenizer is not available locally, so this is an approximation
+        from the shared tokenizer service (BPE-based when tiktoken is installed,
+        ~4 characters per token otherwise).
+        """
+        return count_tokens(text, self._resolve_model_name(model_name))
 
     def get_provider_type(self) -> ProviderType:
         """Get the provider type."""
@@ -431,6 +698,14 @@ class GeminiModelProvider(ModelProvider):
                 # Calculate total only if both values are available and valid
                 if input_tokens is not None and output_tokens is not None:
                     usage["total_tokens"] = input_tokens + output_tokens
+
+                # Prompt tokens served from implicit or explicit context caches
+                try:
+                    value = metadata.cached_content_token_count
+                    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+                        usage["cached_input_tokens"] = value
+                except (AttributeError, TypeError):
+                    pass
         except (AttributeError, TypeError):
             # response doesn't have usage_metadata
             pass
@@ -0,0 +1,420 @@
+"""Opt-in hedged requests across providers.
+
+Many models are reachable through more than one provider (a native API, DIAL,
+a custom endpoint, OpenRouter). When the provider serving a request is slow, the
+tail of the latency distribution is dominated by waiting on that one upstream.
+With hedging enabled, a request that has not produced a response (or, when
+streaming, its first token) after the HEDGE_PERCENTILE latency observed for that
+provider and model is sent again to an equivalent model on another configured
+provider. The first success wins and the other request is cancelled.
+
+    response = await hedged_generate(provider, prompt=..., model_name="o3", ...)
+
+    async for chunk in hedged_stream(provider, prompt=..., model_name="o3", ...):
+        ...
+
+Two models are equivalent when both providers resolve them to the same model
+id, ignoring the vendor prefix and a date-stamped snapshot suffix (``o3``,
+``openai/o3`` and ``o3-2025-04-16`` are the same model). Hedging only starts once
+HEDGE_MIN_SAMPLES latencies have been observed for the provider and model, and
+hedges draw from a budget of HEDGE_BUDGET per minute, so a struggling upstream
+cannot double the load on the others.
+
+Configuration (environment variables):
+
+    HEDGE_REQUESTS      Enable hedging (default false)
+    HEDGE_PERCENTILE    Latency percentile that triggers a hedge (default 95)
+    HEDGE_MIN_SAMPLES   Observations needed before hedging a model (default 20)
+    HEDGE_MIN_DELAY     Never hedge earlier than this many seconds (default 1.0)
+    HEDGE_BUDGET        Maximum hedged requests per minute (default 10)
+"""
+
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from utils.env import env_float, env_int
+
+from .base import ModelProvider, ModelResponse, ProviderType, StreamChunk
+from .retry import RetryBudget
+
+logger = logging.getLogger(__name__)
+
+# Latencies kept per (provider, model, kind)
+LATENCY_WINDOW = 200
+
+# Latency kinds: time to the complete response, and time to the first streamed chunk
+RESPONSE = "response"
+FIRST_TOKEN = "first_token"
+
+_SNAPSHOT_SUFFIX = re.compile(r"-\d{4}-?\d{2}-?\d{2}$")
+
+
+def is_hedging_enabled() -> bool:
+    """Whether slow requests are hedged on alternate providers (HEDGE_REQUESTS, default false)"""
+    return os.getenv("HEDGE_REQUESTS", "false").lower() in ("true", "1", "yes")
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to hedge a request.
+
+    Attributes:
+        percentile: Observed latency percentile after which a request is hedged
+        min_samples: Observations needed before a provider/model is hedged
+        min_delay: Lower bound for the hedge delay, in seconds
+    """
+
+    percentile: float = 95.0
+    min_samples: int = 20
+    min_delay: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        """Build the policy from HEDGE_* environment variables"""
+        return cls(
+            percentile=min(100.0, env_float("HEDGE_PERCENTILE", cls.percentile)),
+            min_samples=max(1, env_int("HEDGE_MIN_SAMPLES", cls.min_samples)),
+            min_delay=env_float("HEDGE_MIN_DELAY", cls.min_delay),
+        )
+
+
+class LatencyTracker:
+    """Rolling window of observed latencies per provider, model and kind"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._window = window
+        self._samples: dict[tuple[str, str, str], deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model_name: str, kind: str, seconds: float) -> None:
+        key = (provider, model_name, kind)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def percentile(
+        self, provider: str, model_name: str, kind: str, percentile: float, min_samples: int = 1
+    ) -> Optional[float]:
+        """Return the latency percentile (nearest rank), or None with fewer than min_samples observations"""
+        with self._lock:
+            samples = sorted(self._samples.get((provider, model_name, kind), ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * len(samples)))
+        return samples[rank - 1]
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return sample counts and p50/p95/p99 per provider, model and kind"""
+        with self._lock:
+            keys = list(self._samples)
+        stats = {}
+        for provider, model_name, kind in keys:
+            stats[f"{provider}/{model_name}/{kind}"] = {
+                "samples": len(self._samples[(provider, model_name, kind)]),
+                **{f"p{p}": self.percentile(provider, model_name, kind, p) for p in (50, 95, 99)},
+            }
+        return stats
+
+
+_tracker: Optional[LatencyTracker] = None
+_hedge_budget: Optional[RetryBudget] = None
+# (primary provider type, model name) -> (alternate provider type, model name) or None
+_alternates: dict[tuple[ProviderType, str], Optional[tuple[ProviderType, str]]] = {}
+_alternates_version: Optional[int] = None
+_state_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get the global latency tracker (singleton pattern)"""
+    global _tracker
+    if _tracker is None:
+        with _state_lock:
+            if _tracker is None:
+                _tracker = LatencyTracker()
+    return _tracker
+
+
+def _get_hedge_budget() -> RetryBudget:
+    global _hedge_budget
+    if _hedge_budget is None:
+        with _state_lock:
+            if _hedge_budget is None:
+                per_minute = env_int("HEDGE_BUDGET", 10)
+                _hedge_budget = RetryBudget(capacity=per_minute, refill_per_second=per_minute / 60)
+    return _hedge_budget
+
+
+def reset_hedging() -> None:
+    """Forget observed latencies and the hedge budget (used by tests)"""
+    global _tracker, _hedge_budget, _alternates_version
+    with _state_lock:
+        _tracker = None
+        _hedge_budget = None
+        _alternates.clear()
+        _alternates_version = None
+
+
+def _provider_key(provider: ModelProvider) -> str:
+    return provider.get_provider_type().value
+
+
+def _base_model_id(model_name: str) -> str:
+    """Model id without vendor prefix or snapshot date ("openai/o3-2025-04-16" -> "o3")"""
+    return _SNAPSHOT_SUFFIX.sub("", model_name.rsplit("/", 1)[-1].lower())
+
+
+def find_alternate(provider: ModelProvider, model_name: str) -> Optional[tuple[ModelProvider, str]]:
+    """Find another configured provider serving the same model.
+
+    Only models an alternate provider lists (catalog-backed providers such as
+    OpenRouter accept any name, but cannot serve every one) are considered.
+    Results are memoized per model catalog version.
+
+    Args:
+        provider: Provider the request is sent to first
+        model_name: Model name (or alias) as requested
+
+    Returns:
+        (alternate provider, model name to request from it), or None if no
+        other provider serves an equivalent model
+    """
+    from .registry import ModelProviderRegistry
+
+    global _alternates_version
+    version = ModelProviderRegistry.get_model_catalog().version
+    primary_type = provider.get_provider_type()
+    key = (primary_type, model_name)
+    with _state_lock:
+        if _alternates_version != version:
+            _alternates.clear()
+            _alternates_version = version
+        cached = _alternates.get(key, False)
+
+    if cached is False:
+        cached = _find_alternate(provider, model_name)
+        with _state_lock:
+            _alternates[key] = cached
+    if cached is None:
+        return None
+    alternate = ModelProviderRegistry.get_provider(cached[0])
+    return (alternate, cached[1]) if alternate else None
+
+
+def _find_alternate(provider: ModelProvider, model_name: str) -> Optional[tuple[ProviderType, str]]:
+    from .registry import ModelProviderRegistry
+
+    resolved = provider._resolve_model_name(model_name)
+    base_id = _base_model_id(resolved)
+    primary_type = provider.get_provider_type()
+
+    for provider_type in ModelProviderRegistry.PROVIDER_PRIORITY_ORDER:
+        if provider_type == primary_type:
+            continue
+        alternate = ModelProviderRegistry.get_provider(provider_type)
+        if alternate is None:
+            continue
+        try:
+            listed = alternate.list_models(respect_restrictions=True)
+        except NotImplementedError:
+            continue
+        # Prefer the name as requested, then any listed name or alias for the same model
+        preferred = [name for name in (model_name, resolved) if name in listed]
+        for candidate in dict.fromkeys(preferred + listed):
+            try:
+                if _base_model_id(alternate._resolve_model_name(candidate)) == base_id:
+                    return provider_type, candidate
+            except Exception as e:
+                logger.debug(f"Hedge candidate {provider_type.value}/{candidate} rejected: {e}")
+    return None
+
+
+def _hedge_plan(provider: ModelProvider, model_name: str, kind: str) -> Optional[tuple[float, ModelProvider, str]]:
+    """Return (delay, alternate provider, alternate model) when the request should be hedged"""
+    if not is_hedging_enabled():
+        return None
+    policy = HedgePolicy.from_env()
+    threshold = get_latency_tracker().percentile(
+        _provider_key(provider), model_name, kind, policy.percentile, policy.min_samples
+    )
+    if threshold is None:
+        return None
+    alternate = find_alternate(provider, model_name)
+    if alternate is None:
+        return None
+    return (max(policy.min_delay, threshold), *alternate)
+
+
+async def _timed(provider: ModelProvider, model_name: str, kind: str, call: Awaitable[Any]) -> Any:
+    """Await call and record how long it took.
+
+    A call cancelled because the other side of a hedge won is recorded with the time
+    it had run so far, as a lower bound of its latency. Leaving these slow calls out
+    would pull the percentile down, so hedges would fire earlier and earlier.
+    Responses served from the response cache never reached the provider and are
+    not recorded.
+    """
+    start = time.monotonic()
+    try:
+        result = await call
+    except asyncio.CancelledError:
+        get_latency_tracker().record(_provider_key(provider), model_name, kind, time.monotonic() - start)
+        raise
+    if not _is_cache_hit(result):
+        get_latency_tracker().record(_provider_key(provider), model_name, kind, time.monotonic() - start)
+    return result
+
+
+def _is_cache_hit(result: Any) -> bool:
+    """Whether result (a ModelResponse or the first StreamChunk) came from the response cache"""
+    if isinstance(result, StreamChunk):
+        result = result.response
+    return isinstance(result, ModelResponse) and bool(result.metadata.get("cache_hit"))
+
+
+async def _first_success(tasks: list[asyncio.Future]) -> tuple[int, Any]:
+    """Wait for the first task to succeed and cancel the rest.
+
+    Returns:
+        (index of the winning task, its result)
+
+    Raises:
+        The first task's exception if every task fails
+    """
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                if task in done and not task.cancelled() and task.exception() is None:
+                    return tasks.index(task), task.result()
+        return 0, tasks[0].result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _won_by_hedge(response: ModelResponse, provider: ModelProvider) -> ModelResponse:
+    response.metadata["hedged_from"] = _provider_key(provider)
+    return response
+
+
+async def hedged_generate(provider: ModelProvider, **kwargs) -> ModelResponse:
+    """agenerate_content(), hedged on an alternate provider when the primary is slow.
+
+    Args:
+        provider: Provider to send the request to first
+        **kwargs: Arguments for agenerate_content(); must include model_name
+
+    Returns:
+        The first successful ModelResponse; ``metadata["hedged_from"]`` names the
+        primary provider when the alternate won
+    """
+    model_name = kwargs["model_name"]
+    plan = _hedge_plan(provider, model_name, RESPONSE)
+    if plan is None:
+        return await _timed(provider, model_name, RESPONSE, provider.agenerate_content(**kwargs))
+
+    delay, alternate, alternate_model = plan
+    primary = asyncio.ensure_future(_timed(provider, model_name, RESPONSE, provider.agenerate_content(**kwargs)))
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+    except BaseException:
+        primary.cancel()
+        raise
+    if done or not _get_hedge_budget().try_acquire():
+        return await primary
+
+    logger.info(
+        f"Hedging {_provider_key(provider)}/{model_name} on {_provider_key(alternate)}/{alternate_model} "
+        f"after {delay:.1f}s"
+    )
+    hedge = asyncio.ensure_future(
+        _timed(
+            alternate,
+            alternate_model,
+            RESPONSE,
+            alternate.agenerate_content(**{**kwargs, "model_name": alternate_model}),
+        )
+    )
+    winner, response = await _first_success([primary, hedge])
+    return _won_by_hedge(response, provider) if winner else response
+
+
+async def _first_chunk(provider: ModelProvider, model_name: str, stream: AsyncIterator[StreamChunk]):
+    """Wait for the first chunk of stream, recording the time it took (None if the stream is empty)"""
+    try:
+        return await _timed(provider, model_name, FIRST_TOKEN, stream.__anext__())
+    except StopAsyncIteration:
+        return None
+
+
+async def hedged_stream(provider: ModelProvider, **kwargs) -> AsyncIterator[StreamChunk]:
+    """astream_content(), hedged on an alternate provider when the first token is slow.
+
+    Once either stream produces its first chunk the other is closed, and the rest
+    of the output comes from the winner.
+
+    Args:
+        provider: Provider to send the request to first
+        **kwargs: Arguments for astream_content(); must include model_name
+
+    Yields:
+        StreamChunk objects from the winning stream
+    """
+    model_name = kwargs["model_name"]
+    plan = _hedge_plan(provider, model_name, FIRST_TOKEN)
+    if plan is None:
+        stream = provider.astream_content(**kwargs)
+        try:
+            first = await _first_chunk(provider, model_name, stream)
+            if first is None:
+                return
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+        return
+
+    delay, alternate, alternate_model = plan
+    streams = [provider.astream_content(**kwargs)]
+    tasks = [asyncio.ensure_future(_first_chunk(provider, model_name, streams[0]))]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done and _get_hedge_budget().try_acquire():
+            logger.info(
+                f"Hedging {_provider_key(provider)}/{model_name} stream on "
+                f"{_provider_key(alternate)}/{alternate_model} after {delay:.1f}s"
+            )
+            streams.append(alternate.astream_content(**{**kwargs, "model_name": alternate_model}))
+            tasks.append(asyncio.ensure_future(_first_chunk(alternate, alternate_model, streams[1])))
+
+        winner, first = await _first_success(tasks)
+        if first is None:
+            return
+        if winner and first.response is not None:
+            _won_by_hedge(first.response, provider)
+        yield first
+        async for chunk in streams[winner]:
+            if winner and chunk.response is not None:
+                _won_by_hedge(chunk.response, provider)
+            yield chunk
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for stream in streams:
+            await stream.aclose()
@@ -0,0 +1,347 @@
+"""Shared HTTP connection pool for OpenAI-compatible providers.
+
+Each provider (and each DIAL deployment) used to build its own ``httpx`` client
+with default pool limits, so concurrent requests to the same endpoint paid for
+separate TLS handshakes and nobody could tell how many sockets were open. This
+module owns a single pool of connections that every client is built on:
+
+- Providers still create their own lightweight ``httpx.Client`` (for headers,
+  event hooks and timeouts), but pass ``transport=get_http_pool().transport``
+  so connections are pooled and kept alive across providers and deployments
+- Async connections belong to the event loop that opened them, so the async
+  transport keeps one pool per running loop
+- Closing a provider's client leaves the shared pool open; it is closed once
+  on shutdown via ``reset_http_pool()``
+- Pool saturation (requests that had to wait for a free connection) and socket
+  usage are exposed through ``get_http_pool_stats()``
+
+Configuration (environment variables):
+
+    HTTP_POOL_MAX_CONNECTIONS   Maximum open connections (default 100)
+    HTTP_POOL_MAX_KEEPALIVE     Idle connections kept alive for reuse (default 20)
+    HTTP_POOL_KEEPALIVE_EXPIRY  Seconds an idle connection is kept (default 30)
+    HTTP_POOL_HTTP2             Negotiate HTTP/2 where supported (default false,
+                                requires the optional ``h2`` package)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+
+from utils.env import env_float, env_int
+
+try:
+    import h2  # noqa: F401
+
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between "pool saturated" warnings
+_SATURATION_WARNING_INTERVAL = 60.0
+
+
+@dataclass(frozen=True)
+class HTTPPoolSettings:
+    """Limits of the shared connection pool.
+
+    Attributes:
+        max_connections: Maximum number of open connections across all hosts
+        max_keepalive_connections: Idle connections kept alive for reuse
+        keepalive_expiry: Seconds an idle connection is kept before it is closed
+        http2: Whether to negotiate HTTP/2 with servers that support it
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "HTTPPoolSettings":
+        """Build settings from HTTP_POOL_* environment variables"""
+        http2 = os.getenv("HTTP_POOL_HTTP2", "false").lower() in ("true", "1", "yes")
+        if http2 and not HAS_H2:
+            logger.warning("HTTP_POOL_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        return cls(
+            max_connections=max(1, env_int("HTTP_POOL_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=env_int("HTTP_POOL_MAX_KEEPALIVE", cls.max_keepalive_connections),
+            keepalive_expiry=env_float("HTTP_POOL_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            http2=http2,
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class _PoolMetrics:
+    """Thread-safe request counters shared by the sync and async transports"""
+
+    def __init__(self, max_connections: int):
+        self._max_connections = max_connections
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated_requests = 0
+        self._last_warning = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            self.requests += 1
+            # Every connection is busy, so this request queues until one is released
+            saturated = self.in_flight >= self._max_connections
+            if saturated:
+                self.saturated_requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            now = time.monotonic()
+            warn = saturated and now - self._last_warning >= _SATURATION_WARNING_INTERVAL
+            if warn:
+                self._last_warning = now
+        if warn:
+            logger.warning(
+                f"HTTP connection pool saturated: {self.in_flight} requests in flight with "
+                f"{self._max_connections} connections; consider raising HTTP_POOL_MAX_CONNECTIONS"
+            )
+
+    def finish(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _release_once(metrics: _PoolMetrics):
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            metrics.finish()
+
+    return release
+
+
+class _MeteredStream(httpx.SyncByteStream):
+    """Response body that releases its in-flight slot once the body is closed"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncMeteredStream(httpx.AsyncByteStream):
+    """Async response body that releases its in-flight slot once the body is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _metered_response(response: httpx.Response, stream: Any) -> httpx.Response:
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=stream,
+        extensions=response.extensions,
+    )
+
+
+def _connection_counts(transport: Any) -> tuple[int, int]:
+    """Return (open, idle) connection counts of an httpx transport's connection pool"""
+    connections = list(getattr(getattr(transport, "_pool", None), "connections", None) or [])
+    idle = 0
+    for connection in connections:
+        try:
+            idle += bool(connection.is_idle())
+        except Exception:
+            pass
+    return len(connections), idle
+
+
+class SharedHTTPTransport(httpx.BaseTransport):
+    """Synchronous transport over the shared connection pool.
+
+    Clients built on it may be closed freely; the pool itself is only closed by
+    ``shutdown()``.
+    """
+
+    def __init__(self, settings: HTTPPoolSettings, metrics: _PoolMetrics):
+        self._transport = httpx.HTTPTransport(limits=settings.limits(), http2=settings.http2)
+        self._metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._metrics.start()
+        release = _release_once(self._metrics)
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+        return _metered_response(response, _MeteredStream(response.stream, release))
+
+    def close(self) -> None:
+        """Closing a client must not tear down connections other providers are using"""
+
+    def shutdown(self) -> None:
+        self._transport.close()
+
+    def connection_counts(self) -> tuple[int, int]:
+        return _connection_counts(self._transport)
+
+
+class SharedAsyncHTTPTransport(httpx.AsyncBaseTransport):
+    """Asynchronous transport over the shared connection pool.
+
+    Connections cannot be shared between event loops, so one pool is kept per
+    running loop and dropped together with the loop.
+    """
+
+    def __init__(self, settings: HTTPPoolSettings, metrics: _PoolMetrics):
+        self._settings = settings
+        self._metrics = metrics
+        self._lock = threading.Lock()
+        self._transports: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _loop_transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            with self._lock:
+                transport = self._transports.get(loop)
+                if transport is None:
+                    transport = httpx.AsyncHTTPTransport(limits=self._settings.limits(), http2=self._settings.http2)
+                    self._transports[loop] = transport
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._loop_transport()
+        self._metrics.start()
+        release = _release_once(self._metrics)
+        try:
+            response = await transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        return _metered_response(response, _AsyncMeteredStream(response.stream, release))
+
+    async def aclose(self) -> None:
+        """Closing a client must not tear down connections other providers are using"""
+
+    def shutdown(self) -> None:
+        # Async connections can only be closed from their own loop; drop them with the pools
+        with self._lock:
+            self._transports.clear()
+
+    def connection_counts(self) -> tuple[int, int]:
+        with self._lock:
+            transports = list(self._transports.values())
+        counts = [_connection_counts(transport) for transport in transports]
+        return sum(c[0] for c in counts), sum(c[1] for c in counts)
+
+
+class HTTPConnectionPool:
+    """The shared sync and async transports plus their saturation metrics"""
+
+    def __init__(self, settings: Optional[HTTPPoolSettings] = None):
+        self.settings = settings or HTTPPoolSettings.from_env()
+        self._metrics = _PoolMetrics(self.settings.max_connections)
+        self.transport = SharedHTTPTransport(self.settings, self._metrics)
+        self.async_transport = SharedAsyncHTTPTransport(self.settings, self._metrics)
+        logger.debug(
+            f"HTTP connection pool: max_connections={self.settings.max_connections}, "
+            f"max_keepalive={self.settings.max_keepalive_connections}, "
+            f"keepalive_expiry={self.settings.keepalive_expiry}s, http2={self.settings.http2}"
+        )
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return pool limits, request counters and connection usage
+
+        Returns:
+            Dict with the configured limits, total/in-flight/peak request counts,
+            how many requests found the pool saturated, and open/idle connections
+        """
+        open_sync, idle_sync = self.transport.connection_counts()
+        open_async, idle_async = self.async_transport.connection_counts()
+        metrics = self._metrics
+        return {
+            "max_connections": self.settings.max_connections,
+            "max_keepalive_connections": self.settings.max_keepalive_connections,
+            "keepalive_expiry": self.settings.keepalive_expiry,
+            "http2": self.settings.http2,
+            "requests": metrics.requests,
+            "in_flight": metrics.in_flight,
+            "peak_in_flight": metrics.peak_in_flight,
+            "saturated_requests": metrics.saturated_requests,
+            "saturation": metrics.in_flight / self.settings.max_connections,
+            "open_connections": open_sync + open_async,
+            "idle_connections": idle_sync + idle_async,
+        }
+
+    def close(self) -> None:
+        self.transport.shutdown()
+        self.async_transport.shutdown()
+
+
+_pool_instance: Optional[HTTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HTTPConnectionPool:
+    """Get the global connection pool (singleton pattern)"""
+    global _pool_instance
+    if _pool_instance is None:
+        with _pool_lock:
+            if _pool_instance is None:
+                _pool_instance = HTTPConnectionPool()
+    return _pool_instance
+
+
+def get_http_pool_stats() -> dict[str, Any]:
+    """Return statistics of the global connection pool"""
+    return get_http_pool().get_stats()
+
+
+def reset_http_pool() -> None:
+    """Close the global connection pool; the next get_http_pool() builds a new one from the environment"""
+    global _pool_instance
+    with _pool_lock:
+        if _pool_instance is not None:
+            _pool_instance.close()
+            _pool_instance = None
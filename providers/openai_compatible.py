@@ -4,19 +4,31 @@ import copy
 import ipaddress
 import logging
 import os
-import time
 from abc import abstractmethod
+from collections.abc import AsyncIterator
 from typing import Optional
 from urllib.parse import urlparse
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from utils.prompt_cache import (
+    MIN_CACHEABLE_PREFIX_CHARS,
+    cacheable_prefix_chars,
+    is_prompt_cache_enabled,
+    prompt_cache_key,
+    split_cacheable_prefix,
+)
+from utils.tokenizer import count_tokens
 
 from .base import (
     ModelCapabilities,
     ModelProvider,
     ModelResponse,
     ProviderType,
+    StreamChunk,
 )
+from .http_pool import get_http_pool
+from .retry import RetryError
 
 
 class OpenAICompatibleProvider(ModelProvider):
@@ -30,6 +42,10 @@ class OpenAICompatibleProvider(ModelProvider):
 
     DEFAULT_HEADERS = {}
     FRIENDLY_NAME = "OpenAI Compatible"
+    # Whether the endpoint accepts OpenAI's prompt_cache_key routing hint (unknown fields break some servers)
+    SUPPORTS_PROMPT_CACHE_KEY = False
+    # Whether astream_content() may open streaming completions against this endpoint
+    STREAMING_ENABLED = True
 
     def __init__(self, api_key: str, base_url: str = None, **kwargs):
         """Initialize the provider with API key and optional base URL.
@@ -41,6 +57,7 @@ class OpenAICompatibleProvider(ModelProvider):
         """
         super().__init__(api_key, **kwargs)
         self._client = None
+        self._async_client = None
         self.base_url = base_url
         self.organization = kwargs.get("organization")
         self.allowed_models = self._parse_allowed_models()
@@ -197,82 +214,110 @@ class OpenAICompatibleProvider(ModelProvider):
     def client(self):
         """Lazy initialization of OpenAI client with security checks and timeout configuration."""
         if self._client is None:
-            import os
+            self._client = self._create_openai_client(asynchronous=False)
+        return self._client
 
-            import httpx
+    @property
+    def async_client(self):
+        """Lazy initialization of the AsyncOpenAI client used by agenerate_content()."""
+        if self._async_client is None:
+            self._async_client = self._create_openai_client(asynchronous=True)
+        return self._async_client
 
-            # Temporarily disable proxy environment variables to prevent httpx from detecting them
-            original_env = {}
-            proxy_env_vars = ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]
+    def _create_openai_client(self, asynchronous: bool = False):
+        """Create an OpenAI (or AsyncOpenAI) client with a proxy-free httpx client.
 
-            for var in proxy_env_vars:
-                if var in os.environ:
-                    original_env[var] = os.environ[var]
-                    del os.environ[var]
+        The httpx client is built on the shared connection pool (providers/http_pool.py),
+        so connections are reused across provider instances.
 
-            try:
-                # Create a custom httpx client that explicitly avoids proxy parameters
-                timeout_config = (
-                    self.timeout_config
-                    if hasattr(self, "timeout_config") and self.timeout_config
-                    else httpx.Timeout(30.0)
-                )
+        Args:
+            asynchronous: Build an AsyncOpenAI client backed by httpx.AsyncClient
 
-                # Create httpx client with minimal config to avoid proxy conflicts
-                # Note: proxies parameter was removed in httpx 0.28.0
-                # Check for test transport injection
-                if hasattr(self, "_test_transport"):
-                    # Use custom transport for testing (HTTP recording/replay)
-                    http_client = httpx.Client(
-                        transport=self._test_transport,
-                        timeout=timeout_config,
-                        follow_redirects=True,
-                    )
-                else:
-                    # Normal production client
-                    http_client = httpx.Client(
-                        timeout=timeout_config,
-                        follow_redirects=True,
-                    )
-
-                # Keep client initialization minimal to avoid proxy parameter conflicts
-                client_kwargs = {
-                    "api_key": self.api_key,
-                    "http_client": http_client,
-                }
+        Returns:
+            Configured OpenAI or AsyncOpenAI client
+        """
+        import os
 
-                if self.base_url:
-                    client_kwargs["base_url"] = self.base_url
+        import httpx
 
-                if self.organization:
-                    client_kwargs["organization"] = self.organization
+        client_cls = AsyncOpenAI if asynchronous else OpenAI
+        http_client_cls = httpx.AsyncClient if asynchronous else httpx.Client
 
-                # Add default headers if any
-                if self.DEFAULT_HEADERS:
-                    client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
+        # Temporarily disable proxy environment variables to prevent httpx from detecting them
+        original_env = {}
+        proxy_env_vars = ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]
 
-                logging.debug(f"OpenAI client initialized with custom httpx client and timeout: {timeout_config}")
+        for var in proxy_env_vars:
+            if var in os.environ:
+                original_env[var] = os.environ[var]
+                del os.environ[var]
 
-                # Create OpenAI client with custom httpx client
-                self._client = OpenAI(**client_kwargs)
+        try:
+            # Create a custom httpx client that explicitly avoids proxy parameters
+            timeout_config = (
+                self.timeout_config if hasattr(self, "timeout_config") and self.timeout_config else httpx.Timeout(30.0)
+            )
 
-            except Exception as e:
-                # If all else fails, try absolute minimal client without custom httpx
-                logging.warning(f"Failed to create client with custom httpx, falling back to minimal config: {e}")
-                try:
-                    minimal_kwargs = {"api_key": self.api_key}
-                    if self.base_url:
-                        minimal_kwargs["base_url"] = self.base_url
-                    self._client = OpenAI(**minimal_kwargs)
-                except Exception as fallback_error:
-                    logging.error(f"Even minimal OpenAI client creation failed: {fallback_error}")
-                    raise
-            finally:
-                # Restore original proxy environment variables
-                for var, value in original_env.items():
-                    os.environ[var] = value
+            # Create httpx client with minimal config to avoid proxy conflicts
+            # Note: proxies parameter was removed in httpx 0.28.0
+            # Check for test transport injection
+            if hasattr(self, "_test_transport"):
+                # Use custom transport for testing (HTTP recording/replay)
+                http_client = http_client_cls(
+                    transport=self._test_transport,
+                    timeout=timeout_config,
+                    follow_redirects=True,
+                )
+            else:
+                # Normal production client, pooling connections with every other provider
+                pool = get_http_pool()
+                http_client = http_client_cls(
+                    transport=pool.async_transport if asynchronous else pool.transport,
+                    timeout=timeout_config,
+                    follow_redirects=True,
+                )
 
-        return self._client
+            # Keep client initialization minimal to avoid proxy parameter conflicts
+            # Retries are handled by providers/retry.py; disable the SDK's own
+            # retry loop so attempts don't multiply
+            client_kwargs = {
+                "api_key": self.api_key,
+                "http_client": http_client,
+                "max_retries": 0,
+            }
+
+            if self.base_url:
+                client_kwargs["base_url"] = self.base_url
+
+            if self.organization:
+                client_kwargs["organization"] = self.organization
+
+            # Add default headers if any
+            if self.DEFAULT_HEADERS:
+                client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
+
+            logging.debug(
+                f"{client_cls.__name__} client initialized with custom httpx client and timeout: {timeout_config}"
+            )
+
+            # Create OpenAI client with custom httpx client
+            return client_cls(**client_kwargs)
+
+        except Exception as e:
+            # If all else fails, try absolute minimal client without custom httpx
+            logging.warning(f"Failed to create client with custom httpx, falling back to minimal config: {e}")
+            try:
+                minimal_kwargs = {"api_key": self.api_key, "max_retries": 0}
+                if self.base_url:
+                    minimal_kwargs["base_url"] = self.base_url
+                return client_cls(**minimal_kwargs)
+            except Exception as fallback_error:
+                logging.error(f"Even minimal {client_cls.__name__} client creation failed: {fallback_error}")
+                raise
+        finally:
+            # Restore original proxy environment variables
+            for var, value in original_env.items():
+                os.environ[var] = value
 
     def _sanitize_for_logging(self, params: dict) -> dict:
         """Sanitize sensitive data from parameters before logging.
@@ -331,15 +376,8 @@ class OpenAICompatibleProvider(ModelProvider):
 
         return content
 
-    def _generate_with_responses_endpoint(
-        self,
-        model_name: str,
-        messages: list,
-        temperature: float,
-        max_output_tokens: Optional[int] = None,
-        **kwargs,
-    ) -> ModelResponse:
-        """Generate content using the /v1/responses endpoint for o3-pro via OpenAI library."""
+    def _build_responses_params(self, model_name: str, messages: list, max_output_tokens: Optional[int]) -> dict:
+        """Convert chat messages into a /v1/responses request for o3-pro."""
         # Convert messages to the correct format for responses endpoint
         input_messages = []
 
@@ -371,78 +409,102 @@ class OpenAICompatibleProvider(ModelProvider):
 
         # For responses endpoint, we only add parameters that are explicitly supported
         # Remove unsupported chat completion parameters that may cause API errors
+        return completion_params
+
+    def _log_responses_request(self, completion_params: dict) -> None:
+        """Log the sanitized o3-pro payload for debugging."""
+        import json
+
+        sanitized_params = self._sanitize_for_logging(completion_params)
+        logging.info(f"o3-pro API request (sanitized): {json.dumps(sanitized_params, indent=2, ensure_ascii=False)}")
+
+    def _build_responses_model_response(self, response, model_name: str) -> ModelResponse:
+        """Convert a /v1/responses result into a ModelResponse."""
+        # Extract content from responses endpoint format
+        # Use validation helper to safely extract output_text
+        content = self._safe_extract_output_text(response)
+
+        # Try to extract usage information
+        usage = None
+        if hasattr(response, "usage"):
+            usage = self._extract_usage(response)
+        elif hasattr(response, "input_tokens") and hasattr(response, "output_tokens"):
+            # Safely extract token counts with None handling
+            input_tokens = getattr(response, "input_tokens", 0) or 0
+            output_tokens = getattr(response, "output_tokens", 0) or 0
+            usage = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+
+        return ModelResponse(
+            content=content,
+            usage=usage,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "model": getattr(response, "model", model_name),
+                "id": getattr(response, "id", ""),
+                "created": getattr(response, "created_at", 0),
+                "endpoint": "responses",
+            },
+        )
+
+    def _generate_with_responses_endpoint(
+        self,
+        model_name: str,
+        messages: list,
+        temperature: float,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the /v1/responses endpoint for o3-pro via OpenAI library."""
+        completion_params = self._build_responses_params(model_name, messages, max_output_tokens)
 
-        # Retry logic with progressive delays
-        max_retries = 4
-        retry_delays = [1, 3, 5, 8]
-        last_exception = None
-        actual_attempts = 0
+        def _call():
+            # Log sanitized payload for debugging
+            self._log_responses_request(completion_params)
+            return self.client.responses.create(**completion_params)
 
-        for attempt in range(max_retries):
-            try:  # Log sanitized payload for debugging
-                import json
+        try:
+            response = self._call_with_retries(_call, "o3-pro responses endpoint request")
+        except RetryError as e:
+            self._raise_responses_error(e)
 
-                sanitized_params = self._sanitize_for_logging(completion_params)
-                logging.info(
-                    f"o3-pro API request (sanitized): {json.dumps(sanitized_params, indent=2, ensure_ascii=False)}"
-                )
+        return self._build_responses_model_response(response, model_name)
 
-                # Use OpenAI client's responses endpoint
-                response = self.client.responses.create(**completion_params)
-
-                # Extract content from responses endpoint format
-                # Use validation helper to safely extract output_text
-                content = self._safe_extract_output_text(response)
-
-                # Try to extract usage information
-                usage = None
-                if hasattr(response, "usage"):
-                    usage = self._extract_usage(response)
-                elif hasattr(response, "input_tokens") and hasattr(response, "output_tokens"):
-                    # Safely extract token counts with None handling
-                    input_tokens = getattr(response, "input_tokens", 0) or 0
-                    output_tokens = getattr(response, "output_tokens", 0) or 0
-                    usage = {
-                        "input_tokens": input_tokens,
-                        "output_tokens": output_tokens,
-                        "total_tokens": input_tokens + output_tokens,
-                    }
-
-                return ModelResponse(
-                    content=content,
-                    usage=usage,
-                    model_name=model_name,
-                    friendly_name=self.FRIENDLY_NAME,
-                    provider=self.get_provider_type(),
-                    metadata={
-                        "model": getattr(response, "model", model_name),
-                        "id": getattr(response, "id", ""),
-                        "created": getattr(response, "created_at", 0),
-                        "endpoint": "responses",
-                    },
-                )
+    async def _agenerate_with_responses_endpoint(
+        self,
+        model_name: str,
+        messages: list,
+        temperature: float,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of _generate_with_responses_endpoint() using the AsyncOpenAI client."""
+        completion_params = self._build_responses_params(model_name, messages, max_output_tokens)
 
-            except Exception as e:
-                last_exception = e
-
-                # Check if this is a retryable error using structured error codes
-                is_retryable = self._is_error_retryable(e)
-
-                if is_retryable and attempt < max_retries - 1:
-                    delay = retry_delays[attempt]
-                    logging.warning(
-                        f"Retryable error for o3-pro responses endpoint, attempt {actual_attempts}/{max_retries}: {str(e)}. Retrying in {delay}s..."
-                    )
-                    time.sleep(delay)
-                else:
-                    break
-
-        # If we get here, all retries failed
-        error_msg = f"o3-pro responses endpoint error after {actual_attempts} attempt{'s' if actual_attempts > 1 else ''}: {str(last_exception)}"
+        async def _call():
+            self._log_responses_request(completion_params)
+            return await self.async_client.responses.create(**completion_params)
+
+        try:
+            response = await self._acall_with_retries(_call, "o3-pro responses endpoint request")
+        except RetryError as e:
+            self._raise_responses_error(e)
+
+        return self._build_responses_model_response(response, model_name)
+
+    def _raise_responses_error(self, error: RetryError):
+        """Raise the user-facing error once retries for the responses endpoint are exhausted."""
+        attempts = error.attempts
+        error_msg = f"o3-pro responses endpoint error after {attempts} attempt{'s' if attempts > 1 else ''}: {str(error.last_exception)}"
         logging.error(error_msg)
-        raise RuntimeError(error_msg) from last_exception
+        raise RuntimeError(error_msg) from error.last_exception
 
-    def generate_content(
+    def _prepare_completion_request(
         self,
         prompt: str,
         model_name: str,
@@ -451,19 +513,11 @@ class OpenAICompatibleProvider(ModelProvider):
         max_output_tokens: Optional[int] = None,
         images: Optional[list[str]] = None,
         **kwargs,
-    ) -> ModelResponse:
-        """Generate content using the OpenAI-compatible API.
-
-        Args:
-            prompt: User prompt to send to the model
-            model_name: Name of the model to use
-            system_prompt: Optional system prompt for model behavior
-            temperature: Sampling temperature
-            max_output_tokens: Maximum tokens to generate
-            **kwargs: Additional provider-specific parameters
+    ) -> tuple[dict, list, str]:
+        """Validate inputs and build the chat completion request shared by the sync and async paths.
 
         Returns:
-            ModelResponse with generated content and metadata
+            Tuple of (completion_params, messages, resolved_model)
         """
         # Validate model name against allow-list
         if not self.validate_model_name(model_name):
@@ -539,6 +593,91 @@ class OpenAICompatibleProvider(ModelProvider):
                     continue  # Skip unsupported parameters for reasoning models
                 completion_params[key] = value
 
+        if is_prompt_cache_enabled():
+            self._apply_prompt_cache(
+                completion_params, resolved_model, system_prompt, prompt, kwargs.get("cacheable_prefix_length")
+            )
+
+        return completion_params, messages, resolved_model
+
+    def _apply_prompt_cache(
+        self,
+        completion_params: dict,
+        model_name: str,
+        system_prompt: Optional[str],
+        prompt: str,
+        prefix_length: Optional[int],
+    ) -> None:
+        """Add cache hints for the stable start of the request (see utils.prompt_cache).
+
+        The system message and the stable prefix of the prompt already lead the
+        request, which is all automatic prefix caching needs. Endpoints that
+        support it additionally get a prompt_cache_key so requests sharing the
+        prefix are routed to the same cache.
+
+        Args:
+            completion_params: Chat completion request to amend in place
+            model_name: Resolved model name
+            system_prompt: System prompt of the request
+            prompt: User prompt of the request
+            prefix_length: Leading characters of prompt that repeat across calls
+        """
+        if not self.SUPPORTS_PROMPT_CACHE_KEY:
+            return
+        prefix, _ = split_cacheable_prefix(prompt, prefix_length)
+        if cacheable_prefix_chars(system_prompt, prefix) < MIN_CACHEABLE_PREFIX_CHARS:
+            return
+        # Sent via extra_body so older SDKs without the named parameter still pass it through
+        extra_body = completion_params.setdefault("extra_body", {})
+        extra_body["prompt_cache_key"] = prompt_cache_key(model_name, system_prompt, prefix)
+
+    def _build_chat_model_response(self, response, model_name: str) -> ModelResponse:
+        """Convert a chat completion result into a ModelResponse."""
+        # Extract content and usage
+        content = response.choices[0].message.content
+        usage = self._extract_usage(response)
+
+        return ModelResponse(
+            content=content,
+            usage=usage,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "finish_reason": response.choices[0].finish_reason,
+                "model": response.model,  # Actual model used
+                "id": response.id,
+                "created": response.created,
+            },
+        )
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the OpenAI-compatible API.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        completion_params, messages, resolved_model = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
+
         # Check if this is o3-pro and needs the responses endpoint
         if resolved_model == "o3-pro":
             # This model requires the /v1/responses endpoint
@@ -551,68 +690,163 @@ class OpenAICompatibleProvider(ModelProvider):
                 **kwargs,
             )
 
-        # Retry logic with progressive delays
-        max_retries = 4  # Total of 4 attempts
-        retry_delays = [1, 3, 5, 8]  # Progressive delays: 1s, 3s, 5s, 8s
+        try:
+            response = self._call_with_retries(
+                lambda: self.client.chat.completions.create(**completion_params),
+                f"{self.FRIENDLY_NAME} request for model {model_name}",
+            )
+        except RetryError as e:
+            self._raise_generation_error(model_name, e)
 
-        last_exception = None
-        actual_attempts = 0
+        return self._build_chat_model_response(response, model_name)
 
-        for attempt in range(max_retries):
-            actual_attempts = attempt + 1  # Convert from 0-based index to human-readable count
-            try:
-                # Generate completion
-                response = self.client.chat.completions.create(**completion_params)
-
-                # Extract content and usage
-                content = response.choices[0].message.content
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=content,
-                    usage=usage,
-                    model_name=model_name,
-                    friendly_name=self.FRIENDLY_NAME,
-                    provider=self.get_provider_type(),
-                    metadata={
-                        "finish_reason": response.choices[0].finish_reason,
-                        "model": response.model,  # Actual model used
-                        "id": response.id,
-                        "created": response.created,
-                    },
-                )
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the AsyncOpenAI client without blocking the event loop.
 
-            except Exception as e:
-                last_exception = e
+        Accepts the same arguments as generate_content().
+        """
+        completion_params, messages, resolved_model = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
+
+        if resolved_model == "o3-pro":
+            return await self._agenerate_with_responses_endpoint(
+                model_name=resolved_model,
+                messages=messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                **kwargs,
+            )
 
-                # Check if this is a retryable error using structured error codes
-                is_retryable = self._is_error_retryable(e)
+        async def _call():
+            return await self.async_client.chat.completions.create(**completion_params)
 
-                # If this is the last attempt or not retryable, give up
-                if attempt == max_retries - 1 or not is_retryable:
-                    break
+        try:
+            response = await self._acall_with_retries(_call, f"{self.FRIENDLY_NAME} request for model {model_name}")
+        except RetryError as e:
+            self._raise_generation_error(model_name, e)
 
-                # Get progressive delay
-                delay = retry_delays[attempt]
+        return self._build_chat_model_response(response, model_name)
 
-                # Log retry attempt
-                logging.warning(
-                    f"{self.FRIENDLY_NAME} error for model {model_name}, attempt {actual_attempts}/{max_retries}: {str(e)}. Retrying in {delay}s..."
-                )
-                time.sleep(delay)
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream a chat completion, yielding text deltas and finally the complete response.
+
+        Accepts the same arguments as generate_content(). o3-pro (responses endpoint),
+        requests answered by the response cache and models or providers that do not
+        stream (see _should_stream) are answered by agenerate_content() in one chunk.
+        """
+        model_name = self._resolve_model_name(model_name)
+        if not self._should_stream(model_name, temperature, kwargs):
+            async for chunk in super().astream_content(
+                prompt, model_name, system_prompt, temperature, max_output_tokens, images=images, **kwargs
+            ):
+                yield chunk
+            return
+
+        completion_params, _, _ = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
+        completion_params["stream"] = True
+        completion_params["stream_options"] = {"include_usage": True}
+        client = self._get_async_streaming_client(completion_params["model"])
+
+        async def _call():
+            return await client.chat.completions.create(**completion_params)
 
-        # If we get here, all retries failed
-        error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name} after {actual_attempts} attempt{'s' if actual_attempts > 1 else ''}: {str(last_exception)}"
+        # Only opening the stream is retried; a failure mid-stream surfaces to the caller
+        try:
+            stream = await self._acall_with_retries(
+                _call, f"{self.FRIENDLY_NAME} streaming request for model {model_name}"
+            )
+        except RetryError as e:
+            self._raise_generation_error(model_name, e)
+
+        parts = []
+        usage = {}
+        finish_reason = None
+        last_event = None
+        try:
+            async for event in stream:
+                last_event = event
+                text = ""
+                if event.choices:
+                    choice = event.choices[0]
+                    text = getattr(choice.delta, "content", None) or ""
+                    finish_reason = choice.finish_reason or finish_reason
+                event_usage = self._extract_usage(event)
+                if event_usage:
+                    usage = event_usage
+                if text:
+                    parts.append(text)
+                if text or event_usage:
+                    yield StreamChunk(text=text, usage=event_usage or None)
+        finally:
+            # Closing the connection stops the generation when the consumer gives up early
+            await stream.close()
+
+        response = ModelResponse(
+            content="".join(parts),
+            usage=usage,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "finish_reason": finish_reason,
+                "model": getattr(last_event, "model", model_name),
+                "id": getattr(last_event, "id", ""),
+                "created": getattr(last_event, "created", 0),
+                "streamed": True,
+            },
+        )
+        yield StreamChunk(usage=usage or None, response=response)
+
+    def _should_stream(self, model_name: str, temperature: float, params: dict) -> bool:
+        """Whether astream_content() should open a streaming completion for this request."""
+        if not self.STREAMING_ENABLED or params.get("stream") is False:
+            return False
+        if model_name == "o3-pro" or self._uses_response_cache(temperature, params):
+            return False
+        try:
+            return self.get_capabilities(model_name).supports_streaming
+        except Exception as e:
+            logging.debug(f"Could not check streaming support for {model_name}: {e}")
+            return False
+
+    def _get_async_streaming_client(self, resolved_model: str):
+        """Async client that streaming completions for resolved_model are sent to."""
+        return self.async_client
+
+    def _raise_generation_error(self, model_name: str, error: RetryError):
+        """Raise the user-facing error once retries for a chat completion are exhausted."""
+        attempts = error.attempts
+        error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name} after {attempts} attempt{'s' if attempts > 1 else ''}: {str(error.last_exception)}"
         logging.error(error_msg)
-        raise RuntimeError(error_msg) from last_exception
+        raise RuntimeError(error_msg) from error.last_exception
 
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text.
 
         Uses a layered approach:
         1. Try provider-specific token counting endpoint
-        2. Try tiktoken for known model families
-        3. Fall back to character-based estimation
+        2. Count locally with the tokenizer service (falls back to character-based estimation)
 
         Args:
             text: Text to count tokens for
@@ -628,27 +862,10 @@ class OpenAICompatibleProvider(ModelProvider):
             except Exception as e:
                 logging.debug(f"Remote token counting failed: {e}")
 
-        # 2. Try tiktoken for known models
-        try:
-            import tiktoken
-
-            # Try to get encoding for the specific model
-            try:
-                encoding = tiktoken.encoding_for_model(model_name)
-            except KeyError:
-                encoding = tiktoken.get_encoding("cl100k_base")
-
-            return len(encoding.encode(text))
-
-        except (ImportError, Exception) as e:
-            logging.debug(f"Tiktoken not available or failed: {e}")
-
-        # 3. Fall back to character-based estimation
-        logging.warning(
-            f"No specific tokenizer available for '{model_name}'. "
-            "Using character-based estimation (~4 chars per token)."
-        )
-        return len(text) // 4
+        # 2. Count locally with the shared tokenizer service: cached encoders and
+        #    memoized counts, exact for OpenAI families, approximate for others and
+        #    character-based (~4 chars per token) when tiktoken is not installed
+        return count_tokens(text, self._resolve_model_name(model_name))
 
     def validate_parameters(self, model_name: str, temperature: float, **kwargs) -> None:
         """Validate model parameters.
@@ -694,6 +911,12 @@ class OpenAICompatibleProvider(ModelProvider):
             usage["output_tokens"] = getattr(response.usage, "completion_tokens", 0) or 0
             usage["total_tokens"] = getattr(response.usage, "total_tokens", 0) or 0
 
+            # Prompt tokens served from the provider's prefix cache
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            cached_tokens = getattr(details, "cached_tokens", None)
+            if isinstance(cached_tokens, int) and not isinstance(cached_tokens, bool) and cached_tokens > 0:
+                usage["cached_input_tokens"] = cached_tokens
+
         return usage
 
     @abstractmethod
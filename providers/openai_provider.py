@@ -20,6 +20,8 @@ logger = logging.getLogger(__name__)
 class OpenAIModelProvider(OpenAICompatibleProvider):
     """Official OpenAI API provider (api.openai.com)."""
 
+    SUPPORTS_PROMPT_CACHE_KEY = True
+
     # Model configurations using ModelCapabilities objects
     SUPPORTED_MODELS = {
         "gpt-5": ModelCapabilities(
@@ -257,6 +259,27 @@ class OpenAIModelProvider(OpenAICompatibleProvider):
             **kwargs,
         )
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of generate_content() with the same model name resolution."""
+        resolved_model_name = self._resolve_model_name(model_name)
+
+        return await super().agenerate_content(
+            prompt=prompt,
+            model_name=resolved_model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
     def supports_thinking_mode(self, model_name: str) -> bool:
         """Check if the model supports extended thinking mode."""
         # GPT-5 models support reasoning tokens (extended thinking)
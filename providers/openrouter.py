@@ -4,6 +4,8 @@ import logging
 import os
 from typing import Optional
 
+from utils.prompt_cache import MIN_CACHEABLE_PREFIX_CHARS, cacheable_prefix_chars, split_cacheable_prefix
+
 from .base import (
     ModelCapabilities,
     ModelResponse,
@@ -29,6 +31,9 @@ class OpenRouterProvider(OpenAICompatibleProvider):
         "X-Title": os.getenv("OPENROUTER_TITLE", "Zen MCP Server"),
     }
 
+    # Streaming stays off for OpenRouter, matching generate_content()
+    STREAMING_ENABLED = False
+
     # Model registry for managing configurations and aliases
     _registry: Optional[OpenRouterModelRegistry] = None
 
@@ -193,6 +198,65 @@ class OpenRouterProvider(OpenAICompatibleProvider):
             **kwargs,
         )
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of generate_content() for the OpenRouter API."""
+        resolved_model = self._resolve_model_name(model_name)
+
+        # Always disable streaming for OpenRouter (see generate_content)
+        if "stream" not in kwargs:
+            kwargs["stream"] = False
+
+        return await super().agenerate_content(
+            prompt=prompt,
+            model_name=resolved_model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    def _apply_prompt_cache(
+        self,
+        completion_params: dict,
+        model_name: str,
+        system_prompt: Optional[str],
+        prompt: str,
+        prefix_length: Optional[int],
+    ) -> None:
+        """Mark the stable start of the request with Anthropic cache_control breakpoints.
+
+        OpenAI, Gemini and most other upstream models cache prompt prefixes
+        automatically; Anthropic models only cache up to an explicit breakpoint.
+        Breakpoints go after the system prompt and after the stable prefix of the
+        user prompt (Anthropic allows up to four per request).
+        """
+        if not model_name.startswith("anthropic/"):
+            return
+        prefix, remainder = split_cacheable_prefix(prompt, prefix_length)
+        if cacheable_prefix_chars(system_prompt, prefix) < MIN_CACHEABLE_PREFIX_CHARS:
+            return
+
+        cache_control = {"type": "ephemeral"}
+        for message in completion_params["messages"]:
+            if message["role"] == "system" and isinstance(message["content"], str):
+                message["content"] = [{"type": "text", "text": message["content"], "cache_control": cache_control}]
+            elif message["role"] == "user" and prefix:
+                parts = [{"type": "text", "text": prefix, "cache_control": cache_control}]
+                if remainder:
+                    parts.append({"type": "text", "text": remainder})
+                if isinstance(message["content"], list):
+                    # Keep the images that follow the prompt text
+                    parts.extend(part for part in message["content"] if part.get("type") != "text")
+                message["content"] = parts
+
     def supports_thinking_mode(self, model_name: str) -> bool:
         """Check if the model supports extended thinking mode.
 
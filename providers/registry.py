@@ -3,6 +3,10 @@
 import json
 import logging
 import os
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Optional
 
 from .base import ModelProvider, ProviderType
@@ -11,10 +15,38 @@ if TYPE_CHECKING:
     from tools.models import ToolModelCategory
 
 
+@dataclass(frozen=True)
+class ModelCatalog:
+    """Immutable snapshot of the models available from configured providers.
+
+    Restrictions are already applied. A new catalog (with a higher version) is built
+    whenever providers or restrictions change, so callers can key derived data such
+    as tool schemas on the version.
+
+    Attributes:
+        version: Increases every time the catalog is rebuilt
+        models: Read-only mapping of model name (or alias) to provider type
+        allowed_by_provider: Canonical model names each provider may serve under the restrictions,
+            filled in on first use by get_preferred_fallback_model()
+    """
+
+    version: int
+    models: Mapping[str, ProviderType]
+    allowed_by_provider: dict[ProviderType, tuple[str, ...]] = field(default_factory=dict)
+
+    def model_names(self, provider_type: Optional[ProviderType] = None) -> list[str]:
+        """Return model names, optionally only those served by provider_type"""
+        if provider_type:
+            return [name for name, ptype in self.models.items() if ptype == provider_type]
+        return list(self.models)
+
+
 class ModelProviderRegistry:
     """Registry for managing model providers."""
 
     _instance = None
+    _catalog_lock = threading.Lock()
+    _catalog_version = 0
 
     # Provider priority order for model selection
     # Native APIs first, then custom endpoints, then catch-all providers
@@ -35,6 +67,10 @@ class ModelProviderRegistry:
             # Initialize instance dictionaries on first creation
             cls._instance._providers = {}
             cls._instance._initialized_providers = {}
+            cls._instance._model_index = {}
+            cls._instance._model_index_key = None
+            cls._instance._model_catalog = None
+            cls._instance._model_catalog_key = None
             logging.debug(f"REGISTRY: Created instance {cls._instance}")
         return cls._instance
 
@@ -48,6 +84,7 @@ class ModelProviderRegistry:
         """
         instance = cls()
         instance._providers[provider_type] = provider_class
+        cls._invalidate_model_caches()
 
     @classmethod
     def get_provider(cls, provider_type: ProviderType, force_new: bool = False) -> Optional[ModelProvider]:
@@ -100,8 +137,9 @@ class ModelProviderRegistry:
             # Initialize non-custom provider with just API key
             provider = provider_class(api_key=api_key)
 
-        # Cache the instance
+        # Cache the instance; a new provider may claim models that used to resolve elsewhere
         instance._initialized_providers[provider_type] = provider
+        cls._invalidate_model_caches()
 
         return provider
 
@@ -114,34 +152,141 @@ class ModelProviderRegistry:
         2. CUSTOM - For local/private models with specific endpoints
         3. OPENROUTER - Catch-all for cloud models via unified API
 
+        Resolutions (including "no provider") are memoized in a model index, so
+        repeated lookups of a name are a dictionary hit rather than a walk over
+        every provider's validate_model_name().
+
         Args:
             model_name: Name of the model (e.g., "gemini-2.5-flash", "gpt5")
 
         Returns:
             ModelProvider instance that supports this model
         """
-        logging.debug(f"get_provider_for_model called with model_name='{model_name}'")
+        index = cls._current_model_index()
+        if model_name in index:
+            provider_type = index[model_name]
+            if provider_type is None:
+                return None
+            provider = cls.get_provider(provider_type)
+            if provider is not None:
+                return provider
+
+        provider_type, provider = cls._resolve_provider_for_model(model_name)
+        index[model_name] = provider_type
+        return provider
 
-        # Check providers in priority order
+    @classmethod
+    def _resolve_provider_for_model(cls, model_name: str) -> tuple[Optional[ProviderType], Optional[ModelProvider]]:
+        """Walk providers in priority order and return the first that validates model_name."""
         instance = cls()
-        logging.debug(f"Registry instance: {instance}")
-        logging.debug(f"Available providers in registry: {list(instance._providers.keys())}")
+        logging.debug(f"Resolving provider for model '{model_name}'")
 
         for provider_type in cls.PROVIDER_PRIORITY_ORDER:
             if provider_type in instance._providers:
-                logging.debug(f"Found {provider_type} in registry")
                 # Get or create provider instance
                 provider = cls.get_provider(provider_type)
                 if provider and provider.validate_model_name(model_name):
                     logging.debug(f"{provider_type} validates model {model_name}")
-                    return provider
-                else:
-                    logging.debug(f"{provider_type} does not validate model {model_name}")
-            else:
-                logging.debug(f"{provider_type} not found in registry")
+                    return provider_type, provider
 
         logging.debug(f"No provider found for model {model_name}")
-        return None
+        return None, None
+
+    @classmethod
+    def _current_model_index(cls) -> dict[str, Optional[ProviderType]]:
+        """Return the model index, starting a new one if providers or restrictions changed."""
+        instance = cls()
+        key = cls._registry_state_key()
+        if key != instance._model_index_key:
+            instance._model_index = {}
+            instance._model_index_key = key
+        return instance._model_index
+
+    @classmethod
+    def build_model_index(cls) -> int:
+        """Precompute provider resolution for every model name and alias the providers list.
+
+        Called once providers are configured so per-request lookups never walk the providers.
+
+        Returns:
+            Number of names indexed
+        """
+        cls.invalidate_model_index()
+        instance = cls()
+        names = []
+        for provider_type in cls.PROVIDER_PRIORITY_ORDER:
+            if provider_type not in instance._providers:
+                continue
+            provider = cls.get_provider(provider_type)
+            if not provider:
+                continue
+            try:
+                names.extend(provider.list_models(respect_restrictions=True))
+            except NotImplementedError:
+                continue
+
+        # Resolve through the regular walk so the index agrees with priority order exactly
+        index = cls._current_model_index()
+        for model_name in names:
+            if model_name not in index:
+                index[model_name] = cls._resolve_provider_for_model(model_name)[0]
+
+        logging.debug(f"Model index built with {len(index)} names")
+        return len(index)
+
+    @classmethod
+    def invalidate_model_index(cls) -> None:
+        """Forget memoized model resolutions (after providers or restrictions change)."""
+        instance = cls()
+        instance._model_index = {}
+        instance._model_index_key = None
+
+    @classmethod
+    def get_model_catalog(cls) -> ModelCatalog:
+        """Return the catalog of available models, rebuilding it if providers or restrictions changed.
+
+        Schema generation, auto mode and error messages all read the same catalog, so
+        the providers' list_models() run once per configuration rather than per call.
+        """
+        instance = cls()
+        catalog = instance._model_catalog
+        if catalog is not None and instance._model_catalog_key == cls._registry_state_key():
+            return catalog
+
+        with cls._catalog_lock:
+            catalog = instance._model_catalog
+            if catalog is not None and instance._model_catalog_key == cls._registry_state_key():
+                return catalog
+            models = cls._collect_available_models(respect_restrictions=True)
+            ModelProviderRegistry._catalog_version += 1
+            catalog = ModelCatalog(version=ModelProviderRegistry._catalog_version, models=MappingProxyType(models))
+            # Collecting may initialize providers, so take the key afterwards
+            instance._model_catalog = catalog
+            instance._model_catalog_key = cls._registry_state_key()
+            logging.debug(f"Model catalog v{catalog.version} built with {len(models)} models")
+            return catalog
+
+    @classmethod
+    def invalidate_model_catalog(cls) -> None:
+        """Drop the cached model catalog so the next lookup rebuilds it."""
+        instance = cls()
+        instance._model_catalog = None
+        instance._model_catalog_key = None
+
+    @classmethod
+    def _invalidate_model_caches(cls) -> None:
+        cls.invalidate_model_index()
+        cls.invalidate_model_catalog()
+
+    @classmethod
+    def _registry_state_key(cls) -> tuple:
+        """Identify the provider and restriction configuration the model caches were built for."""
+        from utils.model_restrictions import get_restriction_service
+
+        instance = cls()
+        # Providers are normally changed through the registry methods (which invalidate the
+        # caches), but the restriction service can be replaced underneath us
+        return (get_restriction_service(), len(instance._providers), len(instance._initialized_providers))
 
     @classmethod
     def get_available_providers(cls) -> list[ProviderType]:
@@ -159,6 +304,13 @@ class ModelProviderRegistry:
         Returns:
             Dict mapping model names to provider types
         """
+        if respect_restrictions:
+            return dict(cls.get_model_catalog().models)
+        return cls._collect_available_models(respect_restrictions=False)
+
+    @classmethod
+    def _collect_available_models(cls, respect_restrictions: bool) -> dict[str, ProviderType]:
+        """Ask every configured provider for its models."""
         # Import here to avoid circular imports
         from utils.model_restrictions import get_restriction_service
 
@@ -211,14 +363,7 @@ class ModelProviderRegistry:
         Returns:
             List of available model names
         """
-        available_models = cls.get_available_models(respect_restrictions=True)
-
-        if provider_type:
-            # Filter by specific provider
-            return [name for name, ptype in available_models.items() if ptype == provider_type]
-        else:
-            # Return all available models
-            return list(available_models.keys())
+        return cls.get_model_catalog().model_names(provider_type)
 
     @classmethod
     def _get_api_key_for_provider(cls, provider_type: ProviderType) -> Optional[str]:
@@ -299,13 +444,18 @@ class ModelProviderRegistry:
 
         effective_category = tool_category or ToolModelCategory.BALANCED
         first_available_model = None
+        catalog = cls.get_model_catalog()
 
         # Ask each provider for their preference in priority order
         for provider_type in cls.PROVIDER_PRIORITY_ORDER:
             provider = cls.get_provider(provider_type)
             if provider:
-                # 1. Registry filters the models first
-                allowed_models = cls._get_allowed_models_for_provider(provider, provider_type)
+                # 1. Registry filters the models first (once per catalog version)
+                allowed = catalog.allowed_by_provider.get(provider_type)
+                if allowed is None:
+                    allowed = tuple(cls._get_allowed_models_for_provider(provider, provider_type))
+                    catalog.allowed_by_provider[provider_type] = allowed
+                allowed_models = list(allowed)
 
                 if not allowed_models:
                     continue
@@ -351,6 +501,7 @@ class ModelProviderRegistry:
         """Clear cached provider instances."""
         instance = cls()
         instance._initialized_providers.clear()
+        cls._invalidate_model_caches()
 
     @classmethod
     def reset_for_testing(cls) -> None:
@@ -369,6 +520,7 @@ class ModelProviderRegistry:
         instance = cls()
         instance._providers.pop(provider_type, None)
         instance._initialized_providers.pop(provider_type, None)
+        cls._invalidate_model_caches()
 
 
 # Load _ModelLibrary.json for upstream_provider checks
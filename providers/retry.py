@@ -0,0 +1,268 @@
+"""Shared retry/backoff engine for model providers.
+
+Every provider used to carry its own ``retry_delays = [1, 3, 5, 8]`` loop with
+``time.sleep``. This module replaces those loops with a single policy:
+
+- Jittered exponential backoff, so concurrent failures against the same
+  endpoint do not retry in lock-step (thundering herd)
+- ``Retry-After`` / ``retry-after-ms`` headers and Gemini ``RetryInfo`` hints
+  take precedence over the computed delay
+- A per-provider retry budget (token bucket) caps how many retries a failing
+  provider may issue, so an outage does not multiply load or tie up the server
+- Error classification stays with each provider's ``_is_error_retryable`` hook
+
+``retry_call`` is the synchronous entry point and ``aretry_call`` awaits
+``asyncio.sleep`` between attempts so the event loop keeps serving other requests.
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import re
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Optional, TypeVar
+
+from utils.env import env_float
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upper bound for server-provided Retry-After hints; anything longer is treated as "give up"
+MAX_RETRY_AFTER_SECONDS = env_float("PROVIDER_MAX_RETRY_AFTER", 60.0)
+
+# Per-provider retry budget: bucket size and refill rate (tokens per second)
+DEFAULT_RETRY_BUDGET = env_float("PROVIDER_RETRY_BUDGET", 20.0)
+DEFAULT_RETRY_BUDGET_REFILL = env_float("PROVIDER_RETRY_BUDGET_REFILL", 0.5)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Backoff parameters for provider calls.
+
+    Attributes:
+        max_attempts: Total attempts including the first call
+        base_delay: Nominal delay before the first retry, in seconds
+        multiplier: Exponential growth factor between retries
+        max_delay: Cap for the computed (non Retry-After) delay
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    multiplier: float = 2.0
+    max_delay: float = 8.0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Return the jittered delay to wait after the given (1-based) failed attempt.
+
+        Uses "equal jitter": half of the exponential delay is kept and the other half
+        is randomised, which spreads retries out while guaranteeing some backoff.
+        """
+        nominal = min(self.max_delay, self.base_delay * (self.multiplier ** (attempt - 1)))
+        half = nominal / 2
+        return half + random.uniform(0, half)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class RetryBudget:
+    """Token bucket limiting how many retries a provider may issue.
+
+    Each retry consumes one token; tokens refill continuously up to ``capacity``.
+    First attempts are never limited - only retries draw from the budget.
+    """
+
+    def __init__(
+        self,
+        capacity: float = DEFAULT_RETRY_BUDGET,
+        refill_per_second: float = DEFAULT_RETRY_BUDGET_REFILL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Consume one retry token if available."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available (for diagnostics)."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+_budgets: dict[str, RetryBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_retry_budget(key: str) -> RetryBudget:
+    """Return the shared retry budget for a provider (created on first use)."""
+    with _budgets_lock:
+        budget = _budgets.get(key)
+        if budget is None:
+            budget = RetryBudget()
+            _budgets[key] = budget
+        return budget
+
+
+def reset_retry_budgets() -> None:
+    """Drop all retry budgets (used by tests)."""
+    with _budgets_lock:
+        _budgets.clear()
+
+
+class RetryError(Exception):
+    """Raised when a call is not retried any further.
+
+    Attributes:
+        last_exception: The exception raised by the final attempt
+        attempts: Number of attempts made
+        retryable: Whether the final error was classified as retryable
+        budget_exhausted: True if retries stopped because the provider budget ran out
+    """
+
+    def __init__(self, last_exception: Exception, attempts: int, retryable: bool, budget_exhausted: bool = False):
+        super().__init__(str(last_exception))
+        self.last_exception = last_exception
+        self.attempts = attempts
+        self.retryable = retryable
+        self.budget_exhausted = budget_exhausted
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse durations such as ``"30s"``, ``"1.5s"`` or ``"250ms"``."""
+    match = re.fullmatch(r"\s*([\d.]+)\s*(ms|s)?\s*", value)
+    if not match:
+        return None
+    amount = float(match.group(1))
+    return amount / 1000 if match.group(2) == "ms" else amount
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Extract a server-provided retry delay from an SDK exception, if any.
+
+    Checks ``retry-after-ms`` and ``retry-after`` (seconds or HTTP date) on the
+    attached HTTP response, then Gemini-style ``RetryInfo.retryDelay`` details.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms:
+                return float(retry_after_ms) / 1000
+
+            retry_after = headers.get("retry-after")
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    retry_at = email.utils.parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError, AttributeError):
+            pass
+
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []) or []:
+            if isinstance(detail, dict) and "retryDelay" in detail:
+                return _parse_duration(str(detail["retryDelay"]))
+
+    return None
+
+
+def _plan_retry(
+    error: Exception,
+    attempt: int,
+    policy: RetryPolicy,
+    is_retryable: Callable[[Exception], bool],
+    budget: Optional[RetryBudget],
+    description: str,
+) -> float:
+    """Return the delay before the next attempt, or raise RetryError to stop."""
+    retryable = is_retryable(error)
+    if not retryable or attempt >= policy.max_attempts:
+        raise RetryError(error, attempt, retryable) from error
+
+    retry_after = get_retry_after(error)
+    if retry_after is not None and retry_after > MAX_RETRY_AFTER_SECONDS:
+        logger.warning(f"{description}: server asked to retry after {retry_after:.0f}s, giving up")
+        raise RetryError(error, attempt, retryable) from error
+
+    if budget is not None and not budget.try_acquire():
+        logger.warning(f"{description}: retry budget exhausted, not retrying: {error}")
+        raise RetryError(error, attempt, retryable, budget_exhausted=True) from error
+
+    delay = retry_after if retry_after is not None else policy.backoff_delay(attempt)
+    logger.warning(
+        f"{description} failed, attempt {attempt}/{policy.max_attempts}: {error}. Retrying in {delay:.1f}s..."
+    )
+    return delay
+
+
+def retry_call(
+    fn: Callable[[], T],
+    *,
+    is_retryable: Callable[[Exception], bool],
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    budget: Optional[RetryBudget] = None,
+    description: str = "Provider request",
+) -> T:
+    """Call ``fn`` with retries, blocking between attempts.
+
+    Raises:
+        RetryError: When the error is not retryable, attempts or budget are exhausted
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn()
+        except Exception as e:
+            delay = _plan_retry(e, attempt, policy, is_retryable, budget, description)
+        time.sleep(delay)
+
+
+async def aretry_call(
+    fn: Callable[[], Awaitable[Any]],
+    *,
+    is_retryable: Callable[[Exception], bool],
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    budget: Optional[RetryBudget] = None,
+    description: str = "Provider request",
+) -> Any:
+    """Await ``fn()`` with retries, yielding to the event loop between attempts.
+
+    Raises:
+        RetryError: When the error is not retryable, attempts or budget are exhausted
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await fn()
+        except Exception as e:
+            delay = _plan_retry(e, attempt, policy, is_retryable, budget, description)
+        await asyncio.sleep(delay)
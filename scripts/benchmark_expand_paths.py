@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark expand_paths against the previous os.walk-based implementation
+
+Usage:
+    python scripts/benchmark_expand_paths.py [DIRECTORY] [--repeat N] [--workers N ...]
+
+Without a directory a synthetic tree is generated in a temporary directory.
+Timings are the best of N runs. Cold runs clear the directory index first;
+the "indexed" row shows repeated expansion of an unchanged tree. Note that
+the current implementation also applies .gitignore rules, so file counts can
+differ on real repositories; set EXPAND_PATHS_RESPECT_GITIGNORE=false for a
+like-for-like comparison.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import file_utils  # noqa: E402
+from utils.directory_index import get_directory_index  # noqa: E402
+from utils.file_types import CODE_EXTENSIONS  # noqa: E402
+from utils.security_config import EXCLUDED_DIRS  # noqa: E402
+
+
+def legacy_expand_paths(paths: list[str], extensions: set[str] = CODE_EXTENSIONS) -> list[str]:
+    """The os.walk traversal expand_paths used before the scandir walker"""
+    expanded_files = []
+    seen = set()
+    for path in paths:
+        path_obj = Path(path).resolve()
+        for root, dirs, files in os.walk(path_obj):
+            original_dirs = dirs[:]
+            dirs[:] = []
+            for d in original_dirs:
+                if d.startswith(".") or d in EXCLUDED_DIRS:
+                    continue
+                if file_utils.is_mcp_directory(Path(root) / d):
+                    continue
+                dirs.append(d)
+            for file in files:
+                if file.startswith("."):
+                    continue
+                file_path = Path(root) / file
+                if not extensions or file_path.suffix.lower() in extensions:
+                    full_path = str(file_path)
+                    if full_path not in seen:
+                        expanded_files.append(full_path)
+                        seen.add(full_path)
+    expanded_files.sort()
+    return expanded_files
+
+
+def build_tree(root: Path, depth: int = 4, breadth: int = 6, files_per_dir: int = 20) -> None:
+    """Create a synthetic source tree of breadth**depth directories"""
+    suffixes = [".py", ".js", ".md", ".png", ".txt"]
+    directories = [root]
+    for _ in range(depth):
+        next_level = []
+        for directory in directories:
+            for i in range(breadth):
+                child = directory / f"pkg_{i}"
+                child.mkdir()
+                next_level.append(child)
+            for i in range(files_per_dir):
+                (directory / f"file_{i}{suffixes[i % len(suffixes)]}").touch()
+        directories = next_level
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "index.js").touch()
+    # Backdate directories so the index does not treat them as just modified
+    past = time.time() - 60
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (past, past))
+
+
+def best_of(repeat: int, func, *args) -> tuple[float, list[str]]:
+    best = float("inf")
+    result: list[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", help="Directory to expand (default: synthetic tree)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant (best is reported)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8], help="EXPAND_PATHS_WORKERS values")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.directory:
+            target = str(Path(args.directory).resolve())
+        else:
+            build_tree(Path(tmp))
+            target = str(Path(tmp).resolve())
+
+        legacy_time, legacy_files = best_of(args.repeat, legacy_expand_paths, [target])
+        print(f"{'os.walk (legacy)':<24} {legacy_time * 1000:9.1f} ms  {len(legacy_files):7d} files")
+
+        def cold_expand(paths: list[str]) -> list[str]:
+            get_directory_index().clear()
+            return file_utils.expand_paths(paths)
+
+        def report(label: str, elapsed: float, files: list[str]) -> None:
+            speedup = legacy_time / elapsed if elapsed else float("inf")
+            print(f"{label:<24} {elapsed * 1000:9.1f} ms  {len(files):7d} files  {speedup:5.2f}x")
+
+        for workers in args.workers:
+            file_utils.EXPAND_PATHS_WORKERS = workers
+            file_utils._walk_executor = None
+            report(f"scandir (workers={workers})", *best_of(args.repeat, cold_expand, [target]))
+
+        file_utils.EXPAND_PATHS_WORKERS = 1
+        file_utils.expand_paths([target])
+        report("scandir (indexed)", *best_of(args.repeat, file_utils.expand_paths, [target]))
+
+
+if __name__ == "__main__":
+    main()
@@ -81,6 +81,9 @@ from tools import (  # noqa: E402
     VersionTool,
 )
 from tools.models import ToolOutput  # noqa: E402
+from tools.shared.execution_context import tool_execution_scope  # noqa: E402
+from utils.file_manifest import file_manifest_scope  # noqa: E402
+from utils.progress import progress_reporter_for_request, progress_scope  # noqa: E402
 
 # Configure logging for server operations
 # Can be controlled via LOG_LEVEL environment variable (DEBUG, INFO, WARNING, ERROR)
@@ -527,6 +530,10 @@ def configure_providers():
                     except Exception:
                         # Logger might be closed during shutdown
                         pass
+            # Providers leave the shared connection pool open; close it last
+            from providers.http_pool import reset_http_pool
+
+            reset_http_pool()
         except Exception:
             # Silently ignore any errors during cleanup
             pass
@@ -558,6 +565,13 @@ def configure_providers():
     else:
         logger.info("No model restrictions configured - all models allowed")
 
+    # Resolve every known model name and alias up front so requests never walk the providers
+    indexed = ModelProviderRegistry.build_model_index()
+    logger.debug(f"Indexed {indexed} model names across configured providers")
+    # Build the model catalog shared by tool schemas and auto mode before the first tools/list
+    catalog = ModelProviderRegistry.get_model_catalog()
+    logger.debug(f"Model catalog v{catalog.version}: {len(catalog.models)} models available")
+
     # Check if auto mode has any models available after restrictions
     from config import IS_AUTO_MODE
 
@@ -692,6 +706,15 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         3. Claude continues with codereview tool + continuation_id → full context preserved
         4. Multiple tools can collaborate using same thread ID
     """
+    # Paths, stats and size estimates are computed once per call and shared by the boundary
+    # file size check, conversation reconstruction and the tool's file embedding. Clients that
+    # sent a progress token receive the model's output as progress notifications while it streams.
+    with file_manifest_scope(), progress_scope(progress_reporter_for_request(server)):
+        return await _dispatch_tool_call(name, arguments)
+
+
+async def _dispatch_tool_call(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Reconstruct conversation context, resolve the model, check file sizes and run the tool"""
     logger.info(f"MCP tool call: {name}")
     logger.debug(f"MCP tool arguments: {list(arguments.keys())}")
 
@@ -753,7 +776,8 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         if not tool.requires_model():
             logger.debug(f"Tool {name} doesn't require model resolution - skipping model validation")
             # Execute tool directly without model context
-            return await tool.execute(arguments)
+            with tool_execution_scope(name):
+                return await tool.execute(arguments)
 
         # Handle auto mode at MCP boundary - resolve to specific model
         if model_name.lower() == "auto":
@@ -801,13 +825,17 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         # Check file sizes before tool execution using resolved model
         if "files" in arguments and arguments["files"]:
             logger.debug(f"Checking file sizes for {len(arguments['files'])} files with model {model_name}")
-            file_size_check = check_total_file_size(arguments["files"], model_name)
+            # Continuations were reconstructed above; a new conversation carries no history
+            history_tokens = None if arguments.get("continuation_id") else 0
+            file_size_check = check_total_file_size(arguments["files"], model_name, history_tokens=history_tokens)
             if file_size_check:
                 logger.warning(f"File size check failed for {name} with model {model_name}")
                 return [TextContent(type="text", text=ToolOutput(**file_size_check).model_dump_json())]
 
-        # Execute tool with pre-resolved model context
-        result = await tool.execute(arguments)
+        # Execute tool with pre-resolved model context. Tools are shared singletons, so per-call
+        # state lives in a fresh execution scope to keep concurrent calls isolated.
+        with tool_execution_scope(name):
+            result = await tool.execute(arguments)
         logger.info(f"Tool '{name}' execution completed")
 
         # Log completion to activity file
@@ -1094,7 +1122,9 @@ async def reconstruct_thread_context(arguments: dict[str, Any]) -> dict[str, Any
 
     # Calculate remaining token budget based on current model
     # (model_context was already created above for history building)
-    token_allocation = model_context.calculate_token_allocation()
+    from utils.model_context import TokenDemand
+
+    token_allocation = model_context.calculate_token_allocation(demand=TokenDemand(history_tokens=conversation_tokens))
 
     # Calculate remaining tokens for files/new content
     # History has already consumed some of the content budget
@@ -20,6 +20,9 @@ if str(parent_dir) not in sys.path:
 # This prevents all tests from failing due to missing model parameter
 os.environ["DEFAULT_MODEL"] = "gemini-2.5-flash"
 
+# Keep learned token calibration in memory so test runs never write data/token_calibration.json
+os.environ["TOKEN_CALIBRATION_PATH"] = ""
+
 # Force reload of config module to pick up the env var
 import config  # noqa: E402
 
@@ -93,6 +96,45 @@ def pytest_collection_modifyitems(session, config, items):
     _set_dummy_keys_if_missing()
 
 
+@pytest.fixture(autouse=True)
+def reset_provider_retry_budgets():
+    """Give every test a fresh per-provider retry budget so retry counts are deterministic."""
+    from providers.retry import reset_retry_budgets
+
+    reset_retry_budgets()
+    yield
+    reset_retry_budgets()
+
+
+@pytest.fixture(autouse=True)
+def clear_file_content_cache():
+    """Start every test without cached file contents so files rewritten within a test are re-read."""
+    from utils.file_content_cache import get_file_content_cache
+
+    get_file_content_cache().clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_directory_index():
+    """Start every test without indexed directory listings."""
+    from utils.directory_index import get_directory_index
+
+    get_directory_index().clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_token_calibration():
+    """Start every test with uncalibrated token estimates."""
+    from utils.token_calibration import get_token_calibrator
+
+    calibrator = get_token_calibrator()
+    if calibrator is not None:
+        calibrator.reset()
+    yield
+
+
 @pytest.fixture(autouse=True)
 def mock_provider_availability(request, monkeypatch):
     """
@@ -134,7 +176,7 @@ def mock_provider_availability(request, monkeypatch):
 
         ModelProviderRegistry.register_provider(ProviderType.CUSTOM, custom_provider_factory)
 
-    from unittest.mock import MagicMock
+    from unittest.mock import AsyncMock, MagicMock
 
     original_get_provider = ModelProviderRegistry.get_provider_for_model
 
@@ -164,6 +206,8 @@ def mock_provider_availability(request, monkeypatch):
                 capabilities.input_cost_per_1k = 0.075
                 capabilities.output_cost_per_1k = 0.3
             provider.get_model_capabilities.return_value = capabilities
+            # Tools call the async API; route it through the sync mock so either can be configured
+            provider.agenerate_content = AsyncMock(side_effect=provider.generate_content)
             return provider
         # Otherwise use the original logic
         return original_get_provider(model_name)
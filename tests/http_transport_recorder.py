@@ -13,6 +13,7 @@ Key Features:
 - JSON cassette format with data sanitization
 """
 
+import asyncio
 import base64
 import hashlib
 import json
@@ -95,6 +96,14 @@ class RecordingTransport(httpx.HTTPTransport):
             self._record_interaction(request_data, response_data)
             return response
 
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Record a request issued by httpx.AsyncClient (e.g. AsyncOpenAI).
+
+        The underlying transport is synchronous, so the call is made in a worker thread.
+        """
+        await request.aread()
+        return await asyncio.to_thread(self.handle_request, request)
+
     def _record_interaction(self, request_data: dict[str, Any], response_data: dict[str, Any]):
         """Helper method to record interaction and save cassette."""
         interaction = {"request": request_data, "response": response_data}
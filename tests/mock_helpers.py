@@ -1,6 +1,6 @@
 """Helper functions for test mocking."""
 
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 from providers.base import ModelCapabilities, ProviderType, RangeTemperatureConstraint
 
@@ -38,5 +38,6 @@ def create_mock_provider(model_name="gemini-2.5-flash", context_window=1_048_576
     mock_response.metadata = {"finish_reason": "STOP"}
 
     mock_provider.generate_content.return_value = mock_response
+    mock_provider.agenerate_content = AsyncMock(return_value=mock_response)
 
     return mock_provider
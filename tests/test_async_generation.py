@@ -0,0 +1,147 @@
+"""Tests for the non-blocking agenerate_content() provider API."""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.base import ModelProvider, ModelResponse, ProviderType
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.xai import XAIModelProvider
+
+
+def _chat_completion_response(model: str):
+    """Build a minimal chat completion response object."""
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = "Async response"
+    response.choices[0].finish_reason = "stop"
+    response.model = model
+    response.id = "test-id"
+    response.created = 1234567890
+    response.usage = MagicMock()
+    response.usage.prompt_tokens = 10
+    response.usage.completion_tokens = 5
+    response.usage.total_tokens = 15
+    return response
+
+
+class TestAsyncGeneration:
+    """Test native async generation paths."""
+
+    def setup_method(self):
+        import utils.model_restrictions
+
+        utils.model_restrictions._restriction_service = None
+
+    def teardown_method(self):
+        import utils.model_restrictions
+
+        utils.model_restrictions._restriction_service = None
+
+    @pytest.mark.asyncio
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    @patch("providers.openai_compatible.OpenAI")
+    async def test_openai_uses_async_client_with_resolved_alias(self, mock_openai_class, mock_async_openai_class):
+        """agenerate_content should await AsyncOpenAI and never touch the sync client."""
+        mock_async_client = MagicMock()
+        mock_async_client.chat.completions.create = AsyncMock(return_value=_chat_completion_response("gpt-4.1"))
+        mock_async_openai_class.return_value = mock_async_client
+
+        provider = OpenAIModelProvider("test-key")
+        result = await provider.agenerate_content(prompt="Test prompt", model_name="gpt4.1", temperature=1.0)
+
+        assert isinstance(result, ModelResponse)
+        assert result.content == "Async response"
+        assert result.usage["total_tokens"] == 15
+        call_kwargs = mock_async_client.chat.completions.create.call_args[1]
+        assert call_kwargs["model"] == "gpt-4.1"
+        mock_openai_class.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    async def test_async_retry_does_not_block_event_loop(self, mock_async_openai_class):
+        """Retry delays in the async path must yield to the event loop."""
+        mock_async_client = MagicMock()
+        mock_async_client.chat.completions.create = AsyncMock(
+            side_effect=[Exception("Connection timeout"), _chat_completion_response("grok-3")]
+        )
+        mock_async_openai_class.return_value = mock_async_client
+
+        provider = XAIModelProvider("test-key")
+        with patch("providers.retry.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            result = await provider.agenerate_content(prompt="Test", model_name="grok3")
+
+        assert result.content == "Async response"
+        assert mock_async_client.chat.completions.create.await_count == 2
+        mock_sleep.assert_awaited_once()
+        delay = mock_sleep.await_args[0][0]
+        assert 0.5 <= delay <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_gemini_uses_aio_client(self):
+        """Gemini's async path should go through client.aio."""
+        provider = GeminiModelProvider("test-key")
+
+        mock_response = MagicMock()
+        mock_response.text = "Gemini async"
+        mock_response.candidates = []
+        mock_response.usage_metadata = None
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+        provider._client = mock_client
+
+        result = await provider.agenerate_content(prompt="Test", model_name="flash")
+
+        assert result.content == "Gemini async"
+        assert result.provider == ProviderType.GOOGLE
+        assert mock_client.aio.models.generate_content.await_args[1]["model"] == "gemini-2.5-flash"
+        mock_client.models.generate_content.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_default_implementation_runs_in_worker_thread(self):
+        """Providers without a native async client fall back to a worker thread."""
+        provider = GeminiModelProvider("test-key")
+        calling_threads = []
+
+        def fake_generate_content(**kwargs):
+            calling_threads.append(threading.current_thread())
+            return ModelResponse(content="sync", model_name=kwargs["model_name"])
+
+        provider.generate_content = fake_generate_content
+
+        result = await ModelProvider.agenerate_content(provider, prompt="Test", model_name="flash")
+
+        assert result.content == "sync"
+        assert calling_threads and calling_threads[0] is not threading.main_thread()
+
+    @pytest.mark.asyncio
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    async def test_concurrent_calls_overlap(self, mock_async_openai_class):
+        """Two in-flight requests should run concurrently on one event loop."""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def slow_create(**kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _chat_completion_response(kwargs["model"])
+
+        mock_async_client = MagicMock()
+        mock_async_client.chat.completions.create = slow_create
+        mock_async_openai_class.return_value = mock_async_client
+
+        provider = OpenAIModelProvider("test-key")
+        results = await asyncio.gather(
+            provider.agenerate_content(prompt="a", model_name="gpt-4.1"),
+            provider.agenerate_content(prompt="b", model_name="gpt-4.1"),
+        )
+
+        assert [r.content for r in results] == ["Async response", "Async response"]
+        assert max_in_flight == 2
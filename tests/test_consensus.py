@@ -2,10 +2,13 @@
 Tests for the Consensus tool using WorkflowTool architecture.
 """
 
-from unittest.mock import Mock
+import asyncio
+import json
+from unittest.mock import Mock, patch
 
 import pytest
 
+from providers.base import ModelResponse, ProviderType
 from tools.consensus import ConsensusRequest, ConsensusTool
 from tools.models import ToolModelCategory
 
@@ -331,6 +334,135 @@ class TestConsensusTool:
         result = tool.customize_workflow_response(response_data, request)
         assert result["consensus_workflow_status"] == "ready_for_synthesis"
 
+    @pytest.mark.asyncio
+    async def test_parallel_mode_consults_all_models_concurrently(self):
+        """Parallel mode returns every verdict in step 1 and runs consultations concurrently."""
+        tool = ConsensusTool()
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_consult(model_config, request, context_files=None):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {
+                "model": model_config["model"],
+                "stance": model_config.get("stance", "neutral"),
+                "status": "success",
+                "verdict": f"verdict from {model_config['model']}",
+            }
+
+        tool._consult_model = fake_consult
+        result = await tool.execute_workflow(
+            {
+                "step": "Evaluate the proposal",
+                "step_number": 1,
+                "total_steps": 3,
+                "next_step_required": True,
+                "findings": "Initial analysis",
+                "models": [{"model": "flash"}, {"model": "o3", "stance": "for"}, {"model": "pro", "stance": "against"}],
+                "parallel": True,
+            }
+        )
+
+        data = json.loads(result[0].text)
+        assert data["status"] == "consensus_workflow_complete"
+        assert data["next_step_required"] is False
+        assert [r["model"] for r in data["accumulated_responses"]] == ["flash", "o3", "pro"]
+        assert data["complete_consensus"]["total_responses"] == 3
+        assert data["complete_consensus"]["models_failed"] == []
+        assert max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_parallel_mode_reports_timeouts_and_failures(self):
+        """A slow or failing model must not block the verdicts of the others."""
+        tool = ConsensusTool()
+
+        async def fake_consult(model_config, request, context_files=None):
+            if model_config["model"] == "slow":
+                await asyncio.sleep(5)
+            if model_config["model"] == "broken":
+                return {"model": "broken", "stance": "neutral", "status": "error", "error": "API down"}
+            return {"model": model_config["model"], "stance": "neutral", "status": "success", "verdict": "ok"}
+
+        tool._consult_model = fake_consult
+        result = await tool.execute_workflow(
+            {
+                "step": "Evaluate the proposal",
+                "step_number": 1,
+                "total_steps": 3,
+                "next_step_required": True,
+                "findings": "Initial analysis",
+                "models": [{"model": "flash"}, {"model": "slow"}, {"model": "broken"}],
+                "parallel": True,
+                "model_timeout": 0.05,
+            }
+        )
+
+        data = json.loads(result[0].text)
+        statuses = {r["model"]: r["status"] for r in data["accumulated_responses"]}
+        assert statuses == {"flash": "success", "slow": "timeout", "broken": "error"}
+        assert data["complete_consensus"]["models_consulted"] == ["flash:neutral"]
+        assert data["complete_consensus"]["models_failed"] == ["slow:neutral", "broken:neutral"]
+        assert data["complete_consensus"]["consensus_confidence"] == "partial"
+        assert "did not respond" in data["next_steps"]
+
+    @pytest.mark.asyncio
+    async def test_parallel_mode_prepares_context_files_once(self):
+        """Every model gets the same context files, which are read a single time."""
+        tool = ConsensusTool()
+        prompts = []
+
+        async def fake_generate(provider, **kwargs):
+            prompts.append(kwargs["prompt"])
+            return ModelResponse(content="ok", model_name=kwargs["model_name"], metadata={"cache_hit": True})
+
+        arguments = {
+            "step": "Evaluate the proposal",
+            "step_number": 1,
+            "total_steps": 3,
+            "next_step_required": True,
+            "findings": "Initial analysis",
+            "relevant_files": ["/tmp/proposal.md"],
+            "models": [
+                {"model": "flash"},
+                {"model": "flash-lite", "stance": "for"},
+                {"model": "pro", "stance": "against"},
+            ],
+            "parallel": True,
+        }
+        prepared = ("file body", {})
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.GOOGLE
+        with patch.object(tool, "_prepare_file_content_for_prompt", return_value=prepared) as prepare_files:
+            with patch.object(tool, "get_model_provider", return_value=provider):
+                with patch("tools.consensus.hedged_generate", side_effect=fake_generate):
+                    await tool.execute_workflow(arguments)
+
+        prepare_files.assert_called_once()
+        assert len(prompts) == 3
+        assert all(prompt.endswith("=== CONTEXT FILES ===\nfile body\n=== END CONTEXT ===") for prompt in prompts)
+
+    def test_parallel_fields_in_schema(self):
+        """The parallel and model_timeout options are exposed in the input schema."""
+        schema = ConsensusTool().get_input_schema()
+        assert schema["properties"]["parallel"]["type"] == "boolean"
+        assert schema["properties"]["model_timeout"]["type"] == "number"
+
+        with pytest.raises(ValueError):
+            ConsensusRequest(
+                step="Test",
+                step_number=1,
+                total_steps=1,
+                next_step_required=False,
+                findings="Test",
+                models=[{"model": "flash"}],
+                parallel=True,
+                model_timeout=0,
+            )
+
 
 if __name__ == "__main__":
     import unittest
@@ -16,11 +16,15 @@ from utils.conversation_memory import (
     MAX_CONVERSATION_TURNS,
     ConversationTurn,
     ThreadContext,
+    _render_turns,
+    _RenderedTurns,
     add_turn,
     build_conversation_history,
+    clear_thread_cache,
     create_thread,
     get_thread,
 )
+from utils.storage_backend import InMemoryStorage
 
 
 class TestConversationMemory:
@@ -61,13 +65,19 @@ class TestConversationMemory:
             initial_context={"prompt": "test"},
         )
         mock_client.get.return_value = context_obj.model_dump_json()
+        mock_client.get_list.return_value = [
+            ConversationTurn(role="user", content="Hi", timestamp="2023-01-01T00:02:00Z").model_dump_json()
+        ]
 
         context = get_thread(test_uuid)
 
         assert context is not None
         assert context.thread_id == test_uuid
         assert context.tool_name == "chat"
+        assert [turn.content for turn in context.turns] == ["Hi"]
+        assert context.last_updated_at == "2023-01-01T00:02:00Z"
         mock_client.get.assert_called_once_with(f"thread:{test_uuid}")
+        mock_client.get_list.assert_called_once_with(f"thread:{test_uuid}:turns")
 
     @patch("utils.conversation_memory.get_storage")
     def test_get_thread_invalid_uuid(self, mock_storage):
@@ -104,12 +114,20 @@ class TestConversationMemory:
         )
         mock_client.get.return_value = context_obj.model_dump_json()
 
+        mock_client.append_with_ttl.return_value = 1
+
         success = add_turn(test_uuid, "user", "Hello there")
 
         assert success is True
-        # Verify Redis get and setex were called
+        # Only the new turn is appended; the thread itself is not rewritten
         mock_client.get.assert_called_once()
-        mock_client.setex.assert_called_once()
+        mock_client.setex.assert_not_called()
+        mock_client.append_with_ttl.assert_called_once()
+        key, ttl, value = mock_client.append_with_ttl.call_args[0]
+        assert key == f"thread:{test_uuid}:turns"
+        assert ttl == CONVERSATION_TIMEOUT_SECONDS
+        assert ConversationTurn.model_validate_json(value).content == "Hello there"
+        mock_client.expire.assert_called_once_with(f"thread:{test_uuid}", CONVERSATION_TIMEOUT_SECONDS)
 
     @patch("utils.conversation_memory.get_storage")
     def test_add_turn_max_limit(self, mock_storage):
@@ -138,6 +156,95 @@ class TestConversationMemory:
 
         assert success is False
 
+    @patch("utils.conversation_memory.get_storage")
+    def test_add_turn_appends_without_rewriting_thread(self, mock_storage):
+        """Adding a turn serializes only that turn, regardless of thread length"""
+        storage = Mock(wraps=InMemoryStorage())
+        mock_storage.return_value = storage
+
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        large_output = "x" * 10_000
+
+        for i in range(MAX_CONVERSATION_TURNS):
+            assert add_turn(thread_id, "assistant" if i % 2 else "user", f"{i}:{large_output}") is True
+
+        # The thread header is written once at creation; every turn is a single append
+        storage.setex.assert_called_once()
+        assert storage.append_with_ttl.call_count == MAX_CONVERSATION_TURNS
+        payload_sizes = {len(call.args[2]) for call in storage.append_with_ttl.call_args_list[1:9]}
+        assert max(payload_sizes) - min(payload_sizes) < 50
+
+        # Limit is still enforced with the append-only log
+        assert add_turn(thread_id, "user", "one too many") is False
+
+        context = get_thread(thread_id)
+        assert len(context.turns) == MAX_CONVERSATION_TURNS
+        assert [turn.content.split(":")[0] for turn in context.turns] == [str(i) for i in range(MAX_CONVERSATION_TURNS)]
+        assert context.last_updated_at == context.turns[-1].timestamp
+
+    def test_storage_append_with_ttl(self):
+        """Append-only lists honor max_length and expire with their TTL"""
+        storage = InMemoryStorage()
+
+        assert storage.append_with_ttl("log", 60, "a") == 1
+        assert storage.append_with_ttl("log", 60, "b", max_length=2) == 2
+        assert storage.append_with_ttl("log", 60, "c", max_length=2) is None
+        assert storage.get_list("log") == ["a", "b"]
+        assert storage.get_list("missing") == []
+
+        assert storage.expire("log", -1) is True
+        assert storage.get_list("log") == []
+        assert storage.expire("log", 60) is False
+
+    def test_storage_versions_change_on_write(self):
+        """Writes bump a key's version; TTL refreshes and reads do not"""
+        storage = InMemoryStorage()
+        assert storage.get_version("key") is None
+
+        storage.setex("key", 60, "a")
+        first = storage.get_version("key")
+        storage.get("key")
+        storage.expire("key", 120)
+        assert storage.get_version("key") == first
+
+        storage.setex("key", 60, "b")
+        assert storage.get_version("key") > first
+
+        storage.append_with_ttl("log", 60, "a")
+        log_version = storage.get_version("log")
+        storage.append_with_ttl("log", 60, "b")
+        assert storage.get_version("log") > log_version
+
+        storage.expire("key", -1)
+        assert storage.get_version("key") is None
+
+    @patch("utils.conversation_memory.get_storage")
+    def test_get_thread_parses_once_per_mutation(self, mock_get_storage):
+        """Repeated reads reuse the decoded thread until a turn is added"""
+        mock_get_storage.return_value = InMemoryStorage()
+        clear_thread_cache()
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "user", "First")
+
+        with patch.object(ThreadContext, "model_validate_json", wraps=ThreadContext.model_validate_json) as parse:
+            first = get_thread(thread_id)
+            second = get_thread(thread_id)
+            assert parse.call_count == 1
+
+            # Returned contexts are independent copies of the cached one
+            assert first is not second
+            first.turns.append(ConversationTurn(role="user", content="local", timestamp="now"))
+            assert len(get_thread(thread_id).turns) == 1
+            assert parse.call_count == 1
+
+            assert add_turn(thread_id, "assistant", "Second")
+            parse.reset_mock()
+            updated = get_thread(thread_id)
+            assert [turn.content for turn in updated.turns] == ["First", "Second"]
+            assert parse.call_count == 1
+            get_thread(thread_id)
+            assert parse.call_count == 1
+
     @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
     def test_build_conversation_history(self, project_path):
         """Test building conversation history format with files and speaker identification"""
@@ -233,6 +340,136 @@ class TestConversationMemory:
         assert history == ""
         assert tokens == 0
 
+    def test_history_rendering_reuses_cached_turns(self):
+        """Continuations only format turns added since the previous rendering"""
+        from utils.model_context import ModelContext
+
+        turns = [
+            ConversationTurn(role="user", content=f"Question {i}", timestamp=f"2023-01-01T00:00:{i:02d}Z")
+            for i in range(30)
+        ]
+        context = ThreadContext(
+            thread_id="4b7c3a52-7a25-4b4e-9d6c-1f0ad3bd7c01",
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:00:00Z",
+            tool_name="chat",
+            turns=turns,
+            initial_context={},
+        )
+        model_context = ModelContext("gemini-2.5-flash")
+
+        with patch(
+            "utils.conversation_memory._get_tool_formatted_content",
+            side_effect=lambda turn: [turn.content],
+        ) as formatter:
+            first, _ = build_conversation_history(context, model_context)
+            assert formatter.call_count == 30
+
+            second, _ = build_conversation_history(context, model_context)
+            assert formatter.call_count == 30
+            assert second == first
+
+            context.turns.append(ConversationTurn(role="assistant", content="Answer", timestamp="2023-01-01T00:01:00Z"))
+            third, _ = build_conversation_history(context, model_context)
+            assert formatter.call_count == 31
+            assert "--- Turn 31 (Gemini) ---\nAnswer" in third
+
+            # A changed turn invalidates the cached rendering from that turn onwards
+            context.turns[28] = ConversationTurn(role="user", content="Edited", timestamp="2023-01-01T00:00:28Z")
+            build_conversation_history(context, model_context)
+            assert formatter.call_count == 34
+
+    def test_history_budget_matches_newest_first_walk(self):
+        """The prefix-sum search includes exactly the turns a newest-first walk would"""
+        token_counts = [5, 40, 0, 12, 7, 30, 1, 9]
+        prefix = [0]
+        for count in token_counts:
+            prefix.append(prefix[-1] + count)
+        rendered = _RenderedTurns([()] * len(token_counts), ["turn"] * len(token_counts), prefix)
+
+        for budget in range(-5, sum(token_counts) + 5):
+            expected, used = len(token_counts), 0
+            for idx in range(len(token_counts) - 1, -1, -1):
+                if used + token_counts[idx] > budget:
+                    break
+                used += token_counts[idx]
+                expected = idx
+            assert rendered.first_turn_within(budget) == expected, budget
+
+    def test_render_cache_recounts_tokens_when_calibration_moves(self):
+        """Cached token counts are not reused once the model's calibration factor changes"""
+        from utils.model_context import ModelContext
+
+        turns = [
+            ConversationTurn(role="user", content="x" * 1200, timestamp=f"2023-01-01T00:00:{i:02d}Z") for i in range(3)
+        ]
+        model_context = ModelContext("gemini-2.5-flash")
+
+        with patch("utils.conversation_memory._get_tool_formatted_content", side_effect=lambda turn: [turn.content]):
+            uncalibrated = _render_turns("calibrated-thread", turns, model_context).tokens_from(0)
+            with patch.object(ModelContext, "token_estimate_factor", return_value=0.5):
+                calibrated = _render_turns("calibrated-thread", turns, model_context)
+                expected = sum(model_context.estimate_tokens(content) for content in calibrated.contents)
+
+        assert calibrated.tokens_from(0) == expected
+        assert expected < uncalibrated
+
+    def test_files_are_counted_once_against_the_context(self, tmp_path):
+        """Files and turns that fit together are both kept in a tight context window"""
+        from providers.base import ModelCapabilities, ProviderType
+        from utils.file_utils import estimate_file_tokens
+        from utils.model_context import ModelContext
+
+        source = tmp_path / "module.py"
+        source.write_text("value = 1\n" * 1400)
+        turns = [
+            ConversationTurn(
+                role="user" if i % 2 == 0 else "assistant",
+                content="y" * 3000,
+                timestamp=f"2023-01-01T00:00:{i:02d}Z",
+                files=[str(source)] if i == 0 else None,
+            )
+            for i in range(4)
+        ]
+        context = ThreadContext(
+            thread_id="5d0a6f8e-1c2b-4e3d-9a7f-2b6c8d4e0f11",
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:00:00Z",
+            tool_name="chat",
+            turns=turns,
+            initial_context={},
+        )
+        capabilities = ModelCapabilities(
+            provider=ProviderType.GOOGLE,
+            model_name="gemini-2.5-flash",
+            friendly_name="Gemini",
+            context_window=20_000,
+            max_output_tokens=8_000,
+        )
+        model_context = ModelContext("gemini-2.5-flash")
+        model_context._capabilities = capabilities
+
+        with patch("utils.conversation_memory._get_tool_formatted_content", side_effect=lambda turn: [turn.content]):
+            file_tokens = estimate_file_tokens(str(source), "gemini-2.5-flash")
+            turn_tokens = _render_turns("unused", turns, model_context).tokens_from(0)
+            # Both fit in the 9,600 tokens left for files and history, but not with the files counted twice
+            assert file_tokens + turn_tokens <= 9_600 < 2 * file_tokens + turn_tokens
+
+            history, _ = build_conversation_history(context, model_context)
+
+        assert str(source) in history
+        assert "most recent turns out of" not in history
+
+    def test_render_turns_without_model_name_is_not_cached(self):
+        model_context = Mock()
+        model_context.estimate_tokens.return_value = 1
+        turns = [ConversationTurn(role="user", content="Hi", timestamp="2023-01-01T00:00:00Z")]
+
+        _render_turns("thread", turns, model_context)
+        _render_turns("thread", turns, model_context)
+
+        assert model_context.estimate_tokens.call_count == 2
+
 
 class TestConversationFlow:
     """Test complete conversation flows simulating stateless MCP requests"""
@@ -667,26 +904,19 @@ class TestConversationFlow:
             initial_context={"prompt": "Think about architecture"},
         )
         mock_client.get.return_value = initial_context.model_dump_json()
+        mock_client.append_with_ttl.return_value = 1
 
         success = add_turn(thread_id, "assistant", "Architecture analysis")
         assert success is True
 
-        # Process 2: Different "request cycle" accesses same thread
-        context_from_redis = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:01:00Z",
-            tool_name="thinkdeep",
-            turns=[
-                ConversationTurn(
-                    role="assistant",
-                    content="Architecture analysis",
-                    timestamp="2023-01-01T00:00:30Z",
-                )
-            ],
-            initial_context={"prompt": "Think about architecture"},
-        )
-        mock_client.get.return_value = context_from_redis.model_dump_json()
+        # Process 2: Different "request cycle" accesses same thread header and turn log
+        mock_client.get_list.return_value = [
+            ConversationTurn(
+                role="assistant",
+                content="Architecture analysis",
+                timestamp="2023-01-01T00:00:30Z",
+            ).model_dump_json()
+        ]
 
         # Verify context continuity across "processes"
         retrieved_context = get_thread(thread_id)
@@ -8,7 +8,7 @@ continuations.
 """
 
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
 import pytest
 
@@ -16,6 +16,7 @@ from tests.mock_helpers import create_mock_provider
 from tools.chat import ChatTool
 from tools.models import ToolOutput
 from utils.conversation_memory import add_turn, create_thread
+from utils.storage_backend import InMemoryStorage
 
 
 class TestDirectoryExpansionTracking:
@@ -127,20 +128,8 @@ def helper_function():
         self, mock_get_provider, mock_storage, tool, temp_directory_with_files
     ):
         """Test that conversation continuation works correctly with directory expansion"""
-        # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
-        redis_storage = {}  # Simulate Redis storage
-
-        def mock_get(key):
-            return redis_storage.get(key)
-
-        def mock_setex(key, ttl, value):
-            redis_storage[key] = value
-            return True
-
-        mock_client.get.side_effect = mock_get
-        mock_client.setex.side_effect = mock_setex
-        mock_storage.return_value = mock_client
+        # Use a private in-memory storage instance for this test
+        mock_storage.return_value = InMemoryStorage()
 
         # Setup mock provider
         mock_provider = create_mock_provider()
@@ -199,20 +188,8 @@ def helper_function():
     @patch("utils.conversation_memory.get_storage")
     def test_get_conversation_embedded_files_with_expanded_files(self, mock_storage, tool, temp_directory_with_files):
         """Test that get_conversation_embedded_files returns expanded files"""
-        # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
-        redis_storage = {}  # Simulate Redis storage
-
-        def mock_get(key):
-            return redis_storage.get(key)
-
-        def mock_setex(key, ttl, value):
-            redis_storage[key] = value
-            return True
-
-        mock_client.get.side_effect = mock_get
-        mock_client.setex.side_effect = mock_setex
-        mock_storage.return_value = mock_client
+        # Use a private in-memory storage instance for this test
+        mock_storage.return_value = InMemoryStorage()
 
         directory = temp_directory_with_files["directory"]
         expected_files = temp_directory_with_files["files"]
@@ -240,20 +217,8 @@ def helper_function():
     @patch("utils.conversation_memory.get_storage")
     def test_file_filtering_with_mixed_files_and_directories(self, mock_storage, tool, temp_directory_with_files):
         """Test file filtering when request contains both individual files and directories"""
-        # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
-        redis_storage = {}  # Simulate Redis storage
-
-        def mock_get(key):
-            return redis_storage.get(key)
-
-        def mock_setex(key, ttl, value):
-            redis_storage[key] = value
-            return True
-
-        mock_client.get.side_effect = mock_get
-        mock_client.setex.side_effect = mock_setex
-        mock_storage.return_value = mock_client
+        # Use a private in-memory storage instance for this test
+        mock_storage.return_value = InMemoryStorage()
 
         directory = temp_directory_with_files["directory"]
         python_file = temp_directory_with_files["python_file"]
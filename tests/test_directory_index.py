@@ -0,0 +1,164 @@
+"""
+Tests for the directory listing index used by expand_paths
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from utils import file_utils
+from utils.directory_index import DirectoryIndex, get_directory_index
+from utils.file_utils import expand_paths
+
+
+def _make_tree(root: Path) -> None:
+    for package in ("alpha", "beta"):
+        for module in ("a.py", "b.py"):
+            path = root / package / "sub" / module
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("# module\n")
+
+
+def _age_directories(root: Path, seconds: int = 60) -> None:
+    """Backdate directory mtimes so listings are outside the racy window"""
+    past = time.time() - seconds
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (past, past))
+
+
+class TestDirectoryIndex:
+    def test_unchanged_directory_is_listed_once(self, tmp_path):
+        _age_directories(tmp_path)
+        index = DirectoryIndex("mtime")
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return ("listing",)
+
+        assert index.get_or_load(str(tmp_path), "key", loader) == ("listing",)
+        assert index.get_or_load(str(tmp_path), "key", loader) == ("listing",)
+        assert index.get_or_load(str(tmp_path), "other", loader) == ("listing",)
+
+        assert len(calls) == 2
+        assert index.get_stats()["hits"] == 1
+
+    def test_recently_modified_directory_is_not_trusted(self, tmp_path):
+        index = DirectoryIndex("mtime")
+        calls = []
+        for _ in range(2):
+            index.get_or_load(str(tmp_path), "key", lambda: calls.append(1))
+
+        assert len(calls) == 2
+
+    def test_lru_bound_and_off_mode(self, tmp_path):
+        index = DirectoryIndex("mtime", max_dirs=2)
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+            index.get_or_load(str(tmp_path / name), "key", lambda: None)
+        assert index.get_stats()["entries"] == 2
+        assert index.get_stats()["evictions"] == 1
+
+        off = DirectoryIndex("off")
+        calls = []
+        for _ in range(2):
+            off.get_or_load(str(tmp_path), "key", lambda: calls.append(1))
+        assert len(calls) == 2
+
+    def test_loader_errors_are_not_indexed(self, tmp_path):
+        index = DirectoryIndex("mtime")
+
+        def failing_loader():
+            raise PermissionError("denied")
+
+        with pytest.raises(PermissionError):
+            index.get_or_load(str(tmp_path), "key", failing_loader)
+        assert index.get_stats()["entries"] == 0
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+    def test_inotify_events_invalidate_listings(self, tmp_path):
+        index = DirectoryIndex("inotify")
+        if index.mode != "inotify":
+            pytest.skip("inotify unavailable")
+        try:
+            calls = []
+            index.get_or_load(str(tmp_path), "key", lambda: calls.append(1))
+            with patch("utils.directory_index.os.stat", side_effect=AssertionError("watched listings are not stat'ed")):
+                index.get_or_load(str(tmp_path), "key", lambda: calls.append(1))
+            assert len(calls) == 1
+
+            (tmp_path / "new.py").write_text("x = 1\n")
+            deadline = time.monotonic() + 5
+            while index.get_stats()["invalidations"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            index.get_or_load(str(tmp_path), "key", lambda: calls.append(1))
+            assert len(calls) == 2
+        finally:
+            index.shutdown()
+
+
+class TestExpandPathsIndexing:
+    def _expand_counting_listings(self, root: Path) -> tuple[list[str], list[str]]:
+        listed = []
+        original = file_utils._list_directory
+
+        def tracking_list(directory, *args):
+            listed.append(directory)
+            return original(directory, *args)
+
+        with patch("utils.file_utils._list_directory", side_effect=tracking_list):
+            files = expand_paths([str(root)])
+        return files, listed
+
+    def test_repeated_expansion_does_not_relist_tree(self, tmp_path):
+        _make_tree(tmp_path)
+        _age_directories(tmp_path)
+
+        first, first_listed = self._expand_counting_listings(tmp_path)
+        second, second_listed = self._expand_counting_listings(tmp_path)
+
+        assert second == first
+        assert len(first) == 4
+        assert len(first_listed) == 5
+        assert second_listed == []
+
+    def test_changed_directory_is_relisted(self, tmp_path):
+        _make_tree(tmp_path)
+        _age_directories(tmp_path)
+        self._expand_counting_listings(tmp_path)
+
+        new_file = tmp_path / "beta" / "sub" / "c.py"
+        new_file.write_text("# new\n")
+        files, listed = self._expand_counting_listings(tmp_path)
+
+        assert str(new_file.resolve()) in files
+        assert listed == [str((tmp_path / "beta" / "sub").resolve())]
+
+    def test_gitignore_edits_apply_to_indexed_listings(self, tmp_path):
+        _make_tree(tmp_path)
+        (tmp_path / ".gitignore").write_text("")
+        _age_directories(tmp_path)
+        self._expand_counting_listings(tmp_path)
+
+        (tmp_path / ".gitignore").write_text("beta/\n")  # Rewriting a file leaves the directory mtime alone
+        files, listed = self._expand_counting_listings(tmp_path)
+
+        assert [Path(f).parts[-3] for f in files] == ["alpha", "alpha"]
+        assert listed == []
+
+    def test_extension_sets_are_indexed_separately(self, tmp_path):
+        _make_tree(tmp_path)
+        (tmp_path / "notes.txt").write_text("notes\n")
+        _age_directories(tmp_path)
+
+        code_files = expand_paths([str(tmp_path)], extensions={".py"})
+        text_files = expand_paths([str(tmp_path)], extensions={".txt"})
+
+        assert len(code_files) == 4
+        assert text_files == [str((tmp_path / "notes.txt").resolve())]
+        assert get_directory_index().get_stats()["entries"] == 10
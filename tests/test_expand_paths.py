@@ -0,0 +1,155 @@
+"""
+Tests for the scandir-based directory walker and .gitignore handling in expand_paths
+"""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from utils import file_utils
+from utils.file_utils import expand_paths
+from utils.gitignore import inherited_rules, is_ignored, parse_gitignore
+
+
+def _touch(root: Path, *names: str) -> None:
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("# test\n")
+
+
+def _relative(root: Path, files: list[str]) -> list[str]:
+    return [Path(f).relative_to(root).as_posix() for f in files]
+
+
+class TestGitIgnoreRules:
+    def _ignored(self, patterns: str, path: str, is_dir: bool = False) -> bool:
+        base = os.path.join(os.sep, "repo")
+        rules = parse_gitignore(patterns, base)
+        return is_ignored(rules, os.path.join(base, *path.split("/")), is_dir)
+
+    def test_basic_patterns(self):
+        assert self._ignored("*.log", "debug.log")
+        assert self._ignored("*.log", "deep/nested/debug.log")
+        assert not self._ignored("*.log", "debug.py")
+        assert self._ignored("build/", "src/build", is_dir=True)
+        assert not self._ignored("build/", "src/build", is_dir=False)
+        assert self._ignored("file?.py", "file1.py")
+        assert self._ignored("file[0-9].py", "file7.py")
+        assert not self._ignored("file[!0-9].py", "file7.py")
+
+    def test_anchored_and_double_star_patterns(self):
+        assert self._ignored("/generated", "generated", is_dir=True)
+        assert not self._ignored("/generated", "src/generated", is_dir=True)
+        assert self._ignored("docs/*.md", "docs/a.md")
+        assert not self._ignored("docs/*.md", "docs/sub/a.md")
+        assert self._ignored("docs/**/*.md", "docs/sub/deeper/a.md")
+        assert self._ignored("**/fixtures", "a/b/fixtures", is_dir=True)
+
+    def test_negation_comments_and_order(self):
+        patterns = "# comment\n*.py\n!keep.py\n\n"
+        assert self._ignored(patterns, "drop.py")
+        assert not self._ignored(patterns, "keep.py")
+        assert self._ignored("!keep.py\n*.py", "keep.py")  # Last match wins
+        assert self._ignored("\\#literal", "#literal")
+
+    def test_inherited_rules_stop_at_repository_root(self, tmp_path):
+        outer = tmp_path / "outer"
+        repo = outer / "repo"
+        (repo / ".git").mkdir(parents=True)
+        (outer / ".gitignore").write_text("*.py\n")
+        (repo / ".gitignore").write_text("*.log\n")
+        (repo / "pkg").mkdir()
+
+        rules = inherited_rules(str(repo / "pkg"))
+
+        assert is_ignored(rules, str(repo / "pkg" / "a.log"), False)
+        assert not is_ignored(rules, str(repo / "pkg" / "a.py"), False)
+        assert inherited_rules(str(tmp_path / "not-a-repo")) == []
+
+
+class TestExpandPathsWalker:
+    def test_gitignore_rules_are_applied(self, tmp_path):
+        _touch(
+            tmp_path,
+            "main.py",
+            "debug.log.py",
+            "build/out.py",
+            "src/app.py",
+            "src/generated.py",
+            "src/keep_generated.py",
+            "docs/guide.md",
+        )
+        (tmp_path / ".gitignore").write_text("build/\n*.log.py\n")
+        (tmp_path / "src" / ".gitignore").write_text("*generated.py\n!keep_generated.py\n")
+
+        files = _relative(tmp_path.resolve(), expand_paths([str(tmp_path)]))
+
+        assert files == ["docs/guide.md", "main.py", "src/app.py", "src/keep_generated.py"]
+
+    def test_gitignore_can_be_disabled(self, tmp_path):
+        _touch(tmp_path, "main.py", "generated/out.py")
+        (tmp_path / ".gitignore").write_text("generated/\n")
+
+        with patch.object(file_utils, "EXPAND_PATHS_RESPECT_GITIGNORE", False):
+            files = _relative(tmp_path.resolve(), expand_paths([str(tmp_path)]))
+
+        assert files == ["generated/out.py", "main.py"]
+
+    def test_gitignore_of_enclosing_repository_applies_to_subdirectory(self, tmp_path):
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".gitignore").write_text("*.gen.py\n")
+        _touch(tmp_path, "pkg/a.py", "pkg/b.gen.py")
+
+        files = _relative(tmp_path.resolve(), expand_paths([str(tmp_path / "pkg")]))
+
+        assert files == ["pkg/a.py"]
+
+    def test_hidden_excluded_symlinked_and_extension_filtering(self, tmp_path):
+        _touch(
+            tmp_path,
+            "a.py",
+            "b.PY",
+            "c.bin",
+            "noext",
+            ".hidden.py",
+            ".venv/lib.py",
+            "node_modules/x.js",
+            "__pycache__/m.py",
+            "real/inner.py",
+        )
+        os.symlink(tmp_path / "real", tmp_path / "linked", target_is_directory=True)
+
+        files = _relative(tmp_path.resolve(), expand_paths([str(tmp_path)]))
+
+        assert files == ["a.py", "b.PY", "real/inner.py"]
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_sequential_and_parallel_walks_match(self, tmp_path, workers):
+        for top in range(4):
+            for sub in range(3):
+                _touch(tmp_path, f"pkg{top}/sub{sub}/mod.py", f"pkg{top}/sub{sub}/deep/leaf.js", f"pkg{top}/top.py")
+        expected = sorted(str(Path(root) / name) for root, _, names in os.walk(tmp_path.resolve()) for name in names)
+
+        with patch.object(file_utils, "EXPAND_PATHS_WORKERS", workers):
+            with patch.object(file_utils, "_walk_executor", None):
+                files = expand_paths([str(tmp_path)])
+
+        assert files == expected
+
+    def test_overlapping_roots_are_walked_once(self, tmp_path):
+        _touch(tmp_path, "top.py", "pkg/a.py", "pkg/sub/b.py")
+        scanned = []
+        original = file_utils._scan_directory
+
+        def tracking_scan(directory, rules, extensions):
+            scanned.append(directory)
+            return original(directory, rules, extensions)
+
+        with patch("utils.file_utils._scan_directory", side_effect=tracking_scan):
+            files = expand_paths([str(tmp_path / "pkg"), str(tmp_path), str(tmp_path / "pkg" / "sub")])
+
+        assert _relative(tmp_path.resolve(), files) == ["pkg/a.py", "pkg/sub/b.py", "top.py"]
+        assert len(scanned) == len(set(scanned)) == 3
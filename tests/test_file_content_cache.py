@@ -0,0 +1,79 @@
+"""
+Tests for the formatted file content cache used by read_file_content
+"""
+
+import os
+from unittest.mock import patch
+
+from utils.file_content_cache import FileContentCache, FileStamp, get_file_content_cache
+from utils.file_utils import read_file_content
+
+
+class TestReadFileContentCache:
+    def test_unchanged_file_is_read_once(self, tmp_path):
+        path = tmp_path / "module.py"
+        path.write_text("def main():\n    pass\n")
+
+        first = read_file_content(str(path))
+        with patch("builtins.open", side_effect=AssertionError("file should not be re-read")):
+            second = read_file_content(str(path))
+
+        assert second == first
+        assert get_file_content_cache().get_stats()["hits"] == 1
+
+    def test_modified_file_is_read_again(self, tmp_path):
+        path = tmp_path / "module.py"
+        path.write_text("old = 1\n")
+        read_file_content(str(path))
+
+        path.write_text("new_value = 2\n")
+        content, _ = read_file_content(str(path))
+        assert "new_value = 2" in content
+
+        # Same size, different content: detected through the modification time
+        stat = path.stat()
+        path.write_text("new_value = 3\n")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        content, _ = read_file_content(str(path))
+        assert "new_value = 3" in content
+
+    def test_line_number_flag_is_part_of_the_key(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("first\nsecond\n")
+
+        plain, _ = read_file_content(str(path), include_line_numbers=False)
+        numbered, _ = read_file_content(str(path), include_line_numbers=True)
+
+        assert "   1│ first" in numbered
+        assert "│" not in plain
+
+    def test_errors_are_not_cached(self, tmp_path):
+        path = tmp_path / "later.py"
+        missing, _ = read_file_content(str(path))
+        assert "FILE NOT FOUND" in missing
+
+        path.write_text("created = True\n")
+        content, _ = read_file_content(str(path))
+        assert "created = True" in content
+
+
+class TestFileContentCache:
+    def test_lru_eviction_by_bytes(self):
+        content = "x" * 1000
+        cache = FileContentCache(max_bytes=2500)
+        stamp = FileStamp("/a", 1, 1000)
+        for name in ("a", "b", "c"):
+            cache.put(name, False, stamp, content, 10)
+
+        assert cache.get("a", False, stamp) is None
+        assert cache.get("c", False, stamp) == (content, 10)
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_stale_stamp_misses_and_disabled_cache(self):
+        cache = FileContentCache(max_bytes=1024)
+        cache.put("a", False, FileStamp("/a", 1, 3), "abc", 1)
+        assert cache.get("a", False, FileStamp("/a", 2, 3)) is None
+
+        disabled = FileContentCache(max_bytes=0)
+        disabled.put("a", False, FileStamp("/a", 1, 3), "abc", 1)
+        assert disabled.get("a", False, FileStamp("/a", 1, 3)) is None
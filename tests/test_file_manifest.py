@@ -0,0 +1,113 @@
+"""
+Tests for the request-scoped file manifest shared by boundary checks and file embedding
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from utils import file_utils
+from utils.conversation_memory import _plan_file_inclusion_by_size
+from utils.file_manifest import file_manifest_scope, get_file_manifest, stat_path
+from utils.file_utils import check_total_file_size, estimate_file_tokens, expand_paths, read_files
+
+
+def _make_project(tmp_path, files: int = 3):
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    for i in range(files):
+        (project / "src" / f"module_{i}.py").write_text(f"value_{i} = {i}\n" * 50)
+    return project
+
+
+class TestFileManifest:
+    def test_expansion_is_computed_once_per_scope(self, tmp_path):
+        project = _make_project(tmp_path)
+
+        with patch.object(file_utils, "_expand_paths", wraps=file_utils._expand_paths) as walker:
+            with file_manifest_scope():
+                first = expand_paths([str(project)])
+                first.append("mutated by caller")
+                second = expand_paths([str(project)])
+            expand_paths([str(project)])
+
+        assert walker.call_count == 2
+        assert len(second) == 3
+        assert "mutated by caller" not in second
+
+    def test_stats_and_estimates_are_reused(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("x" * 4000)
+
+        with file_manifest_scope() as manifest:
+            assert estimate_file_tokens(str(path)) == 1000
+            path.write_text("x" * 8000)
+            # The request keeps the sizes it planned with
+            assert estimate_file_tokens(str(path)) == 1000
+            assert stat_path(str(path)).st_size == 4000
+            assert manifest.get_stats()["hits"] >= 2
+
+        assert estimate_file_tokens(str(path)) == 2000
+
+    def test_missing_paths(self, tmp_path):
+        missing = str(tmp_path / "missing.py")
+
+        assert stat_path(missing) is None
+        with file_manifest_scope():
+            assert stat_path(missing) is None
+            assert estimate_file_tokens(missing) == 0
+
+    def test_nested_scopes_share_the_manifest(self):
+        assert get_file_manifest() is None
+        with file_manifest_scope() as outer:
+            with file_manifest_scope() as inner:
+                assert inner is outer
+            assert get_file_manifest() is outer
+        assert get_file_manifest() is None
+
+    def test_manifest_follows_asyncio_tasks(self):
+        async def current():
+            return get_file_manifest()
+
+        async def run():
+            with file_manifest_scope() as manifest:
+                seen = await asyncio.gather(asyncio.to_thread(get_file_manifest), asyncio.create_task(current()))
+                return manifest, seen
+
+        manifest, seen = asyncio.run(run())
+        assert seen == [manifest, manifest]
+
+    def test_inclusion_plans_are_memoized(self, tmp_path):
+        project = _make_project(tmp_path)
+        files = expand_paths([str(project)])
+
+        with file_manifest_scope() as manifest:
+            plan = _plan_file_inclusion_by_size(files, 10_000)
+            plan[0].clear()
+            assert _plan_file_inclusion_by_size(files, 10_000) == (files, [], plan[2])
+            assert manifest.get_stats()["plans"] == 1
+
+    def test_concurrent_reads_use_the_request_manifest(self, tmp_path):
+        project = _make_project(tmp_path, files=4)
+
+        # Planning stats run on executor threads, which do not inherit the request context
+        with patch.object(file_utils, "FILE_READ_WORKERS", 4), file_manifest_scope() as manifest:
+            content = read_files([str(project)])
+
+        assert content.count("--- BEGIN FILE:") == 4
+        assert manifest.get_stats()["stats"] == 4
+
+
+class TestBoundaryCheck:
+    def test_directories_are_sized_by_their_contents(self, tmp_path):
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "big.py").write_text("x" * 2_000_000)
+
+        with patch("utils.model_context.ModelContext.calculate_token_allocation") as allocation:
+            allocation.return_value.total_tokens = 200_000
+            allocation.return_value.file_tokens = 100_000
+            result = check_total_file_size([str(project)], "o3")
+
+        assert result is not None
+        assert result["status"] == "code_too_large"
+        assert result["metadata"]["file_count"] == 1
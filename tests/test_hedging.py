@@ -0,0 +1,211 @@
+"""
+Tests for hedged requests across providers
+"""
+
+import asyncio
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from providers.base import ModelResponse, ProviderType, StreamChunk
+from providers.hedging import (
+    FIRST_TOKEN,
+    RESPONSE,
+    LatencyTracker,
+    _base_model_id,
+    get_latency_tracker,
+    hedged_generate,
+    hedged_stream,
+    reset_hedging,
+)
+
+HEDGE_ENV = {"HEDGE_REQUESTS": "true", "HEDGE_MIN_SAMPLES": "1", "HEDGE_MIN_DELAY": "0"}
+
+
+class FakeProvider:
+    """Provider answering after a fixed delay, recording cancellation"""
+
+    def __init__(self, provider_type, delay, content=None):
+        self.provider_type = provider_type
+        self.delay = delay
+        self.content = content or f"from {provider_type.value}"
+        self.calls = []
+        self.cancelled = False
+        self.stream_closed = False
+
+    def get_provider_type(self):
+        return self.provider_type
+
+    async def agenerate_content(self, **kwargs):
+        self.calls.append(kwargs)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return ModelResponse(content=self.content, provider=self.provider_type, metadata={})
+
+    async def astream_content(self, **kwargs):
+        self.calls.append(kwargs)
+        try:
+            await asyncio.sleep(self.delay)
+            yield StreamChunk(text=self.content)
+            yield StreamChunk(response=ModelResponse(content=self.content, provider=self.provider_type, metadata={}))
+        finally:
+            self.stream_closed = True
+
+
+@pytest.fixture(autouse=True)
+def clean_hedging_state():
+    reset_hedging()
+    yield
+    reset_hedging()
+
+
+def _observe(provider, model_name, kind, seconds):
+    get_latency_tracker().record(provider.get_provider_type().value, model_name, kind, seconds)
+
+
+class TestLatencyTracker:
+    def test_percentile(self):
+        tracker = LatencyTracker()
+        for seconds in range(1, 101):
+            tracker.record("openai", "o3", RESPONSE, float(seconds))
+
+        assert tracker.percentile("openai", "o3", RESPONSE, 95) == 95.0
+        assert tracker.percentile("openai", "o3", RESPONSE, 50) == 50.0
+        assert tracker.percentile("openai", "o3", FIRST_TOKEN, 95) is None
+        assert tracker.percentile("openai", "o3", RESPONSE, 95, min_samples=101) is None
+
+    def test_equivalent_model_ids(self):
+        assert _base_model_id("o3") == _base_model_id("openai/o3") == _base_model_id("o3-2025-04-16")
+        assert _base_model_id("google/gemini-2.5-pro") == "gemini-2.5-pro"
+        assert _base_model_id("o3") != _base_model_id("o3-mini")
+
+
+class TestHedgedGenerate:
+    def _run(self, primary, alternate, env=None):
+        with patch.dict(os.environ, env or HEDGE_ENV):
+            with patch("providers.hedging.find_alternate", return_value=(alternate, "openai/o3")):
+                return asyncio.run(hedged_generate(primary, prompt="hi", model_name="o3"))
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=5)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+        _observe(primary, "o3", RESPONSE, 0.01)
+
+        response = self._run(primary, alternate)
+
+        assert response.content == "from openrouter"
+        assert response.metadata["hedged_from"] == "openai"
+        assert alternate.calls == [{"prompt": "hi", "model_name": "openai/o3"}]
+        assert primary.cancelled
+
+    def test_fast_primary_is_not_hedged(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=0)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+        _observe(primary, "o3", RESPONSE, 1.0)
+
+        response = self._run(primary, alternate)
+
+        assert response.content == "from openai"
+        assert "hedged_from" not in response.metadata
+        assert alternate.calls == []
+
+    def test_disabled_or_without_observations(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=0.05)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+
+        # Nothing observed yet: no basis for a hedge delay
+        assert self._run(primary, alternate).content == "from openai"
+
+        _observe(primary, "o3", RESPONSE, 0.01)
+        assert self._run(primary, alternate, env={"HEDGE_REQUESTS": "false"}).content == "from openai"
+        assert alternate.calls == []
+
+    def test_budget_limits_hedges(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=0.05)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+        _observe(primary, "o3", RESPONSE, 0.01)
+
+        response = self._run(primary, alternate, env={**HEDGE_ENV, "HEDGE_BUDGET": "0"})
+
+        assert response.content == "from openai"
+        assert alternate.calls == []
+
+    def test_failed_hedge_waits_for_primary(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=0.1)
+        alternate = MagicMock()
+        alternate.get_provider_type.return_value = ProviderType.OPENROUTER
+
+        async def fail(**kwargs):
+            raise RuntimeError("upstream error")
+
+        alternate.agenerate_content.side_effect = fail
+        _observe(primary, "o3", RESPONSE, 0.01)
+
+        assert self._run(primary, alternate).content == "from openai"
+        alternate.agenerate_content.assert_called_once()
+
+    def test_threshold_does_not_drift_down_with_hedges(self):
+        fast = FakeProvider(ProviderType.OPENAI, delay=0)
+        slow = FakeProvider(ProviderType.OPENAI, delay=5)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+        for _ in range(9):
+            _observe(fast, "o3", RESPONSE, 0.01)
+        _observe(fast, "o3", RESPONSE, 0.05)
+        threshold = get_latency_tracker().percentile("openai", "o3", RESPONSE, 95)
+
+        # Half the calls are slow; they are hedged and cancelled, but still count
+        for _ in range(10):
+            self._run(fast, alternate)
+            assert self._run(slow, alternate).metadata["hedged_from"] == "openai"
+
+        assert slow.cancelled
+        assert get_latency_tracker().percentile("openai", "o3", RESPONSE, 95) >= threshold
+
+    def test_cache_hits_are_not_recorded(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=0)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+        cached = ModelResponse(content="cached", provider=ProviderType.OPENAI, metadata={"cache_hit": True})
+
+        async def from_cache(**kwargs):
+            return cached
+
+        with patch.object(primary, "agenerate_content", side_effect=from_cache):
+            assert self._run(primary, alternate) is cached
+
+        assert get_latency_tracker().percentile("openai", "o3", RESPONSE, 50) is None
+
+
+class TestHedgedStream:
+    def _collect(self, primary, alternate):
+        async def run():
+            return [chunk async for chunk in hedged_stream(primary, prompt="hi", model_name="o3")]
+
+        with patch.dict(os.environ, HEDGE_ENV):
+            with patch("providers.hedging.find_alternate", return_value=(alternate, "openai/o3")):
+                return asyncio.run(run())
+
+    def test_slow_first_token_is_hedged(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=5)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+        _observe(primary, "o3", FIRST_TOKEN, 0.01)
+
+        chunks = self._collect(primary, alternate)
+
+        assert chunks[0].text == "from openrouter"
+        assert chunks[-1].response.metadata["hedged_from"] == "openai"
+        assert primary.stream_closed and alternate.stream_closed
+
+    def test_unhedged_stream_passes_through(self):
+        primary = FakeProvider(ProviderType.OPENAI, delay=0)
+        alternate = FakeProvider(ProviderType.OPENROUTER, delay=0)
+
+        chunks = self._collect(primary, alternate)
+
+        assert [chunk.text for chunk in chunks] == ["from openai", ""]
+        assert alternate.calls == []
+        assert primary.stream_closed
+        assert get_latency_tracker().percentile("openai", "o3", FIRST_TOKEN, 50) is not None
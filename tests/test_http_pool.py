@@ -0,0 +1,124 @@
+"""
+Tests for the shared HTTP connection pool used by OpenAI-compatible providers
+"""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from providers.dial import DIALModelProvider
+from providers.http_pool import HTTPConnectionPool, HTTPPoolSettings, get_http_pool, reset_http_pool
+from providers.openai_provider import OpenAIModelProvider
+
+
+def _ok(request):
+    return httpx.Response(200, json={"ok": True})
+
+
+@pytest.fixture
+def pool():
+    reset_http_pool()
+    yield get_http_pool()
+    reset_http_pool()
+
+
+def _mocked_pool(max_connections=2):
+    pool = HTTPConnectionPool(HTTPPoolSettings(max_connections=max_connections))
+    pool.transport._transport = httpx.MockTransport(_ok)
+    pool.async_transport._loop_transport = lambda: httpx.MockTransport(_ok)
+    return pool
+
+
+class TestSettings:
+    def test_defaults(self):
+        with patch.dict(os.environ, {}, clear=True):
+            settings = HTTPPoolSettings.from_env()
+        assert settings == HTTPPoolSettings(
+            max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0, http2=False
+        )
+
+    def test_from_env(self):
+        env = {
+            "HTTP_POOL_MAX_CONNECTIONS": "8",
+            "HTTP_POOL_MAX_KEEPALIVE": "4",
+            "HTTP_POOL_KEEPALIVE_EXPIRY": "5.5",
+            "HTTP_POOL_HTTP2": "false",
+        }
+        with patch.dict(os.environ, env):
+            limits = HTTPPoolSettings.from_env().limits()
+        assert (limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry) == (8, 4, 5.5)
+
+    def test_invalid_values_and_missing_h2_fall_back(self):
+        env = {"HTTP_POOL_MAX_CONNECTIONS": "lots", "HTTP_POOL_KEEPALIVE_EXPIRY": "-1", "HTTP_POOL_HTTP2": "true"}
+        with patch.dict(os.environ, env), patch("providers.http_pool.HAS_H2", False):
+            settings = HTTPPoolSettings.from_env()
+        assert (settings.max_connections, settings.keepalive_expiry, settings.http2) == (100, 30.0, False)
+
+
+class TestPoolMetrics:
+    def test_saturation_and_release(self):
+        pool = _mocked_pool(max_connections=1)
+        client = httpx.Client(transport=pool.transport)
+
+        first = client.send(client.build_request("GET", "https://api.example.com/a"), stream=True)
+        second = client.send(client.build_request("GET", "https://api.example.com/b"), stream=True)
+        stats = pool.get_stats()
+        assert (stats["in_flight"], stats["peak_in_flight"], stats["saturated_requests"]) == (2, 2, 1)
+        assert stats["saturation"] == 2.0
+
+        first.close()
+        second.close()
+        second.close()  # releasing twice must not skew the counters
+        stats = pool.get_stats()
+        assert (stats["requests"], stats["in_flight"]) == (2, 0)
+
+    def test_async_requests_are_counted(self):
+        pool = _mocked_pool()
+
+        async def run():
+            async with httpx.AsyncClient(transport=pool.async_transport) as client:
+                return await client.get("https://api.example.com/a")
+
+        assert asyncio.run(run()).json() == {"ok": True}
+        stats = pool.get_stats()
+        assert (stats["requests"], stats["in_flight"]) == (1, 0)
+
+    def test_closing_a_client_keeps_the_pool_open(self):
+        pool = _mocked_pool()
+
+        with httpx.Client(transport=pool.transport) as client:
+            client.get("https://api.example.com/a")
+        with httpx.Client(transport=pool.transport) as client:
+            assert client.get("https://api.example.com/a").status_code == 200
+
+        assert pool.get_stats()["requests"] == 2
+
+
+class TestProvidersSharePool:
+    def test_openai_compatible_clients(self, pool):
+        first = OpenAIModelProvider("key-1")
+        second = OpenAIModelProvider("key-2")
+
+        assert first.client._client._transport is pool.transport
+        assert second.client._client._transport is pool.transport
+        assert first.async_client._client._transport is pool.async_transport
+
+    def test_test_transport_bypasses_the_pool(self, pool):
+        provider = OpenAIModelProvider("key")
+        provider._test_transport = httpx.MockTransport(_ok)
+
+        assert provider.client._client._transport is provider._test_transport
+
+    def test_dial_deployments(self, pool):
+        provider = DIALModelProvider("dial-key")
+
+        client_a = provider._get_deployment_client("model_a")
+        client_b = provider._get_deployment_client("model_b")
+        assert client_a._client._transport is client_b._client._transport is pool.transport
+        assert provider._get_async_deployment_client("model_a")._client._transport is pool.async_transport
+
+        provider.close()
+        assert get_http_pool() is pool
@@ -89,6 +89,7 @@ class TestImageSupportIntegration:
 
         # Mock the Redis operations to return success
         mock_client.set.return_value = True
+        mock_client.get_list.return_value = []  # Turns below are embedded in the thread header
 
         thread_id = create_thread("test_tool", {"initial": "context"})
 
@@ -323,6 +324,7 @@ class TestImageSupportIntegration:
 
         # Mock the Redis operations to return success
         mock_client.set.return_value = True
+        mock_client.get_list.return_value = []  # Turns below are embedded in the thread header
 
         # Create initial thread with chat tool
         thread_id = create_thread("chat", {"initial": "context"})
@@ -461,6 +463,7 @@ class TestImageSupportIntegration:
 
         # Mock the Redis operations to return success
         mock_client.set.return_value = True
+        mock_client.get_list.return_value = []  # Turns below are embedded in the thread header
 
         # Create parent thread with images
         parent_thread_id = create_thread("chat", {"parent": "context"})
@@ -0,0 +1,110 @@
+"""Tests for the cached model catalog shared by schema generation and auto mode"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+import utils.model_restrictions
+from providers import ModelProviderRegistry
+from providers.base import ProviderType
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from tools.chat import ChatTool
+from tools.shared.base_tool import BaseTool
+from tools.thinkdeep import ThinkDeepTool
+
+
+@pytest.mark.no_mock_provider
+class TestModelCatalog:
+    def setup_method(self):
+        registry = ModelProviderRegistry()
+        self._original_providers = registry._providers.copy()
+        registry._providers.clear()
+        registry._initialized_providers.clear()
+        ModelProviderRegistry.invalidate_model_catalog()
+        utils.model_restrictions._restriction_service = None
+        BaseTool._model_field_schema_cache.clear()
+
+    def teardown_method(self):
+        registry = ModelProviderRegistry()
+        registry._providers.clear()
+        registry._initialized_providers.clear()
+        registry._providers.update(self._original_providers)
+        ModelProviderRegistry.invalidate_model_catalog()
+        utils.model_restrictions._restriction_service = None
+        BaseTool._model_field_schema_cache.clear()
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"})
+    def test_catalog_is_built_once(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        provider = ModelProviderRegistry.get_provider(ProviderType.OPENAI)
+
+        with patch.object(provider, "list_models", wraps=provider.list_models) as list_models:
+            first = ModelProviderRegistry.get_available_models()
+            ModelProviderRegistry.get_available_model_names()
+            ModelProviderRegistry.get_available_model_names(ProviderType.OPENAI)
+            ModelProviderRegistry.get_preferred_fallback_model()
+            ModelProviderRegistry.get_preferred_fallback_model()
+
+        assert "o3" in first
+        # One call for the catalog, one for the fallback's allowed list
+        assert list_models.call_count == 2
+
+        # Callers get their own copies
+        first.clear()
+        assert ModelProviderRegistry.get_available_models()
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": "test-key"})
+    def test_catalog_is_rebuilt_on_configuration_changes(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        catalog = ModelProviderRegistry.get_model_catalog()
+        assert ModelProviderRegistry.get_model_catalog() is catalog
+        assert "gemini-2.5-flash" not in catalog.models
+
+        ModelProviderRegistry.register_provider(ProviderType.GOOGLE, GeminiModelProvider)
+        with_gemini = ModelProviderRegistry.get_model_catalog()
+        assert with_gemini.version > catalog.version
+        assert with_gemini.models["gemini-2.5-flash"] == ProviderType.GOOGLE
+
+        with patch.dict(os.environ, {"OPENAI_ALLOWED_MODELS": "o4-mini"}):
+            utils.model_restrictions._restriction_service = None
+            restricted = ModelProviderRegistry.get_model_catalog()
+            assert restricted.version > with_gemini.version
+            assert "o4-mini" in restricted.models
+            assert "o3" not in restricted.models
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"})
+    def test_model_field_schema_is_shared_between_tools(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+
+        with patch.object(BaseTool, "_build_model_field_schema", autospec=True, return_value={"enum": ["o3"]}) as build:
+            chat_schema = ChatTool().get_model_field_schema()
+            thinkdeep_schema = ThinkDeepTool().get_model_field_schema()
+
+            assert build.call_count == 1
+            assert chat_schema == thinkdeep_schema == {"enum": ["o3"]}
+            chat_schema["enum"].append("mutated")
+            assert ThinkDeepTool().get_model_field_schema() == {"enum": ["o3"]}
+
+            ModelProviderRegistry.clear_cache()
+            ChatTool().get_model_field_schema()
+            assert build.call_count == 2
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "OPENROUTER_API_KEY": "secret-key"})
+    def test_tools_overriding_the_schema_builder_get_their_own_entry(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+
+        class NarrowTool(ChatTool):
+            def _get_available_models(self):
+                return ["o3"]
+
+        with patch.object(BaseTool, "_build_model_field_schema", autospec=True, return_value={"enum": ["o3"]}) as build:
+            ChatTool().get_model_field_schema()
+            NarrowTool().get_model_field_schema()
+            NarrowTool().get_model_field_schema()
+
+        assert build.call_count == 2
+        assert len(BaseTool._model_field_schema_cache) == 2
+        for key, _ in BaseTool._model_field_schema_cache.values():
+            assert "secret-key" not in key
@@ -0,0 +1,77 @@
+"""Tests for the memoized model-to-provider index of the registry"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+import utils.model_restrictions
+from providers import ModelProviderRegistry
+from providers.base import ProviderType
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+
+
+@pytest.mark.no_mock_provider
+class TestModelIndex:
+    def setup_method(self):
+        registry = ModelProviderRegistry()
+        self._original_providers = registry._providers.copy()
+        registry._providers.clear()
+        registry._initialized_providers.clear()
+        ModelProviderRegistry.invalidate_model_index()
+        utils.model_restrictions._restriction_service = None
+
+    def teardown_method(self):
+        registry = ModelProviderRegistry()
+        registry._providers.clear()
+        registry._initialized_providers.clear()
+        registry._providers.update(self._original_providers)
+        ModelProviderRegistry.invalidate_model_index()
+        utils.model_restrictions._restriction_service = None
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"})
+    def test_lookups_are_memoized(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        provider = ModelProviderRegistry.get_provider(ProviderType.OPENAI)
+
+        with patch.object(provider, "validate_model_name", wraps=provider.validate_model_name) as validate:
+            for _ in range(3):
+                assert ModelProviderRegistry.get_provider_for_model("o3") is provider
+                assert ModelProviderRegistry.get_provider_for_model("no-such-model") is None
+
+        # One walk per name; unknown names are cached as misses too
+        assert validate.call_count == 2
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"})
+    def test_build_model_index_covers_aliases(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        provider = ModelProviderRegistry.get_provider(ProviderType.OPENAI)
+
+        assert ModelProviderRegistry.build_model_index() == len(set(provider.list_models()))
+
+        with patch.object(provider, "validate_model_name") as validate:
+            assert ModelProviderRegistry.get_provider_for_model("o3") is provider
+            assert ModelProviderRegistry.get_provider_for_model("o3-mini") is provider
+        validate.assert_not_called()
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": "test-key"})
+    def test_registering_a_provider_invalidates(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        assert ModelProviderRegistry.get_provider_for_model("gemini-2.5-flash") is None
+
+        ModelProviderRegistry.register_provider(ProviderType.GOOGLE, GeminiModelProvider)
+        provider = ModelProviderRegistry.get_provider_for_model("gemini-2.5-flash")
+        assert provider.get_provider_type() == ProviderType.GOOGLE
+
+        ModelProviderRegistry.unregister_provider(ProviderType.GOOGLE)
+        assert ModelProviderRegistry.get_provider_for_model("gemini-2.5-flash") is None
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"})
+    def test_restriction_changes_invalidate(self):
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        assert ModelProviderRegistry.get_provider_for_model("o3") is not None
+
+        with patch.dict(os.environ, {"OPENAI_ALLOWED_MODELS": "o4-mini"}):
+            utils.model_restrictions._restriction_service = None
+            assert ModelProviderRegistry.get_provider_for_model("o3") is None
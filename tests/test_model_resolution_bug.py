@@ -7,7 +7,7 @@ This test specifically targets the bug where:
 3. OpenRouter API returns "gemini-2.5-pro is not a valid model ID"
 """
 
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from providers.base import ProviderType
 from providers.openrouter import OpenRouterProvider
@@ -52,7 +52,7 @@ class TestModelResolutionBug:
         mock_response = Mock()
         mock_response.content = "Test response"
         mock_response.usage = None
-        mock_provider.generate_content.return_value = mock_response
+        mock_provider.agenerate_content = AsyncMock(return_value=mock_response)
 
         # Track the model name passed to generate_content
         received_model_names = []
@@ -61,7 +61,7 @@ class TestModelResolutionBug:
             received_model_names.append(kwargs.get("model_name", args[1] if len(args) > 1 else "unknown"))
             return mock_response
 
-        mock_provider.generate_content.side_effect = track_generate_content
+        mock_provider.agenerate_content.side_effect = track_generate_content
 
         # Mock the get_model_provider to return our mock
         with patch.object(self.consensus_tool, "get_model_provider", return_value=mock_provider):
@@ -0,0 +1,105 @@
+"""
+Tests for compression of stored conversation payloads
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from utils.conversation_memory import add_turn, clear_thread_cache, create_thread, get_thread
+from utils.payload_compression import PayloadCodec, get_payload_codec, reset_payload_codec
+from utils.sqlite_storage import SQLiteStorage
+from utils.storage_backend import InMemoryStorage
+
+MODEL_RESPONSE = "\n".join(
+    f"## Finding {i}\n\n```python\ndef handler_{i}(request):\n    return process(request, retries={i})\n```\n"
+    for i in range(200)
+)
+
+
+@pytest.fixture
+def codec_env(monkeypatch):
+    """Reset the process-wide codec before and after each test"""
+    reset_payload_codec()
+    yield monkeypatch
+    reset_payload_codec()
+
+
+class TestPayloadCodec:
+    def test_large_payloads_are_compressed(self):
+        codec = PayloadCodec(algorithm="zlib", min_bytes=1024)
+        stored = codec.encode(MODEL_RESPONSE)
+
+        assert isinstance(stored, bytes)
+        assert len(stored) * 5 < len(MODEL_RESPONSE)
+        assert codec.decode(stored) == MODEL_RESPONSE
+
+        stats = codec.get_stats()
+        assert stats["compressed"] == 1
+        assert stats["compression_ratio"] > 5
+
+    def test_small_and_incompressible_payloads_are_stored_as_is(self):
+        codec = PayloadCodec(algorithm="zlib", min_bytes=1024)
+        assert codec.encode("short") == "short"
+
+        noise = "".join(chr(0x4E00 + (i * 7919) % 20000) for i in range(2000))
+        stored = codec.encode(noise)
+        assert codec.decode(stored) == noise
+        assert codec.get_stats()["uncompressed"] >= 1
+
+    def test_disabled_compression(self):
+        codec = PayloadCodec(algorithm="none")
+        assert codec.encode(MODEL_RESPONSE) is MODEL_RESPONSE
+        assert codec.get_stats()["compression_ratio"] == 1.0
+
+    def test_dictionary_improves_small_payloads_and_is_required_to_decode(self):
+        dictionary = MODEL_RESPONSE[:4000].encode("utf-8")
+        payload = MODEL_RESPONSE[4000:5200]
+        plain = PayloadCodec(algorithm="zlib", min_bytes=100)
+        with_dict = PayloadCodec(algorithm="zlib", min_bytes=100, dictionary=dictionary)
+
+        stored = with_dict.encode(payload)
+        assert len(stored) < len(plain.encode(payload))
+        assert with_dict.decode(stored) == payload
+
+        with pytest.raises(ValueError):
+            PayloadCodec(algorithm="zlib", dictionary=b"another dictionary").decode(stored)
+
+    def test_plain_stored_values_still_decode(self):
+        codec = PayloadCodec()
+        assert codec.decode('{"role": "user"}') == '{"role": "user"}'
+        assert codec.decode(b'{"role": "user"}') == '{"role": "user"}'
+
+    def test_environment_configuration(self, codec_env):
+        codec_env.setenv("CONVERSATION_COMPRESSION", "zstd")
+        codec_env.setenv("CONVERSATION_COMPRESSION_MIN_BYTES", "64")
+        codec = get_payload_codec()
+
+        assert codec.algorithm in ("zstd", "zlib")  # zlib when zstandard is not installed
+        assert codec.min_bytes == 64
+        assert get_payload_codec() is codec
+
+
+class TestCompressedConversationStorage:
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_turns_are_compressed_transparently(self, backend, tmp_path, codec_env):
+        codec_env.setenv("CONVERSATION_COMPRESSION", "zlib")
+        storage = InMemoryStorage() if backend == "memory" else SQLiteStorage(str(tmp_path / "conversations.db"))
+        clear_thread_cache()
+
+        try:
+            with patch("utils.conversation_memory.get_storage", return_value=storage):
+                thread_id = create_thread("chat", {"prompt": "Review this"})
+                assert add_turn(thread_id, "assistant", MODEL_RESPONSE, model_name="flash")
+                assert add_turn(thread_id, "user", "Thanks")
+
+                stored = storage.get_list(f"thread:{thread_id}:turns")
+                assert isinstance(stored[0], bytes) and len(stored[0]) * 5 < len(MODEL_RESPONSE)
+                assert isinstance(stored[1], str)
+
+                context = get_thread(thread_id)
+        finally:
+            storage.shutdown()
+
+        assert [turn.content for turn in context.turns] == [MODEL_RESPONSE, "Thanks"]
+        assert get_payload_codec().get_stats()["compressed"] == 1
@@ -0,0 +1,220 @@
+"""
+Tests for provider prompt-prefix caching hints and stable-first prompt ordering
+"""
+
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from providers.dial import DIALModelProvider
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.openrouter import OpenRouterProvider
+from providers.xai import XAIModelProvider
+from utils.prompt_cache import prompt_cache_key, split_cacheable_prefix
+
+SYSTEM_PROMPT = "You are a careful reviewer.\n" * 200
+FILES = "--- BEGIN FILE: /p/app.py ---\nx = 1\n--- END FILE: /p/app.py ---\n" * 100
+
+
+class TestPromptCacheHelpers:
+    def test_split_cacheable_prefix(self):
+        assert split_cacheable_prefix("abcdef", 2) == ("ab", "cdef")
+        assert split_cacheable_prefix("abcdef", None) == ("", "abcdef")
+        assert split_cacheable_prefix("abc", 10) == ("abc", "")
+
+    def test_prompt_cache_key_depends_on_stable_content_only(self):
+        key = prompt_cache_key("gpt-5", SYSTEM_PROMPT, FILES)
+        assert key == prompt_cache_key("gpt-5", SYSTEM_PROMPT, FILES)
+        assert key != prompt_cache_key("gpt-5", SYSTEM_PROMPT, FILES + "changed")
+        assert key != prompt_cache_key("o3", SYSTEM_PROMPT, FILES)
+        assert key.startswith("zen-")
+
+
+class TestOpenAICompatibleCacheHints:
+    def test_openai_sends_prompt_cache_key(self):
+        provider = OpenAIModelProvider("test-key")
+        prompt = FILES + "Review the code."
+
+        params, messages, _ = provider._prepare_completion_request(
+            prompt, "o3", SYSTEM_PROMPT, cacheable_prefix_length=len(FILES)
+        )
+
+        assert params["extra_body"]["prompt_cache_key"] == prompt_cache_key("o3", SYSTEM_PROMPT, FILES)
+        assert "cacheable_prefix_length" not in params
+        assert messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+
+    def test_short_or_disabled_prefixes_send_no_hint(self):
+        provider = OpenAIModelProvider("test-key")
+
+        params, _, _ = provider._prepare_completion_request("hi", "o3", "short system prompt")
+        assert "extra_body" not in params
+
+        with patch.dict(os.environ, {"PROMPT_CACHE": "false"}):
+            params, _, _ = provider._prepare_completion_request(
+                FILES + "Review.", "o3", SYSTEM_PROMPT, cacheable_prefix_length=len(FILES)
+            )
+        assert "extra_body" not in params
+
+    def test_other_compatible_endpoints_get_no_unknown_fields(self):
+        provider = XAIModelProvider("test-key")
+
+        params, _, _ = provider._prepare_completion_request(
+            FILES + "Review.", "grok-4", SYSTEM_PROMPT, cacheable_prefix_length=len(FILES)
+        )
+
+        assert "extra_body" not in params
+
+    def test_cached_tokens_are_reported(self):
+        provider = OpenAIModelProvider("test-key")
+        response = SimpleNamespace(
+            usage=SimpleNamespace(
+                prompt_tokens=5000,
+                completion_tokens=100,
+                total_tokens=5100,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=4096),
+            )
+        )
+
+        usage = provider._extract_usage(response)
+
+        assert usage["cached_input_tokens"] == 4096
+        assert usage["input_tokens"] == 5000
+
+
+class TestCacheControlBreakpoints:
+    def _params(self, prompt, images=False):
+        user_content = prompt
+        if images:
+            user_content = [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+            ]
+        return {
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_content},
+            ]
+        }
+
+    def test_openrouter_anthropic_models_get_breakpoints(self):
+        provider = OpenRouterProvider(api_key="test-key")
+        params = self._params(FILES + "Review.", images=True)
+
+        provider._apply_prompt_cache(params, "anthropic/claude-sonnet-4", SYSTEM_PROMPT, FILES + "Review.", len(FILES))
+
+        system, user = params["messages"]
+        assert system["content"] == [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+        assert user["content"][0] == {"type": "text", "text": FILES, "cache_control": {"type": "ephemeral"}}
+        assert user["content"][1] == {"type": "text", "text": "Review."}
+        assert user["content"][2]["type"] == "image_url"
+
+    def test_openrouter_other_models_are_untouched(self):
+        provider = OpenRouterProvider(api_key="test-key")
+        params = self._params(FILES + "Review.")
+
+        provider._apply_prompt_cache(params, "openai/gpt-4o", SYSTEM_PROMPT, FILES + "Review.", len(FILES))
+
+        assert params == self._params(FILES + "Review.")
+
+    def test_dial_claude_system_message_breakpoint(self):
+        provider = DIALModelProvider("test-key")
+        params = self._params("Review.")
+
+        provider._apply_prompt_cache(params, "anthropic.claude-opus-4.1-20250805-v1:0", SYSTEM_PROMPT, "Review.", 0)
+
+        assert params["messages"][0]["custom_fields"] == {"cache_breakpoint": {}}
+        assert "custom_fields" not in params["messages"][1]
+
+        params = self._params("Review.")
+        provider._apply_prompt_cache(params, "o3-2025-04-16", SYSTEM_PROMPT, "Review.", 0)
+        assert "custom_fields" not in params["messages"][0]
+
+
+class TestGeminiExplicitCache:
+    def _provider(self, **env):
+        with patch.dict(
+            os.environ, {"GEMINI_EXPLICIT_CACHE": "true", "GEMINI_EXPLICIT_CACHE_MIN_TOKENS": "1024", **env}
+        ):
+            provider = GeminiModelProvider(api_key="test-key")
+        provider._client = MagicMock()
+        provider._client.caches.create.return_value = SimpleNamespace(name="cachedContents/abc")
+        return provider
+
+    def test_prefix_is_cached_and_reused(self):
+        provider = self._provider()
+        prompt = FILES + "Review the code."
+
+        for _ in range(2):
+            provider.generate_content(
+                prompt, "gemini-2.5-flash", system_prompt=SYSTEM_PROMPT, cacheable_prefix_length=len(FILES)
+            )
+
+        assert provider._client.caches.create.call_count == 1
+        cache_config = provider._client.caches.create.call_args.kwargs["config"]
+        assert cache_config.system_instruction == SYSTEM_PROMPT
+        call = provider._client.models.generate_content.call_args.kwargs
+        assert call["config"].cached_content == "cachedContents/abc"
+        assert call["contents"][0]["parts"][0]["text"] == "Review the code."
+
+    def test_failed_cache_creation_falls_back_and_is_not_retried(self):
+        provider = self._provider()
+        provider._client.caches.create.side_effect = RuntimeError("model does not support caching")
+        prompt = FILES + "Review the code."
+
+        for _ in range(2):
+            provider.generate_content(
+                prompt, "gemini-2.5-flash", system_prompt=SYSTEM_PROMPT, cacheable_prefix_length=len(FILES)
+            )
+
+        assert provider._client.caches.create.call_count == 1
+        call = provider._client.models.generate_content.call_args.kwargs
+        assert call["config"].cached_content is None
+        assert call["contents"][0]["parts"][0]["text"] == f"{SYSTEM_PROMPT}\n\n{prompt}"
+
+    @pytest.mark.parametrize(
+        "env", [{"GEMINI_EXPLICIT_CACHE": "false"}, {"GEMINI_EXPLICIT_CACHE_MIN_TOKENS": "1000000"}]
+    )
+    def test_disabled_or_small_prefixes_use_implicit_caching(self, env):
+        provider = self._provider(**env)
+
+        provider.generate_content(
+            FILES + "Review.", "gemini-2.5-flash", system_prompt=SYSTEM_PROMPT, cacheable_prefix_length=len(FILES)
+        )
+
+        provider._client.caches.create.assert_not_called()
+
+    def test_cached_tokens_are_reported(self):
+        provider = self._provider()
+        metadata = SimpleNamespace(prompt_token_count=5000, candidates_token_count=10, cached_content_token_count=4000)
+
+        usage = provider._extract_usage(SimpleNamespace(usage_metadata=metadata))
+
+        assert usage["cached_input_tokens"] == 4000
+
+
+class TestStableFirstPrompts:
+    def test_standard_prompt_puts_files_before_the_request(self):
+        from tools.chat import ChatTool
+
+        tool = ChatTool()
+        request = SimpleNamespace(
+            prompt="What does this do?", files=["/p/app.py"], continuation_id=None, use_websearch=False
+        )
+        with patch.object(tool, "_prepare_file_content_for_prompt", return_value=(FILES, ["/p/app.py"])):
+            prompt = tool.build_standard_prompt("SYSTEM", "What does this do?", request)
+
+        assert prompt.index(FILES) < prompt.index("=== USER REQUEST ===") < prompt.index("What does this do?")
+        assert prompt.startswith(tool._cacheable_prompt_prefix)
+        assert tool._cacheable_prompt_prefix.startswith("SYSTEM")
+        assert FILES in tool._cacheable_prompt_prefix
+
+    def test_expert_context_puts_files_first(self):
+        from tools.analyze import AnalyzeTool
+
+        context = AnalyzeTool()._add_files_to_expert_context("FINDINGS", FILES)
+
+        assert context.startswith("=== ESSENTIAL FILES ===")
+        assert context.endswith("FINDINGS")
@@ -0,0 +1,104 @@
+"""
+Tests for budget-aware concurrent reading in read_files
+"""
+
+import threading
+from unittest.mock import patch
+
+from utils import file_utils
+from utils.file_utils import read_files
+
+
+def _make_files(directory, count, size):
+    paths = []
+    for i in range(count):
+        path = directory / f"module_{i:02d}.py"
+        path.write_text("x" * size)
+        paths.append(str(path))
+    return paths
+
+
+class TestReadFiles:
+    def test_output_keeps_sorted_order(self, tmp_path):
+        paths = _make_files(tmp_path, 12, 100)
+
+        result = read_files([str(tmp_path)], max_tokens=1_000_000, reserve_tokens=0)
+
+        positions = [result.index(f"--- BEGIN FILE: {path} ---") for path in paths]
+        assert positions == sorted(positions)
+        assert "SKIPPED FILES" not in result
+
+    def test_reading_stops_once_budget_is_exhausted(self, tmp_path):
+        paths = _make_files(tmp_path, 10, 3500)  # ~1,000 estimated tokens each
+        _, file_tokens = file_utils.read_file_content(paths[0])
+        read_paths = []
+        original = file_utils.read_file_content
+
+        def tracking_read(file_path, **kwargs):
+            read_paths.append(file_path)
+            return original(file_path, **kwargs)
+
+        with patch("utils.file_utils.read_file_content", side_effect=tracking_read):
+            result = read_files([str(tmp_path)], max_tokens=3 * file_tokens, reserve_tokens=0)
+
+        assert sorted(read_paths) == paths[:3]
+        assert "Total skipped: 7" in result
+        listed = [line.strip()[2:] for line in result.splitlines() if line.strip().startswith("- ")]
+        assert listed == paths[3:]
+
+    def test_skipped_files_match_sequential_reading(self, tmp_path):
+        # Line-numberless .py files estimate at more tokens than they are charged, and the
+        # large file at the front underestimates, so the size plan is off in both directions
+        (tmp_path / "a_large.txt").write_text("word " * 4000)
+        for i in range(6):
+            (tmp_path / f"f{i}.py").write_text("".join(f"value_{n} = {n}\n" for n in range(400)))
+        (tmp_path / "z_small.py").write_text("x = 1\n")
+        all_files = file_utils.expand_paths([str(tmp_path)])
+        counts = [file_utils.read_file_content(path)[1] for path in all_files]
+
+        def sequential(budget):
+            included, skipped, total = [], [], 0
+            for i, (path, tokens) in enumerate(zip(all_files, counts)):
+                if total >= budget:
+                    skipped.extend(all_files[i:])
+                    break
+                if total + tokens <= budget:
+                    included.append(path)
+                    total += tokens
+                else:
+                    skipped.append(path)
+            return included, skipped, total
+
+        for budget in (sum(counts[1:]), sum(counts), counts[0] - 1, counts[1] * 3, sum(counts) // 2):
+            included, skipped, total = sequential(budget)
+            parts, tokens, files_skipped = file_utils._read_files_within_budget(all_files, budget, False)
+
+            assert files_skipped == skipped
+            assert tokens == total
+            assert len(parts) == len(included)
+
+    def test_files_are_read_concurrently(self, tmp_path):
+        _make_files(tmp_path, 4, 10)
+        barrier = threading.Barrier(2, timeout=5)
+
+        def blocking_read(file_path, **kwargs):
+            barrier.wait()  # Deadlocks (times out) unless two reads overlap
+            return f"--- {file_path} ---", 1
+
+        with patch("utils.file_utils.read_file_content", side_effect=blocking_read):
+            result = read_files([str(tmp_path)], max_tokens=1_000, reserve_tokens=0)
+
+        assert result.count("---") == 8
+
+    def test_file_exceeding_budget_after_read_is_skipped(self, tmp_path):
+        paths = _make_files(tmp_path, 2, 10)
+
+        def underestimated_read(file_path, **kwargs):
+            tokens = 900 if file_path == paths[0] else 5
+            return f"content of {file_path}", tokens
+
+        with patch("utils.file_utils.read_file_content", side_effect=underestimated_read):
+            result = read_files([str(tmp_path)], max_tokens=100, reserve_tokens=0)
+
+        assert f"content of {paths[1]}" in result
+        assert f"  - {paths[0]}" in result
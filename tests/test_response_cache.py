@@ -0,0 +1,222 @@
+"""
+Tests for the opt-in response cache of deterministic model calls
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+
+from providers.base import ModelCapabilities, ModelProvider, ModelResponse, ProviderType, _cache_entry
+from utils.response_cache import ResponseCache, get_response_cache, reset_response_cache, response_cache_key
+
+
+class CountingProvider(ModelProvider):
+    """Provider whose answers reveal how often the API was called"""
+
+    def __init__(self, api_key: str = "test-key", **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.calls = 0
+
+    def get_capabilities(self, model_name: str) -> ModelCapabilities:
+        raise NotImplementedError
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        self.calls += 1
+        return ModelResponse(
+            content=f"answer {self.calls}",
+            usage={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12},
+            model_name=model_name,
+            friendly_name="Test",
+            provider=ProviderType.CUSTOM,
+            metadata={"finish_reason": "stop"},
+        )
+
+    def count_tokens(self, text: str, model_name: str) -> int:
+        return len(text) // 4
+
+    def get_provider_type(self) -> ProviderType:
+        return ProviderType.CUSTOM
+
+    def validate_model_name(self, model_name: str) -> bool:
+        return True
+
+    def supports_thinking_mode(self, model_name: str) -> bool:
+        return False
+
+
+class NativeAsyncProvider(CountingProvider):
+    """Provider with its own async implementation that delegates to its parent"""
+
+    def generate_content(self, prompt: str, model_name: str, **kwargs) -> ModelResponse:
+        return super().generate_content(prompt, model_name, **kwargs)
+
+    async def agenerate_content(self, prompt: str, model_name: str, **kwargs) -> ModelResponse:
+        return self.generate_content(prompt, model_name, **kwargs)
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    env = {"RESPONSE_CACHE": "true", "RESPONSE_CACHE_PATH": str(tmp_path / "responses.db")}
+    with patch.dict(os.environ, env):
+        reset_response_cache()
+        yield get_response_cache()
+        reset_response_cache()
+
+
+class TestResponseCache:
+    def test_memory_and_disk_tiers(self, tmp_path):
+        path = str(tmp_path / "responses.db")
+        cache = ResponseCache(path=path)
+        cache.put("k", {"content": "hello"})
+
+        assert cache.get("k") == ({"content": "hello"}, "memory")
+        cache.close()
+
+        # A new process finds the entry on disk and promotes it to memory
+        reopened = ResponseCache(path=path)
+        assert reopened.get("k") == ({"content": "hello"}, "disk")
+        assert reopened.get("k") == ({"content": "hello"}, "memory")
+        assert reopened.get("missing") is None
+        stats = reopened.get_stats()
+        assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+        reopened.close()
+
+    def test_entries_expire(self, tmp_path):
+        cache = ResponseCache(ttl_seconds=60, path=str(tmp_path / "responses.db"))
+        cache.put("k", {"content": "hello"})
+
+        later = time.time() + 3600
+        with patch("utils.response_cache.time.time", return_value=later):
+            assert cache.get("k") is None
+        cache.close()
+
+    def test_size_limits(self, tmp_path):
+        cache = ResponseCache(max_entries=2, path=str(tmp_path / "responses.db"), max_disk_bytes=2000)
+        for i in range(3):
+            cache.put(f"k{i}", {"content": os.urandom(600).hex()})
+
+        stats = cache.get_stats()
+        assert stats["memory_entries"] == 2
+        assert stats["disk_bytes"] <= 2000
+        assert cache.get("k0") is None
+        assert cache.get("k2") is not None
+        cache.close()
+
+    def test_disk_eviction_spans_batches(self, tmp_path):
+        cache = ResponseCache(max_entries=1, path=str(tmp_path / "responses.db"), max_disk_bytes=3000)
+        for i in range(8):
+            cache.put(f"small{i}", {"content": os.urandom(200).hex()})
+        assert cache.get_stats()["disk_entries"] == 8
+
+        with patch("utils.response_cache._DISK_EVICTION_BATCH", 2):
+            cache.put("large", {"content": os.urandom(2000).hex()})
+
+        stats = cache.get_stats()
+        assert stats["disk_bytes"] <= 3000
+        assert 1 < stats["disk_entries"] < 8
+        assert cache.get("large") is not None
+        assert cache.get("small0") is None
+        cache.close()
+
+    def test_key_covers_every_input(self):
+        base = {
+            "provider": "openai",
+            "endpoint": None,
+            "model_name": "o3",
+            "system_prompt": "system",
+            "prompt": "prompt",
+            "temperature": 0,
+            "max_output_tokens": None,
+            "params": {"thinking_mode": "high"},
+        }
+        key = response_cache_key(**base)
+
+        assert key == response_cache_key(**{**base, "params": {"thinking_mode": "high", "cacheable_prefix_length": 5}})
+        for change in (
+            {"model_name": "gpt-5"},
+            {"prompt": "other"},
+            {"system_prompt": None},
+            {"temperature": 0.5},
+            {"params": {"thinking_mode": "low"}},
+            {"params": {"thinking_mode": "high", "images": ["data:image/png;base64,AAAA"]}},
+        ):
+            assert response_cache_key(**{**base, **change}) != key
+
+
+class TestProviderResponseCache:
+    def test_deterministic_requests_are_served_from_cache(self, response_cache):
+        provider = CountingProvider()
+
+        first = provider.generate_content("Review this diff", "test-model", temperature=0)
+        second = provider.generate_content("Review this diff", "test-model", temperature=0)
+
+        assert provider.calls == 1
+        assert second.content == first.content == "answer 1"
+        assert "cache_hit" not in first.metadata
+        assert second.metadata["cache_hit"] is True
+        assert second.metadata["cache_tier"] == "memory"
+        assert second.provider == ProviderType.CUSTOM
+
+        provider.generate_content("Review another diff", "test-model", temperature=0)
+        assert provider.calls == 2
+
+    def test_provider_defaults_are_respected(self, response_cache):
+        provider = CountingProvider()
+
+        provider.generate_content("Review this diff", "test-model")
+        provider.generate_content("Review this diff", "test-model")
+
+        # CountingProvider defaults to temperature 0
+        assert provider.calls == 1
+
+    def test_sampled_requests_are_not_cached(self, response_cache):
+        provider = CountingProvider()
+
+        provider.generate_content("Brainstorm", "test-model", temperature=0.7)
+        provider.generate_content("Brainstorm", "test-model", temperature=0.7)
+        assert provider.calls == 2
+
+        provider.generate_content("Brainstorm", "test-model", temperature=0.7, seed=42)
+        provider.generate_content("Brainstorm", "test-model", temperature=0.7, seed=42)
+        assert provider.calls == 3
+
+    def test_disabled_by_default(self):
+        reset_response_cache()
+        provider = CountingProvider()
+
+        with patch.dict(os.environ, {"RESPONSE_CACHE": "false"}):
+            provider.generate_content("Review this diff", "test-model", temperature=0)
+            provider.generate_content("Review this diff", "test-model", temperature=0)
+
+        assert provider.calls == 2
+
+    def test_async_and_nested_calls_store_one_entry(self, response_cache):
+        provider = NativeAsyncProvider()
+
+        async def run():
+            first = await provider.agenerate_content("Review this diff", "test-model", temperature=0)
+            second = await provider.agenerate_content("Review this diff", "test-model", temperature=0)
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert provider.calls == 1
+        assert second.metadata["cache_hit"] is True
+        assert response_cache.get_stats()["stores"] == 1
+
+    def test_empty_or_blocked_responses_are_not_cached(self):
+        assert _cache_entry(ModelResponse(content="")) is None
+        assert _cache_entry(ModelResponse(content="...", metadata={"is_blocked_by_safety": True})) is None
+        assert _cache_entry(ModelResponse(content="ok"))["provider"] == ProviderType.GOOGLE.value
@@ -0,0 +1,193 @@
+"""Tests for the shared provider retry/backoff engine."""
+
+import os
+import subprocess
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.retry import (
+    RetryBudget,
+    RetryError,
+    RetryPolicy,
+    aretry_call,
+    get_retry_after,
+    get_retry_budget,
+    retry_call,
+)
+
+
+def _error_with_headers(message: str, headers: dict):
+    """Build an exception carrying an HTTP response with the given headers."""
+    error = Exception(message)
+    error.response = MagicMock()
+    error.response.headers = headers
+    return error
+
+
+class TestRetryPolicy:
+    """Test backoff computation."""
+
+    def test_backoff_is_jittered_exponential(self):
+        policy = RetryPolicy(base_delay=1.0, multiplier=2.0, max_delay=8.0)
+
+        for attempt, nominal in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 8.0), (5, 8.0)]:
+            delays = {policy.backoff_delay(attempt) for _ in range(20)}
+            assert all(nominal / 2 <= d <= nominal for d in delays)
+            assert len(delays) > 1, "Delays should be randomised"
+
+    def test_retry_after_headers(self):
+        assert get_retry_after(_error_with_headers("429", {"retry-after": "7"})) == 7.0
+        assert get_retry_after(_error_with_headers("429", {"retry-after-ms": "250"})) == 0.25
+        assert get_retry_after(_error_with_headers("429", {})) is None
+        assert get_retry_after(Exception("no response")) is None
+
+    def test_gemini_retry_info(self):
+        error = Exception("429 RESOURCE_EXHAUSTED")
+        error.details = {
+            "error": {"details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "12s"}]}
+        }
+        assert get_retry_after(error) == 12.0
+
+
+class TestRetryBudget:
+    """Test the per-provider token bucket."""
+
+    def test_budget_exhausts_and_refills(self):
+        now = [0.0]
+        budget = RetryBudget(capacity=2, refill_per_second=1.0, clock=lambda: now[0])
+
+        assert budget.try_acquire()
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+
+        now[0] += 1.0
+        assert budget.try_acquire()
+
+    def test_budget_is_shared_per_provider(self):
+        assert get_retry_budget("openai") is get_retry_budget("openai")
+        assert get_retry_budget("openai") is not get_retry_budget("google")
+
+    def test_invalid_budget_settings_fall_back_to_defaults(self):
+        env = {**os.environ, "PROVIDER_RETRY_BUDGET": "twenty", "PROVIDER_MAX_RETRY_AFTER": "-1"}
+        code = "import providers.retry as r; print(r.DEFAULT_RETRY_BUDGET, r.MAX_RETRY_AFTER_SECONDS)"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ["20.0", "60.0"]
+
+
+class TestRetryCall:
+    """Test the sync and async retry loops."""
+
+    @patch("providers.retry.time.sleep")
+    def test_retries_until_success(self, mock_sleep):
+        fn = MagicMock(side_effect=[Exception("timeout"), Exception("timeout"), "ok"])
+
+        assert retry_call(fn, is_retryable=lambda e: True) == "ok"
+        assert fn.call_count == 3
+        assert mock_sleep.call_count == 2
+
+    @patch("providers.retry.time.sleep")
+    def test_non_retryable_error_stops_immediately(self, mock_sleep):
+        fn = MagicMock(side_effect=ValueError("bad request"))
+
+        with pytest.raises(RetryError) as exc_info:
+            retry_call(fn, is_retryable=lambda e: False)
+
+        assert exc_info.value.attempts == 1
+        assert not exc_info.value.retryable
+        assert isinstance(exc_info.value.last_exception, ValueError)
+        mock_sleep.assert_not_called()
+
+    @patch("providers.retry.time.sleep")
+    def test_max_attempts(self, mock_sleep):
+        fn = MagicMock(side_effect=Exception("503"))
+
+        with pytest.raises(RetryError) as exc_info:
+            retry_call(fn, is_retryable=lambda e: True, policy=RetryPolicy(max_attempts=3))
+
+        assert exc_info.value.attempts == 3
+        assert exc_info.value.retryable
+        assert mock_sleep.call_count == 2
+
+    @patch("providers.retry.time.sleep")
+    def test_retry_after_overrides_backoff(self, mock_sleep):
+        fn = MagicMock(side_effect=[_error_with_headers("429", {"retry-after": "3"}), "ok"])
+
+        assert retry_call(fn, is_retryable=lambda e: True) == "ok"
+        mock_sleep.assert_called_once_with(3.0)
+
+    @patch("providers.retry.time.sleep")
+    def test_excessive_retry_after_gives_up(self, mock_sleep):
+        fn = MagicMock(side_effect=_error_with_headers("429", {"retry-after": "3600"}))
+
+        with pytest.raises(RetryError):
+            retry_call(fn, is_retryable=lambda e: True)
+
+        assert fn.call_count == 1
+        mock_sleep.assert_not_called()
+
+    @patch("providers.retry.time.sleep")
+    def test_exhausted_budget_stops_retries(self, mock_sleep):
+        budget = RetryBudget(capacity=1, refill_per_second=0)
+        fn = MagicMock(side_effect=Exception("timeout"))
+
+        with pytest.raises(RetryError) as exc_info:
+            retry_call(fn, is_retryable=lambda e: True, budget=budget)
+
+        assert exc_info.value.budget_exhausted
+        assert exc_info.value.attempts == 2
+        assert mock_sleep.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_async_retry_awaits_sleep(self):
+        fn = AsyncMock(side_effect=[Exception("timeout"), "ok"])
+
+        with (
+            patch("providers.retry.asyncio.sleep", new=AsyncMock()) as mock_sleep,
+            patch("providers.retry.time.sleep") as mock_blocking_sleep,
+        ):
+            assert await aretry_call(fn, is_retryable=lambda e: True) == "ok"
+
+        mock_sleep.assert_awaited_once()
+        mock_blocking_sleep.assert_not_called()
+
+
+class TestProviderIntegration:
+    """Providers should classify errors through their _is_error_retryable hook."""
+
+    @patch("providers.retry.time.sleep")
+    def test_openai_provider_uses_engine(self, mock_sleep):
+        from providers.openai_provider import OpenAIModelProvider
+
+        provider = OpenAIModelProvider("test-key")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = Exception("Invalid API key")
+        provider._client = mock_client
+
+        with pytest.raises(RuntimeError, match="after 1 attempt"):
+            provider.generate_content(prompt="Test", model_name="gpt-4.1")
+
+        mock_sleep.assert_not_called()
+
+    @patch("providers.retry.time.sleep")
+    def test_dial_non_retryable_error_raises_immediately(self, mock_sleep):
+        from providers.dial import DIALModelProvider
+
+        provider = DIALModelProvider("test-key")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = Exception("Invalid API key")
+
+        with patch.object(provider, "_get_deployment_client", return_value=mock_client):
+            with pytest.raises(ValueError, match="DIAL API error for model o3: Invalid API key"):
+                provider.generate_content(prompt="Test", model_name="o3")
+
+        mock_sleep.assert_not_called()
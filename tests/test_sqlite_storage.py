@@ -0,0 +1,138 @@
+"""
+Tests for the SQLite conversation storage backend
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from utils.conversation_memory import add_turn, clear_thread_cache, create_thread, get_thread
+from utils.sqlite_storage import SQLiteStorage
+from utils.storage_backend import InMemoryStorage, create_storage_backend
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "conversations.db")
+
+
+@pytest.fixture
+def storage(db_path):
+    backend = SQLiteStorage(db_path)
+    yield backend
+    backend.shutdown()
+
+
+class TestSQLiteStorage:
+    """Test the StorageBackend contract and on-disk persistence"""
+
+    def test_values_and_lists(self, storage):
+        storage.setex("key", 60, "value")
+        assert storage.get("key") == "value"
+        assert storage.get("missing") is None
+
+        assert storage.append_with_ttl("log", 60, "a") == 1
+        assert storage.append_with_ttl("log", 60, "b", max_length=2) == 2
+        assert storage.append_with_ttl("log", 60, "c", max_length=2) is None
+        assert storage.get_list("log") == ["a", "b"]
+        assert storage.get("log") is None
+
+        assert storage.expire("log", -1) is True
+        assert storage.get_list("log") == []
+        assert storage.expire("log", 60) is False
+        assert storage.append_with_ttl("log", 60, "fresh") == 1
+        assert storage.get_list("log") == ["fresh"]
+
+    def test_versions_change_on_write(self, storage):
+        assert storage.get_version("key") is None
+        storage.setex("key", 60, "a")
+        first = storage.get_version("key")
+        storage.expire("key", 120)
+        assert storage.get_version("key") == first
+        storage.setex("key", 60, "b")
+        assert storage.get_version("key") > first
+
+    def test_data_survives_restart(self, db_path):
+        first = SQLiteStorage(db_path)
+        first.setex("key", 60, "value")
+        first.append_with_ttl("log", 60, "turn")
+        first.shutdown()
+
+        second = SQLiteStorage(db_path)
+        try:
+            assert second.get("key") == "value"
+            assert second.get_list("log") == ["turn"]
+        finally:
+            second.shutdown()
+
+    def test_instances_share_state(self, db_path):
+        """Separate instances (as in separate processes) see each other's writes"""
+        writer, reader = SQLiteStorage(db_path), SQLiteStorage(db_path)
+        try:
+            writer.append_with_ttl("log", 60, "a")
+            version = reader.get_version("log")
+            writer.append_with_ttl("log", 60, "b")
+            assert reader.get_list("log") == ["a", "b"]
+            assert reader.get_version("log") > version
+        finally:
+            writer.shutdown()
+            reader.shutdown()
+
+    def test_sweep_deletes_expired_in_batches(self, db_path):
+        storage = SQLiteStorage(db_path, sweep_batch_size=3)
+        try:
+            for i in range(7):
+                storage.append_with_ttl(f"expired{i}", -1, "turn")
+            storage.setex("live", 60, "value")
+
+            storage._cleanup_expired()
+
+            stats = storage.get_stats()
+            assert stats["entries"] == 1
+            assert stats["expired"] == 7
+            count = storage._connection().execute("SELECT COUNT(*) FROM list_items").fetchone()[0]
+            assert count == 0
+        finally:
+            storage.shutdown()
+
+    def test_concurrent_appends(self, storage):
+        def worker(n: int):
+            for i in range(25):
+                storage.append_with_ttl("log", 60, f"{n}:{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(storage.get_list("log")) == 100
+
+    def test_conversation_round_trip(self, storage):
+        clear_thread_cache()
+        with patch("utils.conversation_memory.get_storage", return_value=storage):
+            thread_id = create_thread("chat", {"prompt": "Hello"})
+            assert add_turn(thread_id, "user", "First")
+            assert add_turn(thread_id, "assistant", "Second", model_name="flash")
+
+            context = get_thread(thread_id)
+
+        assert [turn.content for turn in context.turns] == ["First", "Second"]
+        assert context.turns[1].model_name == "flash"
+
+
+class TestBackendSelection:
+    def test_default_is_in_memory(self, monkeypatch):
+        monkeypatch.delenv("CONVERSATION_STORAGE_BACKEND", raising=False)
+        assert isinstance(create_storage_backend(), InMemoryStorage)
+
+    def test_sqlite_from_environment(self, monkeypatch, db_path):
+        monkeypatch.setenv("CONVERSATION_STORAGE_BACKEND", "sqlite")
+        monkeypatch.setenv("CONVERSATION_STORAGE_PATH", db_path)
+        backend = create_storage_backend()
+        try:
+            assert isinstance(backend, SQLiteStorage)
+            assert backend.get_stats()["path"] == db_path
+        finally:
+            backend.shutdown()
@@ -0,0 +1,142 @@
+"""
+Tests for the sharded in-memory storage backend
+"""
+
+import sys
+import threading
+
+from utils.storage_backend import InMemoryStorage
+
+
+class TestInMemoryStorage:
+    """Test sharding, expiration, capacity bounds and statistics"""
+
+    def test_lru_eviction_by_entry_count(self):
+        """The least recently used key is evicted once the entry cap is exceeded"""
+        storage = InMemoryStorage(shards=1, max_entries=2, max_bytes=0)
+        storage.setex("a", 60, "1")
+        storage.setex("b", 60, "2")
+        assert storage.get("a") == "1"  # "b" is now least recently used
+
+        storage.setex("c", 60, "3")
+
+        assert storage.get("b") is None
+        assert storage.get("a") == "1"
+        assert storage.get("c") == "3"
+        assert storage.get_stats()["evictions"] == 1
+
+    def test_lru_eviction_by_bytes(self):
+        """Byte limits evict old keys but never the one just written"""
+        value = "x" * 1000
+        limit = 2 * sys.getsizeof(value) + 10
+        storage = InMemoryStorage(shards=1, max_entries=0, max_bytes=limit)
+        storage.setex("a", 60, value)
+        storage.setex("b", 60, value)
+        storage.setex("c", 60, value)
+
+        assert storage.get("a") is None
+        assert storage.get("b") == value
+        assert storage.get_stats()["bytes"] <= limit
+
+        storage.setex("huge", 60, "y" * (limit * 2))
+        assert storage.get("huge") is not None
+        assert storage.get_stats()["entries"] == 1
+
+    def test_byte_accounting_tracks_appends_and_overwrites(self):
+        """Appends grow the recorded size and overwrites replace it"""
+        storage = InMemoryStorage(shards=4)
+        storage.append_with_ttl("log", 60, "a" * 100)
+        after_one = storage.get_stats()["bytes"]
+        storage.append_with_ttl("log", 60, "b" * 100)
+        assert storage.get_stats()["bytes"] > after_one
+
+        storage.setex("key", 60, "value")
+        storage.setex("key", 60, "value")
+        storage.expire("log", -1)
+        storage.get_list("log")
+        assert storage.get_stats()["bytes"] == sys.getsizeof("value")
+
+    def test_cleanup_uses_expiration_heap(self):
+        """Cleanup removes expired keys and ignores pairs left behind by TTL refreshes"""
+        storage = InMemoryStorage(shards=2)
+        storage.setex("expired", -1, "old")
+        storage.setex("refreshed", -1, "value")
+        storage.expire("refreshed", 60)  # Already expired, so this does not revive it
+        storage.setex("live", 60, "value")
+        storage.setex("extended", 1, "value")
+        storage.expire("extended", 3600)
+
+        storage._cleanup_expired()
+
+        stats = storage.get_stats()
+        assert stats["entries"] == 2
+        assert stats["expired"] == 2
+        assert storage.get("live") == "value"
+        assert storage.get("extended") == "value"
+
+    def test_stats_report_hits_and_misses(self):
+        storage = InMemoryStorage()
+        storage.setex("key", 60, "value")
+        storage.get("key")
+        storage.get_list("missing")
+
+        stats = storage.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["shards"] == 16
+        assert stats["lock_contention"] >= 0
+
+    def test_clear_removes_all_keys(self):
+        storage = InMemoryStorage(shards=4)
+        for i in range(20):
+            storage.setex(f"key{i}", 60, "value")
+        storage.clear()
+        assert storage.get_stats()["entries"] == 0
+        assert storage.get("key1") is None
+
+    def test_concurrent_appends_across_shards(self):
+        """Appends from many threads are neither lost nor duplicated"""
+        storage = InMemoryStorage(shards=8, max_entries=0, max_bytes=0)
+
+        def worker(n: int):
+            for i in range(200):
+                storage.append_with_ttl(f"log{i % 10}", 60, f"{n}:{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(len(storage.get_list(f"log{i}")) for i in range(10)) == 8 * 200
+
+    def test_threads_are_evicted_with_their_turn_logs(self):
+        """A thread header never outlives its turn log when capacity evicts keys"""
+        storage = InMemoryStorage(shards=4, max_entries=24, max_bytes=0)
+        thread_ids = [f"{n:08d}-0000-0000-0000-000000000000" for n in range(60)]
+
+        for thread_id in thread_ids:
+            storage.setex(f"thread:{thread_id}", 60, "header")
+            storage.append_with_ttl(f"thread:{thread_id}:turns", 60, "turn 1")
+            # Only the header of the first thread is read, its turn log is not
+            assert storage.get(f"thread:{thread_ids[0]}") == "header"
+
+        assert storage.get_stats()["evictions"] > 0
+        survivors = [thread_id for thread_id in thread_ids if storage.get(f"thread:{thread_id}") is not None]
+        assert thread_ids[0] in survivors
+        for thread_id in survivors:
+            assert storage.get_list(f"thread:{thread_id}:turns") == ["turn 1"]
+
+    def test_capacity_from_environment(self, monkeypatch):
+        monkeypatch.setenv("CONVERSATION_STORAGE_MAX_ENTRIES", "5")
+        monkeypatch.setenv("CONVERSATION_STORAGE_MAX_MB", "invalid")
+        monkeypatch.setenv("CONVERSATION_STORAGE_SHARDS", "1")
+        storage = InMemoryStorage()
+
+        for i in range(10):
+            storage.setex(f"key{i}", 60, "value")
+
+        stats = storage.get_stats()
+        assert stats["entries"] == 5
+        assert stats["max_bytes"] == 512 * 1024 * 1024
@@ -0,0 +1,291 @@
+"""
+Tests for streaming model output to MCP clients as progress notifications
+"""
+
+import asyncio
+import os
+from dataclasses import replace
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.base import ModelResponse, ProviderType, StreamChunk
+from providers.dial import DIALModelProvider
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.openrouter import OpenRouterProvider
+from tools.chat import ChatTool
+from utils.progress import ProgressReporter, get_progress_reporter, progress_reporter_for_request, progress_scope
+
+
+class FakeStream:
+    """Async iterator over canned stream events that records whether it was closed"""
+
+    def __init__(self, events):
+        self._events = list(events)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._events:
+            raise StopAsyncIteration
+        return self._events.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+def _openai_event(text=None, finish_reason=None, usage=None):
+    choices = (
+        [] if text is None else [SimpleNamespace(delta=SimpleNamespace(content=text), finish_reason=finish_reason)]
+    )
+    return SimpleNamespace(choices=choices, usage=usage, model="gpt-4.1-2025-04-14", id="chatcmpl-1", created=1)
+
+
+def _collect(stream):
+    async def run():
+        return [chunk async for chunk in stream]
+
+    return asyncio.run(run())
+
+
+class TestProgressReporter:
+    def test_streamed_text_is_batched(self):
+        session = SimpleNamespace(send_progress_notification=AsyncMock())
+        reporter = ProgressReporter(session, "token-1", request_id=7, min_interval=3600)
+
+        async def run():
+            await reporter.stream_text("Hello")  # first text goes out immediately
+            await reporter.stream_text(", ")
+            await reporter.stream_text("world")
+            await reporter.flush()
+
+        asyncio.run(run())
+
+        calls = session.send_progress_notification.await_args_list
+        assert [call.kwargs["message"] for call in calls] == ["Hello", ", world"]
+        assert [call.kwargs["progress"] for call in calls] == [1, 2]
+        assert calls[0].kwargs["progress_token"] == "token-1"
+        assert calls[0].kwargs["related_request_id"] == 7
+
+    def test_failures_stop_reporting(self):
+        session = SimpleNamespace(send_progress_notification=AsyncMock(side_effect=RuntimeError("closed")))
+        reporter = ProgressReporter(session, "token-1", min_interval=0)
+
+        async def run():
+            await reporter.send("first")
+            await reporter.send("second")
+
+        asyncio.run(run())
+
+        assert session.send_progress_notification.await_count == 1
+
+    def test_reporter_only_when_client_asked_for_progress(self):
+        session = object()
+        with_token = SimpleNamespace(
+            request_context=SimpleNamespace(meta=SimpleNamespace(progressToken="abc"), session=session, request_id=3)
+        )
+        without_token = SimpleNamespace(
+            request_context=SimpleNamespace(meta=SimpleNamespace(progressToken=None), session=session, request_id=3)
+        )
+
+        class NoRequest:
+            @property
+            def request_context(self):
+                raise LookupError("no request")
+
+        reporter = progress_reporter_for_request(with_token)
+        assert (reporter.progress_token, reporter.session, reporter.request_id) == ("abc", session, 3)
+        assert progress_reporter_for_request(without_token) is None
+        assert progress_reporter_for_request(NoRequest()) is None
+
+    def test_scope(self):
+        reporter = ProgressReporter(object(), "t")
+        assert get_progress_reporter() is None
+        with progress_scope(reporter):
+            assert get_progress_reporter() is reporter
+        assert get_progress_reporter() is None
+
+
+class TestOpenAIStreaming:
+    def _provider(self, events):
+        provider = OpenAIModelProvider("test-key")
+        stream = FakeStream(events)
+        provider._async_client = MagicMock()
+        provider._async_client.chat.completions.create = AsyncMock(return_value=stream)
+        return provider, stream
+
+    def test_chunks_and_final_response(self):
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12)
+        provider, stream = self._provider(
+            [_openai_event("Hel"), _openai_event("lo", finish_reason="stop"), _openai_event(usage=usage)]
+        )
+
+        chunks = _collect(provider.astream_content("Say hello", "gpt4.1", temperature=0.5))
+
+        params = provider._async_client.chat.completions.create.await_args.kwargs
+        assert params["stream"] is True
+        assert params["stream_options"] == {"include_usage": True}
+        assert params["model"] == "gpt-4.1"
+        assert [chunk.text for chunk in chunks[:2]] == ["Hel", "lo"]
+        response = chunks[-1].response
+        assert response.content == "Hello"
+        assert response.usage == {"input_tokens": 10, "output_tokens": 2, "total_tokens": 12}
+        assert response.metadata["finish_reason"] == "stop"
+        assert response.metadata["streamed"] is True
+        assert stream.closed
+
+    def test_abandoning_the_stream_closes_the_connection(self):
+        provider, stream = self._provider([_openai_event("a"), _openai_event("b"), _openai_event("c")])
+
+        async def run():
+            chunks = provider.astream_content("Say hello", "gpt-4.1", temperature=0.5)
+            first = await chunks.__anext__()
+            await chunks.aclose()
+            return first
+
+        assert asyncio.run(run()).text == "a"
+        assert stream.closed
+
+    def test_models_without_streaming_support_are_answered_in_one_chunk(self):
+        provider, _ = self._provider([])
+        final = ModelResponse(content="full answer", provider=ProviderType.OPENAI)
+        capabilities = replace(provider.get_capabilities("gpt-4.1"), supports_streaming=False)
+
+        with patch.object(provider, "get_capabilities", return_value=capabilities):
+            with patch.object(provider, "agenerate_content", AsyncMock(return_value=final)):
+                chunks = _collect(provider.astream_content("Say hello", "gpt-4.1", temperature=0.5))
+
+        assert [chunk.response for chunk in chunks] == [final]
+        provider._async_client.chat.completions.create.assert_not_called()
+
+
+class TestDIALStreaming:
+    def test_streams_through_the_deployment_endpoint(self):
+        provider = DIALModelProvider("test-key")
+        stream = FakeStream([_openai_event("Hi", finish_reason="stop")])
+        deployment_client = MagicMock()
+        deployment_client.chat.completions.create = AsyncMock(return_value=stream)
+        provider._async_client = MagicMock()
+
+        with patch.object(provider, "_get_async_deployment_client", return_value=deployment_client) as get_client:
+            chunks = _collect(provider.astream_content("Say hi", "o3", temperature=0.5))
+
+        get_client.assert_called_once_with("o3-2025-04-16")
+        params = deployment_client.chat.completions.create.await_args.kwargs
+        assert params["stream"] is True
+        assert chunks[-1].response.content == "Hi"
+        provider._async_client.chat.completions.create.assert_not_called()
+        assert stream.closed
+
+    def test_stream_errors_are_reported_like_dial_errors(self):
+        provider = DIALModelProvider("test-key")
+        deployment_client = MagicMock()
+        deployment_client.chat.completions.create = AsyncMock(side_effect=Exception("Invalid API key"))
+
+        with patch.object(provider, "_get_async_deployment_client", return_value=deployment_client):
+            with pytest.raises(ValueError, match="DIAL API error for model o3-2025-04-16: Invalid API key"):
+                _collect(provider.astream_content("Say hi", "o3", temperature=0.5))
+
+
+class TestOpenRouterStreaming:
+    def test_streaming_is_never_requested(self):
+        provider = OpenRouterProvider(api_key="test-key")
+        provider._async_client = MagicMock()
+        final = ModelResponse(content="full answer", provider=ProviderType.OPENROUTER)
+
+        with patch.object(provider, "agenerate_content", AsyncMock(return_value=final)) as agenerate:
+            chunks = _collect(provider.astream_content("Say hi", "openai/gpt-4o", temperature=0.5))
+
+        assert [chunk.response for chunk in chunks] == [final]
+        agenerate.assert_awaited_once()
+        provider._async_client.chat.completions.create.assert_not_called()
+
+
+class TestGeminiStreaming:
+    def test_chunks_and_final_response(self):
+        provider = GeminiModelProvider(api_key="test-key")
+        last = SimpleNamespace(
+            text=" there",
+            candidates=[SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"), safety_ratings=None)],
+            usage_metadata=SimpleNamespace(prompt_token_count=5, candidates_token_count=2),
+        )
+        stream = FakeStream([SimpleNamespace(text="Hi", candidates=[], usage_metadata=None), last])
+        provider._client = MagicMock()
+        provider._client.aio.models.generate_content_stream = AsyncMock(return_value=stream)
+
+        chunks = _collect(provider.astream_content("Say hi", "gemini-2.5-flash", temperature=0.5))
+
+        assert [chunk.text for chunk in chunks[:2]] == ["Hi", " there"]
+        response = chunks[-1].response
+        assert response.content == "Hi there"
+        assert response.metadata["finish_reason"] == "STOP"
+        assert response.metadata["streamed"] is True
+        assert response.usage["input_tokens"] == 5
+        assert stream.closed
+
+
+class TestToolStreaming:
+    def _provider(self, chunks=None, error=None):
+        provider = MagicMock()
+        provider.get_provider_type.return_value = ProviderType.OPENAI
+        final = ModelResponse(content="full answer", provider=ProviderType.OPENAI)
+        provider.agenerate_content = AsyncMock(return_value=final)
+
+        async def astream_content(**kwargs):
+            for chunk in chunks or []:
+                yield chunk
+            if error:
+                raise error
+
+        provider.astream_content = MagicMock(side_effect=astream_content)
+        return provider, final
+
+    def test_without_progress_token_the_response_is_awaited(self):
+        provider, final = self._provider()
+
+        response = asyncio.run(ChatTool().generate_model_response(provider, prompt="hi", model_name="o3"))
+
+        assert response is final
+        provider.astream_content.assert_not_called()
+
+    def test_output_is_streamed_as_progress(self):
+        streamed = ModelResponse(content="Hello world", provider=ProviderType.OPENAI)
+        provider, _ = self._provider([StreamChunk(text="Hello"), StreamChunk(text=" world", response=streamed)])
+        session = SimpleNamespace(send_progress_notification=AsyncMock())
+
+        async def run():
+            with progress_scope(ProgressReporter(session, "t", min_interval=0)):
+                return await ChatTool().generate_model_response(provider, prompt="hi", model_name="o3")
+
+        assert asyncio.run(run()) is streamed
+        messages = [call.kwargs["message"] for call in session.send_progress_notification.await_args_list]
+        assert messages == ["Hello", " world"]
+        provider.agenerate_content.assert_not_called()
+
+    def test_streaming_failure_before_output_falls_back(self):
+        provider, final = self._provider(error=RuntimeError("organization must be verified to stream"))
+        session = SimpleNamespace(send_progress_notification=AsyncMock())
+
+        async def run():
+            with progress_scope(ProgressReporter(session, "t")):
+                return await ChatTool().generate_model_response(provider, prompt="hi", model_name="o3")
+
+        assert asyncio.run(run()) is final
+        provider.agenerate_content.assert_awaited_once_with(prompt="hi", model_name="o3")
+
+    def test_streaming_can_be_disabled(self):
+        provider, final = self._provider()
+
+        async def run():
+            with progress_scope(ProgressReporter(object(), "t")), patch.dict(os.environ, {"STREAM_RESPONSES": "false"}):
+                return await ChatTool().generate_model_response(provider, prompt="hi", model_name="o3")
+
+        assert asyncio.run(run()) is final
+        provider.astream_content.assert_not_called()
@@ -0,0 +1,101 @@
+"""
+Tests for demand-driven token allocation in ModelContext
+"""
+
+import pytest
+
+from providers.base import ModelCapabilities, ProviderType
+from utils.model_context import ModelContext, TokenDemand, _water_fill
+
+
+def _context(context_window: int, max_output_tokens: int) -> ModelContext:
+    context = ModelContext("test-model")
+    context._capabilities = ModelCapabilities(
+        provider=ProviderType.OPENAI,
+        model_name="test-model",
+        friendly_name="Test",
+        context_window=context_window,
+        max_output_tokens=max_output_tokens,
+    )
+    return context
+
+
+class TestWaterFill:
+    def test_unbounded_categories_split_by_weight(self):
+        shares = _water_fill(1000, {"a": None, "b": None}, {"a": 0.3, "b": 0.5})
+        assert shares == {"a": 375, "b": 625}
+
+    def test_unused_room_goes_to_other_category(self):
+        shares = _water_fill(1000, {"a": 100, "b": None}, {"a": 0.5, "b": 0.5})
+        assert shares == {"a": 100, "b": 900}
+
+    def test_contention_caps_at_fair_share(self):
+        shares = _water_fill(1000, {"a": 5000, "b": 5000}, {"a": 0.5, "b": 0.5})
+        assert shares == {"a": 500, "b": 500}
+
+    def test_zero_demand_gets_nothing(self):
+        shares = _water_fill(1000, {"a": 0, "b": 200}, {"a": 0.5, "b": 0.5})
+        assert shares["a"] == 0
+        # Spare room is still handed to the category that asked for some
+        assert shares["b"] == 1000
+
+    def test_spare_room_is_shared_when_all_demands_are_met(self):
+        shares = _water_fill(1000, {"a": 100, "b": 300}, {"a": 0.5, "b": 0.5})
+        assert shares == {"a": 400, "b": 600}
+
+
+class TestDemandDrivenAllocation:
+    def test_without_demand_allocation_is_unchanged(self):
+        allocation = _context(200_000, 100_000).calculate_token_allocation()
+
+        assert allocation.content_tokens == 120_000
+        assert allocation.response_tokens == 80_000
+        assert allocation.file_tokens == 36_000
+        assert allocation.history_tokens == 60_000
+
+    def test_response_reserve_is_capped_at_max_output_tokens(self):
+        allocation = _context(200_000, 32_000).calculate_token_allocation(demand=TokenDemand())
+
+        assert allocation.response_tokens == 32_000
+        assert allocation.content_tokens == 168_000
+
+    def test_requested_output_and_explicit_reserve(self):
+        context = _context(200_000, 100_000)
+
+        assert context.calculate_token_allocation(demand=TokenDemand(output_tokens=4_000)).response_tokens == 4_000
+        allocation = context.calculate_token_allocation(
+            reserved_for_response=10_000, demand=TokenDemand(output_tokens=4_000)
+        )
+        assert allocation.response_tokens == 10_000
+
+    def test_files_take_room_history_does_not_need(self):
+        context = _context(200_000, 32_000)
+        static = context.calculate_token_allocation()
+
+        allocation = context.calculate_token_allocation(demand=TokenDemand(history_tokens=0))
+
+        assert allocation.history_tokens == 0
+        assert allocation.file_tokens > static.file_tokens + static.history_tokens
+        # The prompt keeps at least its fixed-ratio reserve
+        assert allocation.available_for_prompt >= static.available_for_prompt
+
+    def test_known_prompt_size_releases_prompt_reserve(self):
+        context = _context(200_000, 32_000)
+
+        allocation = context.calculate_token_allocation(
+            demand=TokenDemand(system_prompt_tokens=2_000, prompt_tokens=1_000, history_tokens=5_000)
+        )
+
+        assert allocation.history_tokens >= 5_000
+        assert allocation.available_for_prompt == 3_000
+        assert allocation.file_tokens + allocation.history_tokens == allocation.content_tokens - 3_000
+
+    def test_oversized_demands_share_the_window_fairly(self):
+        context = _context(1_000_000, 65_536)
+
+        allocation = context.calculate_token_allocation(
+            demand=TokenDemand(file_tokens=2_000_000, history_tokens=2_000_000, prompt_tokens=0)
+        )
+
+        assert allocation.file_tokens == pytest.approx(allocation.history_tokens, abs=1)
+        assert allocation.file_tokens + allocation.history_tokens <= allocation.content_tokens
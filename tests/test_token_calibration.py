@@ -0,0 +1,138 @@
+"""
+Tests for adaptive token-estimate calibration from provider usage reports
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from providers.base import ModelResponse
+from tools.chat import ChatTool
+from utils import token_calibration
+from utils.file_utils import estimate_file_tokens
+from utils.model_context import ModelContext
+from utils.token_calibration import (
+    PROMPT_CATEGORY,
+    TokenCalibrator,
+    get_token_calibrator,
+    record_prompt_usage,
+    split_prompt_by_category,
+)
+
+
+def _file_block(path: str, content: str) -> str:
+    return f"\n--- BEGIN FILE: {path} ---\n{content}\n--- END FILE: {path} ---\n"
+
+
+class TestSplitPromptByCategory:
+    def test_files_and_prompt_text_are_separated(self):
+        code = "x = 1\n" * 70  # 420 chars at 3.5 chars/token for .py
+        text = "Please review." + _file_block("/p/app.py", code) + _file_block("/p/README.md", "a" * 420)
+
+        estimates = split_prompt_by_category(text)
+
+        assert estimates["programming"] == pytest.approx(len(code + "\n") / 3.5)
+        assert estimates["docs"] == pytest.approx(421 / 4.2)
+        assert estimates[PROMPT_CATEGORY] > 0
+
+
+class TestTokenCalibrator:
+    def test_factor_converges_and_requires_samples(self):
+        calibrator = TokenCalibrator()
+        for i in range(40):
+            calibrator.record("model-a", {PROMPT_CATEGORY: 1000.0}, 1300)
+            if i < 2:
+                assert calibrator.correction_factor("model-a", PROMPT_CATEGORY) is None
+
+        assert calibrator.correction_factor("model-a", PROMPT_CATEGORY) == pytest.approx(1.3, rel=0.01)
+        assert calibrator.correction_factor("model-b", PROMPT_CATEGORY) is None
+        assert calibrator.calibrate("model-a", PROMPT_CATEGORY, 100) == pytest.approx(130, rel=0.01)
+
+    def test_categories_learn_in_proportion_to_their_share(self):
+        calibrator = TokenCalibrator()
+        for _ in range(60):
+            calibrator.record("m", {"programming": 1000.0}, 1500)
+            calibrator.record("m", {"programming": 900.0, PROMPT_CATEGORY: 100.0}, 1450)
+
+        assert calibrator.correction_factor("m", "programming") == pytest.approx(1.5, rel=0.03)
+        assert calibrator.correction_factor("m", PROMPT_CATEGORY) == pytest.approx(1.0, abs=0.15)
+
+    def test_small_or_invalid_observations_are_ignored(self):
+        calibrator = TokenCalibrator()
+        calibrator.record("m", {PROMPT_CATEGORY: 50.0}, 500)
+        record_prompt_usage("m", "x" * 4000, None, {"input_tokens": None})
+        assert calibrator.get_stats()["observations"] == 0
+
+    def test_factors_are_clamped(self):
+        calibrator = TokenCalibrator()
+        for _ in range(200):
+            calibrator.record("m", {PROMPT_CATEGORY: 1000.0}, 100_000)
+        assert calibrator.correction_factor("m", PROMPT_CATEGORY) == token_calibration.MAX_FACTOR
+
+    def test_factors_persist_across_instances(self, tmp_path):
+        path = tmp_path / "data" / "calibration.json"
+        calibrator = TokenCalibrator(str(path))
+        for _ in range(10):
+            calibrator.record("m", {PROMPT_CATEGORY: 1000.0}, 800)
+        calibrator.save()
+
+        reloaded = TokenCalibrator(str(path))
+        assert reloaded.correction_factor("m", PROMPT_CATEGORY) == calibrator.correction_factor("m", PROMPT_CATEGORY)
+
+        path.write_text("{not json")
+        assert TokenCalibrator(str(path)).get_stats()["models"] == {}
+
+    def test_saves_are_debounced(self, tmp_path):
+        path = tmp_path / "calibration.json"
+        calibrator = TokenCalibrator(str(path))
+        calibrator.record("m", {PROMPT_CATEGORY: 1000.0}, 800)
+        assert not path.exists()
+
+        with patch.object(token_calibration, "SAVE_INTERVAL_SECONDS", 0):
+            calibrator.record("m", {PROMPT_CATEGORY: 1000.0}, 800)
+        assert json.loads(path.read_text())["models"]["m"][PROMPT_CATEGORY]["samples"] == 2
+
+
+class TestCalibratedEstimates:
+    def test_model_context_uses_calibrated_prompt_factor(self):
+        context = ModelContext("gemini-2.5-flash")
+        text = "x" * 1200
+        assert context.estimate_tokens(text) == 400  # Conservative len // 3 until calibrated
+
+        for _ in range(30):
+            record_prompt_usage("gemini-2.5-flash", "y" * 4000, None, {"input_tokens": 1100})
+
+        assert context.estimate_tokens(text) == pytest.approx(330, abs=5)
+
+    def test_file_estimates_use_model_and_category(self, tmp_path):
+        path = tmp_path / "module.py"
+        path.write_text("a" * 3500)
+        assert estimate_file_tokens(str(path), "gemini-2.5-flash") == 1000
+
+        calibrator = get_token_calibrator()
+        for _ in range(40):
+            calibrator.record("gemini-2.5-flash", {"programming": 1000.0}, 1200)
+
+        assert estimate_file_tokens(str(path), "gemini-2.5-flash") == pytest.approx(1200, abs=10)
+        assert estimate_file_tokens(str(path)) == 1000
+
+    def test_calibration_can_be_disabled(self, monkeypatch):
+        monkeypatch.setenv("TOKEN_CALIBRATION", "false")
+        assert get_token_calibrator() is None
+        record_prompt_usage("m", "x" * 4000, None, {"input_tokens": 900})
+        assert ModelContext("gemini-2.5-flash").estimate_tokens("x" * 300) == 100
+
+    def test_tools_skip_images_and_cached_responses(self):
+        tool = ChatTool()
+        usage = {"input_tokens": 900}
+
+        with patch("utils.token_calibration.record_prompt_usage") as record:
+            tool._record_token_usage("m", "hi", "sys", ModelResponse(content="a", usage=usage), has_images=True)
+            cached = ModelResponse(content="a", usage=usage, metadata={"cache_hit": True})
+            tool._record_token_usage("m", "hi", "sys", cached, has_images=False)
+            record.assert_not_called()
+
+            tool._record_token_usage("m", "hi", "sys", ModelResponse(content="a", usage=usage), has_images=False)
+
+        record.assert_called_once_with("m", "hi", "sys", usage)
@@ -0,0 +1,107 @@
+"""
+Tests for the tokenizer service used for token counting
+"""
+
+from unittest.mock import patch
+
+from utils import tokenizer
+from utils.model_context import ModelContext
+from utils.tokenizer import TokenizerService, _split_on_lines
+
+
+class FakeEncoding:
+    """Stands in for a tiktoken encoding: one token per whitespace-separated word"""
+
+    def __init__(self):
+        self.calls = 0
+        self.batches = []
+
+    def encode_ordinary(self, text):
+        self.calls += 1
+        return text.split()
+
+    def encode_ordinary_batch(self, texts):
+        self.batches.append(len(texts))
+        return [text.split() for text in texts]
+
+
+def _service_with_fake_encoder(**kwargs):
+    encoding = FakeEncoding()
+    patcher = patch("utils.tokenizer._load_encoding", return_value=encoding)
+    patcher.start()
+    return TokenizerService(**kwargs), encoding, patcher
+
+
+class TestTokenizerService:
+    def test_counts_are_memoized_by_content(self):
+        service, encoding, patcher = _service_with_fake_encoder()
+        try:
+            text = "word " * 100
+            assert service.count_tokens(text, "gpt-4o") == 100
+            assert service.count_tokens(text, "gpt-4o") == 100
+            assert service.count_tokens(text + "extra", "gpt-4o") == 101
+        finally:
+            patcher.stop()
+
+        assert encoding.calls == 2
+        assert service.get_stats()["hits"] == 1
+
+    def test_encoders_are_loaded_once_per_family(self):
+        with patch("utils.tokenizer._load_encoding", return_value=FakeEncoding()) as load:
+            service = TokenizerService()
+            for model in ("gpt-4o", "o3-mini", "gpt-5", "gpt-4", "gpt-3.5-turbo", "gemini-2.5-pro"):
+                service.count_tokens("a b c", model)
+
+        loaded = sorted(call.args[0] for call in load.call_args_list)
+        assert loaded == ["cl100k_base", "o200k_base"]
+
+    def test_exact_tokenizer_families(self):
+        service, _, patcher = _service_with_fake_encoder()
+        try:
+            assert service.has_exact_tokenizer("gpt-4.1")
+            assert service.has_exact_tokenizer("openai/gpt-4o")
+            assert service.has_exact_tokenizer("o4-mini")
+            assert not service.has_exact_tokenizer("gemini-2.5-flash")
+            assert not service.has_exact_tokenizer("anthropic/claude-opus-4")
+            assert not service.has_exact_tokenizer(None)
+        finally:
+            patcher.stop()
+
+    def test_large_texts_are_batch_encoded(self):
+        service, encoding, patcher = _service_with_fake_encoder()
+        line = "token " * 15 + "\n"
+        text = line * (tokenizer.PARALLEL_THRESHOLD_CHARS // len(line) + 10)
+        try:
+            count = service.count_tokens(text, "gpt-4o")
+        finally:
+            patcher.stop()
+
+        assert count == len(text.split())
+        assert encoding.calls == 0
+        assert encoding.batches and encoding.batches[0] > 1
+
+    def test_falls_back_to_estimation_without_tiktoken(self):
+        with patch("utils.tokenizer._load_encoding", return_value=None):
+            service = TokenizerService()
+            assert service.count_tokens("x" * 400, "gpt-4o") == 100
+            assert not service.has_exact_tokenizer("gpt-4o")
+            assert service.get_stats()["fallbacks"] == 1
+
+    def test_split_on_lines_preserves_text(self):
+        text = "".join(f"line {i}\n" for i in range(1000))
+        chunks = _split_on_lines(text, 100)
+        assert "".join(chunks) == text
+        assert all(chunk.endswith("\n") for chunk in chunks)
+        assert _split_on_lines("x" * 250, 100) == ["x" * 100, "x" * 100, "x" * 50]
+
+
+class TestModelContextTokenCounting:
+    def test_exact_tokenizer_is_used_when_available(self):
+        service, _, patcher = _service_with_fake_encoder()
+        try:
+            with patch("utils.model_context.get_tokenizer_service", return_value=service):
+                assert ModelContext("gpt-4o").estimate_tokens("one two three") == 3
+                # No exact tokenizer for Gemini: conservative character estimate
+                assert ModelContext("gemini-2.5-flash").estimate_tokens("x" * 300) == 100
+        finally:
+            patcher.stop()
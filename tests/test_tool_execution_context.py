@@ -0,0 +1,275 @@
+"""Tests for per-invocation tool state isolation."""
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from providers.base import ProviderType
+from tools.chat import ChatTool
+from tools.consensus import ConsensusTool
+from tools.shared.execution_context import RequestScoped, get_execution_context, tool_execution_scope
+from utils.model_context import ModelContext
+
+
+class _StatefulTool:
+    value = RequestScoped()
+    items = RequestScoped(default_factory=list)
+
+
+class TestRequestScoped:
+    """Test the RequestScoped descriptor."""
+
+    def test_outside_scope_uses_instance_state(self):
+        tool = _StatefulTool()
+        tool.value = "direct"
+        tool.items.append(1)
+
+        assert tool.value == "direct"
+        assert tool.__dict__["value"] == "direct"
+        assert tool.items == [1]
+        assert get_execution_context() is None
+
+    def test_scope_starts_fresh_and_does_not_leak(self):
+        tool = _StatefulTool()
+        tool.value = "direct"
+
+        with tool_execution_scope("test") as context:
+            assert get_execution_context() is context
+            assert tool.value is None
+            assert tool.items == []
+            tool.value = "scoped"
+            tool.items.append("scoped")
+
+        assert tool.value == "direct"
+        assert tool.items == []
+
+    def test_mutable_defaults_are_not_shared(self):
+        first, second = _StatefulTool(), _StatefulTool()
+        with tool_execution_scope("test"):
+            first.items.append("a")
+            assert second.items == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_scopes_are_isolated(self):
+        tool = _StatefulTool()
+
+        async def invocation(name: str):
+            with tool_execution_scope("test"):
+                tool.value = name
+                await asyncio.sleep(0.01)
+                return tool.value
+
+        assert await asyncio.gather(invocation("one"), invocation("two")) == ["one", "two"]
+
+    @pytest.mark.asyncio
+    async def test_scope_follows_child_tasks(self):
+        tool = _StatefulTool()
+
+        async def read_value():
+            return tool.value
+
+        with tool_execution_scope("test"):
+            tool.value = "parent"
+            assert await asyncio.gather(read_value(), asyncio.to_thread(lambda: tool.value)) == ["parent", "parent"]
+
+
+class TestConcurrentToolCalls:
+    """Overlapping calls to the same tool singleton keep their own state."""
+
+    @pytest.mark.asyncio
+    async def test_overlapping_chat_calls(self):
+        from tests.mock_helpers import create_mock_provider
+
+        tool = ChatTool()
+        observed = {}
+        mock_provider = create_mock_provider()
+        response = mock_provider.agenerate_content.return_value
+
+        async def slow_generate(prompt, **kwargs):
+            before = tool._current_arguments["prompt"]
+            await asyncio.sleep(0.02)
+            observed[before] = tool._current_arguments["prompt"]
+            return response
+
+        mock_provider.agenerate_content.side_effect = slow_generate
+
+        async def call(prompt: str):
+            model_context = ModelContext("gemini-2.5-flash")
+            model_context._provider = mock_provider
+            with tool_execution_scope(tool.get_name()):
+                return await tool.execute(
+                    {"prompt": prompt, "model": "gemini-2.5-flash", "_model_context": model_context}
+                )
+
+        results = await asyncio.gather(call("first question"), call("second question"))
+
+        assert observed == {"first question": "first question", "second question": "second question"}
+        for result in results:
+            assert json.loads(result[0].text)["status"] in ["success", "continuation_available"]
+
+    @pytest.mark.asyncio
+    async def test_consensus_state_restored_across_scoped_calls(self):
+        tool = ConsensusTool()
+        consulted = []
+
+        async def fake_consult(model_config, request):
+            consulted.append((model_config["model"], tool.original_proposal))
+            return {"model": model_config["model"], "stance": "neutral", "status": "success", "verdict": "ok"}
+
+        models = [{"model": "flash", "stance": "neutral"}, {"model": "o3-mini", "stance": "neutral"}]
+        base_args = {
+            "findings": "Initial analysis",
+            "total_steps": 2,
+            "models": models,
+            "model": "flash",
+        }
+
+        provider = MagicMock()
+        provider.get_provider_type.return_value = ProviderType.GOOGLE
+
+        with (
+            patch.object(tool, "_consult_model", side_effect=fake_consult),
+            patch.object(tool, "get_model_provider", return_value=provider),
+        ):
+            with tool_execution_scope(tool.get_name()):
+                step1 = await tool.execute_workflow(
+                    {**base_args, "step": "Should we adopt X?", "step_number": 1, "next_step_required": True}
+                )
+            step1_data = json.loads(step1[0].text)
+            continuation_id = step1_data["continuation_id"]
+
+            with tool_execution_scope(tool.get_name()):
+                step2 = await tool.execute_workflow(
+                    {
+                        **base_args,
+                        "step": "Summary of first response",
+                        "step_number": 2,
+                        "next_step_required": False,
+                        "continuation_id": continuation_id,
+                    }
+                )
+
+        step2_data = json.loads(step2[0].text)
+        assert consulted == [("flash", "Should we adopt X?"), ("o3-mini", "Should we adopt X?")]
+        assert step2_data["status"] == "consensus_workflow_complete"
+        assert step2_data["complete_consensus"]["models_consulted"] == ["flash:neutral", "o3-mini:neutral"]
+        assert step2_data["complete_consensus"]["initial_prompt"] == "Should we adopt X?"
+
+    @pytest.mark.asyncio
+    async def test_consensus_step_without_continuation_is_rejected(self):
+        tool = ConsensusTool()
+        consulted = []
+
+        async def fake_consult(model_config, request):
+            consulted.append((model_config["model"], tool.original_proposal))
+            return {"model": model_config["model"], "stance": "neutral", "status": "success", "verdict": "ok"}
+
+        base_args = {
+            "findings": "Initial analysis",
+            "total_steps": 2,
+            "models": [{"model": "flash", "stance": "neutral"}, {"model": "o3-mini", "stance": "neutral"}],
+            "model": "flash",
+        }
+
+        provider = MagicMock()
+        provider.get_provider_type.return_value = ProviderType.GOOGLE
+
+        with patch.object(tool, "_consult_model", side_effect=fake_consult):
+            with patch.object(tool, "get_model_provider", return_value=provider):
+                with tool_execution_scope(tool.get_name()):
+                    await tool.execute_workflow(
+                        {**base_args, "step": "Another user's proposal", "step_number": 1, "next_step_required": True}
+                    )
+
+                with tool_execution_scope(tool.get_name()):
+                    result = await tool.execute(
+                        {**base_args, "step": "Summary", "step_number": 2, "next_step_required": False}
+                    )
+
+        # Step 2 neither joins the other session nor falls through silently
+        assert consulted == [("flash", "Another user's proposal")]
+        error = json.loads(result[0].text)
+        assert error["status"] == "error"
+        assert "continuation_id returned by step 1" in error["content"]
+
+
+class TestWorkflowStateAcrossScopedCalls:
+    """State a tool records on step 1 must survive into later steps, which run in new scopes."""
+
+    async def _run_two_steps(self, tool, first_step: dict, final_step: dict):
+        expert_contexts = []
+
+        async def fake_expert_analysis(arguments, request):
+            expert_contexts.append(tool.prepare_expert_analysis_context(tool.consolidated_findings))
+            return {"status": "analysis_complete", "raw_analysis": "ok"}
+
+        with patch.object(tool, "_call_expert_analysis", side_effect=fake_expert_analysis):
+            with tool_execution_scope(tool.get_name()):
+                step1 = await tool.execute_workflow({**first_step, "step_number": 1, "next_step_required": True})
+            continuation_id = json.loads(step1[0].text)["continuation_id"]
+
+            with tool_execution_scope(tool.get_name()):
+                final = await tool.execute_workflow(
+                    {**final_step, "step_number": 2, "next_step_required": False, "continuation_id": continuation_id}
+                )
+
+        return json.loads(final[0].text), expert_contexts
+
+    @pytest.mark.asyncio
+    async def test_debug_keeps_initial_issue(self, tmp_path):
+        from tools.debug import DebugIssueTool
+
+        source = tmp_path / "app.py"
+        source.write_text("def handler():\n    return None\n")
+        common = {"total_steps": 2, "model": "flash", "relevant_files": [str(source)], "confidence": "medium"}
+
+        _, expert_contexts = await self._run_two_steps(
+            DebugIssueTool(),
+            {**common, "step": "Login returns 500 after upgrade", "findings": "Handler returns None"},
+            {**common, "step": "Confirmed root cause", "findings": "Missing return value"},
+        )
+
+        assert len(expert_contexts) == 1
+        assert "Login returns 500 after upgrade" in expert_contexts[0]
+        assert "Investigation initiated" not in expert_contexts[0]
+
+    @pytest.mark.asyncio
+    async def test_analyze_keeps_analysis_config(self, tmp_path):
+        from tools.analyze import AnalyzeTool
+
+        source = tmp_path / "app.py"
+        source.write_text("def handler():\n    return None\n")
+        common = {"total_steps": 2, "model": "flash", "relevant_files": [str(source)]}
+
+        _, expert_contexts = await self._run_two_steps(
+            AnalyzeTool(),
+            {**common, "step": "Assess the architecture", "findings": "Single module", "analysis_type": "security"},
+            {**common, "step": "Summarise the assessment", "findings": "No layering"},
+        )
+
+        assert len(expert_contexts) == 1
+        assert "analysis_type: security" in expert_contexts[0]
+
+    @pytest.mark.asyncio
+    async def test_tracer_keeps_trace_config(self):
+        from tools.tracer import TracerTool
+
+        tool = TracerTool()
+        common = {"total_steps": 2, "model": "flash", "target_description": "Trace the login flow"}
+
+        final, _ = await self._run_two_steps(
+            tool,
+            {
+                **common,
+                "step": "Map dependencies of AuthService",
+                "findings": "Uses TokenStore",
+                "trace_mode": "dependencies",
+            },
+            {**common, "step": "Dependency map complete", "findings": "TokenStore depends on Redis"},
+        )
+
+        assert final["output"]["format"] == "dependencies_trace_analysis"
+        assert final["output"]["rendering_instructions"] == tool._get_rendering_instructions("dependencies")
+        assert final["metadata"]["trace_mode"] == "dependencies"
@@ -76,7 +76,7 @@ class TestWorkflowToolsUTF8(unittest.IsolatedAsyncioTestCase):
         mock_provider = Mock()
         mock_provider.get_provider_type.return_value = Mock(value="test")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content = AsyncMock(
+        mock_provider.agenerate_content = AsyncMock(
             return_value=Mock(
                 content=json.dumps(
                     {
@@ -122,7 +122,7 @@ class TestWorkflowToolsUTF8(unittest.IsolatedAsyncioTestCase):
 
         # Check that the French instruction was added
         # The mock provider's generate_content should be called
-        mock_provider.generate_content.assert_called()
+        mock_provider.agenerate_content.assert_called()
         # The call was successful, which means our fix worked
 
     @patch("tools.shared.base_tool.BaseTool.get_model_provider")
@@ -132,7 +132,7 @@ class TestWorkflowToolsUTF8(unittest.IsolatedAsyncioTestCase):
         mock_provider = Mock()
         mock_provider.get_provider_type.return_value = Mock(value="test")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content = AsyncMock(
+        mock_provider.agenerate_content = AsyncMock(
             return_value=Mock(
                 content=json.dumps(
                     {
@@ -205,7 +205,7 @@ class TestWorkflowToolsUTF8(unittest.IsolatedAsyncioTestCase):
         mock_provider = Mock()
         mock_provider.get_provider_type.return_value = Mock(value="test")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content = AsyncMock(
+        mock_provider.agenerate_content = AsyncMock(
             return_value=Mock(
                 content=json.dumps(
                     {
@@ -42,6 +42,14 @@ def inject_transport(monkeypatch, cassette_path: str):
             self._test_transport = transport
         return original_client_property.fget(self)
 
+    original_async_client_property = OpenAICompatibleProvider.async_client
+
+    def patched_async_client_getter(self):
+        if self._async_client is None:
+            self._test_transport = transport
+        return original_async_client_property.fget(self)
+
     monkeypatch.setattr(OpenAICompatibleProvider, "client", property(patched_client_getter))
+    monkeypatch.setattr(OpenAICompatibleProvider, "async_client", property(patched_async_client_getter))
 
     return transport
@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import ANALYZE_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -147,10 +148,7 @@ class AnalyzeTool(WorkflowTool):
     including architectural review, performance analysis, security assessment, and maintainability evaluation.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_request = None
-        self.analysis_config = {}
+    analysis_config: dict = RequestScoped(default_factory=dict)
 
     def get_name(self) -> str:
         return "analyze"
@@ -418,6 +416,17 @@ class AnalyzeTool(WorkflowTool):
         """Store initial request for expert analysis."""
         self.initial_request = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the analysis config across steps."""
+        state = super().get_persisted_state()
+        state["analysis_config"] = self.analysis_config
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the analysis config saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.analysis_config = state.get("analysis_config") or {}
+
     # Override inheritance hooks for analyze-specific behavior
 
     def get_completion_status(self) -> str:
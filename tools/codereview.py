@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import CODEREVIEW_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -138,10 +139,7 @@ class CodeReviewTool(WorkflowTool):
     including security audits, performance analysis, architectural review, and maintainability assessment.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_request = None
-        self.review_config = {}
+    review_config: dict = RequestScoped(default_factory=dict)
 
     def get_name(self) -> str:
         return "codereview"
@@ -470,6 +468,17 @@ class CodeReviewTool(WorkflowTool):
         """Store initial request for expert analysis."""
         self.initial_request = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the review config across steps."""
+        state = super().get_persisted_state()
+        state["review_config"] = self.review_config
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the review config saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.review_config = state.get("review_config") or {}
+
     # Override inheritance hooks for code review-specific behavior
 
     def get_review_validation_type(self, request) -> str:
@@ -15,6 +15,7 @@ Key features:
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from typing import TYPE_CHECKING, Any
@@ -26,9 +27,12 @@ if TYPE_CHECKING:
 
 from mcp.types import TextContent
 
-from config import TEMPERATURE_ANALYTICAL
+from config import DEFAULT_CONSENSUS_TIMEOUT, TEMPERATURE_ANALYTICAL
+from providers.hedging import hedged_generate
 from systemprompts import CONSENSUS_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
+from utils.conversation_memory import add_turn, create_thread, get_thread
 from utils.model_context import ModelContext
 
 from .workflow.base import WorkflowTool
@@ -77,6 +81,14 @@ CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS = {
         "Optional list of image paths or base64 data URLs for visual context. Useful for UI/UX discussions, "
         "architecture diagrams, mockups, or any visual references that help inform the consensus analysis."
     ),
+    "parallel": (
+        "Step 1 only. When true, consult ALL models concurrently and return every verdict in a single response "
+        "instead of one model per step. The workflow completes in step 1; proceed directly to synthesis."
+    ),
+    "model_timeout": (
+        "Step 1 only, used with parallel=true. Maximum seconds to wait for each model. Models that time out or "
+        "fail are reported alongside the successful verdicts."
+    ),
 }
 
 
@@ -113,6 +125,10 @@ class ConsensusRequest(WorkflowRequest):
     # Optional images for visual debugging
     images: list[str] | None = Field(default=None, description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["images"])
 
+    # Parallel fan-out (step 1 only)
+    parallel: bool | None = Field(False, description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["parallel"])
+    model_timeout: float | None = Field(None, gt=0, description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["model_timeout"])
+
     # Override inherited fields to exclude them from schema
     temperature: float | None = Field(default=None, exclude=True)
     thinking_mode: str | None = Field(default=None, exclude=True)
@@ -158,13 +174,10 @@ class ConsensusTool(WorkflowTool):
     and finally synthesizes all perspectives into a unified recommendation.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_prompt: str | None = None
-        self.original_proposal: str | None = None  # Store the original proposal separately
-        self.models_to_consult: list[dict] = []
-        self.accumulated_responses: list[dict] = []
-        self._current_arguments: dict[str, Any] = {}
+    initial_prompt: str | None = RequestScoped()
+    original_proposal: str | None = RequestScoped()  # Store the original proposal separately
+    models_to_consult: list[dict] = RequestScoped(default_factory=list)
+    accumulated_responses: list[dict] = RequestScoped(default_factory=list)
 
     def get_name(self) -> str:
         return "consensus"
@@ -274,6 +287,16 @@ of the evidence, even when it strongly points in one direction.""",
                 "items": {"type": "string"},
                 "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["images"],
             },
+            "parallel": {
+                "type": "boolean",
+                "default": False,
+                "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["parallel"],
+            },
+            "model_timeout": {
+                "type": "number",
+                "exclusiveMinimum": 0,
+                "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["model_timeout"],
+            },
         }
 
         # Define excluded fields for consensus workflow
@@ -442,6 +465,23 @@ of the evidence, even when it strongly points in one direction.""",
             # Set total steps: len(models) (each step includes consultation + response)
             request.total_steps = len(self.models_to_consult)
 
+            if request.parallel and self.models_to_consult:
+                return await self._execute_parallel_consensus(request)
+
+            continuation_id = self._start_consensus_session(request, arguments)
+        else:
+            continuation_id = self._restore_consensus_session(request)
+            if not self.models_to_consult:
+                error_data = {
+                    "status": "error",
+                    "content": (
+                        f"Consensus step {request.step_number} has no session to continue. Pass the "
+                        "continuation_id returned by step 1 so its models and responses can be restored."
+                    ),
+                }
+                self._add_workflow_metadata(error_data, arguments)
+                return [TextContent(type="text", text=json.dumps(error_data, indent=2, ensure_ascii=False))]
+
         # For all steps (1 through total_steps), consult the corresponding model
         if request.step_number <= request.total_steps:
             # Calculate which model to consult for this step
@@ -465,6 +505,8 @@ of the evidence, even when it strongly points in one direction.""",
                     "current_model_index": model_idx + 1,
                     "next_step_required": request.step_number < request.total_steps,
                 }
+                if continuation_id:
+                    response_data["continuation_id"] = continuation_id
 
                 # Add CLAI Agent's analysis to step 1
                 if request.step_number == 1:
@@ -501,6 +543,8 @@ of the evidence, even when it strongly points in one direction.""",
                         f"- step_number: {request.step_number + 1}\n"
                         f"- findings: Summarize key points from this model's response"
                     )
+                    if continuation_id:
+                        response_data["next_steps"] += f"\n- continuation_id: {continuation_id}"
 
                 # Add accumulated responses for tracking
                 response_data["accumulated_responses"] = self.accumulated_responses
@@ -515,32 +559,189 @@ of the evidence, even when it strongly points in one direction.""",
                     "provider_used": provider.get_provider_type().value,
                 }
 
+                if continuation_id:
+                    self._save_consensus_session(continuation_id, model_response)
+
                 return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
 
         # Otherwise, use standard workflow execution
         return await super().execute_workflow(arguments)
 
-    async def _consult_model(self, model_config: dict, request) -> dict:
-        """Consult a single model and return its response."""
+    def _start_consensus_session(self, request, arguments: dict[str, Any]) -> str | None:
+        """Open (or join) the conversation thread that carries consensus state between steps."""
+        continuation_id = request.continuation_id
+        if not continuation_id:
+            try:
+                clean_args = {k: v for k, v in arguments.items() if k not in ["_model_context", "_resolved_model_name"]}
+                continuation_id = create_thread(self.get_name(), clean_args)
+            except Exception as e:
+                logger.warning(f"Could not create consensus thread, state will not persist between steps: {e}")
+                return None
+        return continuation_id
+
+    def _restore_consensus_session(self, request) -> str | None:
+        """Load proposal, models and responses saved by earlier steps of this consensus session."""
+        continuation_id = request.continuation_id
+        if not continuation_id or self.models_to_consult:
+            # Nothing to restore from, or state is already present (direct, unscoped use of the tool)
+            return continuation_id
+
+        thread = get_thread(continuation_id)
+        if not thread:
+            return continuation_id
+
+        for turn in reversed(thread.turns):
+            state = turn.model_metadata
+            if turn.role == "assistant" and turn.tool_name == self.get_name() and isinstance(state, dict):
+                consensus_state = state.get("consensus_state")
+                if consensus_state:
+                    self.original_proposal = consensus_state.get("original_proposal")
+                    self.initial_prompt = self.original_proposal
+                    self.models_to_consult = consensus_state.get("models_to_consult", [])
+                    self.accumulated_responses = consensus_state.get("accumulated_responses", [])
+                    logger.debug(
+                        f"[CONSENSUS] Restored session {continuation_id} with "
+                        f"{len(self.accumulated_responses)} of {len(self.models_to_consult)} responses"
+                    )
+                    break
+
+        return continuation_id
+
+    def _save_consensus_session(self, continuation_id: str, model_response: dict) -> None:
+        """Persist consensus state after a model consultation so the next step can resume it."""
+        content = model_response.get("verdict") or model_response.get("error", "")
+        add_turn(
+            thread_id=continuation_id,
+            role="assistant",
+            content=f"{model_response['model']} ({model_response.get('stance', 'neutral')}): {content}",
+            tool_name=self.get_name(),
+            model_metadata={
+                "consensus_state": {
+                    "original_proposal": self.original_proposal,
+                    "models_to_consult": self.models_to_consult,
+                    "accumulated_responses": self.accumulated_responses,
+                }
+            },
+        )
+
+    async def _execute_parallel_consensus(self, request) -> list:
+        """Consult every model in step 1 concurrently and return all verdicts in one response."""
+        responses = await self._consult_models_in_parallel(self.models_to_consult, request)
+        self.accumulated_responses = responses
+
+        successful = [r for r in responses if r.get("status") == "success"]
+        failed = [r for r in responses if r.get("status") != "success"]
+
+        response_data = {
+            "status": "consensus_workflow_complete",
+            "step_number": 1,
+            "total_steps": 1,
+            "next_step_required": False,
+            "parallel": True,
+            "consensus_complete": True,
+            "agent_analysis": {
+                "initial_analysis": request.step,
+                "findings": request.findings,
+            },
+            "complete_consensus": {
+                "initial_prompt": self.original_proposal if self.original_proposal else self.initial_prompt,
+                "models_consulted": [f"{m['model']}:{m.get('stance', 'neutral')}" for m in successful],
+                "models_failed": [f"{m['model']}:{m.get('stance', 'neutral')}" for m in failed],
+                "total_responses": len(successful),
+                "consensus_confidence": "high" if not failed else "partial",
+            },
+            "accumulated_responses": responses,
+        }
+
+        if not successful:
+            response_data["next_steps"] = (
+                "No model returned a verdict. Review the errors in accumulated_responses, then retry with "
+                "different models or a longer model_timeout."
+            )
+        else:
+            response_data["next_steps"] = (
+                "CONSENSUS GATHERING IS COMPLETE. Synthesize all perspectives and present:\n"
+                "1. Key points of AGREEMENT across models\n"
+                "2. Key points of DISAGREEMENT and why they differ\n"
+                "3. Your final consolidated recommendation\n"
+                "4. Specific, actionable next steps for implementation\n"
+                "5. Critical risks or concerns that must be addressed"
+            )
+            if failed:
+                response_data["next_steps"] += (
+                    f"\n\nNOTE: {len(failed)} of {len(responses)} models did not respond "
+                    f"({', '.join(response_data['complete_consensus']['models_failed'])}). "
+                    "Mention this gap in your synthesis."
+                )
+
+        response_data["metadata"] = {
+            "tool_name": self.get_name(),
+            "workflow_type": "multi_model_consensus",
+            "models_consulted": [f"{m['model']}:{m.get('stance', 'neutral')}" for m in self.models_to_consult],
+            "consensus_complete": True,
+            "total_models": len(self.models_to_consult),
+        }
+
+        return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
+
+    async def _consult_models_in_parallel(self, model_configs: list[dict], request) -> list[dict]:
+        """Consult all models concurrently with a per-model timeout.
+
+        A model that times out or fails yields an error entry instead of aborting the
+        others, so callers always get one result per model, in request order.
+        """
+        timeout = request.model_timeout or DEFAULT_CONSENSUS_TIMEOUT
+        # Every model sees the same files; read them once, off the event loop
+        context_files = await asyncio.to_thread(self._prepare_context_files, request)
+
+        async def consult_with_timeout(model_config: dict) -> dict:
+            try:
+                return await asyncio.wait_for(
+                    self._consult_model(model_config, request, context_files=context_files), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Consensus model %s timed out after %ss", model_config.get("model"), timeout)
+                return {
+                    "model": model_config.get("model", "unknown"),
+                    "stance": model_config.get("stance", "neutral"),
+                    "status": "timeout",
+                    "error": f"Model did not respond within {timeout}s",
+                }
+
+        return list(await asyncio.gather(*(consult_with_timeout(config) for config in model_configs)))
+
+    def _prepare_context_files(self, request) -> str:
+        """Build the context files section appended to the proposal ("" when there are no files)."""
+        if not request.relevant_files:
+            return ""
+        # Use continuation_id=None for blinded consensus - each model should only see
+        # original prompt + files, not conversation history or other model responses
+        file_content, _ = self._prepare_file_content_for_prompt(request.relevant_files, None, "Context files")
+        if not file_content:
+            return ""
+        return f"\n\n=== CONTEXT FILES ===\n{file_content}\n=== END CONTEXT ==="
+
+    async def _consult_model(self, model_config: dict, request, context_files: str | None = None) -> dict:
+        """Consult a single model and return its response.
+
+        Args:
+            model_config: Model name, stance and optional stance prompt
+            request: The consensus request
+            context_files: Context files section built by _prepare_context_files(), when
+                already prepared for several models; built here otherwise
+        """
         try:
             # Get the provider for this model
             model_name = model_config["model"]
             provider = self.get_model_provider(model_name)
 
             # Prepare the prompt with any relevant files
-            # Use continuation_id=None for blinded consensus - each model should only see
-            # original prompt + files, not conversation history or other model responses
             # CRITICAL: Use the original proposal from step 1, NOT what's in request.step for steps 2+!
             # Steps 2+ contain summaries/notes that must NEVER be sent to other models
             prompt = self.original_proposal if self.original_proposal else self.initial_prompt
-            if request.relevant_files:
-                file_content, _ = self._prepare_file_content_for_prompt(
-                    request.relevant_files,
-                    None,  # Use None instead of request.continuation_id for blinded consensus
-                    "Context files",
-                )
-                if file_content:
-                    prompt = f"{prompt}\n\n=== CONTEXT FILES ===\n{file_content}\n=== END CONTEXT ==="
+            if context_files is None:
+                context_files = self._prepare_context_files(request)
+            prompt = f"{prompt}{context_files}"
 
             # Get stance-specific system prompt
             stance = model_config.get("stance", "neutral")
@@ -559,8 +760,9 @@ of the evidence, even when it strongly points in one direction.""",
             for warning in temp_warnings:
                 logger.warning(warning)
 
-            # Call the model with validated temperature
-            response = provider.generate_content(
+            # Call the model with validated temperature (hedged on an alternate provider if enabled)
+            response = await hedged_generate(
+                provider,
                 prompt=prompt,
                 model_name=model_name,
                 system_prompt=system_prompt,
@@ -569,6 +771,8 @@ of the evidence, even when it strongly points in one direction.""",
                 images=request.images if request.images else None,
             )
 
+            self._record_token_usage(model_name, prompt, system_prompt, response, bool(request.images))
+
             return {
                 "model": model_name,
                 "stance": stance,
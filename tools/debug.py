@@ -117,10 +117,6 @@ class DebugIssueTool(WorkflowTool):
     including race conditions, memory leaks, performance issues, and integration problems.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_issue = None
-
     def get_name(self) -> str:
         return "debug"
 
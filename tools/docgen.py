@@ -132,10 +132,6 @@ class DocgenTool(WorkflowTool):
     - Modern documentation style appropriate for the language/platform
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_request = None
-
     def get_name(self) -> str:
         return "docgen"
 
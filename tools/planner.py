@@ -21,7 +21,7 @@ architectural decisions, and breaking down large problems into manageable steps.
 """
 
 import logging
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Optional
 
 from pydantic import Field, field_validator
 
@@ -31,6 +31,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_BALANCED
 from systemprompts import PLANNER_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -121,9 +122,8 @@ class PlannerTool(WorkflowTool):
     - Self-contained operation (no expert analysis)
     """
 
-    def __init__(self):
-        super().__init__()
-        self.branches = {}
+    branches: dict = RequestScoped(default_factory=dict)
+    initial_planning_description: Optional[str] = RequestScoped()
 
     def get_name(self) -> str:
         return "planner"
@@ -423,12 +423,12 @@ class PlannerTool(WorkflowTool):
         # No need to append to step_history since workflow mixin already manages work_history
         # and we calculate step counts from work_history
 
-        # Handle branching like original planner
-        if request.is_branch_point and request.branch_from_step and request.branch_id:
-            if request.branch_id not in self.branches:
-                self.branches[request.branch_id] = []
-            step_data = self.prepare_step_data(request)
-            self.branches[request.branch_id].append(step_data)
+        # Handle branching like original planner. Branches are rebuilt from work_history (which is
+        # restored from conversation memory and already includes this step) rather than kept on the tool.
+        self.branches = {}
+        for step_data in self.work_history:
+            if step_data.get("is_branch_point") and step_data.get("branch_from_step") and step_data.get("branch_id"):
+                self.branches.setdefault(step_data["branch_id"], []).append(step_data)
 
         # Ensure metadata exists and preserve existing metadata from build_base_response
         if "metadata" not in response_data:
@@ -518,6 +518,17 @@ class PlannerTool(WorkflowTool):
         """Store initial planning description."""
         self.initial_planning_description = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the initial planning description across steps."""
+        state = super().get_persisted_state()
+        state["initial_planning_description"] = self.initial_planning_description
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the initial planning description saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.initial_planning_description = state.get("initial_planning_description")
+
     def get_initial_request(self, fallback_step: str) -> str:
         """Get initial planning description."""
         try:
@@ -26,6 +26,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import PRECOMMIT_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -139,10 +140,7 @@ class PrecommitTool(WorkflowTool):
     multi-repository analysis, security review, performance validation, and integration testing.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_request = None
-        self.git_config = {}
+    git_config: dict = RequestScoped(default_factory=dict)
 
     def get_name(self) -> str:
         return "precommit"
@@ -511,6 +509,17 @@ class PrecommitTool(WorkflowTool):
         """Store initial request for expert analysis."""
         self.initial_request = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the git config across steps."""
+        state = super().get_persisted_state()
+        state["git_config"] = self.git_config
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the git config saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.git_config = state.get("git_config") or {}
+
     # Override inheritance hooks for precommit-specific behavior
 
     def get_completion_status(self) -> str:
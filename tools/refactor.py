@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import REFACTOR_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -154,10 +155,7 @@ class RefactorTool(WorkflowTool):
     opportunities, and organization improvements.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_request = None
-        self.refactor_config = {}
+    refactor_config: dict = RequestScoped(default_factory=dict)
 
     def get_name(self) -> str:
         return "refactor"
@@ -457,6 +455,17 @@ class RefactorTool(WorkflowTool):
         """Store initial request for expert analysis."""
         self.initial_request = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the refactor config across steps."""
+        state = super().get_persisted_state()
+        state["refactor_config"] = self.refactor_config
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the refactor config saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.refactor_config = state.get("refactor_config") or {}
+
     # Inheritance hook methods for refactor-specific behavior
 
     # Override inheritance hooks for refactor-specific behavior
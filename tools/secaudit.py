@@ -28,6 +28,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import SECAUDIT_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -161,10 +162,7 @@ class SecauditTool(WorkflowTool):
     security-specific capabilities.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_request = None
-        self.security_config = {}
+    security_config: dict = RequestScoped(default_factory=dict)
 
     def get_name(self) -> str:
         """Return the unique name of the tool."""
@@ -517,6 +515,17 @@ class SecauditTool(WorkflowTool):
         """Store initial request for expert analysis."""
         self.initial_request = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the security config across steps."""
+        state = super().get_persisted_state()
+        state["security_config"] = self.security_config
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the security config saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.security_config = state.get("security_config") or {}
+
     def should_include_files_in_expert_prompt(self) -> bool:
         """Include files in expert analysis for comprehensive security audit."""
         return True
@@ -9,6 +9,7 @@ common functionality for request validation, error handling, model management,
 conversation handling, file processing, and response formatting.
 """
 
+import copy
 import logging
 import os
 from abc import ABC, abstractmethod
@@ -20,7 +21,8 @@ if TYPE_CHECKING:
     from tools.models import ToolModelCategory
 
 from config import MCP_PROMPT_SIZE_LIMIT
-from providers import ModelProvider, ModelProviderRegistry
+from providers import ModelProvider, ModelProviderRegistry, ModelResponse
+from providers.hedging import hedged_generate, hedged_stream
 from utils import check_token_limit
 from utils.conversation_memory import (
     ConversationTurn,
@@ -28,6 +30,9 @@ from utils.conversation_memory import (
     get_thread,
 )
 from utils.file_utils import read_file_content, read_files
+from utils.progress import get_progress_reporter, is_streaming_enabled
+
+from .execution_context import RequestScoped
 
 # Import models from tools.models for compatibility
 try:
@@ -82,6 +87,16 @@ class BaseTool(ABC):
     # Class-level cache for OpenRouter registry to avoid multiple loads
     _openrouter_registry_cache = None
 
+    # (key, schema) of the model field schema shared by all tools, per classes that build it
+    _model_field_schema_cache: dict[tuple[type, ...], tuple[tuple, dict[str, Any]]] = {}
+
+    # Per-invocation state: stored in the active ToolExecutionContext so that
+    # concurrent calls to this (singleton) tool cannot see each other's values
+    _current_arguments = RequestScoped(default_factory=dict)
+    _current_model_name = RequestScoped()
+    _model_context = RequestScoped()
+    _actually_processed_files = RequestScoped(default_factory=list)
+
     @classmethod
     def _get_openrouter_registry(cls):
         """Get cached OpenRouter registry instance, creating if needed."""
@@ -295,9 +310,46 @@ class BaseTool(ABC):
         When auto mode is enabled, the model parameter becomes required
         and includes detailed descriptions of each model's capabilities.
 
+        The schema is the same for every tool, so it is built once per model
+        catalog version (see ModelProviderRegistry.get_model_catalog) and
+        configuration, and shared. Tools that override how it is built get
+        their own cache entry.
+
         Returns:
             Dict containing the model field JSON schema
         """
+        owners = self._model_field_schema_owners()
+        cached = BaseTool._model_field_schema_cache.get(owners)
+        if cached is not None and cached[0] == self._model_field_schema_key():
+            return copy.deepcopy(cached[1])
+
+        schema = self._build_model_field_schema()
+        # Building may initialize providers and so change the catalog version, so key afterwards
+        BaseTool._model_field_schema_cache[owners] = (self._model_field_schema_key(), schema)
+        return copy.deepcopy(schema)
+
+    def _model_field_schema_key(self) -> tuple:
+        """Identify the configuration the model field schema is derived from"""
+        from config import DEFAULT_MODEL
+
+        return (
+            ModelProviderRegistry.get_model_catalog().version,
+            DEFAULT_MODEL,
+            self.is_effective_auto_mode(),
+            bool(os.getenv("OPENROUTER_API_KEY")),
+            os.getenv("CUSTOM_API_URL"),
+        )
+
+    def _model_field_schema_owners(self) -> tuple[type, ...]:
+        """Classes defining the methods the model field schema is built with"""
+        mro = type(self).__mro__
+        return tuple(
+            next(cls for cls in mro if name in cls.__dict__)
+            for name in ("_build_model_field_schema", "_get_available_models")
+        )
+
+    def _build_model_field_schema(self) -> dict[str, Any]:
+        """Build the model field schema from the available providers and models"""
         import os
 
         from config import DEFAULT_MODEL
@@ -627,6 +679,81 @@ class BaseTool(ABC):
             logger.error(f"Failed to get provider for model '{model_name}' in {self.name} tool: {e}")
             raise
 
+    async def generate_model_response(self, provider: ModelProvider, **kwargs) -> ModelResponse:
+        """
+        Call the model, streaming its output to the client as MCP progress notifications.
+
+        Output is only streamed when the client asked for progress on this request
+        (and STREAM_RESPONSES is not disabled); otherwise this is a plain
+        agenerate_content() call. If the stream cannot be opened the request is
+        retried without streaming, so endpoints that reject streaming still work.
+        With HEDGE_REQUESTS enabled, slow requests are hedged on an alternate
+        provider (see providers/hedging.py).
+
+        Args:
+            provider: Provider serving the model
+            **kwargs: Arguments for agenerate_content()/astream_content()
+
+        Returns:
+            ModelResponse with the complete output
+        """
+        reporter = get_progress_reporter()
+        if reporter is None or not is_streaming_enabled():
+            return await hedged_generate(provider, **kwargs)
+
+        response = None
+        received = False
+        stream = hedged_stream(provider, **kwargs)
+        try:
+            async for chunk in stream:
+                if chunk.text:
+                    received = True
+                    await reporter.stream_text(chunk.text)
+                if chunk.response is not None:
+                    response = chunk.response
+        except Exception as e:
+            if received:
+                raise
+            logger.warning(f"Streaming from {provider.get_provider_type().value} failed, retrying without: {e}")
+            return await hedged_generate(provider, **kwargs)
+        finally:
+            # Stops the generation upstream when the call is cancelled mid-stream
+            await stream.aclose()
+
+        await reporter.flush()
+        if response is None:
+            raise RuntimeError(f"{provider.get_provider_type().value} stream ended without a response")
+        return response
+
+    def _record_token_usage(
+        self,
+        model_name: Optional[str],
+        prompt: str,
+        system_prompt: Optional[str],
+        response: ModelResponse,
+        has_images: bool,
+    ) -> None:
+        """
+        Learn how far the static token estimates are off for this model.
+
+        Only text-only prompts that actually reached the API are recorded:
+        image tokens cannot be attributed to any text category, and cached
+        responses report the usage of the call that filled the cache.
+
+        Args:
+            model_name: Model that served the request
+            prompt: Prompt that was sent
+            system_prompt: System prompt that was sent
+            response: Response returned for the prompt
+            has_images: Whether images were sent along with the prompt
+        """
+        if has_images or response.metadata.get("cache_hit"):
+            return
+
+        from utils.token_calibration import record_prompt_usage
+
+        record_prompt_usage(model_name, prompt, system_prompt, response.usage)
+
     # === CONVERSATION AND FILE HANDLING METHODS ===
 
     def get_conversation_embedded_files(self, continuation_id: Optional[str]) -> list[str]:
@@ -928,7 +1055,11 @@ class BaseTool(ABC):
 
             # This is now the single source of truth for token allocation.
             try:
-                token_allocation = model_context.calculate_token_allocation()
+                from utils.model_context import TokenDemand
+
+                # Without a continuation no history is embedded, so files may use its share
+                demand = TokenDemand(history_tokens=None if continuation_id else 0)
+                token_allocation = model_context.calculate_token_allocation(demand=demand)
                 # Standardize on `file_tokens` for consistency and correctness.
                 effective_max_tokens = token_allocation.file_tokens - reserve_tokens
                 logger.debug(
@@ -0,0 +1,102 @@
+"""
+Per-invocation execution context for Zen MCP tools.
+
+Tool instances in server.TOOLS are long-lived singletons, but tools keep
+per-call state on ``self`` (current arguments, model context, workflow
+history, consensus responses, ...). Attributes declared with
+``RequestScoped`` store that state in the active ``ToolExecutionContext``
+instead of on the instance, so overlapping calls to the same tool each see
+their own values.
+
+The server opens a scope for every tool call:
+
+    with tool_execution_scope(name):
+        result = await tool.execute(arguments)
+
+The context lives in a ``ContextVar``, so it follows the call into tasks
+created with ``asyncio.gather`` / ``asyncio.to_thread`` while staying
+invisible to concurrent requests. Outside a scope (e.g. unit tests calling
+tool methods directly) the values fall back to the instance ``__dict__``,
+which preserves the previous single-request behaviour.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+_MISSING = object()
+
+_current_context: ContextVar[Optional["ToolExecutionContext"]] = ContextVar("tool_execution_context", default=None)
+
+
+class ToolExecutionContext:
+    """State for a single tool invocation, keyed by tool instance."""
+
+    def __init__(self, tool_name: str):
+        self.tool_name = tool_name
+        self._states: dict[int, tuple[Any, dict[str, Any]]] = {}
+
+    def state_for(self, tool: Any) -> dict[str, Any]:
+        """Return the attribute store for ``tool`` within this invocation."""
+        entry = self._states.get(id(tool))
+        if entry is None:
+            # Keep a reference to the tool so its id() cannot be reused while the context lives
+            entry = (tool, {})
+            self._states[id(tool)] = entry
+        return entry[1]
+
+
+def get_execution_context() -> Optional[ToolExecutionContext]:
+    """Return the active tool execution context, if any."""
+    return _current_context.get()
+
+
+@contextmanager
+def tool_execution_scope(tool_name: str) -> Iterator[ToolExecutionContext]:
+    """Run a tool call with fresh request-scoped state."""
+    context = ToolExecutionContext(tool_name)
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
+
+
+class RequestScoped:
+    """Descriptor for tool attributes that hold per-invocation state.
+
+    Args:
+        default: Value returned before the attribute is assigned in a scope
+        default_factory: Callable producing a fresh default (use for mutable values)
+    """
+
+    def __init__(self, default: Any = None, default_factory: Optional[Callable[[], Any]] = None):
+        self.default = default
+        self.default_factory = default_factory
+        self.name = None
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def _store(self, obj) -> dict[str, Any]:
+        context = _current_context.get()
+        if context is None:
+            return obj.__dict__
+        return context.state_for(obj)
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        store = self._store(obj)
+        value = store.get(self.name, _MISSING)
+        if value is _MISSING:
+            value = self.default_factory() if self.default_factory is not None else self.default
+            store[self.name] = value
+        return value
+
+    def __set__(self, obj, value) -> None:
+        self._store(obj)[self.name] = value
+
+    def __delete__(self, obj) -> None:
+        self._store(obj).pop(self.name, None)
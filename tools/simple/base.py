@@ -17,6 +17,7 @@ from typing import Any, Optional
 
 from tools.shared.base_models import ToolRequest
 from tools.shared.base_tool import BaseTool
+from tools.shared.execution_context import RequestScoped
 from tools.shared.schema_builders import SchemaBuilder
 
 
@@ -60,6 +61,10 @@ class SimpleTool(BaseTool):
     FILES_FIELD = SchemaBuilder.SIMPLE_FIELD_SCHEMAS["files"]
     IMAGES_FIELD = SchemaBuilder.COMMON_FIELD_SCHEMAS["images"]
 
+    # Stable start of the prompt built by build_standard_prompt (system prompt and embedded
+    # files), reported to providers so they can serve it from their prompt cache
+    _cacheable_prompt_prefix = RequestScoped(default="")
+
     @abstractmethod
     def get_tool_fields(self) -> dict[str, dict[str, Any]]:
         """
@@ -428,18 +433,28 @@ class SimpleTool(BaseTool):
             estimated_tokens = estimate_tokens(prompt)
             logger.debug(f"Prompt length: {len(prompt)} characters (~{estimated_tokens:,} tokens)")
 
+            # Continuations lead with conversation history, so only fresh prompts start with the stable prefix
+            cacheable_prefix = self._cacheable_prompt_prefix
+            cacheable_prefix_length = (
+                len(cacheable_prefix) if cacheable_prefix and prompt.startswith(cacheable_prefix) else 0
+            )
+
             # Generate content with provider abstraction
-            model_response = provider.generate_content(
+            model_response = await self.generate_model_response(
+                provider,
                 prompt=prompt,
                 model_name=self._current_model_name,
                 system_prompt=system_prompt,
                 temperature=temperature,
                 thinking_mode=thinking_mode if provider.supports_thinking_mode(self._current_model_name) else None,
                 images=images if images else None,
+                cacheable_prefix_length=cacheable_prefix_length,
             )
 
             logger.info(f"Received response from {provider.get_provider_type().value} API for {self.get_name()}")
 
+            self._record_token_usage(self._current_model_name, prompt, system_prompt, model_response, bool(images))
+
             # Process the model's response
             if model_response.content:
                 raw_text = model_response.content
@@ -486,7 +501,8 @@ class SimpleTool(BaseTool):
                         retry_prompt = f"{original_prompt}\n\nIMPORTANT: Please provide a substantive response. If you cannot respond to the above request, please explain why and suggest alternatives."
 
                         try:
-                            retry_response = provider.generate_content(
+                            retry_response = await self.generate_model_response(
+                                provider,
                                 prompt=retry_prompt,
                                 model_name=self._current_model_name,
                                 system_prompt=system_prompt,
@@ -495,6 +511,7 @@ class SimpleTool(BaseTool):
                                     thinking_mode if provider.supports_thinking_mode(self._current_model_name) else None
                                 ),
                                 images=images if images else None,
+                                cacheable_prefix_length=cacheable_prefix_length,
                             )
 
                             if retry_response.content:
@@ -750,7 +767,12 @@ class SimpleTool(BaseTool):
     # Convenience methods for common tool patterns
 
     def build_standard_prompt(
-        self, system_prompt: str, user_content: str, request, file_context_title: str = "CONTEXT FILES"
+        self,
+        system_prompt: str,
+        user_content: str,
+        request,
+        file_context_title: str = "CONTEXT FILES",
+        websearch_guidance: Optional[str] = None,
     ) -> str:
         """
         Build a standard prompt with system prompt, user content, and optional files.
@@ -766,11 +788,13 @@ class SimpleTool(BaseTool):
             user_content: The main user request/content
             request: The validated request object
             file_context_title: Title for the file context section
+            websearch_guidance: Guidance to use instead of get_websearch_guidance()
 
         Returns:
             Complete formatted prompt ready for the AI model
         """
         # Add context files if provided
+        file_section = ""
         files = self.get_request_files(request)
         if files:
             file_content, processed_files = self._prepare_file_content_for_prompt(
@@ -781,22 +805,30 @@ class SimpleTool(BaseTool):
             )
             self._actually_processed_files = processed_files
             if file_content:
-                user_content = f"{user_content}\n\n=== {file_context_title} ===\n{file_content}\n=== END CONTEXT ===="
+                file_section = f"=== {file_context_title} ===\n{file_content}\n=== END CONTEXT ===="
 
         # Check token limits - only validate original user prompt, not conversation history
-        content_to_validate = self.get_prompt_content_for_size_validation(user_content)
+        content_to_validate = self.get_prompt_content_for_size_validation(
+            f"{user_content}\n\n{file_section}" if file_section else user_content
+        )
         self._validate_token_limit(content_to_validate, "Content")
 
         # Add web search instruction if enabled
         websearch_instruction = ""
         use_websearch = self.get_request_use_websearch(request)
         if use_websearch:
-            websearch_instruction = self.get_websearch_instruction(use_websearch, self.get_websearch_guidance())
-
-        # Combine system prompt with user content
-        full_prompt = f"""{system_prompt}{websearch_instruction}
-
-=== USER REQUEST ===
+            if websearch_guidance is None:
+                websearch_guidance = self.get_websearch_guidance()
+            websearch_instruction = self.get_websearch_instruction(use_websearch, websearch_guidance)
+
+        # Combine system prompt with user content. Content that repeats across calls (system
+        # prompt, embedded files) comes first so providers can reuse it from their prompt cache
+        stable_prefix = f"{system_prompt}{websearch_instruction}\n\n"
+        if file_section:
+            stable_prefix += f"{file_section}\n\n"
+        self._cacheable_prompt_prefix = stable_prefix
+
+        full_prompt = f"""{stable_prefix}=== USER REQUEST ===
 {user_content}
 === END REQUEST ===
 
@@ -964,17 +996,12 @@ Please provide a thoughtful, comprehensive response:"""
         # Get user content (handles prompt.txt files)
         user_content = self.handle_prompt_file_with_fallback(request)
 
-        # Build standard prompt with Chat-style web search guidance
-        websearch_guidance = self.get_chat_style_websearch_guidance()
-
-        # Override the websearch guidance temporarily
-        original_guidance = self.get_websearch_guidance
-        self.get_websearch_guidance = lambda: websearch_guidance
-
-        try:
-            full_prompt = self.build_standard_prompt(system_prompt, user_content, request, "CONTEXT FILES")
-        finally:
-            # Restore original guidance method
-            self.get_websearch_guidance = original_guidance
-
-        return full_prompt
+        # Build standard prompt with Chat-style web search guidance (passed explicitly rather than
+        # patched onto self, so concurrent calls don't see each other's override)
+        return self.build_standard_prompt(
+            system_prompt,
+            user_content,
+            request,
+            "CONTEXT FILES",
+            websearch_guidance=self.get_chat_style_websearch_guidance(),
+        )
@@ -24,6 +24,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_CREATIVE
 from systemprompts import THINKDEEP_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -121,11 +122,8 @@ class ThinkDeepTool(WorkflowTool):
         "Provides systematic hypothesis testing, evidence-based investigation, and expert validation."
     )
 
-    def __init__(self):
-        """Initialize the ThinkDeep workflow tool"""
-        super().__init__()
-        # Storage for request parameters to use in expert analysis
-        self.stored_request_params = {}
+    # Storage for request parameters to use in expert analysis
+    stored_request_params: dict = RequestScoped(default_factory=dict)
 
     def get_name(self) -> str:
         """Return the tool name"""
@@ -184,6 +182,17 @@ class ThinkDeepTool(WorkflowTool):
 
         return DEFAULT_THINKING_MODE_THINKDEEP
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the stored request params across steps."""
+        state = super().get_persisted_state()
+        state["stored_request_params"] = self.stored_request_params
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the stored request params saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.stored_request_params = state.get("stored_request_params") or {}
+
     def customize_workflow_response(self, response_data: dict, request, **kwargs) -> dict:
         """
         Customize the workflow response for thinkdeep-specific needs
@@ -30,6 +30,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import TRACER_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import RequestScoped
 
 from .workflow.base import WorkflowTool
 
@@ -150,10 +151,8 @@ class TracerTool(WorkflowTool):
     both precision tracing (execution flow) and dependencies tracing (structural relationships).
     """
 
-    def __init__(self):
-        super().__init__()
-        self.initial_request = None
-        self.trace_config = {}
+    trace_config: dict = RequestScoped(default_factory=dict)
+    initial_tracing_description: Optional[str] = RequestScoped()
 
     def get_name(self) -> str:
         return "tracer"
@@ -737,6 +736,19 @@ DTOClass ──uses──→ [TARGET_CLASS] ──uses──→ EntityClass
         """Store initial tracing description."""
         self.initial_tracing_description = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """Persist the trace config and initial tracing description across steps."""
+        state = super().get_persisted_state()
+        state["trace_config"] = self.trace_config
+        state["initial_tracing_description"] = self.initial_tracing_description
+        return state
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore the trace config and initial tracing description saved on an earlier step."""
+        super().restore_persisted_state(state)
+        self.trace_config = state.get("trace_config") or {}
+        self.initial_tracing_description = state.get("initial_tracing_description")
+
     def get_initial_request(self, fallback_step: str) -> str:
         """Get initial tracing description."""
         try:
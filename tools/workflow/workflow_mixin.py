@@ -33,6 +33,7 @@ from config import MCP_PROMPT_SIZE_LIMIT
 from utils.conversation_memory import add_turn, create_thread
 
 from ..shared.base_models import ConsolidatedFindings
+from ..shared.execution_context import RequestScoped
 
 logger = logging.getLogger(__name__)
 
@@ -65,11 +66,16 @@ class BaseWorkflowMixin(ABC):
     - _prepare_file_content_for_prompt()
     """
 
-    def __init__(self) -> None:
-        super().__init__()
-        self.work_history: list[dict[str, Any]] = []
-        self.consolidated_findings: ConsolidatedFindings = ConsolidatedFindings()
-        self.initial_request: Optional[str] = None
+    # Workflow progress for the current call; restored from conversation memory on continuation
+    work_history: list[dict[str, Any]] = RequestScoped(default_factory=list)
+    consolidated_findings: ConsolidatedFindings = RequestScoped(default_factory=ConsolidatedFindings)
+    initial_request: Optional[str] = RequestScoped()
+    initial_issue: Optional[str] = RequestScoped()
+
+    # File context prepared for the current step
+    _embedded_file_content: str = RequestScoped(default="")
+    _file_reference_note: str = RequestScoped(default="")
+    _referenced_files: list[str] = RequestScoped(default_factory=list)
 
     # ================================================================================
     # Abstract Methods - Required Implementation by BaseTool or Subclasses
@@ -105,6 +111,11 @@ class BaseWorkflowMixin(ABC):
         """Get model provider for the given model. Usually provided by BaseTool."""
         pass
 
+    @abstractmethod
+    async def generate_model_response(self, provider: Any, **kwargs) -> Any:
+        """Call the model, streaming output as progress notifications. Usually provided by BaseTool."""
+        pass
+
     @abstractmethod
     def _resolve_model_context(self, arguments: dict[str, Any], request: Any) -> tuple[str, Any]:
         """Resolve model context from arguments. Usually provided by BaseTool."""
@@ -356,8 +367,8 @@ class BaseWorkflowMixin(ABC):
         except Exception as e:
             logger.warning(f"[WORKFLOW_FILES] {self.get_name()}: Could not get conversation files: {e}")
 
-        # Convert to list and remove any empty/None values
-        files_for_expert = [f for f in all_relevant_files if f and f.strip()]
+        # Convert to list and remove any empty/None values (sorted so repeated calls embed identical content)
+        files_for_expert = sorted(f for f in all_relevant_files if f and f.strip())
 
         if not files_for_expert:
             logger.debug(f"[WORKFLOW_FILES] {self.get_name()}: No relevant files found for expert analysis")
@@ -399,7 +410,12 @@ class BaseWorkflowMixin(ABC):
         current_model_context = self.get_current_model_context()
         if current_model_context:
             try:
-                token_allocation = current_model_context.calculate_token_allocation()
+                from utils.model_context import TokenDemand
+
+                # Expert analysis embeds no conversation history, so files may use its share
+                token_allocation = current_model_context.calculate_token_allocation(
+                    demand=TokenDemand(history_tokens=0)
+                )
                 max_tokens = token_allocation.file_tokens
                 logger.debug(
                     f"[WORKFLOW_FILES] {self.get_name()}: Using {max_tokens:,} tokens for expert analysis files"
@@ -440,8 +456,12 @@ class BaseWorkflowMixin(ABC):
         """
         Add file content to the expert context.
         Override this to customize how files are added to the context.
+
+        Files go first: they repeat across expert calls on the same code while the
+        findings change, so a leading file section can be reused from the provider's
+        prompt cache.
         """
-        return f"{expert_context}\n\n=== ESSENTIAL FILES ===\n{file_content}\n=== END ESSENTIAL FILES ==="
+        return f"=== ESSENTIAL FILES ===\n{file_content}\n=== END ESSENTIAL FILES ===\n\n{expert_context}"
 
     # ================================================================================
     # Context-Aware File Embedding - Core Implementation
@@ -690,6 +710,7 @@ class BaseWorkflowMixin(ABC):
                             if isinstance(state, dict) and "work_history" in state:
                                 self.work_history = state.get("work_history", [])
                                 self.initial_request = state.get("initial_request")
+                                self.restore_persisted_state(state.get("tool_state") or {})
                                 # Rebuild consolidated findings from restored history
                                 self._reprocess_consolidated_findings()
                                 logger.debug(
@@ -1006,6 +1027,20 @@ class BaseWorkflowMixin(ABC):
         # Default implementation - tools can override to store differently
         self.initial_issue = step_description
 
+    def get_persisted_state(self) -> dict[str, Any]:
+        """
+        Tool-specific state saved with each conversation turn.
+
+        Every step runs in its own execution scope, so anything a tool records on
+        one step and reads on a later one must be returned here and restored by
+        restore_persisted_state(). Override (calling super) to add fields.
+        """
+        return {"initial_issue": self.initial_issue}
+
+    def restore_persisted_state(self, state: dict[str, Any]) -> None:
+        """Restore state saved by get_persisted_state() on continuation. Override to restore custom fields."""
+        self.initial_issue = state.get("initial_issue")
+
     def get_initial_request(self, fallback_step: str) -> str:
         """Get initial request description. Override for custom retrieval."""
         try:
@@ -1134,7 +1169,11 @@ class BaseWorkflowMixin(ABC):
         clean_content = self._extract_clean_workflow_content_for_history(response_data)
 
         # Serialize workflow state for persistence across stateless tool calls
-        workflow_state = {"work_history": self.work_history, "initial_request": getattr(self, "initial_request", None)}
+        workflow_state = {
+            "work_history": self.work_history,
+            "initial_request": getattr(self, "initial_request", None),
+            "tool_state": self.get_persisted_state(),
+        }
 
         add_turn(
             thread_id=continuation_id,
@@ -1480,7 +1519,8 @@ class BaseWorkflowMixin(ABC):
             provider = self._model_context.provider
 
             # Prepare expert analysis context
-            expert_context = self.prepare_expert_analysis_context(self.consolidated_findings)
+            findings_context = self.prepare_expert_analysis_context(self.consolidated_findings)
+            expert_context = findings_context
 
             # Check if tool wants to include files in prompt
             if self.should_include_files_in_expert_prompt():
@@ -1488,6 +1528,12 @@ class BaseWorkflowMixin(ABC):
                 if file_content:
                     expert_context = self._add_files_to_expert_context(expert_context, file_content)
 
+            # Embedded files lead the context and repeat across expert calls on the same code,
+            # unlike the findings; providers can serve that prefix from their prompt cache
+            stable_context_length = (
+                len(expert_context) - len(findings_context) if expert_context.endswith(findings_context) else 0
+            )
+
             # Get system prompt for this tool with localization support
             base_system_prompt = self.get_system_prompt()
             language_instruction = self.get_language_instruction()
@@ -1496,9 +1542,11 @@ class BaseWorkflowMixin(ABC):
             # Check if tool wants system prompt embedded in main prompt
             if self.should_embed_system_prompt():
                 prompt = f"{system_prompt}\n\n{expert_context}\n\n{self.get_expert_analysis_instruction()}"
+                cacheable_prefix_length = len(system_prompt) + 2 + stable_context_length
                 system_prompt = ""  # Clear it since we embedded it
             else:
                 prompt = expert_context
+                cacheable_prefix_length = stable_context_length
 
             # Validate temperature against model constraints
             validated_temperature, temp_warnings = self.get_validated_temperature(request, self._model_context)
@@ -1508,7 +1556,8 @@ class BaseWorkflowMixin(ABC):
                 logger.warning(warning)
 
             # Generate AI response - use request parameters if available
-            model_response = provider.generate_content(
+            model_response = await self.generate_model_response(
+                provider,
                 prompt=prompt,
                 model_name=model_name,
                 system_prompt=system_prompt,
@@ -1516,6 +1565,11 @@ class BaseWorkflowMixin(ABC):
                 thinking_mode=self.get_request_thinking_mode(request),
                 use_websearch=self.get_request_use_websearch(request),
                 images=list(set(self.consolidated_findings.images)) if self.consolidated_findings.images else None,
+                cacheable_prefix_length=cacheable_prefix_length,
+            )
+
+            self._record_token_usage(
+                model_name, prompt, system_prompt, model_response, bool(self.consolidated_findings.images)
             )
 
             if model_response.content:
@@ -20,6 +20,10 @@ It uses in-memory storage that persists only within a single Python process.
     state from previous calls because memory is process-specific, not shared
     across subprocess boundaries.
 
+    Setting CONVERSATION_STORAGE_BACKEND=sqlite stores threads in an on-disk
+    SQLite database instead, which survives restarts and is shared by every
+    server process on the host (see utils/sqlite_storage.py).
+
 ARCHITECTURE OVERVIEW:
 The MCP protocol is inherently stateless - each tool request is independent
 with no memory of previous interactions. This module bridges that gap by:
@@ -50,6 +54,9 @@ Key Features:
 - Automatic turn limiting (20 turns max) to prevent runaway conversations
 - Context reconstruction for stateless request continuity
 - In-memory persistence with automatic expiration (3 hour TTL)
+- Append-only turn log: a thread is stored as a small header ("thread:<id>") plus a list
+  of individually serialized turns ("thread:<id>:turns"), so adding a turn never
+  re-reads or re-serializes the earlier ones
 - Thread-safe operations for concurrent access
 - Graceful degradation when storage is unavailable
 
@@ -104,14 +111,21 @@ This enables true AI-to-AI collaboration across the entire tool ecosystem with o
 context preservation and natural conversation understanding.
 """
 
+import bisect
 import logging
 import os
+import stat
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any, Optional
 
 from pydantic import BaseModel
 
+from .file_manifest import get_file_manifest, stat_path
+from .payload_compression import compress_payload, decompress_payload
+
 logger = logging.getLogger(__name__)
 
 # Configuration constants
@@ -143,6 +157,19 @@ except ValueError:
 
 CONVERSATION_TIMEOUT_SECONDS = CONVERSATION_TIMEOUT_HOURS * 3600
 
+# Decoded threads keyed by thread ID, stamped with the storage versions they were parsed from.
+# A single tool call reads the same thread several times; each read after the first only
+# compares versions and copies the cached object instead of re-parsing every turn.
+THREAD_CACHE_SIZE = 128
+_thread_cache: "OrderedDict[str, tuple[int, Optional[int], ThreadContext]]" = OrderedDict()
+_thread_cache_lock = threading.Lock()
+
+# Rendered conversation turns keyed by (thread ID, model name). Stored turns never change,
+# so a continuation only formats and measures the turns added since the last rendering.
+HISTORY_RENDER_CACHE_SIZE = 64
+_history_render_cache: "OrderedDict[tuple[str, str], _RenderedTurns]" = OrderedDict()
+_history_render_cache_lock = threading.Lock()
+
 
 class ConversationTurn(BaseModel):
     """
@@ -203,10 +230,11 @@ class ThreadContext(BaseModel):
 
 def get_storage():
     """
-    Get in-memory storage backend for conversation persistence.
+    Get the storage backend for conversation persistence.
 
     Returns:
-        InMemoryStorage: Thread-safe in-memory storage backend
+        StorageBackend: In-memory storage by default, or the SQLite backend when
+        CONVERSATION_STORAGE_BACKEND=sqlite
     """
     from .storage_backend import get_storage_backend
 
@@ -258,7 +286,7 @@ def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread
     # Store in memory with configurable TTL to prevent indefinite accumulation
     storage = get_storage()
     key = f"thread:{thread_id}"
-    storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())
+    storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, compress_payload(context.model_dump_json()))
 
     logger.debug(f"[THREAD] Created new thread {thread_id} with parent {parent_thread_id}")
 
@@ -291,10 +319,30 @@ def get_thread(thread_id: str) -> Optional[ThreadContext]:
     try:
         storage = get_storage()
         key = f"thread:{thread_id}"
+
+        # Versions are read before the data, so a concurrent write can only make the cached
+        # entry look stale (forcing a re-parse), never make stale data look current
+        versions = _storage_versions(storage, thread_id)
+        if versions is not None:
+            cached = _get_cached_thread(thread_id, versions)
+            if cached is not None:
+                return cached
+
         data = storage.get(key)
 
         if data:
-            return ThreadContext.model_validate_json(data)
+            context = ThreadContext.model_validate_json(decompress_payload(data))
+            # Turns live in the append-only log; a header may still carry turns written
+            # by the older whole-thread layout, which come first
+            context.turns.extend(
+                ConversationTurn.model_validate_json(decompress_payload(turn))
+                for turn in storage.get_list(_turns_key(thread_id))
+            )
+            if context.turns:
+                context.last_updated_at = context.turns[-1].timestamp
+            if versions is not None:
+                _cache_thread(thread_id, versions, context)
+            return context
         return None
     except Exception:
         # Silently handle errors to avoid exposing storage details
@@ -339,6 +387,7 @@ def add_turn(
         - Storage connection failure
 
     Note:
+        - Only the new turn is serialized and appended; earlier turns are not rewritten
         - Refreshes thread TTL to configured timeout on successful update
         - Turn limits prevent runaway conversations
         - File references are preserved for cross-tool access with atomic ordering
@@ -347,43 +396,108 @@ def add_turn(
     """
     logger.debug(f"[FLOW] Adding {role} turn to {thread_id} ({tool_name})")
 
-    context = get_thread(thread_id)
-    if not context:
-        logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
-        return False
-
-    # Check turn limit to prevent runaway conversations
-    if len(context.turns) >= MAX_CONVERSATION_TURNS:
-        logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
+    if not thread_id or not _is_valid_uuid(thread_id):
         return False
 
-    # Create new turn with complete metadata
-    turn = ConversationTurn(
-        role=role,
-        content=content,
-        timestamp=datetime.now(timezone.utc).isoformat(),
-        files=files,  # Preserved for cross-tool file context
-        images=images,  # Preserved for cross-tool visual context
-        tool_name=tool_name,  # Track which tool generated this turn
-        model_provider=model_provider,  # Track model provider
-        model_name=model_name,  # Track specific model
-        model_metadata=model_metadata,  # Additional model info
-    )
-
-    context.turns.append(turn)
-    context.last_updated_at = datetime.now(timezone.utc).isoformat()
-
-    # Save back to storage and refresh TTL
     try:
         storage = get_storage()
         key = f"thread:{thread_id}"
-        storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())  # Refresh TTL to configured timeout
+        header = storage.get(key)
+        if not header:
+            logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+            return False
+
+        # The header is small and does not grow with the conversation (turns written by the
+        # older whole-thread layout are the only exception, and count towards the limit)
+        legacy_turns = len(ThreadContext.model_validate_json(decompress_payload(header)).turns)
+        remaining = MAX_CONVERSATION_TURNS - legacy_turns
+        if remaining <= 0:
+            logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
+            return False
+
+        # Create new turn with complete metadata
+        turn = ConversationTurn(
+            role=role,
+            content=content,
+            timestamp=datetime.now(timezone.utc).isoformat(),
+            files=files,  # Preserved for cross-tool file context
+            images=images,  # Preserved for cross-tool visual context
+            tool_name=tool_name,  # Track which tool generated this turn
+            model_provider=model_provider,  # Track model provider
+            model_name=model_name,  # Track specific model
+            model_metadata=model_metadata,  # Additional model info
+        )
+
+        # Append only the new turn and refresh TTLs to the configured timeout
+        length = storage.append_with_ttl(
+            _turns_key(thread_id),
+            CONVERSATION_TIMEOUT_SECONDS,
+            compress_payload(turn.model_dump_json()),
+            max_length=remaining,
+        )
+        if length is None:
+            logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
+            return False
+        storage.expire(key, CONVERSATION_TIMEOUT_SECONDS)
         return True
     except Exception as e:
         logger.debug(f"[FLOW] Failed to save turn to storage: {type(e).__name__}")
         return False
 
 
+def _turns_key(thread_id: str) -> str:
+    """Storage key of the append-only turn log for a thread"""
+    return f"thread:{thread_id}:turns"
+
+
+def _storage_versions(storage, thread_id: str) -> Optional[tuple[int, Optional[int]]]:
+    """
+    Return the (header, turn log) versions of a thread, or None if they cannot be used for caching.
+
+    None is returned when the thread does not exist or the storage backend does not
+    provide integer version stamps, in which case get_thread always parses from storage.
+    """
+    get_version = getattr(storage, "get_version", None)
+    if get_version is None:
+        return None
+    header_version = get_version(f"thread:{thread_id}")
+    if not isinstance(header_version, int):
+        with _thread_cache_lock:
+            _thread_cache.pop(thread_id, None)
+        return None
+    turns_version = get_version(_turns_key(thread_id))
+    if turns_version is not None and not isinstance(turns_version, int):
+        return None
+    return header_version, turns_version
+
+
+def _get_cached_thread(thread_id: str, versions: tuple[int, Optional[int]]) -> Optional[ThreadContext]:
+    """Return a copy of the cached thread if it was decoded from the given versions"""
+    with _thread_cache_lock:
+        entry = _thread_cache.get(thread_id)
+        if entry is None or entry[:2] != versions:
+            return None
+        _thread_cache.move_to_end(thread_id)
+        context = entry[2]
+    # Callers are free to mutate the returned context, so never hand out the cached object
+    return context.model_copy(deep=True)
+
+
+def _cache_thread(thread_id: str, versions: tuple[int, Optional[int]], context: ThreadContext) -> None:
+    """Remember a decoded thread, evicting the least recently used entries beyond THREAD_CACHE_SIZE"""
+    with _thread_cache_lock:
+        _thread_cache[thread_id] = (*versions, context.model_copy(deep=True))
+        _thread_cache.move_to_end(thread_id)
+        while len(_thread_cache) > THREAD_CACHE_SIZE:
+            _thread_cache.popitem(last=False)
+
+
+def clear_thread_cache() -> None:
+    """Drop all decoded threads (storage is unaffected)"""
+    with _thread_cache_lock:
+        _thread_cache.clear()
+
+
 def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]:
     """
     Traverse the parent chain to get all threads in conversation sequence.
@@ -570,7 +684,9 @@ def get_conversation_image_list(context: ThreadContext) -> list[str]:
     return image_list
 
 
-def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) -> tuple[list[str], list[str], int]:
+def _plan_file_inclusion_by_size(
+    all_files: list[str], max_file_tokens: int, model_name: Optional[str] = None
+) -> tuple[list[str], list[str], int]:
     """
     Plan which files to include based on size constraints.
 
@@ -579,6 +695,7 @@ def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) ->
     Args:
         all_files: List of files to consider for inclusion
         max_file_tokens: Maximum tokens available for file content
+        model_name: Model the history is built for (applies its token calibration)
 
     Returns:
         Tuple of (files_to_include, files_to_skip, estimated_total_tokens)
@@ -586,6 +703,18 @@ def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) ->
     if not all_files:
         return [], [], 0
 
+    # History may be built more than once per request; the plan depends only on sizes and budget
+    manifest = get_file_manifest()
+    if manifest is not None:
+        return manifest.plan(
+            all_files, max_file_tokens, model_name, lambda: _plan_inclusion(all_files, max_file_tokens, model_name)
+        )
+    return _plan_inclusion(all_files, max_file_tokens, model_name)
+
+
+def _plan_inclusion(
+    all_files: list[str], max_file_tokens: int, model_name: Optional[str]
+) -> tuple[list[str], list[str], int]:
     files_to_include = []
     files_to_skip = []
     total_tokens = 0
@@ -596,9 +725,10 @@ def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) ->
         try:
             from utils.file_utils import estimate_file_tokens
 
-            if os.path.exists(file_path) and os.path.isfile(file_path):
+            file_stat = stat_path(file_path)
+            if file_stat is not None and stat.S_ISREG(file_stat.st_mode):
                 # Use centralized token estimation for consistency
-                estimated_tokens = estimate_file_tokens(file_path)
+                estimated_tokens = estimate_file_tokens(file_path, model_name)
 
                 if total_tokens + estimated_tokens <= max_file_tokens:
                     files_to_include.append(file_path)
@@ -614,7 +744,7 @@ def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) ->
             else:
                 files_to_skip.append(file_path)
                 # More descriptive message for missing files
-                if not os.path.exists(file_path):
+                if file_stat is None:
                     logger.debug(
                         f"[FILES] Skipping {file_path} - file no longer exists (may have been moved/deleted since conversation)"
                     )
@@ -724,6 +854,8 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
 
     Performance Characteristics:
         - O(n) file collection with newest-first prioritization
+        - Turns are formatted and measured once per thread and model; later continuations
+          only render new turns and trim to the budget with a binary search
         - Intelligent token budgeting prevents context window overflow
         - In-memory persistence with automatic TTL management
         - Graceful degradation when files are inaccessible or too large
@@ -782,7 +914,16 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
 
         model_context = ModelContext(model_name)
 
-    token_allocation = model_context.calculate_token_allocation()
+    # Size what this history actually needs, so room one part does not use can go to the other.
+    # Embedded files are paid for by the file budget and turns by the history budget.
+    from utils.file_utils import estimate_file_tokens
+    from utils.model_context import TokenDemand
+
+    rendered = _render_turns(context.thread_id, all_turns, model_context)
+    file_demand = sum(estimate_file_tokens(file_path, model_context.model_name) for file_path in all_files)
+    demand = TokenDemand(file_tokens=file_demand, history_tokens=rendered.tokens_from(0))
+
+    token_allocation = model_context.calculate_token_allocation(demand=demand)
     max_file_tokens = token_allocation.file_tokens
     max_history_tokens = token_allocation.history_tokens
 
@@ -807,7 +948,9 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         # CRITICAL: all_files is already ordered by newest-first prioritization from get_conversation_file_list()
         # So when _plan_file_inclusion_by_size() hits token limits, it naturally excludes OLDER files first
         # while preserving the most recent file references - exactly what we want!
-        files_to_include, files_to_skip, estimated_tokens = _plan_file_inclusion_by_size(all_files, max_file_tokens)
+        files_to_include, files_to_skip, estimated_tokens = _plan_file_inclusion_by_size(
+            all_files, max_file_tokens, model_context.model_name
+        )
 
         if files_to_skip:
             logger.info(f"[FILES] Excluding {len(files_to_skip)} files from conversation history: {files_to_skip}")
@@ -909,70 +1052,23 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     history_parts.append("Previous conversation turns:")
 
     # === PHASE 1: COLLECTION (Newest-First for Token Budget) ===
-    # Build conversation turns bottom-up (most recent first) to prioritize recent context within token limits
-    # This ensures we include as many recent turns as possible within the token budget by excluding
-    # OLDER turns first when space runs out, preserving the most contextually relevant exchanges
-    turn_entries = []  # Will store (index, formatted_turn_content) for chronological ordering later
-    total_turn_tokens = 0
-    file_embedding_tokens = sum(model_context.estimate_tokens(part) for part in history_parts)
-
-    # CRITICAL: Process turns in REVERSE chronological order (newest to oldest)
-    # This prioritization strategy ensures recent context is preserved when token budget is tight
-    for idx in range(len(all_turns) - 1, -1, -1):
-        turn = all_turns[idx]
-        turn_num = idx + 1
-        role_label = "Claude" if turn.role == "user" else "Gemini"
-
-        # Build the complete turn content
-        turn_parts = []
-
-        # Add turn header with tool attribution for cross-tool tracking
-        turn_header = f"\n--- Turn {turn_num} ({role_label}"
-        if turn.tool_name:
-            turn_header += f" using {turn.tool_name}"
-
-        # Add model info if available
-        if turn.model_provider and turn.model_name:
-            turn_header += f" via {turn.model_provider}/{turn.model_name}"
-
-        turn_header += ") ---"
-        turn_parts.append(turn_header)
-
-        # Get tool-specific formatting if available
-        # This includes file references and the actual content
-        tool_formatted_content = _get_tool_formatted_content(turn)
-        turn_parts.extend(tool_formatted_content)
-
-        # Calculate tokens for this turn
-        turn_content = "\n".join(turn_parts)
-        turn_tokens = model_context.estimate_tokens(turn_content)
-
-        # Check if adding this turn would exceed history budget
-        if file_embedding_tokens + total_turn_tokens + turn_tokens > max_history_tokens:
-            # Stop adding turns - we've reached the limit
-            logger.debug(f"[HISTORY] Stopping at turn {turn_num} - would exceed history budget")
-            logger.debug(f"[HISTORY]   File tokens: {file_embedding_tokens:,}")
-            logger.debug(f"[HISTORY]   Turn tokens so far: {total_turn_tokens:,}")
-            logger.debug(f"[HISTORY]   This turn: {turn_tokens:,}")
-            logger.debug(f"[HISTORY]   Would total: {file_embedding_tokens + total_turn_tokens + turn_tokens:,}")
-            logger.debug(f"[HISTORY]   Budget: {max_history_tokens:,}")
-            break
-
-        # Add this turn to our collection (we'll reverse it later for chronological presentation)
-        # Store the original index to maintain proper turn numbering in final output
-        turn_entries.append((idx, turn_content))
-        total_turn_tokens += turn_tokens
+    # Include as many recent turns as possible within the token budget by excluding
+    # OLDER turns first when space runs out, preserving the most contextually relevant exchanges.
+    # Each turn is formatted and measured once (see _render_turns); the newest-first budget walk
+    # is a binary search over the cached prefix sums of turn tokens. Embedded files were already
+    # limited to max_file_tokens above, so the whole history budget goes to turns.
+    first_included = rendered.first_turn_within(max_history_tokens)
+
+    if first_included > 0:
+        logger.debug(f"[HISTORY] Stopping at turn {first_included} - would exceed history budget")
+        logger.debug(f"[HISTORY]   Turn tokens included: {rendered.tokens_from(first_included):,}")
+        logger.debug(f"[HISTORY]   Budget: {max_history_tokens:,}")
 
     # === PHASE 2: PRESENTATION (Chronological for LLM Understanding) ===
-    # Reverse the collected turns to restore chronological order (oldest first)
-    # This gives the LLM a natural conversation flow: Turn 1 → Turn 2 → Turn 3...
-    # while still having prioritized recent turns during the token-constrained collection phase
-    turn_entries.reverse()
-
-    # Add the turns in chronological order for natural LLM comprehension
-    # The LLM will see: "--- Turn 1 (Claude) ---" followed by "--- Turn 2 (Gemini) ---" etc.
-    for _, turn_content in turn_entries:
-        history_parts.append(turn_content)
+    # The included turns are the newest ones, presented oldest first for a natural conversation
+    # flow: Turn 1 → Turn 2 → Turn 3... with the original turn numbering
+    turn_entries = rendered.contents[first_included:]
+    history_parts.extend(turn_entries)
 
     # Log what we included
     included_turns = len(turn_entries)
@@ -1013,6 +1109,140 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     return complete_history, total_conversation_tokens
 
 
+class _RenderedTurns:
+    """Formatted conversation turns with their token counts
+
+    Attributes:
+        signatures: Identity of each rendered turn, used to detect which cached turns still apply
+        contents: Formatted text of each turn (header plus tool-formatted content)
+        prefix_tokens: prefix_tokens[i] is the token count of the first i turns
+        estimate_factor: Token calibration factor the counts were measured with
+    """
+
+    __slots__ = ("signatures", "contents", "prefix_tokens", "estimate_factor")
+
+    def __init__(
+        self,
+        signatures: list[tuple],
+        contents: list[str],
+        prefix_tokens: list[int],
+        estimate_factor: Optional[float] = None,
+    ):
+        self.signatures = signatures
+        self.contents = contents
+        self.prefix_tokens = prefix_tokens
+        self.estimate_factor = estimate_factor
+
+    def tokens_from(self, index: int) -> int:
+        """Token count of the turns from index to the newest"""
+        return self.prefix_tokens[-1] - self.prefix_tokens[index]
+
+    def first_turn_within(self, budget: int) -> int:
+        """Index of the oldest turn such that it and every newer turn fit in budget tokens
+
+        Equivalent to adding turns newest-first until the next one would exceed the budget.
+        Returns len(contents) when not even the newest turn fits.
+        """
+        total = self.prefix_tokens[-1]
+        index = bisect.bisect_left(self.prefix_tokens, total - budget)
+        return min(index, len(self.contents))
+
+
+def _turn_signature(turn: ConversationTurn) -> tuple:
+    """Identify a turn by everything that affects its rendering"""
+    return (
+        turn.timestamp,
+        turn.role,
+        turn.tool_name,
+        turn.model_provider,
+        turn.model_name,
+        tuple(turn.files or ()),
+        len(turn.content),
+        hash(turn.content),
+    )
+
+
+def _render_turn(turn: ConversationTurn, turn_num: int) -> str:
+    """Format one turn for the conversation history"""
+    role_label = "Claude" if turn.role == "user" else "Gemini"
+
+    # Add turn header with tool attribution for cross-tool tracking
+    turn_header = f"\n--- Turn {turn_num} ({role_label}"
+    if turn.tool_name:
+        turn_header += f" using {turn.tool_name}"
+
+    # Add model info if available
+    if turn.model_provider and turn.model_name:
+        turn_header += f" via {turn.model_provider}/{turn.model_name}"
+
+    turn_header += ") ---"
+
+    # Get tool-specific formatting if available
+    # This includes file references and the actual content
+    return "\n".join([turn_header, *_get_tool_formatted_content(turn)])
+
+
+def _render_turns(thread_id: str, turns: list[ConversationTurn], model_context) -> _RenderedTurns:
+    """
+    Format and measure conversation turns, reusing the cached rendering of the thread.
+
+    Turns are only ever appended, so the cached rendering of a thread normally matches a
+    prefix of the current turns and only the new turns are formatted and measured. Any
+    turn whose signature differs from the cached one (and every turn after it) is
+    rendered again. Token counts depend on the model, so renderings are cached per model,
+    and are measured again when the model's token calibration has moved since they were cached.
+    """
+    model_name = getattr(model_context, "model_name", None)
+    cache_key = (thread_id, model_name) if isinstance(model_name, str) else None
+
+    cached = None
+    estimate_factor = None
+    if cache_key is not None:
+        estimate_factor = model_context.token_estimate_factor()
+        with _history_render_cache_lock:
+            cached = _history_render_cache.get(cache_key)
+            if cached is not None:
+                _history_render_cache.move_to_end(cache_key)
+
+    signatures = [_turn_signature(turn) for turn in turns]
+    reused = 0
+    if cached is not None:
+        limit = min(len(cached.signatures), len(signatures))
+        while reused < limit and cached.signatures[reused] == signatures[reused]:
+            reused += 1
+        contents = cached.contents[:reused]
+        if cached.estimate_factor == estimate_factor:
+            prefix_tokens = cached.prefix_tokens[: reused + 1]
+        else:
+            prefix_tokens = [0]
+            for turn_content in contents:
+                prefix_tokens.append(prefix_tokens[-1] + model_context.estimate_tokens(turn_content))
+    else:
+        contents = []
+        prefix_tokens = [0]
+
+    for idx in range(reused, len(turns)):
+        turn_content = _render_turn(turns[idx], idx + 1)
+        contents.append(turn_content)
+        prefix_tokens.append(prefix_tokens[-1] + model_context.estimate_tokens(turn_content))
+
+    logger.debug(f"[HISTORY] Rendered {len(turns) - reused} new turns, reused {reused} cached turns")
+    rendered = _RenderedTurns(signatures, contents, prefix_tokens, estimate_factor)
+    if cache_key is not None:
+        with _history_render_cache_lock:
+            _history_render_cache[cache_key] = rendered
+            _history_render_cache.move_to_end(cache_key)
+            while len(_history_render_cache) > HISTORY_RENDER_CACHE_SIZE:
+                _history_render_cache.popitem(last=False)
+    return rendered
+
+
+def clear_history_render_cache() -> None:
+    """Drop all cached turn renderings"""
+    with _history_render_cache_lock:
+        _history_render_cache.clear()
+
+
 def _get_tool_formatted_content(turn: ConversationTurn) -> list[str]:
     """
     Get tool-specific formatting for a conversation turn.
@@ -0,0 +1,327 @@
+"""
+Process-wide index of directory listings used by expand_paths
+
+Workflow tools (analyze, codereview, refactor, secaudit, ...) pass the same
+project directories in relevant_files step after step, and every step expands
+them again. This index remembers the classified listing of each directory so
+an unchanged tree is not re-listed.
+
+Listings are stored per directory and per extension set, and are validated
+before reuse:
+
+- "mtime" (default): a listing is reused while the directory's modification
+  time is unchanged. Creating, deleting or renaming an entry updates the
+  directory mtime; editing a file's content does not, and does not need to.
+  Listings taken within the filesystem timestamp granularity of a change
+  ("racy" listings) are always re-validated by listing the directory again.
+- "inotify" (Linux only): directories are watched with inotify and listings
+  are dropped when an event arrives, so reuse costs no system calls at all.
+  Directories that cannot be watched (e.g. max_user_watches reached) fall
+  back to mtime validation.
+- "off": no indexing.
+
+Configured by DIRECTORY_INDEX_MODE and DIRECTORY_INDEX_MAX_DIRS (LRU bound on
+the number of indexed directory listings, default 50000).
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+INDEX_MODES = ("mtime", "inotify", "off")
+
+# Listings taken less than this long after the directory's last modification
+# are not trusted on mtime alone (covers 1-2 s timestamp filesystems)
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class _IndexedListing(NamedTuple):
+    value: Any
+    mtime_ns: int
+    scanned_at_ns: int
+    watched: bool
+
+
+class _InotifyWatcher:
+    """Minimal inotify binding (via ctypes) that reports changed directories
+
+    Args:
+        on_change: Called from the watcher thread with the changed directory,
+            or None when events were lost and everything must be invalidated
+    """
+
+    # inotify(7) event masks
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+
+    # Listings only depend on which entries exist, so content changes are not watched
+    WATCH_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, on_change: Callable[[Optional[str]], None]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._dirs_by_wd: dict[int, str] = {}
+        self._wds_by_dir: dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="directory-index-inotify", daemon=True)
+        self._thread.start()
+
+    @property
+    def watch_count(self) -> int:
+        with self._lock:
+            return len(self._wds_by_dir)
+
+    def watch(self, directory: str) -> bool:
+        """Start watching directory; returns False if the kernel refused the watch"""
+        with self._lock:
+            if directory in self._wds_by_dir:
+                return True
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+            if wd < 0:
+                logger.debug(f"inotify watch failed for {directory}: {os.strerror(ctypes.get_errno())}")
+                return False
+            self._dirs_by_wd[wd] = directory
+            self._wds_by_dir[directory] = wd
+            return True
+
+    def unwatch(self, directory: str) -> None:
+        with self._lock:
+            wd = self._wds_by_dir.pop(directory, None)
+            if wd is not None:
+                self._dirs_by_wd.pop(wd, None)
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+        os.close(self._fd)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([self._fd], [], [], 0.5)
+                if not readable:
+                    continue
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                logger.warning(f"inotify watcher stopped: {e}")
+                self._on_change(None)
+                return
+            self._dispatch(data)
+
+    def _dispatch(self, data: bytes) -> None:
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _, name_length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size + name_length
+            if mask & self.IN_Q_OVERFLOW:
+                self._on_change(None)
+                continue
+            with self._lock:
+                directory = self._dirs_by_wd.get(wd)
+                if directory is not None and mask & (self.IN_IGNORED | self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                    # The watch is gone (or now tracks a different path)
+                    self._dirs_by_wd.pop(wd, None)
+                    self._wds_by_dir.pop(directory, None)
+                    if not mask & self.IN_IGNORED:
+                        self._libc.inotify_rm_watch(self._fd, wd)
+            if directory is not None:
+                self._on_change(directory)
+
+
+class DirectoryIndex:
+    """LRU of per-directory listings validated by mtime or inotify
+
+    Args:
+        mode: "mtime", "inotify" or "off"
+        max_dirs: Maximum number of indexed listings
+    """
+
+    def __init__(self, mode: str = "mtime", max_dirs: int = 50_000):
+        self.max_dirs = max_dirs
+        self._entries: OrderedDict[tuple[str, Hashable], _IndexedListing] = OrderedDict()
+        self._keys_by_dir: dict[str, set[Hashable]] = {}
+        # Bumped on every inotify event so listings that raced with a change are not trusted
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+        self._watcher: Optional[_InotifyWatcher] = None
+
+        if mode == "inotify":
+            try:
+                self._watcher = _InotifyWatcher(self._on_directory_changed)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify directory index unavailable ({e}), using mtime validation")
+                mode = "mtime"
+        self.mode = mode
+
+    def get_or_load(self, directory: str, key: Hashable, loader: Callable[[], T]) -> T:
+        """
+        Return the indexed listing for (directory, key), calling loader() to list it when
+        missing or stale. Errors raised by loader propagate and nothing is indexed.
+        """
+        if self.mode == "off" or self.max_dirs <= 0:
+            return loader()
+
+        index_key = (directory, key)
+        with self._lock:
+            entry = self._entries.get(index_key)
+        if entry is not None and self._is_valid(directory, entry):
+            with self._lock:
+                if index_key in self._entries:
+                    self._entries.move_to_end(index_key)
+                self._hits += 1
+            return entry.value
+
+        # Watch and stat before listing so a change made while listing invalidates the result
+        watched = self._watcher is not None and self._watcher.watch(directory)
+        with self._lock:
+            self._misses += 1
+            generation = self._generations.get(directory, 0)
+        mtime_ns = os.stat(directory).st_mtime_ns
+        scanned_at_ns = time.time_ns()
+        value = loader()
+
+        with self._lock:
+            watched = watched and self._generations.get(directory, 0) == generation
+            self._entries[index_key] = _IndexedListing(value, mtime_ns, scanned_at_ns, watched)
+            self._entries.move_to_end(index_key)
+            self._keys_by_dir.setdefault(directory, set()).add(key)
+            unwatch = []
+            while len(self._entries) > self.max_dirs:
+                (evicted_dir, evicted_key), _ = self._entries.popitem(last=False)
+                self._evictions += 1
+                if self._forget_key(evicted_dir, evicted_key):
+                    unwatch.append(evicted_dir)
+        for evicted_dir in unwatch:
+            self._watcher.unwatch(evicted_dir)
+        return value
+
+    def invalidate(self, directory: Optional[str] = None) -> None:
+        """Drop the listings of one directory, or of all directories when None"""
+        with self._lock:
+            if directory is None:
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+                self._keys_by_dir.clear()
+                self._generations.clear()
+                return
+            self._generations[directory] = self._generations.get(directory, 0) + 1
+            for key in self._keys_by_dir.pop(directory, ()):
+                if self._entries.pop((directory, key), None) is not None:
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all listings (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_dir.clear()
+            self._generations.clear()
+
+    def shutdown(self) -> None:
+        """Stop the inotify watcher (if any) and fall back to mtime validation"""
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+            self.mode = "mtime"
+            with self._lock:
+                self._entries = OrderedDict(
+                    (key, entry._replace(watched=False)) for key, entry in self._entries.items()
+                )
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return mode, entries, max_dirs, hits, misses, hit_rate, invalidations, evictions and watches"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "mode": self.mode,
+                "entries": len(self._entries),
+                "max_dirs": self.max_dirs,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+            }
+        stats["watches"] = self._watcher.watch_count if self._watcher is not None else 0
+        return stats
+
+    def _is_valid(self, directory: str, entry: _IndexedListing) -> bool:
+        if entry.watched:
+            return True
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return False
+        return mtime_ns == entry.mtime_ns and entry.mtime_ns < entry.scanned_at_ns - RACY_WINDOW_NS
+
+    def _forget_key(self, directory: str, key: Hashable) -> bool:
+        """Remove key from the per-directory bookkeeping; True if the directory has no listings left"""
+        keys = self._keys_by_dir.get(directory)
+        if keys is None:
+            return False
+        keys.discard(key)
+        if keys:
+            return False
+        del self._keys_by_dir[directory]
+        self._generations.pop(directory, None)
+        return self._watcher is not None
+
+    def _on_directory_changed(self, directory: Optional[str]) -> None:
+        self.invalidate(directory)
+
+
+_index_instance: Optional[DirectoryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_directory_index() -> DirectoryIndex:
+    """Get the process-wide directory index (configured by DIRECTORY_INDEX_MODE / DIRECTORY_INDEX_MAX_DIRS)"""
+    global _index_instance
+    if _index_instance is None:
+        with _index_lock:
+            if _index_instance is None:
+                mode = os.getenv("DIRECTORY_INDEX_MODE", "mtime").strip().lower()
+                if mode not in INDEX_MODES:
+                    logger.warning(f"Invalid DIRECTORY_INDEX_MODE '{mode}', using 'mtime'")
+                    mode = "mtime"
+                try:
+                    max_dirs = max(0, int(os.getenv("DIRECTORY_INDEX_MAX_DIRS", "50000")))
+                except ValueError:
+                    logger.warning("Invalid DIRECTORY_INDEX_MAX_DIRS value, using default of 50000")
+                    max_dirs = 50_000
+                _index_instance = DirectoryIndex(mode, max_dirs)
+    return _index_instance
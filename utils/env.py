@@ -0,0 +1,43 @@
+"""
+Numeric settings read from environment variables
+
+Invalid or negative values are logged and replaced by the default, so a typo in a
+tuning variable never prevents the server from starting.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name: str, default: int) -> int:
+    """Read a non-negative integer setting, falling back to default on invalid values"""
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw}'), using default of {default}")
+        return default
+    if value < 0:
+        logger.warning(f"Invalid {name} value ({value}), using default of {default}")
+        return default
+    return value
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a non-negative float setting, falling back to default on invalid values"""
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw}'), using default of {default}")
+        return default
+    if value < 0:
+        logger.warning(f"Invalid {name} value ({value}), using default of {default}")
+        return default
+    return value
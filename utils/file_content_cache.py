@@ -0,0 +1,126 @@
+"""
+Process-wide cache of formatted file contents
+
+read_file_content() is called for the same files over and over: by
+build_conversation_history on every continuation, by tools preparing file
+content for prompts, and by workflows embedding files for expert analysis.
+This cache keeps the formatted (line-numbered, delimited) text and its token
+estimate so an unchanged file is not re-read and re-formatted.
+
+Entries are keyed by the requested path and line-number flag, and are only
+served while the file's resolved path, modification time (ns) and size match
+the values recorded when it was read. The cache is an LRU bounded by the
+approximate memory used by the formatted text (FILE_CONTENT_CACHE_MB, default
+64 MB; 0 disables caching).
+"""
+
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FileStamp(NamedTuple):
+    """Identity of a file's on-disk content"""
+
+    resolved_path: str
+    mtime_ns: int
+    size: int
+
+
+class _CachedFile(NamedTuple):
+    stamp: FileStamp
+    content: str
+    tokens: int
+    size: int
+
+
+class FileContentCache:
+    """Byte-budgeted LRU of formatted file contents
+
+    Args:
+        max_bytes: Approximate memory budget for cached content; 0 disables the cache
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, bool], _CachedFile] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, file_path: str, line_numbers: bool, stamp: FileStamp) -> Optional[tuple[str, int]]:
+        """Return (formatted_content, tokens) if cached for this exact file state"""
+        if not self.max_bytes:
+            return None
+        key = (file_path, line_numbers)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stamp != stamp:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.content, entry.tokens
+
+    def put(self, file_path: str, line_numbers: bool, stamp: FileStamp, content: str, tokens: int) -> None:
+        """Remember formatted content for a file state, replacing any older entry for the same file"""
+        size = sys.getsizeof(content)
+        if not self.max_bytes or size > self.max_bytes:
+            return
+        key = (file_path, line_numbers)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = _CachedFile(stamp, content, tokens, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached contents (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return entries, bytes, max_bytes, hits, misses, hit_rate and evictions"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+
+_cache_instance: Optional[FileContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_file_content_cache() -> FileContentCache:
+    """Get the process-wide file content cache (configured by FILE_CONTENT_CACHE_MB)"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                try:
+                    max_mb = max(0, int(os.getenv("FILE_CONTENT_CACHE_MB", "64")))
+                except ValueError:
+                    logger.warning("Invalid FILE_CONTENT_CACHE_MB value, using default of 64")
+                    max_mb = 64
+                _cache_instance = FileContentCache(max_mb * 1024 * 1024)
+    return _cache_instance
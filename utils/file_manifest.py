@@ -0,0 +1,146 @@
+"""
+Request-scoped file manifest
+
+A single tool call looks at the same files several times: the MCP boundary
+check in server.handle_call_tool sizes them, conversation reconstruction plans
+which historical files fit (_plan_file_inclusion_by_size), and the tool expands
+and reads them (filter_new_files / expand_paths / read_files). Without sharing,
+directory-heavy requests pay for two or three full tree walks and repeated
+stat calls.
+
+The server opens a manifest for every tool call:
+
+    with file_manifest_scope():
+        ...
+
+While it is active, expand_paths, file stats, token estimates and inclusion
+plans are computed once and reused by every later stage of the call. The
+manifest lives in a ContextVar, so it follows the call into asyncio tasks and
+asyncio.to_thread, but not into plain executor threads: code that fans out to
+a ThreadPoolExecutor captures get_file_manifest() first and passes it along.
+Outside a scope (unit tests, scripts) nothing is memoized and every call hits
+the filesystem as before.
+
+Entries are never invalidated: a manifest only lives for one request, and a
+file changing while that request is being prepared is indistinguishable from
+it changing just afterwards. Reads still stat the file themselves, so embedded
+content is always the current content.
+"""
+
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_current_manifest: ContextVar[Optional["FileManifest"]] = ContextVar("file_manifest", default=None)
+
+
+class FileManifest:
+    """Memoized path expansions, stats, token estimates and inclusion plans for one request"""
+
+    def __init__(self):
+        self._expansions: dict[tuple, list[str]] = {}
+        self._stats: dict[str, Optional[os.stat_result]] = {}
+        self._estimates: dict[tuple[str, Optional[str]], int] = {}
+        self._plans: dict[tuple, tuple[list[str], list[str], int]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def expand(self, paths: Iterable[str], extensions: Iterable[str], compute: Callable[[], list[str]]) -> list[str]:
+        """Return the expansion of paths for extensions, computing it on first use"""
+        key = (tuple(paths), frozenset(extensions))
+        return list(self._memoize(self._expansions, key, compute))
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        """Return os.stat(path), or None if the path cannot be stat'ed"""
+        return self._memoize(self._stats, path, lambda: _stat_or_none(path))
+
+    def estimate(self, path: str, model_name: Optional[str], compute: Callable[[], int]) -> int:
+        """Return the token estimate of path for model_name, computing it on first use"""
+        return self._memoize(self._estimates, (path, model_name), compute)
+
+    def plan(
+        self,
+        files: Iterable[str],
+        budget: int,
+        model_name: Optional[str],
+        compute: Callable[[], tuple[list[str], list[str], int]],
+    ) -> tuple[list[str], list[str], int]:
+        """Return the (included, skipped, tokens) inclusion plan of files within budget"""
+        included, skipped, tokens = self._memoize(self._plans, (tuple(files), budget, model_name), compute)
+        return list(included), list(skipped), tokens
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return entry counts per kind plus memo hits and misses"""
+        with self._lock:
+            return {
+                "expansions": len(self._expansions),
+                "stats": len(self._stats),
+                "estimates": len(self._estimates),
+                "plans": len(self._plans),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    def _memoize(self, table: dict, key: Any, compute: Callable[[], T]) -> T:
+        with self._lock:
+            if key in table:
+                self._hits += 1
+                return table[key]
+            self._misses += 1
+        # Computed outside the lock: a racing thread may compute the same value, which is harmless
+        value = compute()
+        with self._lock:
+            return table.setdefault(key, value)
+
+
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def get_file_manifest() -> Optional[FileManifest]:
+    """Return the manifest of the current request, if any"""
+    return _current_manifest.get()
+
+
+@contextmanager
+def file_manifest_scope() -> Iterator[FileManifest]:
+    """Share file expansions, stats and estimates for the duration of one request
+
+    Nested scopes reuse the outer manifest.
+    """
+    manifest = _current_manifest.get()
+    if manifest is not None:
+        yield manifest
+        return
+    manifest = FileManifest()
+    token = _current_manifest.set(manifest)
+    try:
+        yield manifest
+    finally:
+        _current_manifest.reset(token)
+
+
+def stat_path(path: str, manifest: Optional[FileManifest] = None) -> Optional[os.stat_result]:
+    """
+    Stat path through the request's manifest when one is active.
+
+    Args:
+        path: Path to stat
+        manifest: Manifest to use instead of the current one (for executor threads)
+
+    Returns:
+        The stat result, or None if the path does not exist or cannot be accessed
+    """
+    manifest = manifest or get_file_manifest()
+    if manifest is None:
+        return _stat_or_none(path)
+    return manifest.stat(path)
@@ -37,13 +37,21 @@ multi-turn file handling:
    - Error handling preserves conversation flow when files become unavailable
 """
 
+import functools
 import json
 import logging
 import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
 
+from .directory_index import get_directory_index
+from .file_content_cache import FileStamp, get_file_content_cache
+from .file_manifest import FileManifest, get_file_manifest, stat_path
 from .file_types import BINARY_EXTENSIONS, CODE_EXTENSIONS, IMAGE_EXTENSIONS, TEXT_EXTENSIONS
+from .gitignore import GitIgnoreRule, inherited_rules, is_ignored, load_gitignore
 from .security_config import EXCLUDED_DIRS, is_dangerous_path
 from .token_utils import DEFAULT_CONTEXT_WINDOW, estimate_tokens
 
@@ -97,8 +105,7 @@ def is_mcp_directory(path: Path) -> bool:
         return False
 
     # Get the directory where the MCP server is running from
-    # __file__ is utils/file_utils.py, so parent.parent is the MCP root
-    mcp_server_dir = Path(__file__).parent.parent.resolve()
+    mcp_server_dir = _get_mcp_server_dir()
 
     # Check if the given path is the MCP server directory or a subdirectory
     try:
@@ -328,8 +335,10 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
     Expand paths to individual files, handling both files and directories.
 
     This function recursively walks directories to find all matching files.
-    It automatically filters out hidden files and common non-code directories
-    like __pycache__ to avoid including generated or system files.
+    It automatically filters out hidden files, common non-code directories
+    like __pycache__, and anything excluded by the project's .gitignore files
+    (see EXPAND_PATHS_RESPECT_GITIGNORE) to avoid including generated or
+    system files.
 
     Args:
         paths: List of file or directory paths (must be absolute)
@@ -341,8 +350,19 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
     if extensions is None:
         extensions = CODE_EXTENSIONS
 
+    # Within a request the boundary check, history planning and embedding expand the same paths
+    manifest = get_file_manifest()
+    if manifest is not None:
+        return manifest.expand(paths, extensions, lambda: _expand_paths(paths, extensions))
+    return _expand_paths(paths, extensions)
+
+
+def _expand_paths(paths: list[str], extensions: set[str]) -> list[str]:
     expanded_files = []
     seen = set()
+    # Directories already walked during this call; overlapping roots (e.g. a
+    # project and one of its subdirectories) are only traversed once
+    walked_dirs: set[str] = set()
 
     for path in paths:
         try:
@@ -377,39 +397,11 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
 
         elif path_obj.is_dir():
             # Walk directory recursively to find all files
-            for root, dirs, files in os.walk(path_obj):
-                # Filter directories in-place to skip hidden and excluded directories
-                # This prevents descending into .git, .venv, __pycache__, node_modules, etc.
-                original_dirs = dirs[:]
-                dirs[:] = []
-                for d in original_dirs:
-                    # Skip hidden directories
-                    if d.startswith("."):
-                        continue
-                    # Skip excluded directories
-                    if d in EXCLUDED_DIRS:
-                        continue
-                    # Skip MCP directories found during traversal
-                    dir_path = Path(root) / d
-                    if is_mcp_directory(dir_path):
-                        logger.debug(f"Skipping MCP directory during traversal: {dir_path}")
-                        continue
-                    dirs.append(d)
-
-                for file in files:
-                    # Skip hidden files (e.g., .DS_Store, .gitignore)
-                    if file.startswith("."):
-                        continue
-
-                    file_path = Path(root) / file
-
-                    # Filter by extension if specified
-                    if not extensions or file_path.suffix.lower() in extensions:
-                        full_path = str(file_path)
-                        # Use set to prevent duplicates
-                        if full_path not in seen:
-                            expanded_files.append(full_path)
-                            seen.add(full_path)
+            for full_path in _walk_directory(str(path_obj), extensions, walked_dirs):
+                # Use set to prevent duplicates
+                if full_path not in seen:
+                    expanded_files.append(full_path)
+                    seen.add(full_path)
 
     # Sort for consistent ordering across different runs
     # This makes output predictable and easier to debug
@@ -417,6 +409,169 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
     return expanded_files
 
 
+# Directory expansion settings. Parallel traversal only pays off on very large
+# trees (monorepos, network filesystems), so expansion is sequential by default.
+EXPAND_PATHS_RESPECT_GITIGNORE = os.getenv("EXPAND_PATHS_RESPECT_GITIGNORE", "true").lower() in ("true", "1", "yes")
+try:
+    EXPAND_PATHS_WORKERS = max(1, int(os.getenv("EXPAND_PATHS_WORKERS", "1")))
+except ValueError:
+    EXPAND_PATHS_WORKERS = 1
+_walk_executor: Optional[ThreadPoolExecutor] = None
+_walk_executor_lock = threading.Lock()
+
+
+def _get_walk_executor() -> ThreadPoolExecutor:
+    global _walk_executor
+    if _walk_executor is None:
+        with _walk_executor_lock:
+            if _walk_executor is None:
+                _walk_executor = ThreadPoolExecutor(max_workers=EXPAND_PATHS_WORKERS, thread_name_prefix="expand-paths")
+    return _walk_executor
+
+
+@functools.lru_cache(maxsize=1)
+def _get_mcp_server_dir() -> Path:
+    """Resolved directory the MCP server runs from (utils/file_utils.py -> project root)"""
+    return Path(__file__).parent.parent.resolve()
+
+
+class _DirectoryListing(NamedTuple):
+    """Classified contents of one directory, before .gitignore rules are applied"""
+
+    files: tuple[str, ...]
+    subdirs: tuple[str, ...]
+    has_gitignore: bool
+
+
+def _list_directory(directory: str, extensions: Optional[frozenset[str]], mcp_dir: str) -> _DirectoryListing:
+    """
+    List and classify a single directory with os.scandir.
+
+    Uses the DirEntry type information cached by os.scandir, so classifying an
+    entry normally costs no extra system calls. Mirrors os.walk(followlinks=False):
+    symlinked directories are not descended into, and anything that is not a
+    directory is treated as a file.
+
+    Raises:
+        OSError: If the directory cannot be listed
+    """
+    files = []
+    subdirs = []
+    has_gitignore = False
+    mcp_prefix = mcp_dir + os.sep
+
+    with os.scandir(directory) as iterator:
+        for entry in iterator:
+            name = entry.name
+            # Skip hidden files and directories (.git, .venv, .DS_Store, .gitignore, ...)
+            if name.startswith("."):
+                has_gitignore = has_gitignore or name == ".gitignore"
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+
+            if is_dir:
+                if name in EXCLUDED_DIRS or entry.is_symlink():
+                    continue
+                # The walk starts from a resolved path and never follows symlinks,
+                # so entry.path is already canonical and a prefix test is enough
+                if entry.path == mcp_dir or entry.path.startswith(mcp_prefix):
+                    logger.debug(f"Skipping MCP directory during traversal: {entry.path}")
+                    continue
+                subdirs.append(entry.path)
+            else:
+                if extensions:
+                    suffix = os.path.splitext(name)[1].lower()
+                    if suffix not in extensions:
+                        continue
+                files.append(entry.path)
+
+    return _DirectoryListing(tuple(files), tuple(subdirs), has_gitignore)
+
+
+def _scan_directory(
+    directory: str, rules: list[GitIgnoreRule], extensions: Optional[set[str]]
+) -> tuple[list[str], list[tuple[str, list[GitIgnoreRule]]]]:
+    """
+    Classify a single directory for expand_paths.
+
+    The listing comes from the directory index, so directories that have not
+    changed since a previous expansion are not listed again; .gitignore rules
+    are applied on every call.
+
+    Args:
+        directory: Resolved directory path
+        rules: .gitignore rules inherited from parent directories
+        extensions: File extensions to include (empty/None includes all)
+
+    Returns:
+        Tuple of (matching file paths, [(subdirectory path, rules for that subdirectory)])
+    """
+    extension_key = frozenset(extensions) if extensions else None
+    mcp_dir = str(_get_mcp_server_dir())
+    try:
+        listing = get_directory_index().get_or_load(
+            directory, (extension_key, mcp_dir), lambda: _list_directory(directory, extension_key, mcp_dir)
+        )
+    except OSError as e:
+        logger.debug(f"Cannot list directory {directory}: {e}")
+        return [], []
+
+    if EXPAND_PATHS_RESPECT_GITIGNORE and listing.has_gitignore:
+        rules = rules + load_gitignore(directory)
+    if not rules:
+        return list(listing.files), [(subdir, rules) for subdir in listing.subdirs]
+
+    files = [path for path in listing.files if not is_ignored(rules, path, False)]
+    subdirs = [(path, rules) for path in listing.subdirs if not is_ignored(rules, path, True)]
+    return files, subdirs
+
+
+def _walk_directory(root: str, extensions: Optional[set[str]], walked_dirs: set[str]) -> list[str]:
+    """
+    Recursively collect files below root, skipping directories in walked_dirs.
+
+    Each directory is classified once (hidden, excluded, MCP, gitignored) when
+    its parent is listed; the decision is recorded in walked_dirs so a later
+    root of the same expand_paths call does not walk it again. With
+    EXPAND_PATHS_WORKERS > 1 each level of the tree is listed concurrently on
+    a bounded thread pool.
+
+    Args:
+        root: Resolved directory to walk
+        extensions: File extensions to include
+        walked_dirs: Directories already walked (updated in place)
+
+    Returns:
+        Unsorted list of matching file paths
+    """
+    if root in walked_dirs:
+        return []
+    walked_dirs.add(root)
+
+    rules = inherited_rules(root) if EXPAND_PATHS_RESPECT_GITIGNORE else []
+    files: list[str] = []
+    pending = [(root, rules)]
+    while pending:
+        if EXPAND_PATHS_WORKERS > 1 and len(pending) > 1:
+            results = list(
+                _get_walk_executor().map(lambda item: _scan_directory(item[0], item[1], extensions), pending)
+            )
+        else:
+            results = [_scan_directory(directory, dir_rules, extensions) for directory, dir_rules in pending]
+
+        pending = []
+        for dir_files, subdirs in results:
+            files.extend(dir_files)
+            for subdir in subdirs:
+                if subdir[0] not in walked_dirs:
+                    walked_dirs.add(subdir[0])
+                    pending.append(subdir)
+    return files
+
+
 def read_file_content(
     file_path: str, max_size: int = 1_000_000, *, include_line_numbers: Optional[bool] = None
 ) -> tuple[str, int]:
@@ -427,6 +582,9 @@ def read_file_content(
     returns formatted content, even for errors. This ensures the AI model
     gets context about what files were attempted but couldn't be read.
 
+    Formatted content is cached process-wide (see utils.file_content_cache) and
+    reused while the file's modification time and size are unchanged.
+
     Args:
         file_path: Path to file (must be absolute)
         max_size: Maximum file size to read (default 1MB to prevent memory issues)
@@ -451,19 +609,23 @@ def read_file_content(
         return content, tokens
 
     try:
-        # Validate file existence and type
-        if not path.exists():
+        # Validate file existence and type (a single stat also provides the cache stamp)
+        try:
+            file_stat = path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            file_stat = None
+        if file_stat is None:
             logger.debug(f"[FILES] File does not exist: {file_path}")
             content = f"\n--- FILE NOT FOUND: {file_path} ---\nError: File does not exist\n--- END FILE ---\n"
             return content, estimate_tokens(content)
 
-        if not path.is_file():
+        if not stat.S_ISREG(file_stat.st_mode):
             logger.debug(f"[FILES] Path is not a file: {file_path}")
             content = f"\n--- NOT A FILE: {file_path} ---\nError: Path is not a file\n--- END FILE ---\n"
             return content, estimate_tokens(content)
 
         # Check file size to prevent memory exhaustion
-        file_size = path.stat().st_size
+        file_size = file_stat.st_size
         logger.debug(f"[FILES] File size for {file_path}: {file_size:,} bytes")
         if file_size > max_size:
             logger.debug(f"[FILES] File too large: {file_path} ({file_size:,} > {max_size:,} bytes)")
@@ -474,6 +636,14 @@ def read_file_content(
         add_line_numbers = should_add_line_numbers(file_path, include_line_numbers)
         logger.debug(f"[FILES] Line numbers for {file_path}: {'enabled' if add_line_numbers else 'disabled'}")
 
+        # Reuse the formatted content if the file has not changed since it was last read
+        cache = get_file_content_cache()
+        stamp = FileStamp(str(path), file_stat.st_mtime_ns, file_size)
+        cached = cache.get(file_path, add_line_numbers, stamp)
+        if cached is not None:
+            logger.debug(f"[FILES] Using cached content for {file_path}: {cached[1]} tokens")
+            return cached
+
         # Read the file with UTF-8 encoding, replacing invalid characters
         # This ensures we can handle files with mixed encodings
         logger.debug(f"[FILES] Reading file content for {file_path}")
@@ -498,6 +668,7 @@ def read_file_content(
         formatted = f"\n--- BEGIN FILE: {file_path} ---\n{file_content}\n--- END FILE: {file_path} ---\n"
         tokens = estimate_tokens(formatted)
         logger.debug(f"[FILES] Formatted content for {file_path}: {len(formatted)} chars, {tokens} tokens")
+        cache.put(file_path, add_line_numbers, stamp, formatted, tokens)
         return formatted, tokens
 
     except Exception as e:
@@ -521,8 +692,9 @@ def read_files(
 
     This function implements intelligent token budgeting to maximize the amount
     of relevant content that can be included in an AI prompt while staying
-    within token limits. It prioritizes direct code and reads files until
-    the token budget is exhausted.
+    within token limits. It prioritizes direct code, plans which files fit from
+    their sizes, and reads the planned files concurrently. Output keeps the
+    sorted order of the expanded paths.
 
     Args:
         file_paths: List of file or directory paths (absolute paths required)
@@ -571,28 +743,11 @@ def read_files(
             logger.debug("[FILES] No files found from provided paths")
             content_parts.append(f"\n--- NO FILES FOUND ---\nProvided paths: {', '.join(file_paths)}\n--- END ---\n")
         else:
-            # Read files sequentially until token limit is reached
-            logger.debug(f"[FILES] Reading {len(all_files)} files with token budget {available_tokens:,}")
-            for i, file_path in enumerate(all_files):
-                if total_tokens >= available_tokens:
-                    logger.debug(f"[FILES] Token budget exhausted, skipping remaining {len(all_files) - i} files")
-                    files_skipped.extend(all_files[i:])
-                    break
-
-                file_content, file_tokens = read_file_content(file_path, include_line_numbers=include_line_numbers)
-                logger.debug(f"[FILES] File {file_path}: {file_tokens:,} tokens")
-
-                # Check if adding this file would exceed limit
-                if total_tokens + file_tokens <= available_tokens:
-                    content_parts.append(file_content)
-                    total_tokens += file_tokens
-                    logger.debug(f"[FILES] Added file {file_path}, total tokens: {total_tokens:,}")
-                else:
-                    # File too large for remaining budget
-                    logger.debug(
-                        f"[FILES] File {file_path} too large for remaining budget ({file_tokens:,} tokens, {available_tokens - total_tokens:,} remaining)"
-                    )
-                    files_skipped.append(file_path)
+            file_parts, file_tokens, files_skipped = _read_files_within_budget(
+                all_files, available_tokens - total_tokens, include_line_numbers
+            )
+            content_parts.extend(file_parts)
+            total_tokens += file_tokens
 
     # Add informative note about skipped files to help users understand
     # what was omitted and why
@@ -613,33 +768,155 @@ def read_files(
     return result
 
 
-def estimate_file_tokens(file_path: str) -> int:
+# Shared pool for concurrent file reads; reads are I/O bound, so a few threads hide
+# filesystem latency (network filesystems, cold caches) without competing for the GIL
+try:
+    FILE_READ_WORKERS = max(1, int(os.getenv("FILE_READ_WORKERS", "8")))
+except ValueError:
+    FILE_READ_WORKERS = 8
+_read_executor: Optional[ThreadPoolExecutor] = None
+_read_executor_lock = threading.Lock()
+
+
+def _get_read_executor() -> ThreadPoolExecutor:
+    global _read_executor
+    if _read_executor is None:
+        with _read_executor_lock:
+            if _read_executor is None:
+                _read_executor = ThreadPoolExecutor(max_workers=FILE_READ_WORKERS, thread_name_prefix="file-read")
+    return _read_executor
+
+
+def _estimate_planned_tokens(file_path: str, max_size: int = 1_000_000, manifest: Optional[FileManifest] = None) -> int:
+    """Size-based token estimate used to plan reads (0 when the file cannot be stat'ed)
+
+    Files over max_size are read as a short "FILE TOO LARGE" notice, so they are
+    planned at no cost just like unreadable paths.
+    """
+    file_stat = stat_path(file_path, manifest)
+    if file_stat is None:
+        return 0
+    file_size = file_stat.st_size
+    if file_size > max_size:
+        return 0
+    from .file_types import get_token_estimation_ratio
+
+    return int(file_size / get_token_estimation_ratio(file_path))
+
+
+def _read_files_within_budget(
+    all_files: list[str], available_tokens: int, include_line_numbers: bool
+) -> tuple[list[str], int, list[str]]:
+    """
+    Read as many files as fit in the token budget, concurrently, in deterministic order.
+
+    The files expected to fit are planned from file sizes and type-specific token ratios
+    (the same estimate as estimate_file_tokens) and read in parallel up front. Inclusion
+    itself is then decided exactly as a sequential read would: walking the files in order
+    with the real token counts from read_file_content, skipping a file that does not fit in
+    what is left and stopping once the budget is exhausted. Files the plan left out are
+    read on demand during that walk, so a size estimate that is off in either direction
+    never changes which files are included or reported as skipped.
+
+    Returns:
+        Tuple of (formatted file contents in order, tokens used, skipped file paths in order)
+    """
+    # Executor threads do not inherit the request's context, so the manifest is passed explicitly
+    manifest = get_file_manifest()
+    if len(all_files) > 1 and FILE_READ_WORKERS > 1:
+        estimates = list(
+            _get_read_executor().map(
+                lambda file_path: _estimate_planned_tokens(file_path, manifest=manifest), all_files
+            )
+        )
+    else:
+        estimates = [_estimate_planned_tokens(file_path, manifest=manifest) for file_path in all_files]
+
+    planned: list[int] = []
+    planned_tokens = 0
+    for i, estimate in enumerate(estimates):
+        if planned_tokens >= available_tokens:
+            break
+        if planned_tokens + estimate <= available_tokens:
+            planned.append(i)
+            planned_tokens += estimate
+
+    def read(index: int) -> tuple[str, int]:
+        return read_file_content(all_files[index], include_line_numbers=include_line_numbers)
+
+    logger.debug(f"[FILES] Prefetching {len(planned)} of {len(all_files)} files with token budget {available_tokens:,}")
+    if len(planned) > 1 and FILE_READ_WORKERS > 1:
+        prefetched = dict(zip(planned, _get_read_executor().map(read, planned)))
+    else:
+        prefetched = {index: read(index) for index in planned}
+
+    parts = []
+    skipped = []
+    total_tokens = 0
+    for i, file_path in enumerate(all_files):
+        if total_tokens >= available_tokens:
+            logger.debug(f"[FILES] Token budget exhausted, skipping remaining {len(all_files) - i} files")
+            skipped.extend(all_files[i:])
+            break
+
+        file_content, file_tokens = prefetched[i] if i in prefetched else read(i)
+        if total_tokens + file_tokens <= available_tokens:
+            parts.append(file_content)
+            total_tokens += file_tokens
+            logger.debug(f"[FILES] Added file {file_path}, total tokens: {total_tokens:,}")
+        else:
+            logger.debug(
+                f"[FILES] File {file_path} too large for remaining budget ({file_tokens:,} tokens, {available_tokens - total_tokens:,} remaining)"
+            )
+            skipped.append(file_path)
+
+    return parts, total_tokens, skipped
+
+
+def estimate_file_tokens(file_path: str, model_name: Optional[str] = None) -> int:
     """
     Estimate tokens for a file using file-type aware ratios.
 
     Args:
         file_path: Path to the file
+        model_name: Model the file is budgeted for; when given, the ratio is corrected
+            by the token calibration learned from that model's usage reports
 
     Returns:
         Estimated token count for the file
     """
+    manifest = get_file_manifest()
+    if manifest is not None:
+        return manifest.estimate(file_path, model_name, lambda: _estimate_file_tokens(file_path, model_name))
+    return _estimate_file_tokens(file_path, model_name)
+
+
+def _estimate_file_tokens(file_path: str, model_name: Optional[str]) -> int:
     try:
-        if not os.path.exists(file_path) or not os.path.isfile(file_path):
+        file_stat = stat_path(file_path)
+        if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
             return 0
 
-        file_size = os.path.getsize(file_path)
+        file_size = file_stat.st_size
 
         # Get the appropriate ratio for this file type
-        from .file_types import get_token_estimation_ratio
+        from .file_types import get_file_category, get_token_estimation_ratio
 
         ratio = get_token_estimation_ratio(file_path)
+        estimated = file_size / ratio
+        if model_name:
+            from .token_calibration import calibrate_estimate
+
+            estimated = calibrate_estimate(model_name, get_file_category(file_path), estimated)
 
-        return int(file_size / ratio)
+        return int(estimated)
     except Exception:
         return 0
 
 
-def check_files_size_limit(files: list[str], max_tokens: int, threshold_percent: float = 1.0) -> tuple[bool, int, int]:
+def check_files_size_limit(
+    files: list[str], max_tokens: int, threshold_percent: float = 1.0, model_name: Optional[str] = None
+) -> tuple[bool, int, int]:
     """
     Check if a list of files would exceed token limits.
 
@@ -647,6 +924,7 @@ def check_files_size_limit(files: list[str], max_tokens: int, threshold_percent:
         files: List of file paths to check
         max_tokens: Maximum allowed tokens
         threshold_percent: Percentage of max_tokens to use as threshold (0.0-1.0)
+        model_name: Model to apply token calibration for (see estimate_file_tokens)
 
     Returns:
         Tuple of (within_limit, total_estimated_tokens, file_count)
@@ -660,7 +938,7 @@ def check_files_size_limit(files: list[str], max_tokens: int, threshold_percent:
 
     for file_path in files:
         try:
-            estimated_tokens = estimate_file_tokens(file_path)
+            estimated_tokens = estimate_file_tokens(file_path, model_name)
             total_estimated_tokens += estimated_tokens
             if estimated_tokens > 0:  # Only count accessible files
                 file_count += 1
@@ -791,7 +1069,7 @@ def read_file_safely(file_path: str, max_size: int = 10 * 1024 * 1024) -> Option
         return None
 
 
-def check_total_file_size(files: list[str], model_name: str) -> Optional[dict]:
+def check_total_file_size(files: list[str], model_name: str, history_tokens: Optional[int] = None) -> Optional[dict]:
     """
     Check if total file sizes would exceed token threshold before embedding.
 
@@ -805,6 +1083,8 @@ def check_total_file_size(files: list[str], model_name: str) -> Optional[dict]:
     Args:
         files: List of file paths to check
         model_name: The resolved model name for context-aware thresholds (required)
+        history_tokens: Conversation history the request will embed, if known (0 for a new
+            conversation lets files use the room reserved for history)
 
     Returns:
         Dict with `code_too_large` response if too large, None if acceptable
@@ -821,10 +1101,10 @@ def check_total_file_size(files: list[str], model_name: str) -> Optional[dict]:
 
     logger.info(f"File size check: Using model '{model_name}' for token limit calculation")
 
-    from utils.model_context import ModelContext
+    from utils.model_context import ModelContext, TokenDemand
 
     model_context = ModelContext(model_name)
-    token_allocation = model_context.calculate_token_allocation()
+    token_allocation = model_context.calculate_token_allocation(demand=TokenDemand(history_tokens=history_tokens))
 
     # Dynamic threshold based on model capacity
     context_window = token_allocation.total_tokens
@@ -837,8 +1117,14 @@ def check_total_file_size(files: list[str], model_name: str) -> Optional[dict]:
 
     max_file_tokens = int(token_allocation.file_tokens * threshold_percent)
 
+    # Size what will actually be embedded: directories count as the files they expand to.
+    # Within a request the expansion and estimates are reused by the tool (see utils.file_manifest)
+    expanded_files = expand_paths(files)
+
     # Use centralized file size checking (threshold already applied to max_file_tokens)
-    within_limit, total_estimated_tokens, file_count = check_files_size_limit(files, max_file_tokens)
+    within_limit, total_estimated_tokens, file_count = check_files_size_limit(
+        expanded_files, max_file_tokens, model_name=model_name
+    )
 
     if not within_limit:
         return {
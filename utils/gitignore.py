@@ -0,0 +1,184 @@
+"""
+Minimal .gitignore matching for directory expansion
+
+Implements the subset of gitignore semantics that matters when deciding which
+project files to send to a model:
+
+- Blank lines and lines starting with "#" are ignored ("\\#" escapes a leading hash)
+- "!" negates a pattern ("\\!" escapes a leading exclamation mark)
+- A trailing "/" only matches directories
+- A pattern containing "/" (other than a trailing one) is anchored to the
+  directory of its .gitignore file; otherwise it matches at any depth
+- "*" and "?" do not match "/", "**" matches across directories, and
+  "[...]" character classes are supported
+- Rules from deeper .gitignore files, and later lines, take precedence
+
+Files inside an ignored directory are never re-included, which matches git
+because the walker does not descend into ignored directories.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class GitIgnoreRule(NamedTuple):
+    """One compiled pattern, relative to base_dir (a directory path ending in os.sep)"""
+
+    base_dir: str
+    regex: re.Pattern
+    negated: bool
+    directory_only: bool
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) into a regular expression"""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            if pattern.startswith("**/", i):
+                parts.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                parts.append(".*")
+                i += 2
+                continue
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) or pattern.startswith("[]", i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        elif char == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+def parse_gitignore(content: str, base_dir: str) -> list[GitIgnoreRule]:
+    """Compile the rules of a .gitignore file located in base_dir"""
+    if not base_dir.endswith(os.sep):
+        base_dir += os.sep
+    rules = []
+    for line in content.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith(("\\!", "\\#")):
+            line = line[1:]
+
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        anchored = "/" in line
+        line = line.lstrip("/")
+        regex = _translate(line)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        try:
+            rules.append(GitIgnoreRule(base_dir, re.compile(regex + r"\Z", re.DOTALL), negated, directory_only))
+        except re.error:
+            logger.debug(f"Ignoring invalid .gitignore pattern in {base_dir}: {line}")
+    return rules
+
+
+# Compiled rules per .gitignore path, reused while the file's (mtime_ns, size) is unchanged
+_GITIGNORE_CACHE_SIZE = 4096
+_gitignore_cache: dict[str, tuple[tuple[int, int], list[GitIgnoreRule]]] = {}
+_gitignore_cache_lock = threading.Lock()
+
+
+def load_gitignore(directory: str) -> list[GitIgnoreRule]:
+    """Read and compile directory/.gitignore (empty if missing or unreadable)"""
+    path = os.path.join(directory, ".gitignore")
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return []
+    stamp = (stat_result.st_mtime_ns, stat_result.st_size)
+    with _gitignore_cache_lock:
+        cached = _gitignore_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            rules = parse_gitignore(f.read(), directory)
+    except OSError:
+        return []
+    with _gitignore_cache_lock:
+        if len(_gitignore_cache) >= _GITIGNORE_CACHE_SIZE:
+            _gitignore_cache.clear()
+        _gitignore_cache[path] = (stamp, rules)
+    return rules
+
+
+def find_repository_root(directory: str) -> Optional[str]:
+    """Return the nearest directory at or above directory that contains .git"""
+    current = directory
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def inherited_rules(directory: str) -> list[GitIgnoreRule]:
+    """Rules from .gitignore files in the ancestors of directory, up to its repository root
+
+    Returns an empty list when directory is not inside a git repository. The
+    directory's own .gitignore is not included.
+    """
+    root = find_repository_root(os.path.dirname(directory))
+    if root is None:
+        return []
+    ancestors = []
+    current = os.path.dirname(directory)
+    while True:
+        ancestors.append(current)
+        if current == root:
+            break
+        current = os.path.dirname(current)
+    rules = []
+    for ancestor in reversed(ancestors):
+        rules.extend(load_gitignore(ancestor))
+    return rules
+
+
+def is_ignored(rules: list[GitIgnoreRule], path: str, is_dir: bool) -> bool:
+    """Whether path is ignored by rules (last matching rule wins)"""
+    for rule in reversed(rules):
+        if rule.directory_only and not is_dir:
+            continue
+        if not path.startswith(rule.base_dir):
+            continue
+        relative = path[len(rule.base_dir) :]
+        if os.sep != "/":
+            relative = relative.replace(os.sep, "/")
+        if rule.regex.match(relative):
+            return not rule.negated
+    return False
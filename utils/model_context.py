@@ -32,6 +32,8 @@ from typing import Any, Optional
 
 from config import DEFAULT_MODEL
 from providers import ModelCapabilities, ModelProviderRegistry
+from utils.token_calibration import PROMPT_CATEGORY, PROMPT_CHARS_PER_TOKEN, get_token_calibrator
+from utils.tokenizer import get_tokenizer_service
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +54,57 @@ class TokenAllocation:
         return self.content_tokens - self.file_tokens - self.history_tokens
 
 
+@dataclass
+class TokenDemand:
+    """
+    Known token requirements of a request, for demand-driven allocation.
+
+    A file or history demand of None means "as much as is available": such
+    categories share whatever room the known demands leave. An unknown
+    prompt_tokens keeps the static prompt reserve of the fixed-ratio split.
+    """
+
+    file_tokens: Optional[int] = None
+    history_tokens: Optional[int] = None
+    system_prompt_tokens: int = 0
+    prompt_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+
+def _water_fill(capacity: int, demands: dict[str, Optional[int]], weights: dict[str, float]) -> dict[str, int]:
+    """
+    Split capacity between categories in proportion to weights, capping each at its demand.
+
+    Room a category does not need is redistributed to the categories that still
+    need it (max-min fair share). Categories with a None demand take all the room
+    that is left. Demands are estimates, so when every demand is met the spare
+    room is still handed out (by weight) to the categories that asked for some
+    rather than left idle; caps only bind under contention.
+    """
+    allocation = dict.fromkeys(demands, 0)
+    requesting = {name for name, demand in demands.items() if demand is None or demand > 0}
+    active = set(requesting)
+    remaining = capacity
+    while active and remaining > 0:
+        total_weight = sum(weights[name] for name in active)
+        shares = {name: remaining * weights[name] / total_weight for name in active}
+        satisfied = {name for name in active if demands[name] is not None and demands[name] <= shares[name]}
+        if not satisfied:
+            for name in active:
+                allocation[name] = int(shares[name])
+            return allocation
+        for name in satisfied:
+            allocation[name] = demands[name]
+            remaining -= demands[name]
+        active -= satisfied
+
+    if requesting and remaining > 0:
+        total_weight = sum(weights[name] for name in requesting)
+        for name in requesting:
+            allocation[name] += int(remaining * weights[name] / total_weight)
+    return allocation
+
+
 class ModelContext:
     """
     Encapsulates model-specific information and token calculations.
@@ -84,7 +137,9 @@ class ModelContext:
             self._capabilities = self.provider.get_capabilities(self.model_name)
         return self._capabilities
 
-    def calculate_token_allocation(self, reserved_for_response: Optional[int] = None) -> TokenAllocation:
+    def calculate_token_allocation(
+        self, reserved_for_response: Optional[int] = None, demand: Optional[TokenDemand] = None
+    ) -> TokenAllocation:
         """
         Calculate token allocation based on model capacity and conversation requirements.
 
@@ -106,8 +161,17 @@ class ModelContext:
            - File allocation supports newest-first file prioritization in tools
            - Remaining budget passed to tools via _remaining_tokens parameter
 
+        4. DEMAND-DRIVEN ALLOCATION (when demand is given):
+           - The response reserve is the requested output, or the fixed ratio capped at the
+             model's max_output_tokens
+           - The prompt (and system prompt) is reserved first, using the fixed-ratio prompt
+             reserve when its size is unknown
+           - Files and history split the rest by the fixed ratios, capped at their actual
+             demand; room one does not need goes to the other
+
         Args:
             reserved_for_response: Override response token reservation
+            demand: Actual sizes of the request's files, history, prompts and output
 
         Returns:
             TokenAllocation with calculated budgets for dual prioritization strategy
@@ -143,6 +207,15 @@ class ModelContext:
             file_tokens=file_tokens,
             history_tokens=history_tokens,
         )
+        if demand is not None:
+            allocation = self._allocate_for_demand(allocation, demand, reserved_for_response, file_ratio, history_ratio)
+            logger.debug(f"Demand-driven token allocation for {self.model_name} ({demand}):")
+            logger.debug(f"  Total: {allocation.total_tokens:,}")
+            logger.debug(f"  Content: {allocation.content_tokens:,}")
+            logger.debug(f"  Response: {allocation.response_tokens:,}")
+            logger.debug(f"  Files: {allocation.file_tokens:,}")
+            logger.debug(f"  History: {allocation.history_tokens:,}")
+            return allocation
 
         logger.debug(f"Token allocation for {self.model_name}:")
         logger.debug(f"  Total: {allocation.total_tokens:,}")
@@ -153,17 +226,79 @@ class ModelContext:
 
         return allocation
 
+    def _allocate_for_demand(
+        self,
+        static: TokenAllocation,
+        demand: TokenDemand,
+        reserved_for_response: Optional[int],
+        file_ratio: float,
+        history_ratio: float,
+    ) -> TokenAllocation:
+        """Redistribute the fixed-ratio allocation according to the request's actual demand"""
+        total_tokens = static.total_tokens
+        if reserved_for_response:
+            response_tokens = reserved_for_response
+        elif demand.output_tokens is not None:
+            response_tokens = demand.output_tokens
+        else:
+            # The model cannot produce more than max_output_tokens, so reserving more wastes context
+            response_tokens = static.response_tokens
+            max_output_tokens = getattr(self.capabilities, "max_output_tokens", None)
+            if isinstance(max_output_tokens, int) and 0 < max_output_tokens < response_tokens:
+                response_tokens = max_output_tokens
+        response_tokens = max(0, min(response_tokens, total_tokens))
+        content_tokens = total_tokens - response_tokens
+
+        if demand.prompt_tokens is None:
+            prompt_reserve = max(static.available_for_prompt, demand.system_prompt_tokens)
+        else:
+            prompt_reserve = demand.system_prompt_tokens + demand.prompt_tokens
+        flexible_tokens = max(0, content_tokens - prompt_reserve)
+
+        shares = _water_fill(
+            flexible_tokens,
+            {"files": demand.file_tokens, "history": demand.history_tokens},
+            {"files": file_ratio, "history": history_ratio},
+        )
+        return TokenAllocation(
+            total_tokens=total_tokens,
+            content_tokens=content_tokens,
+            response_tokens=response_tokens,
+            file_tokens=shares["files"],
+            history_tokens=shares["history"],
+        )
+
     def estimate_tokens(self, text: str) -> int:
         """
         Estimate token count for text using model-specific tokenizer.
 
-        For now, uses simple estimation. Can be enhanced with model-specific
-        tokenizers (tiktoken for OpenAI, etc.) in the future.
+        Models with an exact tokenizer (OpenAI families, with tiktoken installed)
+        are counted exactly. Otherwise the ~4 characters per token estimate is
+        corrected by the calibration learned from this model's usage reports,
+        falling back to a conservative ~3 characters per token until enough
+        reports have been seen.
         """
-        # TODO: Integrate model-specific tokenizers
-        # For now, use conservative estimation
+        service = get_tokenizer_service()
+        if service.has_exact_tokenizer(self.model_name):
+            return service.count_tokens(text, self.model_name)
+
+        factor = self.token_estimate_factor()
+        if factor is not None:
+            return int(len(text) / PROMPT_CHARS_PER_TOKEN * factor)
         return len(text) // 3  # Conservative estimate
 
+    def token_estimate_factor(self) -> Optional[float]:
+        """
+        Calibration factor estimate_tokens() currently applies.
+
+        None when the model is counted exactly or is not calibrated yet. Token
+        counts cached across requests are only comparable while this is unchanged.
+        """
+        if get_tokenizer_service().has_exact_tokenizer(self.model_name):
+            return None
+        calibrator = get_token_calibrator()
+        return calibrator.correction_factor(self.model_name, PROMPT_CATEGORY) if calibrator else None
+
     @classmethod
     def from_arguments(cls, arguments: dict[str, Any]) -> "ModelContext":
         """Create ModelContext from tool arguments."""
@@ -0,0 +1,235 @@
+"""
+Transparent compression of stored conversation payloads
+
+Conversation turns hold full model responses - often tens of KB of repetitive
+markdown and code - and thread bodies dominate the memory footprint of the
+conversation store. Payloads at or above a size threshold are compressed before
+they are written to the storage backend and decompressed when read back.
+
+Compressed payloads are stored as bytes with a small header identifying the codec
+and the preset dictionary, so they can always be told apart from plain payloads
+(stored as str) and from payloads written with different settings:
+
+    b"\\x00zp" + codec (b"z" zlib / b"s" zstd) + 4-byte dictionary id (0 = none) + body
+
+Configuration (environment):
+    CONVERSATION_COMPRESSION: "auto" (zstd if the zstandard package is installed,
+        otherwise zlib), "zstd", "zlib" or "none". Defaults to "auto".
+    CONVERSATION_COMPRESSION_MIN_BYTES: Payloads shorter than this are stored as-is
+        (default 1024).
+    CONVERSATION_COMPRESSION_DICT: Optional path to a preset dictionary, e.g. one
+        produced by train_dictionary() from representative conversation turns.
+        Small, similar payloads compress much better with a dictionary.
+"""
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Optional, Union
+
+try:
+    import zstandard
+
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"\x00zp"
+_HEADER = struct.Struct(">3scI")
+_ZLIB = b"z"
+_ZSTD = b"s"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _dictionary_id(data: Optional[bytes]) -> int:
+    """Identify a dictionary by content so payloads are never decoded with the wrong one"""
+    if not data:
+        return 0
+    return zlib.crc32(data) or 1
+
+
+class PayloadCodec:
+    """Compresses payloads above a size threshold and keeps compression statistics
+
+    Args:
+        algorithm: "auto", "zstd", "zlib" or "none"
+        min_bytes: Payloads shorter than this (in characters) are stored uncompressed
+        dictionary: Optional preset dictionary shared by writers and readers
+    """
+
+    def __init__(self, algorithm: str = "auto", min_bytes: int = 1024, dictionary: Optional[bytes] = None):
+        algorithm = algorithm.strip().lower()
+        if algorithm == "auto":
+            algorithm = "zstd" if HAS_ZSTD else "zlib"
+        if algorithm == "zstd" and not HAS_ZSTD:
+            logger.warning("zstd compression requested but the zstandard package is not installed, using zlib")
+            algorithm = "zlib"
+        if algorithm not in ("zstd", "zlib", "none"):
+            logger.warning(f"Unknown conversation compression '{algorithm}', using zlib")
+            algorithm = "zlib"
+
+        self.algorithm = algorithm
+        self.min_bytes = min_bytes
+        self._dictionary = dictionary or None
+        self._dictionary_id = _dictionary_id(self._dictionary)
+
+        self._zstd_dict = None
+        if HAS_ZSTD and self._dictionary:
+            self._zstd_dict = zstandard.ZstdCompressionDict(self._dictionary)
+
+        self._lock = threading.Lock()
+        self._compressed = 0
+        self._uncompressed = 0
+        self._raw_bytes = 0
+        self._stored_bytes = 0
+
+    def encode(self, text: str) -> Union[str, bytes]:
+        """Return the value to store for text: compressed bytes, or text itself if too small to benefit"""
+        if self.algorithm == "none" or len(text) < self.min_bytes:
+            self._record(False, len(text), len(text))
+            return text
+
+        raw = text.encode("utf-8")
+        if self.algorithm == "zstd":
+            codec = _ZSTD
+            body = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self._zstd_dict).compress(raw)
+        else:
+            codec = _ZLIB
+            compressor = (
+                zlib.compressobj(ZLIB_LEVEL, zdict=self._dictionary)
+                if self._dictionary
+                else zlib.compressobj(ZLIB_LEVEL)
+            )
+            body = compressor.compress(raw) + compressor.flush()
+
+        if _HEADER.size + len(body) >= len(raw):
+            self._record(False, len(raw), len(raw))
+            return text
+
+        self._record(True, len(raw), _HEADER.size + len(body))
+        return _HEADER.pack(_MAGIC, codec, self._dictionary_id) + body
+
+    def decode(self, value: Union[str, bytes]) -> str:
+        """Return the original text for a stored value
+
+        Raises:
+            ValueError: If the payload was compressed with an unavailable codec or a different dictionary
+        """
+        if isinstance(value, str):
+            return value
+        if not value.startswith(_MAGIC) or len(value) < _HEADER.size:
+            return value.decode("utf-8")
+
+        _, codec, dictionary_id = _HEADER.unpack_from(value)
+        body = value[_HEADER.size :]
+        if dictionary_id and dictionary_id != self._dictionary_id:
+            raise ValueError("Payload was compressed with a different dictionary")
+
+        if codec == _ZLIB:
+            decompressor = zlib.decompressobj(zdict=self._dictionary) if dictionary_id else zlib.decompressobj()
+            raw = decompressor.decompress(body) + decompressor.flush()
+        elif codec == _ZSTD:
+            if not HAS_ZSTD:
+                raise ValueError("Payload was compressed with zstd but the zstandard package is not installed")
+            dict_data = self._zstd_dict if dictionary_id else None
+            raw = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(body)
+        else:
+            raise ValueError(f"Unknown payload codec {codec!r}")
+        return raw.decode("utf-8")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return compression statistics for payloads encoded by this process
+
+        Returns:
+            dict with algorithm, compressed and uncompressed payload counts, raw_bytes,
+            stored_bytes and compression_ratio (raw / stored, 1.0 when nothing was stored)
+        """
+        with self._lock:
+            return {
+                "algorithm": self.algorithm,
+                "dictionary": bool(self._dictionary),
+                "compressed": self._compressed,
+                "uncompressed": self._uncompressed,
+                "raw_bytes": self._raw_bytes,
+                "stored_bytes": self._stored_bytes,
+                "compression_ratio": self._raw_bytes / self._stored_bytes if self._stored_bytes else 1.0,
+            }
+
+    def _record(self, compressed: bool, raw_size: int, stored_size: int) -> None:
+        with self._lock:
+            if compressed:
+                self._compressed += 1
+            else:
+                self._uncompressed += 1
+            self._raw_bytes += raw_size
+            self._stored_bytes += stored_size
+
+
+def train_dictionary(samples: list[str], size: int = 16384) -> bytes:
+    """Train a preset dictionary from representative payloads (requires zstandard)
+
+    The result can be saved to the file named by CONVERSATION_COMPRESSION_DICT.
+
+    Raises:
+        RuntimeError: If the zstandard package is not installed
+    """
+    if not HAS_ZSTD:
+        raise RuntimeError("Training a compression dictionary requires the zstandard package")
+    return zstandard.train_dictionary(size, [sample.encode("utf-8") for sample in samples]).as_bytes()
+
+
+_codec_instance: Optional[PayloadCodec] = None
+_codec_lock = threading.Lock()
+
+
+def _load_dictionary(path: Optional[str]) -> Optional[bytes]:
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError as e:
+        logger.warning(f"Could not read conversation compression dictionary {path}: {e}")
+        return None
+
+
+def get_payload_codec() -> PayloadCodec:
+    """Get the process-wide codec configured from the environment"""
+    global _codec_instance
+    if _codec_instance is None:
+        with _codec_lock:
+            if _codec_instance is None:
+                try:
+                    min_bytes = int(os.getenv("CONVERSATION_COMPRESSION_MIN_BYTES", "1024"))
+                except ValueError:
+                    logger.warning("Invalid CONVERSATION_COMPRESSION_MIN_BYTES value, using default of 1024")
+                    min_bytes = 1024
+                _codec_instance = PayloadCodec(
+                    algorithm=os.getenv("CONVERSATION_COMPRESSION", "auto"),
+                    min_bytes=min_bytes,
+                    dictionary=_load_dictionary(os.getenv("CONVERSATION_COMPRESSION_DICT")),
+                )
+    return _codec_instance
+
+
+def reset_payload_codec() -> None:
+    """Forget the process-wide codec so the next call re-reads the environment"""
+    global _codec_instance
+    with _codec_lock:
+        _codec_instance = None
+
+
+def compress_payload(text: str) -> Union[str, bytes]:
+    """Encode a payload for storage with the process-wide codec"""
+    return get_payload_codec().encode(text)
+
+
+def decompress_payload(value: Union[str, bytes]) -> str:
+    """Decode a stored payload with the process-wide codec"""
+    return get_payload_codec().decode(value)
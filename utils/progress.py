@@ -0,0 +1,140 @@
+"""
+MCP progress notifications for long-running tool calls
+
+A model call for a large review can take minutes, and without feedback the
+client sees nothing until the whole answer has been generated. When the client
+asks for progress (the request carries a ``progressToken`` in its ``_meta``),
+the server opens a progress scope for the call and tools stream the model's
+output into it as ``notifications/progress`` messages, so the first words arrive
+within seconds and the client can cancel a runaway generation early.
+
+    with progress_scope(progress_reporter_for_request(server)):
+        result = await tool.execute(arguments)
+
+    reporter = get_progress_reporter()  # None when the client did not ask for progress
+    if reporter:
+        await reporter.stream_text(chunk)
+
+Streamed text is batched: a notification is sent at most every
+STREAM_PROGRESS_INTERVAL seconds (default 1.0). STREAM_RESPONSES=false turns
+off streaming of model output (tools then wait for the complete response).
+"""
+
+import logging
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_current_reporter: ContextVar[Optional["ProgressReporter"]] = ContextVar("progress_reporter", default=None)
+
+
+def is_streaming_enabled() -> bool:
+    """Whether model output is streamed to clients that ask for progress (STREAM_RESPONSES, default true)"""
+    return os.getenv("STREAM_RESPONSES", "true").lower() in ("true", "1", "yes")
+
+
+def _progress_interval() -> float:
+    try:
+        return max(0.0, float(os.getenv("STREAM_PROGRESS_INTERVAL", "1.0")))
+    except ValueError:
+        logger.warning("Invalid STREAM_PROGRESS_INTERVAL value, using default of 1.0")
+        return 1.0
+
+
+class ProgressReporter:
+    """Sends progress notifications for one MCP request
+
+    Args:
+        session: MCP server session of the request
+        progress_token: Token the client attached to the request
+        request_id: Id of the request the notifications relate to
+        min_interval: Minimum seconds between notifications carrying streamed text
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        progress_token: Union[str, int],
+        request_id: Optional[Union[str, int]] = None,
+        min_interval: Optional[float] = None,
+    ):
+        self.session = session
+        self.progress_token = progress_token
+        self.request_id = request_id
+        self.min_interval = _progress_interval() if min_interval is None else min_interval
+        self._progress = 0
+        self._pending: list[str] = []
+        self._last_sent = 0.0
+        self._failed = False
+
+    async def send(self, message: str) -> None:
+        """Send a notification with message, flushing any batched text first"""
+        await self.flush()
+        await self._notify(message)
+
+    async def stream_text(self, text: str) -> None:
+        """Queue streamed model output, sending it once min_interval has passed since the last notification"""
+        if not text:
+            return
+        self._pending.append(text)
+        if time.monotonic() - self._last_sent >= self.min_interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send batched streamed text, if any"""
+        if self._pending:
+            text = "".join(self._pending)
+            self._pending.clear()
+            await self._notify(text)
+
+    async def _notify(self, message: str) -> None:
+        if self._failed:
+            return
+        # Progress must increase with every notification; there is no known total
+        self._progress += 1
+        self._last_sent = time.monotonic()
+        try:
+            await self.session.send_progress_notification(
+                progress_token=self.progress_token,
+                progress=self._progress,
+                message=message,
+                related_request_id=self.request_id,
+            )
+        except Exception as e:
+            # A client that went away must not fail the tool call; stop reporting instead
+            logger.debug(f"Progress notifications disabled for this request: {e}")
+            self._failed = True
+
+
+def progress_reporter_for_request(server: Any) -> Optional[ProgressReporter]:
+    """Build a reporter for the MCP request being handled, or None if the client did not ask for progress"""
+    try:
+        request_context = server.request_context
+    except (AttributeError, LookupError):
+        return None
+    meta = getattr(request_context, "meta", None)
+    progress_token = getattr(meta, "progressToken", None) if meta else None
+    session = getattr(request_context, "session", None)
+    if progress_token is None or session is None:
+        return None
+    return ProgressReporter(session, progress_token, getattr(request_context, "request_id", None))
+
+
+def get_progress_reporter() -> Optional[ProgressReporter]:
+    """Return the reporter of the current request, if the client asked for progress"""
+    return _current_reporter.get()
+
+
+@contextmanager
+def progress_scope(reporter: Optional[ProgressReporter]) -> Iterator[Optional[ProgressReporter]]:
+    """Make reporter the current request's progress reporter (None reports nothing)"""
+    token = _current_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current_reporter.reset(token)
@@ -0,0 +1,76 @@
+"""
+Provider prompt (prefix) caching helpers
+
+Workflow steps, expert analysis and continuations resend the same system
+prompt and the same embedded files on every call. Providers can reuse the
+processed prefix of such prompts, which is cheaper and shortens time to first
+token, but only when the repeated content comes first and, for some APIs, when
+the request says where the repeated part ends.
+
+Tools therefore build prompts stable-first (system prompt, then embedded files,
+then the per-call request) and pass the length of the stable part of the user
+prompt to the provider as the ``cacheable_prefix_length`` keyword argument of
+generate_content/agenerate_content. Each provider turns that into its own
+mechanism:
+
+- OpenAI: automatic prefix caching, routed with a ``prompt_cache_key``
+- OpenRouter (Anthropic models) and DIAL (Claude models): cache-control breakpoints
+- Gemini: implicit caching of the stable prefix, plus optional explicit cached
+  content (GEMINI_EXPLICIT_CACHE)
+
+Cached prompt tokens are reported as usage["cached_input_tokens"] where the
+provider returns them. PROMPT_CACHE=false disables all cache hints.
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+# Providers only cache prefixes of at least ~1024 tokens; shorter hints are not worth sending
+MIN_CACHEABLE_PREFIX_CHARS = 4096
+
+
+def is_prompt_cache_enabled() -> bool:
+    """Whether provider cache hints are enabled (PROMPT_CACHE, default true)"""
+    return os.getenv("PROMPT_CACHE", "true").lower() in ("true", "1", "yes")
+
+
+def split_cacheable_prefix(prompt: str, prefix_length: Optional[int]) -> tuple[str, str]:
+    """
+    Split prompt into its stable prefix and the per-call remainder.
+
+    Args:
+        prompt: User prompt sent to the model
+        prefix_length: Number of leading characters that repeat across calls (None or 0 for none)
+
+    Returns:
+        Tuple of (prefix, remainder); the prefix is empty when there is nothing to cache
+    """
+    if not prefix_length or prefix_length <= 0:
+        return "", prompt
+    prefix_length = min(prefix_length, len(prompt))
+    return prompt[:prefix_length], prompt[prefix_length:]
+
+
+def cacheable_prefix_chars(system_prompt: Optional[str], prefix: str) -> int:
+    """Characters of stable content at the start of a request (system prompt plus prompt prefix)"""
+    return len(system_prompt or "") + len(prefix)
+
+
+def prompt_cache_key(model_name: str, system_prompt: Optional[str], prefix: str) -> str:
+    """
+    Identify a stable prompt prefix so requests sharing it can be routed to the same cache.
+
+    Args:
+        model_name: Model the request is for
+        system_prompt: System prompt of the request
+        prefix: Stable prefix of the user prompt
+
+    Returns:
+        Short, stable key derived from the model and the stable content
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for part in (model_name, system_prompt or "", prefix):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return f"zen-{digest.hexdigest()}"
@@ -0,0 +1,338 @@
+"""
+Opt-in cache of model responses for deterministic requests
+
+CI pipelines often repeat the exact same model call: the same tool run over an
+unchanged diff produces the same system prompt, prompt (embedded files
+included), images and parameters. When the request is deterministic (temperature
+0 or an explicit ``seed``) the previous answer can be returned immediately and
+without an API call.
+
+Requests are keyed by a SHA-256 over a canonical JSON encoding of the provider,
+endpoint, resolved model name, system prompt, prompt, image digests and all
+generation parameters. Entries live in a two-tier cache:
+
+- memory: LRU of RESPONSE_CACHE_MAX_ENTRIES responses (default 256)
+- disk: SQLite database at RESPONSE_CACHE_PATH (default data/response_cache.db;
+  empty disables the tier), bounded by RESPONSE_CACHE_DISK_MB (default 256) with
+  least-recently-used entries evicted first, so answers survive restarts and are
+  shared between server processes
+
+Both tiers expire entries after RESPONSE_CACHE_TTL seconds (default 86400).
+The cache is disabled unless RESPONSE_CACHE=true. ModelProvider wraps every
+provider's generate_content/agenerate_content with it; served responses carry
+metadata["cache_hit"] = True and metadata["cache_tier"] ("memory" or "disk").
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from .env import env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / "data" / "response_cache.db"
+
+# Generation hints that do not change the response
+IGNORED_PARAMETERS = frozenset({"cacheable_prefix_length"})
+
+# Rows read per query when evicting from the disk tier
+_DISK_EVICTION_BATCH = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def is_deterministic_request(temperature: Optional[float], params: dict[str, Any]) -> bool:
+    """Whether a request asks for reproducible output (temperature 0 or a fixed seed)"""
+    return temperature == 0 or params.get("seed") is not None
+
+
+def _image_digest(image: Any) -> str:
+    """Identify an image by content: data URLs by their text, files by their bytes"""
+    if isinstance(image, str) and not image.startswith("data:"):
+        try:
+            with open(image, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return f"unreadable:{image}"
+    return hashlib.sha256(str(image).encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def response_cache_key(
+    provider: str,
+    endpoint: Optional[str],
+    model_name: str,
+    system_prompt: Optional[str],
+    prompt: str,
+    temperature: Optional[float],
+    max_output_tokens: Optional[int],
+    params: dict[str, Any],
+) -> str:
+    """
+    Canonical hash of everything that determines a model response.
+
+    Args:
+        provider: Provider type value
+        endpoint: API base URL for providers that can point at different servers
+        model_name: Resolved (canonical) model name
+        system_prompt: System prompt of the request
+        prompt: User prompt of the request
+        temperature: Requested temperature
+        max_output_tokens: Requested output limit
+        params: Remaining provider keyword arguments (images, thinking_mode, seed, ...)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    params = {name: value for name, value in params.items() if name not in IGNORED_PARAMETERS}
+    if params.get("images"):
+        params["images"] = [_image_digest(image) for image in params["images"]]
+    canonical = json.dumps(
+        {
+            "provider": provider,
+            "endpoint": endpoint,
+            "model": model_name,
+            "system_prompt": system_prompt,
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_output_tokens": max_output_tokens,
+            "params": params,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) cache of serialized model responses
+
+    Entries are plain JSON-compatible dicts; converting to and from ModelResponse
+    is up to the caller.
+
+    Args:
+        ttl_seconds: Lifetime of an entry in both tiers
+        max_entries: Responses kept in memory; 0 disables the memory tier
+        path: SQLite database for the disk tier; None disables it
+        max_disk_bytes: Approximate size limit of the stored (compressed) responses on disk
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 86400,
+        max_entries: int = 256,
+        path: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+
+        self._path = Path(path) if path else None
+        self._conn: Optional[sqlite3.Connection] = None
+        if self._path:
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                # One shared connection, serialized by self._lock
+                self._conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache disk tier disabled, cannot open {self._path}: {e}")
+                self._conn = None
+
+    def get(self, key: str) -> Optional[tuple[dict[str, Any], str]]:
+        """Return (entry, tier) for a live entry, where tier is "memory" or "disk" """
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                entry, expires_at = cached
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._memory_hits += 1
+                    return copy.deepcopy(entry), "memory"
+                del self._entries[key]
+
+            entry, expires_at = self._disk_get(key, now)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._memory_put(key, entry, expires_at)
+            return copy.deepcopy(entry), "disk"
+
+    def put(self, key: str, entry: dict[str, Any]) -> None:
+        """Store a JSON-serializable entry in both tiers"""
+        try:
+            data = json.dumps(entry, default=str, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Response not cached, cannot serialize it: {e}")
+            return
+        # Store the JSON round trip so both tiers hand out identical data
+        entry = json.loads(data)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._stores += 1
+            self._memory_put(key, entry, expires_at)
+            self._disk_put(key, zlib.compress(data.encode("utf-8", "surrogatepass")), expires_at)
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM responses")
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not clear response cache {self._path}: {e}")
+
+    def close(self) -> None:
+        """Close the disk tier"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return memory/disk entries, disk bytes, hits per tier, misses, hit_rate and stores"""
+        with self._lock:
+            disk_entries, disk_bytes = 0, 0
+            if self._conn is not None:
+                try:
+                    disk_entries, disk_bytes = self._conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()
+                except sqlite3.Error:
+                    pass
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "memory_entries": len(self._entries),
+                "disk_entries": disk_entries,
+                "disk_bytes": disk_bytes,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "stores": self._stores,
+                "path": str(self._path) if self._conn is not None else None,
+            }
+
+    def _memory_put(self, key: str, entry: dict[str, Any], expires_at: float) -> None:
+        if not self.max_entries:
+            return
+        self._entries[key] = (entry, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> tuple[Optional[dict[str, Any]], float]:
+        if self._conn is None:
+            return None, 0.0
+        try:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None, 0.0
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            return json.loads(zlib.decompress(row[0]).decode("utf-8", "surrogatepass")), row[1]
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning(f"Ignoring unreadable response cache entry: {e}")
+            return None, 0.0
+
+    def _disk_put(self, key: str, value: bytes, expires_at: float) -> None:
+        if self._conn is None or len(value) > self.max_disk_bytes:
+            return
+        now = time.time()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), expires_at, now),
+                )
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                # Evict least recently used rows a batch at a time instead of reading the whole table
+                while total > self.max_disk_bytes:
+                    evicted = []
+                    for old_key, size in self._conn.execute(
+                        "SELECT key, size FROM responses ORDER BY last_used LIMIT ?", (_DISK_EVICTION_BATCH,)
+                    ).fetchall():
+                        if total <= self.max_disk_bytes:
+                            break
+                        evicted.append((old_key,))
+                        total -= size
+                    if not evicted:
+                        break
+                    self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store response in {self._path}: {e}")
+
+
+_cache_instance: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def is_response_cache_enabled() -> bool:
+    """Whether the response cache is enabled (RESPONSE_CACHE, default false)"""
+    return os.getenv("RESPONSE_CACHE", "false").lower() in ("true", "1", "yes")
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the process-wide response cache, or None when RESPONSE_CACHE is disabled"""
+    global _cache_instance
+    if not is_response_cache_enabled():
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                path = os.getenv("RESPONSE_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+                _cache_instance = ResponseCache(
+                    ttl_seconds=env_int("RESPONSE_CACHE_TTL", 86400),
+                    max_entries=env_int("RESPONSE_CACHE_MAX_ENTRIES", 256),
+                    path=path or None,
+                    max_disk_bytes=env_int("RESPONSE_CACHE_DISK_MB", 256) * 1024 * 1024,
+                )
+    return _cache_instance
+
+
+def reset_response_cache() -> None:
+    """Close and forget the process-wide cache so the next call re-reads the environment"""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is not None:
+            _cache_instance.close()
+        _cache_instance = None
@@ -0,0 +1,288 @@
+"""
+SQLite storage backend for conversation threads
+
+Stores conversation threads in an on-disk SQLite database in WAL mode, so threads
+survive server restarts and several server processes on the same host can share
+conversation state without a network service. Enable it with:
+
+    CONVERSATION_STORAGE_BACKEND=sqlite
+    CONVERSATION_STORAGE_PATH=/path/to/conversations.db   # optional
+
+Schema:
+- entries: one row per key (thread header or turn log) with its expiration time and
+  version stamp, indexed by expiration for sweeping
+- list_items: one row per appended value (conversation turn), keyed by (key, seq), so
+  adding a turn inserts a single row instead of rewriting the thread
+- meta: the database-wide version counter, shared by all processes
+
+Expired rows are ignored by reads immediately and deleted by the background sweep
+in batches of CONVERSATION_STORAGE_SWEEP_BATCH keys, one short write transaction
+per batch, so readers and writers in other processes are never blocked for long.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from .env import env_int
+from .storage_backend import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_PATH = Path(__file__).resolve().parent.parent / "data" / "conversations.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB,
+    length INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS list_items (
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (key, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('version', 0);
+"""
+
+
+class SQLiteStorage(StorageBackend):
+    """Conversation storage in a shared SQLite database
+
+    Args:
+        path: Database file (CONVERSATION_STORAGE_PATH, default data/conversations.db in the
+            project root); parent directories are created as needed
+        sweep_batch_size: Keys deleted per sweep transaction (CONVERSATION_STORAGE_SWEEP_BATCH,
+            default 500)
+        busy_timeout: Seconds to wait for another process's write lock before failing
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        sweep_batch_size: Optional[int] = None,
+        busy_timeout: float = 5.0,
+    ):
+        self._path = Path(path or os.getenv("CONVERSATION_STORAGE_PATH") or DEFAULT_DATABASE_PATH)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._sweep_batch_size = max(1, sweep_batch_size or env_int("CONVERSATION_STORAGE_SWEEP_BATCH", 500))
+        self._busy_timeout = busy_timeout
+
+        # sqlite3 connections may not be shared between threads, so each thread opens its own
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+
+        self._connection().executescript(_SCHEMA)
+        super().__init__()
+
+        logger.info(
+            f"SQLite conversation storage initialized at {self._path} with {self._timeout_hours}h timeout, "
+            f"cleanup every {self._cleanup_interval//60}m"
+        )
+
+    def set_with_ttl(self, key: str, ttl_seconds: int, value: Union[str, bytes]) -> None:
+        """Store value with expiration time"""
+        with self._write() as conn:
+            conn.execute("DELETE FROM list_items WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, length, expires_at, version) VALUES (?, ?, 0, ?, ?)",
+                (key, value, time.time() + ttl_seconds, self._next_version(conn)),
+            )
+        logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
+
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
+        """Retrieve value if not expired"""
+        row = (
+            self._connection()
+            .execute("SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time()))
+            .fetchone()
+        )
+        value = row[0] if row else None
+        self._record_lookup(value is not None)
+        return value
+
+    def append_with_ttl(
+        self, key: str, ttl_seconds: int, value: Union[str, bytes], max_length: Optional[int] = None
+    ) -> Optional[int]:
+        """Append a value to the list stored at key and refresh its expiration.
+
+        The value is inserted as a single row; existing entries are not read or rewritten.
+        """
+        with self._write() as conn:
+            now = time.time()
+            row = conn.execute("SELECT value, length, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            live = row is not None and row[0] is None and row[2] > now
+            if row is not None and not live:
+                # Expired list, or a plain value being replaced by a list
+                conn.execute("DELETE FROM list_items WHERE key = ?", (key,))
+            length = row[1] if live else 0
+            if max_length is not None and length >= max_length:
+                return None
+
+            conn.execute("INSERT INTO list_items (key, seq, value) VALUES (?, ?, ?)", (key, length, value))
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, length, expires_at, version) VALUES (?, NULL, ?, ?, ?)",
+                (key, length + 1, now + ttl_seconds, self._next_version(conn)),
+            )
+        logger.debug(f"Appended to key {key} (length {length + 1}) with TTL {ttl_seconds}s")
+        return length + 1
+
+    def get_list(self, key: str) -> list[Union[str, bytes]]:
+        """Return the list stored at key (empty if missing or expired)"""
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT list_items.value FROM list_items JOIN entries ON entries.key = list_items.key "
+                "WHERE list_items.key = ? AND entries.value IS NULL AND entries.expires_at > ? "
+                "ORDER BY list_items.seq",
+                (key, time.time()),
+            )
+            .fetchall()
+        )
+        self._record_lookup(bool(rows))
+        return [row[0] for row in rows]
+
+    def expire(self, key: str, ttl_seconds: int) -> bool:
+        """Redis-compatible expire: refresh the TTL of an existing key"""
+        with self._write() as conn:
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE entries SET expires_at = ? WHERE key = ? AND expires_at > ?", (now + ttl_seconds, key, now)
+            )
+            return cursor.rowcount > 0
+
+    def get_version(self, key: str) -> Optional[int]:
+        """Return the version stamp of the last write to key, or None if missing or expired"""
+        row = (
+            self._connection()
+            .execute("SELECT version FROM entries WHERE key = ? AND expires_at > ?", (key, time.time()))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def clear(self) -> None:
+        """Remove all keys (for every process sharing the database)"""
+        with self._write() as conn:
+            conn.execute("DELETE FROM list_items")
+            conn.execute("DELETE FROM entries")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return storage statistics
+
+        Returns:
+            dict with entries and list_items (live rows in the database), bytes (database
+            file size), this process's hits, misses, hit_rate and swept expired keys, and path
+        """
+        conn = self._connection()
+        now = time.time()
+        entries = conn.execute("SELECT COUNT(*) FROM entries WHERE expires_at > ?", (now,)).fetchone()[0]
+        items = conn.execute(
+            "SELECT COALESCE(SUM(length), 0) FROM entries WHERE value IS NULL AND expires_at > ?", (now,)
+        ).fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        with self._stats_lock:
+            hits, misses, expired = self._hits, self._misses, self._expired
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "list_items": items,
+            "bytes": page_count * page_size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "expired": expired,
+            "path": str(self._path),
+        }
+
+    def _cleanup_expired(self) -> None:
+        """Delete expired keys and their list rows in batches"""
+        removed = 0
+        while True:
+            with self._write() as conn:
+                now = time.time()
+                keys = [
+                    (row[0],)
+                    for row in conn.execute(
+                        "SELECT key FROM entries WHERE expires_at <= ? LIMIT ?", (now, self._sweep_batch_size)
+                    )
+                ]
+                conn.executemany("DELETE FROM list_items WHERE key = ?", keys)
+                conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+            removed += len(keys)
+            if len(keys) < self._sweep_batch_size:
+                break
+
+        if removed:
+            with self._stats_lock:
+                self._expired += removed
+            logger.debug(f"Cleaned up {removed} expired conversation threads")
+
+    def shutdown(self):
+        """Stop the cleanup thread and close all database connections"""
+        super().shutdown()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; write transactions are opened explicitly with BEGIN IMMEDIATE.
+            # Each connection is only used by its own thread, but shutdown() closes them all.
+            conn = sqlite3.connect(
+                self._path, timeout=self._busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a write transaction, taking the database write lock up front"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    @staticmethod
+    def _next_version(conn: sqlite3.Connection) -> int:
+        """Draw the next version stamp from the shared counter (inside a write transaction)"""
+        conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'version'")
+        return conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()[0]
+
+    def _record_lookup(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
@@ -1,41 +1,116 @@
 """
-In-memory storage backend for conversation threads
+Storage backends for conversation threads
 
-This module provides a thread-safe, in-memory alternative to Redis for storing
-conversation contexts. It's designed for ephemeral MCP server sessions where
-conversations only need to persist during a single Claude session.
+This module defines the StorageBackend interface used by conversation memory and
+provides a thread-safe, in-memory implementation as an alternative to Redis. It's
+designed for ephemeral MCP server sessions where conversations only need to persist
+during a single Claude session.
 
-⚠️  PROCESS-SPECIFIC STORAGE: This storage is confined to a single Python process.
+⚠️  PROCESS-SPECIFIC STORAGE: The in-memory store is confined to a single Python process.
     Data stored in one process is NOT accessible from other processes or subprocesses.
     This is why simulator tests that run server.py as separate subprocesses cannot
-    share conversation state between tool calls.
+    share conversation state between tool calls. Set CONVERSATION_STORAGE_BACKEND=sqlite
+    to use the on-disk backend (utils/sqlite_storage.py), which survives restarts and is
+    shared by every server process on the host.
 
 Key Features:
-- Thread-safe operations using locks
-- TTL support with automatic expiration
+- Sharded store with per-shard locks so concurrent threads rarely contend
+- TTL support with a per-shard expiration heap (cleanup touches only expired keys)
+- Capacity bounds (entries and approximate bytes) with least-recently-used eviction
+- Append-only lists so conversation turns can be added without rewriting the thread
+- Per-key version stamps so callers can cache decoded values and detect writes
+- Hit/miss, eviction, size and lock-contention statistics via get_stats()
 - Background cleanup thread for memory management
 - Singleton pattern for consistent state within a single process
 - Drop-in replacement for Redis storage (for single-process scenarios)
 """
 
+import heapq
+import itertools
 import logging
 import os
+import sys
 import threading
 import time
-from typing import Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Optional, Union
+
+from .env import env_int
 
 logger = logging.getLogger(__name__)
 
+_version_counter = itertools.count(1)
+
+# Approximate per-item overhead of a list slot, added to the size of each appended value
+_LIST_SLOT_BYTES = 8
+
+# Suffixes of keys that belong to a parent key, e.g. a thread's turn log "thread:<id>:turns".
+# A key and its companions live in the same shard and are evicted together.
+_COMPANION_SUFFIXES = (":turns",)
+
+
+def _group_key(key: str) -> str:
+    """Return the parent key of a companion key (the key itself otherwise)"""
+    for suffix in _COMPANION_SUFFIXES:
+        if key.endswith(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+def _group_members(group: str) -> tuple[str, ...]:
+    """Return a parent key followed by the keys of its companions"""
+    return (group, *(group + suffix for suffix in _COMPANION_SUFFIXES))
+
+
+class _Entry:
+    """A stored value with its expiration time, version stamp and approximate size"""
+
+    __slots__ = ("value", "expires_at", "version", "size")
 
-class InMemoryStorage:
-    """Thread-safe in-memory storage for conversation threads"""
+    def __init__(self, value: Union[str, bytes, list[Union[str, bytes]]], expires_at: float, version: int, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.version = version
+        self.size = size
+
+
+class _Shard:
+    """One lock-protected partition of the store.
+
+    Entries are kept in least-recently-used order. Expirations are tracked in a heap of
+    (expires_at, key) pairs; refreshing a TTL pushes a new pair and leaves the old one
+    behind, and stale pairs are discarded when they reach the top of the heap.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.expirations: list[tuple[float, str]] = []
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.contention = 0
+
+
+class StorageBackend(ABC):
+    """Interface for conversation storage backends
+
+    Backends store values (str, or bytes for compressed payloads) and append-only lists
+    of values under keys with a TTL, and stamp every write with a version so callers
+    can cache decoded values. A background thread periodically removes expired keys
+    via _cleanup_expired().
+    """
 
     def __init__(self):
-        self._store: dict[str, tuple[str, float]] = {}
-        self._lock = threading.Lock()
         # Match Redis behavior: cleanup interval based on conversation timeout
         # Run cleanup at 1/10th of timeout interval (e.g., 18 mins for 3 hour timeout)
         timeout_hours = int(os.getenv("CONVERSATION_TIMEOUT_HOURS", "3"))
+        self._timeout_hours = timeout_hours
         self._cleanup_interval = (timeout_hours * 3600) // 10
         self._cleanup_interval = max(300, self._cleanup_interval)  # Minimum 5 minutes
         self._shutdown = False
@@ -44,51 +119,70 @@ class InMemoryStorage:
         self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
         self._cleanup_thread.start()
 
-        logger.info(
-            f"In-memory storage initialized with {timeout_hours}h timeout, cleanup every {self._cleanup_interval//60}m"
-        )
-
-    def set_with_ttl(self, key: str, ttl_seconds: int, value: str) -> None:
+    @abstractmethod
+    def set_with_ttl(self, key: str, ttl_seconds: int, value: Union[str, bytes]) -> None:
         """Store value with expiration time"""
-        with self._lock:
-            expires_at = time.time() + ttl_seconds
-            self._store[key] = (value, expires_at)
-            logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
 
-    def get(self, key: str) -> Optional[str]:
+    @abstractmethod
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
         """Retrieve value if not expired"""
-        with self._lock:
-            if key in self._store:
-                value, expires_at = self._store[key]
-                if time.time() < expires_at:
-                    logger.debug(f"Retrieved key {key}")
-                    return value
-                else:
-                    # Clean up expired entry
-                    del self._store[key]
-                    logger.debug(f"Key {key} expired and removed")
-        return None
-
-    def setex(self, key: str, ttl_seconds: int, value: str) -> None:
+
+    def setex(self, key: str, ttl_seconds: int, value: Union[str, bytes]) -> None:
         """Redis-compatible setex method"""
         self.set_with_ttl(key, ttl_seconds, value)
 
+    @abstractmethod
+    def append_with_ttl(
+        self, key: str, ttl_seconds: int, value: Union[str, bytes], max_length: Optional[int] = None
+    ) -> Optional[int]:
+        """Append a value to the list stored at key and refresh its expiration.
+
+        Args:
+            key: List key (created if missing or expired)
+            ttl_seconds: New time-to-live for the whole list
+            value: Serialized entry to append
+            max_length: Optional cap; the append is refused once the list holds this many entries
+
+        Returns:
+            New length of the list, or None if max_length was reached
+        """
+
+    @abstractmethod
+    def get_list(self, key: str) -> list[Union[str, bytes]]:
+        """Return a copy of the list stored at key (empty if missing or expired)"""
+
+    @abstractmethod
+    def expire(self, key: str, ttl_seconds: int) -> bool:
+        """Redis-compatible expire: refresh the TTL of an existing key"""
+
+    @abstractmethod
+    def get_version(self, key: str) -> Optional[int]:
+        """Return the version stamp of the last write to key, or None if missing or expired.
+
+        The version changes on every write (set or append) but not on TTL refreshes, so a
+        caller can keep a decoded copy of the value for as long as the version is unchanged.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all keys"""
+
+    @abstractmethod
+    def get_stats(self) -> dict[str, Any]:
+        """Return backend-specific storage statistics"""
+
+    @abstractmethod
+    def _cleanup_expired(self) -> None:
+        """Remove expired entries"""
+
     def _cleanup_worker(self):
         """Background thread that periodically cleans up expired entries"""
         while not self._shutdown:
             time.sleep(self._cleanup_interval)
-            self._cleanup_expired()
-
-    def _cleanup_expired(self):
-        """Remove all expired entries"""
-        with self._lock:
-            current_time = time.time()
-            expired_keys = [k for k, (_, exp) in self._store.items() if exp < current_time]
-            for key in expired_keys:
-                del self._store[key]
-
-            if expired_keys:
-                logger.debug(f"Cleaned up {len(expired_keys)} expired conversation threads")
+            try:
+                self._cleanup_expired()
+            except Exception as e:
+                logger.warning(f"Conversation storage cleanup failed: {type(e).__name__}: {e}")
 
     def shutdown(self):
         """Graceful shutdown of background thread"""
@@ -97,17 +191,271 @@ class InMemoryStorage:
             self._cleanup_thread.join(timeout=1)
 
 
+class InMemoryStorage(StorageBackend):
+    """Thread-safe, sharded in-memory storage for conversation threads
+
+    Args:
+        shards: Number of independently locked partitions (CONVERSATION_STORAGE_SHARDS, default 16)
+        max_entries: Maximum number of keys, 0 for unbounded (CONVERSATION_STORAGE_MAX_ENTRIES,
+            default 10000)
+        max_bytes: Approximate memory cap for stored values, 0 for unbounded
+            (CONVERSATION_STORAGE_MAX_MB, default 512 MB)
+
+    Capacity limits are divided evenly between shards; when a shard exceeds its share the
+    least recently used keys in that shard are evicted. Companion keys (a thread's turn
+    log) are placed in their parent key's shard and evicted together with it.
+    """
+
+    def __init__(
+        self,
+        shards: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        if shards is None:
+            shards = env_int("CONVERSATION_STORAGE_SHARDS", 16)
+        if max_entries is None:
+            max_entries = env_int("CONVERSATION_STORAGE_MAX_ENTRIES", 10000)
+        if max_bytes is None:
+            max_bytes = env_int("CONVERSATION_STORAGE_MAX_MB", 512) * 1024 * 1024
+
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        # Per-shard limits; 0 disables the corresponding bound
+        self._shard_max_entries = -(-max_entries // len(self._shards)) if max_entries else 0
+        self._shard_max_bytes = -(-max_bytes // len(self._shards)) if max_bytes else 0
+        super().__init__()
+
+        logger.info(
+            f"In-memory storage initialized with {self._timeout_hours}h timeout, cleanup every {self._cleanup_interval//60}m, "
+            f"{len(self._shards)} shards, max {max_entries or 'unlimited'} entries / "
+            f"{f'{max_bytes // (1024 * 1024)}MB' if max_bytes else 'unlimited'}"
+        )
+
+    def set_with_ttl(self, key: str, ttl_seconds: int, value: Union[str, bytes]) -> None:
+        """Store value with expiration time"""
+        with self._locked(key) as shard:
+            expires_at = time.time() + ttl_seconds
+            self._put(shard, key, _Entry(value, expires_at, next(_version_counter), sys.getsizeof(value)))
+            logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
+
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
+        """Retrieve value if not expired"""
+        with self._locked(key) as shard:
+            entry = self._live_entry(shard, key, time.time())
+            if entry is None:
+                shard.misses += 1
+                return None
+            shard.hits += 1
+            self._touch(shard, key)
+            logger.debug(f"Retrieved key {key}")
+            return entry.value
+
+    def append_with_ttl(
+        self, key: str, ttl_seconds: int, value: Union[str, bytes], max_length: Optional[int] = None
+    ) -> Optional[int]:
+        """Append a value to the list stored at key and refresh its expiration.
+
+        Only the new value is stored; existing entries are not copied or re-serialized,
+        so the cost of an append does not depend on the length of the list.
+        """
+        with self._locked(key) as shard:
+            now = time.time()
+            entry = self._live_entry(shard, key, now)
+            if max_length is not None and (len(entry.value) if entry else 0) >= max_length:
+                return None
+            if entry is None:
+                entry = _Entry([], now, 0, sys.getsizeof([]))
+            else:
+                # Detach so _put accounts for the grown size
+                self._remove(shard, key)
+            entry.value.append(value)
+            entry.size += sys.getsizeof(value) + _LIST_SLOT_BYTES
+            entry.expires_at = now + ttl_seconds
+            entry.version = next(_version_counter)
+            self._put(shard, key, entry)
+            logger.debug(f"Appended to key {key} (length {len(entry.value)}) with TTL {ttl_seconds}s")
+            return len(entry.value)
+
+    def get_list(self, key: str) -> list[Union[str, bytes]]:
+        """Return a copy of the list stored at key (empty if missing or expired)"""
+        with self._locked(key) as shard:
+            entry = self._live_entry(shard, key, time.time())
+            if entry is None:
+                shard.misses += 1
+                return []
+            shard.hits += 1
+            self._touch(shard, key)
+            return list(entry.value)
+
+    def expire(self, key: str, ttl_seconds: int) -> bool:
+        """Redis-compatible expire: refresh the TTL of an existing key"""
+        with self._locked(key) as shard:
+            now = time.time()
+            entry = self._live_entry(shard, key, now)
+            if entry is None:
+                return False
+            entry.expires_at = now + ttl_seconds
+            heapq.heappush(shard.expirations, (entry.expires_at, key))
+            self._touch(shard, key)
+            return True
+
+    def get_version(self, key: str) -> Optional[int]:
+        """Return the version stamp of the last write to key, or None if missing or expired"""
+        with self._locked(key) as shard:
+            entry = self._live_entry(shard, key, time.time())
+            return entry.version if entry is not None else None
+
+    def clear(self) -> None:
+        """Remove all keys (statistics are kept)"""
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.expirations.clear()
+                shard.bytes = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return storage statistics aggregated over all shards
+
+        Returns:
+            dict with entries, bytes (approximate), hits, misses, hit_rate, evictions
+            (capacity-driven), expired, lock_contention (acquisitions that had to wait),
+            shards and the configured max_entries / max_bytes (0 means unbounded)
+        """
+        totals = {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        contention = 0
+        for shard in self._shards:
+            with shard.lock:
+                totals["entries"] += len(shard.entries)
+                totals["bytes"] += shard.bytes
+                totals["hits"] += shard.hits
+                totals["misses"] += shard.misses
+                totals["evictions"] += shard.evictions
+                totals["expired"] += shard.expired
+                contention += shard.contention
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            **totals,
+            "hit_rate": totals["hits"] / lookups if lookups else 0.0,
+            "lock_contention": contention,
+            "shards": len(self._shards),
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+        }
+
+    @contextmanager
+    def _locked(self, key: str) -> Iterator[_Shard]:
+        """Acquire the lock of the shard owning key, counting contended acquisitions"""
+        shard = self._shards[hash(_group_key(key)) % len(self._shards)]
+        contended = not shard.lock.acquire(blocking=False)
+        if contended:
+            shard.lock.acquire()
+        try:
+            if contended:
+                shard.contention += 1
+            yield shard
+        finally:
+            shard.lock.release()
+
+    def _live_entry(self, shard: _Shard, key: str, now: float) -> Optional[_Entry]:
+        """Return the unexpired entry for key, dropping it if it has expired (caller holds the lock)"""
+        entry = shard.entries.get(key)
+        if entry is None:
+            return None
+        if now >= entry.expires_at:
+            self._remove(shard, key)
+            shard.expired += 1
+            logger.debug(f"Key {key} expired and removed")
+            return None
+        return entry
+
+    def _put(self, shard: _Shard, key: str, entry: _Entry) -> None:
+        """Insert or replace key as most recently used, then enforce capacity (caller holds the lock)"""
+        previous = shard.entries.pop(key, None)
+        if previous is not None:
+            shard.bytes -= previous.size
+        shard.entries[key] = entry
+        shard.bytes += entry.size
+        self._touch(shard, key)
+        heapq.heappush(shard.expirations, (entry.expires_at, key))
+
+        # Evict least recently used keys together with their companions (so a thread never
+        # keeps its header without its turn log), but never the key just written or its group
+        group = _group_key(key)
+        while (self._shard_max_entries and len(shard.entries) > self._shard_max_entries) or (
+            self._shard_max_bytes and shard.bytes > self._shard_max_bytes
+        ):
+            victim = next((k for k in shard.entries if _group_key(k) != group), None)
+            if victim is None:
+                break
+            for evicted_key in _group_members(_group_key(victim)):
+                evicted = shard.entries.pop(evicted_key, None)
+                if evicted is not None:
+                    shard.bytes -= evicted.size
+                    shard.evictions += 1
+                    logger.debug(f"Evicted key {evicted_key} ({evicted.size} bytes) to stay within storage limits")
+
+        # Stale heap pairs are normally dropped as they expire; rebuild if they pile up
+        if len(shard.expirations) > 2 * len(shard.entries) + 64:
+            shard.expirations = [(e.expires_at, k) for k, e in shard.entries.items()]
+            heapq.heapify(shard.expirations)
+
+    def _touch(self, shard: _Shard, key: str) -> None:
+        """Mark key and its group as most recently used (caller holds the lock)"""
+        for member in _group_members(_group_key(key)):
+            if member in shard.entries:
+                shard.entries.move_to_end(member)
+
+    def _remove(self, shard: _Shard, key: str) -> None:
+        """Remove a key; its heap pair becomes stale (caller holds the lock)"""
+        entry = shard.entries.pop(key, None)
+        if entry is not None:
+            shard.bytes -= entry.size
+
+    def _cleanup_expired(self):
+        """Remove all expired entries, one shard at a time"""
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                now = time.time()
+                heap = shard.expirations
+                while heap and heap[0][0] <= now:
+                    expires_at, key = heapq.heappop(heap)
+                    entry = shard.entries.get(key)
+                    # Skip pairs left behind by TTL refreshes, rewrites and removals
+                    if entry is not None and entry.expires_at == expires_at:
+                        self._remove(shard, key)
+                        shard.expired += 1
+                        removed += 1
+
+        if removed:
+            logger.debug(f"Cleaned up {removed} expired conversation threads")
+
+
 # Global singleton instance
 _storage_instance = None
 _storage_lock = threading.Lock()
 
 
-def get_storage_backend() -> InMemoryStorage:
+def create_storage_backend() -> StorageBackend:
+    """Create the storage backend selected by CONVERSATION_STORAGE_BACKEND ("memory" or "sqlite")"""
+    backend = os.getenv("CONVERSATION_STORAGE_BACKEND", "memory").strip().lower() or "memory"
+    if backend == "sqlite":
+        from .sqlite_storage import SQLiteStorage
+
+        return SQLiteStorage()
+    if backend != "memory":
+        logger.warning(f"Unknown CONVERSATION_STORAGE_BACKEND '{backend}', using in-memory storage")
+    return InMemoryStorage()
+
+
+def get_storage_backend() -> StorageBackend:
     """Get the global storage instance (singleton pattern)"""
     global _storage_instance
     if _storage_instance is None:
         with _storage_lock:
             if _storage_instance is None:
-                _storage_instance = InMemoryStorage()
-                logger.info("Initialized in-memory conversation storage")
+                _storage_instance = create_storage_backend()
+                logger.info(f"Initialized {type(_storage_instance).__name__} conversation storage")
     return _storage_instance
@@ -0,0 +1,256 @@
+"""
+Adaptive calibration of token estimates from provider usage reports
+
+Token budgets are planned with fixed characters-per-token ratios
+(utils.token_utils.estimate_tokens and the per-extension ratios in
+utils.file_types). Providers report the real prompt size in
+ModelResponse.usage["input_tokens"], so every request is a free measurement
+of how far off those ratios are for a given model.
+
+After each model call the prompt is split into embedded files (the
+"--- BEGIN FILE: ... ---" blocks produced by read_file_content, categorised
+with get_file_category) and the remaining prompt text. Each part's static
+estimate is compared with the reported input tokens, and a correction factor
+per (model, category) is updated multiplicatively in proportion to the part's
+share of the estimate, i.e. a rolling, log-space moving average. Factors are
+only applied once they are backed by CALIBRATION_MIN_SAMPLES observations and
+are clamped to [MIN_FACTOR, MAX_FACTOR].
+
+Factors are persisted as JSON (TOKEN_CALIBRATION_PATH, default
+data/token_calibration.json; empty keeps them in memory only) so budgets stay
+calibrated across restarts. TOKEN_CALIBRATION=false disables the subsystem.
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .file_types import get_file_category, get_token_estimation_ratio
+
+logger = logging.getLogger(__name__)
+
+# Category used for prompt text outside embedded files
+PROMPT_CATEGORY = "prompt"
+# Characters per token assumed for prompt text (matches estimate_tokens)
+PROMPT_CHARS_PER_TOKEN = 4.0
+
+CALIBRATION_MIN_SAMPLES = 3
+# Weight of a new observation in the moving average
+CALIBRATION_ALPHA = 0.2
+# Prompts estimated below this are dominated by message framing overhead and are not used
+MIN_OBSERVED_TOKENS = 200
+MIN_FACTOR = 0.25
+MAX_FACTOR = 4.0
+SAVE_INTERVAL_SECONDS = 30.0
+
+_FILE_BLOCK = re.compile(r"^--- BEGIN FILE: (.+?) ---\n(.*?)^--- END FILE: \1 ---$", re.MULTILINE | re.DOTALL)
+
+
+def split_prompt_by_category(text: str) -> dict[str, float]:
+    """
+    Estimate the tokens in text per category using the static ratios.
+
+    Returns:
+        Mapping of category to estimated tokens; embedded files are estimated with
+        their extension's ratio, everything else counts as PROMPT_CATEGORY
+    """
+    estimates: dict[str, float] = {}
+    file_chars = 0
+    for match in _FILE_BLOCK.finditer(text):
+        path, content = match.group(1), match.group(2)
+        category = get_file_category(path)
+        estimates[category] = estimates.get(category, 0.0) + len(content) / get_token_estimation_ratio(path)
+        file_chars += len(content)
+    prompt_chars = len(text) - file_chars
+    if prompt_chars > 0:
+        estimates[PROMPT_CATEGORY] = estimates.get(PROMPT_CATEGORY, 0.0) + prompt_chars / PROMPT_CHARS_PER_TOKEN
+    return estimates
+
+
+class TokenCalibrator:
+    """Rolling per-model, per-category correction factors for token estimates
+
+    Args:
+        path: JSON file the factors are loaded from and saved to (None keeps them in memory)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        # model -> category -> {"factor": float, "samples": float}; samples are weighted by prompt share
+        self._factors: dict[str, dict[str, dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._observations = 0
+        if path:
+            self._load()
+
+    def correction_factor(self, model_name: str, category: str) -> Optional[float]:
+        """Return the calibrated factor for (model, category), or None while uncalibrated"""
+        with self._lock:
+            entry = self._factors.get(model_name, {}).get(category)
+            if entry is None or entry["samples"] < CALIBRATION_MIN_SAMPLES:
+                return None
+            return entry["factor"]
+
+    def calibrate(self, model_name: Optional[str], category: str, estimated_tokens: float) -> float:
+        """Apply the (model, category) correction to a static estimate (unchanged while uncalibrated)"""
+        if not model_name:
+            return estimated_tokens
+        factor = self.correction_factor(model_name, category)
+        return estimated_tokens * factor if factor is not None else estimated_tokens
+
+    def record(self, model_name: str, estimates: dict[str, float], actual_tokens: int) -> None:
+        """
+        Update factors from one request.
+
+        Args:
+            model_name: Model that served the request
+            estimates: Static token estimate per category (see split_prompt_by_category)
+            actual_tokens: Prompt tokens reported by the provider
+        """
+        total_estimate = sum(estimates.values())
+        if total_estimate < MIN_OBSERVED_TOKENS or actual_tokens <= 0:
+            return
+
+        with self._lock:
+            model_factors = self._factors.setdefault(model_name, {})
+            corrected = {
+                category: estimate * model_factors.get(category, {}).get("factor", 1.0)
+                for category, estimate in estimates.items()
+            }
+            predicted = sum(corrected.values())
+            log_error = math.log(actual_tokens / predicted)
+            for category, value in corrected.items():
+                share = value / predicted
+                entry = model_factors.setdefault(category, {"factor": 1.0, "samples": 0})
+                # Categories that were a tiny part of the prompt learn (and count) proportionally less
+                factor = entry["factor"] * math.exp(CALIBRATION_ALPHA * share * log_error)
+                entry["factor"] = min(MAX_FACTOR, max(MIN_FACTOR, factor))
+                entry["samples"] += share
+            self._dirty = True
+            self._observations += 1
+            should_save = self.path and time.monotonic() - self._last_save >= SAVE_INTERVAL_SECONDS
+
+        if should_save:
+            self.save()
+
+    def save(self) -> None:
+        """Write the factors to disk atomically if they changed since the last save"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": 1, "models": self._snapshot()}
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token_calibration.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save token calibration to {self.path}: {e}")
+
+    def reset(self) -> None:
+        """Forget all factors (the file on disk is left untouched until the next save)"""
+        with self._lock:
+            self._factors.clear()
+            self._observations = 0
+            self._dirty = False
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return observations and the current factors per model and category"""
+        with self._lock:
+            return {"observations": self._observations, "models": self._snapshot()}
+
+    def _snapshot(self) -> dict[str, dict[str, dict[str, float]]]:
+        return {
+            model: {category: dict(entry) for category, entry in categories.items()}
+            for model, categories in self._factors.items()
+        }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            models = data.get("models", {})
+            for model, categories in models.items():
+                for category, entry in categories.items():
+                    factor = min(MAX_FACTOR, max(MIN_FACTOR, float(entry["factor"])))
+                    self._factors.setdefault(model, {})[category] = {
+                        "factor": factor,
+                        "samples": float(entry["samples"]),
+                    }
+            logger.debug(f"Loaded token calibration for {len(self._factors)} models from {self.path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable token calibration file {self.path}: {e}")
+            self._factors.clear()
+
+
+_calibrator_instance: Optional[TokenCalibrator] = None
+_calibrator_lock = threading.Lock()
+
+
+def get_token_calibrator() -> Optional[TokenCalibrator]:
+    """Get the process-wide calibrator, or None when TOKEN_CALIBRATION is disabled"""
+    global _calibrator_instance
+    if os.getenv("TOKEN_CALIBRATION", "true").lower() not in ("true", "1", "yes"):
+        return None
+    if _calibrator_instance is None:
+        with _calibrator_lock:
+            if _calibrator_instance is None:
+                default_path = Path(__file__).parent.parent / "data" / "token_calibration.json"
+                path = os.getenv("TOKEN_CALIBRATION_PATH", str(default_path))
+                _calibrator_instance = TokenCalibrator(path or None)
+                atexit.register(_calibrator_instance.save)
+    return _calibrator_instance
+
+
+def calibrate_estimate(model_name: Optional[str], category: str, estimated_tokens: float) -> float:
+    """Apply the learned correction for (model, category) to a static estimate"""
+    calibrator = get_token_calibrator()
+    if calibrator is None:
+        return estimated_tokens
+    return calibrator.calibrate(model_name, category, estimated_tokens)
+
+
+def record_prompt_usage(
+    model_name: Optional[str], prompt: str, system_prompt: Optional[str], usage: Optional[dict]
+) -> None:
+    """
+    Feed one model call into the calibrator.
+
+    Call only for text-only requests: image tokens are counted in the reported
+    input tokens but cannot be attributed to any text category.
+
+    Args:
+        model_name: Model that served the request
+        prompt: Prompt that was sent
+        system_prompt: System prompt that was sent (if any)
+        usage: ModelResponse.usage as reported by the provider
+    """
+    calibrator = get_token_calibrator()
+    if calibrator is None or not model_name or not isinstance(usage, dict):
+        return
+    actual_tokens = usage.get("input_tokens")
+    if not isinstance(actual_tokens, int) or isinstance(actual_tokens, bool):
+        return
+    try:
+        estimates = split_prompt_by_category(f"{system_prompt}\n\n{prompt}" if system_prompt else prompt)
+        calibrator.record(model_name, estimates, actual_tokens)
+    except Exception as e:
+        logger.debug(f"Token calibration skipped: {e}")
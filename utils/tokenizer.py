@@ -0,0 +1,236 @@
+"""
+Tokenizer-based token counting service
+
+Counts tokens with the model's real BPE encoding (via the optional tiktoken
+package) instead of a characters-per-token heuristic, so context windows can
+be used fully rather than leaving headroom for estimation error.
+
+- Encoders are loaded once per encoding (model family) and reused
+- Model names resolve to an encoding once and the result is cached
+- Counts are memoized by content hash (TOKEN_COUNT_CACHE_SIZE entries, LRU)
+- Large texts are split on line boundaries and encoded as a batch; tiktoken
+  encodes batches on several threads outside the GIL
+
+OpenAI model families (gpt-3.5/4/4o/4.1/5, o-series) are counted exactly.
+Other families (Gemini, Grok, Claude via OpenRouter, local models, ...) have
+no public tokenizer here and are approximated with the o200k_base encoding.
+Without tiktoken every count falls back to the ~4 characters per token
+heuristic of utils.token_utils.estimate_tokens.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+from .token_utils import estimate_tokens
+
+try:
+    import tiktoken
+
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+logger = logging.getLogger(__name__)
+
+# Encoding used to approximate model families without a published BPE tokenizer
+APPROXIMATE_ENCODING = "o200k_base"
+
+# Prefix -> encoding for OpenAI families tiktoken may not know yet (checked in order)
+_OPENAI_FAMILIES = (
+    (("gpt-4o", "chatgpt-4o", "gpt-4.1", "gpt-4.5", "gpt-5", "o1", "o3", "o4"), "o200k_base"),
+    (("gpt-4", "gpt-3.5", "text-embedding"), "cl100k_base"),
+)
+
+# Texts shorter than this are counted directly; hashing them is not worth a cache slot
+MIN_MEMOIZED_CHARS = 256
+# Texts longer than this are split into chunks of about CHUNK_CHARS and batch-encoded
+PARALLEL_THRESHOLD_CHARS = 256 * 1024
+CHUNK_CHARS = 64 * 1024
+
+
+class _Encoding(NamedTuple):
+    name: str
+    exact: bool
+
+
+def _split_on_lines(text: str, chunk_chars: int) -> list[str]:
+    """Split text into chunks of roughly chunk_chars, cutting only after newlines"""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_chars
+        if end >= len(text):
+            chunks.append(text[start:])
+            break
+        cut = text.rfind("\n", start, end)
+        end = cut + 1 if cut > start else end
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+class TokenizerService:
+    """Counts tokens per model with cached encoders and memoized results
+
+    Args:
+        cache_size: Maximum number of memoized counts (0 disables memoization)
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._encoders: dict[str, Any] = {}
+        self._model_encodings: dict[str, _Encoding] = {}
+        self._counts: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._fallbacks = 0
+
+    def count_tokens(self, text: str, model_name: Optional[str] = None) -> int:
+        """
+        Count tokens in text for model_name.
+
+        Args:
+            text: Text to count
+            model_name: Model whose tokenizer to use (None approximates with the default encoding)
+
+        Returns:
+            Token count (exact for OpenAI families, approximate otherwise)
+        """
+        if not text:
+            return 0
+        encoding = self._resolve_encoding(model_name)
+        encoder = self._get_encoder(encoding.name)
+        if encoder is None:
+            with self._lock:
+                self._fallbacks += 1
+            return estimate_tokens(text)
+
+        if self.cache_size <= 0 or len(text) < MIN_MEMOIZED_CHARS:
+            return self._encode_count(encoder, text)
+
+        key = (encoding.name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                self._hits += 1
+                return count
+            self._misses += 1
+
+        count = self._encode_count(encoder, text)
+        with self._lock:
+            self._counts[key] = count
+            while len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return count
+
+    def has_exact_tokenizer(self, model_name: Optional[str]) -> bool:
+        """Whether counts for model_name come from the model's own tokenizer"""
+        encoding = self._resolve_encoding(model_name)
+        return encoding.exact and self._get_encoder(encoding.name) is not None
+
+    def clear(self) -> None:
+        """Drop memoized counts (loaded encoders and statistics are kept)"""
+        with self._lock:
+            self._counts.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return tiktoken availability, loaded encoders, cache entries, hits, misses, hit_rate and fallbacks"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "tiktoken": HAS_TIKTOKEN,
+                "encoders": sorted(name for name, encoder in self._encoders.items() if encoder is not None),
+                "entries": len(self._counts),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "fallbacks": self._fallbacks,
+            }
+
+    def _resolve_encoding(self, model_name: Optional[str]) -> _Encoding:
+        if not model_name:
+            return _Encoding(APPROXIMATE_ENCODING, False)
+        cached = self._model_encodings.get(model_name)
+        if cached is not None:
+            return cached
+
+        # OpenRouter-style names ("openai/gpt-4o") carry the vendor as a prefix
+        vendor, _, name = model_name.lower().rpartition("/")
+        encoding = None
+        if vendor in ("", "openai", "azure"):
+            if HAS_TIKTOKEN:
+                try:
+                    encoding = _Encoding(tiktoken.encoding_name_for_model(name), True)
+                except (KeyError, AttributeError):
+                    pass
+            if encoding is None:
+                for prefixes, encoding_name in _OPENAI_FAMILIES:
+                    if name.startswith(prefixes):
+                        encoding = _Encoding(encoding_name, True)
+                        break
+        if encoding is None:
+            encoding = _Encoding(APPROXIMATE_ENCODING, False)
+
+        with self._lock:
+            self._model_encodings[model_name] = encoding
+        return encoding
+
+    def _get_encoder(self, encoding_name: str) -> Optional[Any]:
+        """Load (once) and return the encoder for encoding_name, or None if unavailable"""
+        try:
+            return self._encoders[encoding_name]
+        except KeyError:
+            pass
+        with self._lock:
+            if encoding_name not in self._encoders:
+                self._encoders[encoding_name] = _load_encoding(encoding_name)
+            return self._encoders[encoding_name]
+
+    @staticmethod
+    def _encode_count(encoder: Any, text: str) -> int:
+        # encode_ordinary: special-token markers in user content are plain text, not errors
+        if len(text) <= PARALLEL_THRESHOLD_CHARS:
+            return len(encoder.encode_ordinary(text))
+        chunks = _split_on_lines(text, CHUNK_CHARS)
+        return sum(len(tokens) for tokens in encoder.encode_ordinary_batch(chunks))
+
+
+def _load_encoding(encoding_name: str) -> Optional[Any]:
+    if not HAS_TIKTOKEN:
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # Encodings are downloaded on first use; offline hosts fall back to estimation
+        logger.warning(f"Could not load tokenizer '{encoding_name}', using character-based estimation: {e}")
+        return None
+
+
+_service_instance: Optional[TokenizerService] = None
+_service_lock = threading.Lock()
+
+
+def get_tokenizer_service() -> TokenizerService:
+    """Get the process-wide tokenizer service (configured by TOKEN_COUNT_CACHE_SIZE)"""
+    global _service_instance
+    if _service_instance is None:
+        with _service_lock:
+            if _service_instance is None:
+                try:
+                    cache_size = max(0, int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096")))
+                except ValueError:
+                    logger.warning("Invalid TOKEN_COUNT_CACHE_SIZE value, using default of 4096")
+                    cache_size = 4096
+                _service_instance = TokenizerService(cache_size)
+    return _service_instance
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Count tokens in text with model_name's tokenizer (see TokenizerService.count_tokens)"""
+    return get_tokenizer_service().count_tokens(text, model_name)